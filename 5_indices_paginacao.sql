@@ -0,0 +1,102 @@
+-- 5_indices_paginacao.sql
+-- Índices de suporte à paginação keyset (TenantScopedManager.fetch_page) das listagens
+-- get_all_*. Cada índice segue exatamente a ordenação declarada em sort_keys no manager
+-- (tenant_id primeiro, depois as chaves de ordenação e a PK como desempate), para que o
+-- seek "depois do cursor" + ORDER BY ... LIMIT vire um range scan no índice, sem filesort.
+--
+-- Se a ordenação de alguma listagem mudar no manager, o índice correspondente aqui precisa
+-- mudar junto (e os tokens de página antigos são descartados automaticamente).
+--
+-- Exceção: medições, avanços físicos, REIDIs, seguros, salários, férias, dependentes, ASOs e
+-- participantes ordenam pela coluna exibida da tabela do JOIN (número/nome da obra, cargo/nível,
+-- nome do funcionário, início do agendamento), que nenhum índice da tabela filha cobre. Nessas o
+-- ORDER BY ... LIMIT é um filesort sobre as linhas do tenant já filtradas; os índices abaixo
+-- servem ao filtro (tenant_id, FK) e ao desempate.
+--
+-- Aplicar manualmente, com backup prévio, DEPOIS do 4_indices_performance.sql.
+-- Rollback: ver bloco DROP INDEX no final do arquivo.
+
+-- Obras
+CREATE INDEX idx_obras_tenant_nome_id
+    ON obras (tenant_id, Nome_Obra, ID_Obras);
+
+CREATE INDEX idx_clientes_tenant_nome_id
+    ON clientes (tenant_id, Nome_Cliente, ID_Clientes);
+
+CREATE INDEX idx_contratos_tenant_numero_id
+    ON contratos (tenant_id, Numero_Contrato, ID_Contratos);
+
+CREATE INDEX idx_arts_tenant_numero_id
+    ON arts (tenant_id, Numero_Art, ID_Arts);
+
+CREATE INDEX idx_medicoes_tenant_obra_numero_id
+    ON medicoes (tenant_id, ID_Obras, Numero_Medicao, ID_Medicoes);
+
+-- avancos_fisicos: (tenant_id, ID_Obras, Data_Avanco DESC) já existe no script 4;
+-- esta versão acrescenta a PK para o desempate do cursor.
+CREATE INDEX idx_avancos_fisicos_tenant_obra_data_id
+    ON avancos_fisicos (tenant_id, ID_Obras, Data_Avanco DESC, ID_Avancos_Fisicos DESC);
+
+CREATE INDEX idx_reidis_tenant_obra_portaria_id
+    ON reidis (tenant_id, ID_Obras, Numero_Portaria, ID_Reidis);
+
+CREATE INDEX idx_seguros_tenant_obra_apolice_id
+    ON seguros (tenant_id, ID_Obras, Numero_Apolice, ID_Seguros);
+
+-- Pessoal
+CREATE INDEX idx_funcionarios_tenant_nome_matricula
+    ON funcionarios (tenant_id, Nome_Completo, Matricula);
+
+CREATE INDEX idx_cargos_tenant_nome_id
+    ON cargos (tenant_id, Nome_Cargo, ID_Cargos);
+
+CREATE INDEX idx_niveis_tenant_nome_id
+    ON niveis (tenant_id, Nome_Nivel, ID_Niveis);
+
+CREATE INDEX idx_salarios_tenant_cargo_nivel_vigencia_id
+    ON salarios (tenant_id, ID_Cargos, ID_Niveis, Data_Vigencia DESC, ID_Salarios);
+
+CREATE INDEX idx_ferias_tenant_aquisitivo_id
+    ON ferias (tenant_id, Periodo_Aquisitivo_Inicio DESC, ID_Ferias DESC);
+
+CREATE INDEX idx_dependentes_tenant_matricula_nome_id
+    ON dependentes (tenant_id, Matricula_Funcionario, Nome_Completo, ID_Dependente);
+
+-- Segurança
+CREATE INDEX idx_incidentes_acidentes_tenant_ocorrencia_id
+    ON incidentes_acidentes (tenant_id, Data_Hora_Ocorrencia DESC, ID_Incidente_Acidente DESC);
+
+CREATE INDEX idx_asos_tenant_emissao_id
+    ON asos (tenant_id, Data_Emissao DESC, ID_ASO DESC);
+
+CREATE INDEX idx_treinamentos_tenant_nome_id
+    ON treinamentos (tenant_id, Nome_Treinamento, ID_Treinamento);
+
+CREATE INDEX idx_treinamentos_agendamentos_tenant_inicio_id
+    ON treinamentos_agendamentos (tenant_id, Data_Hora_Inicio DESC, ID_Agendamento DESC);
+
+CREATE INDEX idx_treinamentos_participantes_tenant_agendamento_id
+    ON treinamentos_participantes (tenant_id, ID_Agendamento DESC, ID_Participante);
+
+-- ----------------------------------------------------------------------------------------
+-- Rollback (executar em caso de regressão de escrita ou problema inesperado):
+-- ----------------------------------------------------------------------------------------
+-- DROP INDEX idx_obras_tenant_nome_id ON obras;
+-- DROP INDEX idx_clientes_tenant_nome_id ON clientes;
+-- DROP INDEX idx_contratos_tenant_numero_id ON contratos;
+-- DROP INDEX idx_arts_tenant_numero_id ON arts;
+-- DROP INDEX idx_medicoes_tenant_obra_numero_id ON medicoes;
+-- DROP INDEX idx_avancos_fisicos_tenant_obra_data_id ON avancos_fisicos;
+-- DROP INDEX idx_reidis_tenant_obra_portaria_id ON reidis;
+-- DROP INDEX idx_seguros_tenant_obra_apolice_id ON seguros;
+-- DROP INDEX idx_funcionarios_tenant_nome_matricula ON funcionarios;
+-- DROP INDEX idx_cargos_tenant_nome_id ON cargos;
+-- DROP INDEX idx_niveis_tenant_nome_id ON niveis;
+-- DROP INDEX idx_salarios_tenant_cargo_nivel_vigencia_id ON salarios;
+-- DROP INDEX idx_ferias_tenant_aquisitivo_id ON ferias;
+-- DROP INDEX idx_dependentes_tenant_matricula_nome_id ON dependentes;
+-- DROP INDEX idx_incidentes_acidentes_tenant_ocorrencia_id ON incidentes_acidentes;
+-- DROP INDEX idx_asos_tenant_emissao_id ON asos;
+-- DROP INDEX idx_treinamentos_tenant_nome_id ON treinamentos;
+-- DROP INDEX idx_treinamentos_agendamentos_tenant_inicio_id ON treinamentos_agendamentos;
+-- DROP INDEX idx_treinamentos_participantes_tenant_agendamento_id ON treinamentos_participantes;
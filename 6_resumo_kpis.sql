@@ -0,0 +1,40 @@
+-- 6_resumo_kpis.sql
+-- Modelo de leitura dos KPIs de dashboard (database/kpi_summary.py): contadores e somas por
+-- tenant, mantidos pelos managers na MESMA transação das escritas em obras, contratos,
+-- medições, avanços físicos, funcionários e incidentes/acidentes. Os dashboards leem daqui
+-- (uma consulta pela PK) em vez de agregar o histórico inteiro do tenant.
+--
+-- Uma linha por (tenant, métrica, chave). Chave = dimensão da métrica (status, ID de cargo,
+-- 'AAAA-MM'...), '' quando a métrica não tem dimensão.
+--   obras_status            Quantidade = obras por Status_Obra
+--   obras_avanco_andamento  Quantidade/Valor = obras 'Em Andamento' com avanço / soma do último percentual
+--   contratos_ativos        Quantidade/Valor = contratos 'Ativo' / soma de Valor_Contrato
+--   medicoes_realizadas     Quantidade/Valor = medições 'Paga'/'Aprovada' / soma de Valor_Medicao
+--   funcionarios_status     funcionários por Status
+--   funcionarios_cargo      funcionários por ID_Cargos
+--   funcionarios_nivel      funcionários por ID_Niveis
+--   incidentes_tipo         incidentes/acidentes por Tipo_Registro
+--   incidentes_status       incidentes/acidentes por Status_Registro
+--   incidentes_mes          incidentes/acidentes por mês da ocorrência ('AAAA-MM')
+--   _construido             marcador: o resumo do tenant já foi montado pela reconstrução
+--
+-- Aplicar manualmente, com backup prévio, DEPOIS do 5_indices_paginacao.sql. Em seguida
+-- montar os resumos dos tenants existentes:
+--     flask --app app kpi-rebuild
+-- (tenant sem o marcador tem os KPIs agregados direto das tabelas até o comando rodar; a leitura
+-- não monta o resumo).
+-- O mesmo comando corrige divergências (escritas feitas fora dos managers, scripts SQL).
+-- Rollback: ver bloco DROP TABLE no final do arquivo (reverter junto o código dos managers).
+
+CREATE TABLE tenant_kpi_summary (
+    tenant_id INT NOT NULL,
+    Metrica VARCHAR(50) NOT NULL,
+    Chave VARCHAR(100) NOT NULL DEFAULT '',
+    Quantidade BIGINT NOT NULL DEFAULT 0,
+    Valor DECIMAL(20,4) NOT NULL DEFAULT 0,
+    Data_Modificacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (tenant_id, Metrica, Chave)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Rollback
+-- DROP TABLE tenant_kpi_summary;
@@ -0,0 +1,44 @@
+-- 7_avanco_obra.sql
+-- Último avanço físico e avanço acumulado denormalizados na obra. Mantidos pelo ObrasManager na
+-- MESMA transação das escritas em avancos_fisicos (add/update/delete_avanco_fisico), e lidos
+-- direto pelo relatório de andamento, pelo resumo de KPIs (database/kpi_summary.py) e pelo
+-- endpoint /obras/get_acumulado_obra — sem subconsultas por obra nem SUM do histórico.
+--   Ultimo_Avanco_Percentual  percentual do último avanço (Data_Avanco, Data_Criacao, ID mais recentes)
+--   Ultima_Data_Avanco        Data_Avanco desse avanço
+--   Avanco_Acumulado          soma de todos os percentuais lançados para a obra
+--
+-- Aplicar manualmente, com backup prévio, DEPOIS do 6_resumo_kpis.sql e ANTES de publicar o
+-- código que lê as colunas. O UPDATE abaixo preenche as obras existentes; rodar de novo corrige
+-- divergências de avanços gravados fora dos managers.
+-- Rollback: ver bloco DROP COLUMN no final do arquivo (reverter junto o código dos managers).
+
+ALTER TABLE obras
+    ADD COLUMN Ultimo_Avanco_Percentual DECIMAL(5,2) DEFAULT NULL,
+    ADD COLUMN Ultima_Data_Avanco DATE DEFAULT NULL,
+    ADD COLUMN Avanco_Acumulado DECIMAL(9,2) NOT NULL DEFAULT 0.00;
+
+UPDATE obras o
+LEFT JOIN (
+    SELECT tenant_id, ID_Obras, SUM(Percentual_Avanco_Fisico) AS Acumulado
+    FROM avancos_fisicos
+    GROUP BY tenant_id, ID_Obras
+) s ON s.tenant_id = o.tenant_id AND s.ID_Obras = o.ID_Obras
+SET
+    o.Avanco_Acumulado = COALESCE(s.Acumulado, 0),
+    o.Ultimo_Avanco_Percentual = (
+        SELECT af.Percentual_Avanco_Fisico FROM avancos_fisicos af
+        WHERE af.tenant_id = o.tenant_id AND af.ID_Obras = o.ID_Obras
+        ORDER BY af.Data_Avanco DESC, af.Data_Criacao DESC, af.ID_Avancos_Fisicos DESC
+        LIMIT 1),
+    o.Ultima_Data_Avanco = (
+        SELECT af.Data_Avanco FROM avancos_fisicos af
+        WHERE af.tenant_id = o.tenant_id AND af.ID_Obras = o.ID_Obras
+        ORDER BY af.Data_Avanco DESC, af.Data_Criacao DESC, af.ID_Avancos_Fisicos DESC
+        LIMIT 1),
+    o.Data_Modificacao = o.Data_Modificacao;
+
+-- Rollback
+-- ALTER TABLE obras
+--     DROP COLUMN Ultimo_Avanco_Percentual,
+--     DROP COLUMN Ultima_Data_Avanco,
+--     DROP COLUMN Avanco_Acumulado;
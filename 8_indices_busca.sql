@@ -0,0 +1,50 @@
+-- 8_indices_busca.sql
+-- Índices FULLTEXT com parser ngram para os filtros de busca textual das listagens
+-- (database/busca.py, usado pelos parâmetros search_* dos managers). Substituem o
+-- LIKE '%termo%', que não usa índice nenhum e varre todas as linhas do tenant.
+--
+-- Cada coluna buscada tem o seu índice (MATCH precisa casar exatamente com a lista de colunas
+-- do índice). Se uma coluna entrar ou sair daqui, COLUNAS_INDEXADAS em database/busca.py
+-- precisa mudar junto — coluna sem índice cai no LIKE.
+--
+-- Requisitos do servidor MySQL:
+--   ngram_token_size = 2 (padrão; se mudar, ajustar BUSCA_NGRAM_TOKEN_SIZE na aplicação).
+--   A lista de stopwords padrão do InnoDB é em inglês e, no ngram, descarta todo pedaço que
+--   contenha uma stopword ("a", "de", "com"...), o que apagaria boa parte dos nomes em
+--   português. Por isso os índices são criados com as stopwords desligadas nesta sessão.
+--
+-- Acentos e maiúsculas: as colunas usam utf8mb4_0900_ai_ci, então o índice compara sem
+-- acento e sem caixa ("jose" encontra "José").
+--
+-- Aplicar manualmente, com backup prévio, DEPOIS do 7_avanco_obra.sql. Cada CREATE reconstrói
+-- a tabela (ALGORITHM=INPLACE, mas o primeiro FULLTEXT de uma tabela cria o FTS_DOC_ID):
+-- rodar fora do horário de uso.
+-- Rollback: ver bloco DROP INDEX no final do arquivo.
+
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+-- Obras
+CREATE FULLTEXT INDEX ft_obras_numero ON obras (Numero_Obra) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_obras_nome ON obras (Nome_Obra) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_clientes_nome ON clientes (Nome_Cliente) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_contratos_numero ON contratos (Numero_Contrato) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_arts_numero ON arts (Numero_Art) WITH PARSER ngram;
+
+-- Pessoal
+CREATE FULLTEXT INDEX ft_funcionarios_nome ON funcionarios (Nome_Completo) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_dependentes_nome ON dependentes (Nome_Completo) WITH PARSER ngram;
+
+-- Segurança
+CREATE FULLTEXT INDEX ft_treinamentos_nome ON treinamentos (Nome_Treinamento) WITH PARSER ngram;
+
+SET SESSION innodb_ft_enable_stopword = ON;
+
+-- Rollback
+-- DROP INDEX ft_obras_numero ON obras;
+-- DROP INDEX ft_obras_nome ON obras;
+-- DROP INDEX ft_clientes_nome ON clientes;
+-- DROP INDEX ft_contratos_numero ON contratos;
+-- DROP INDEX ft_arts_numero ON arts;
+-- DROP INDEX ft_funcionarios_nome ON funcionarios;
+-- DROP INDEX ft_dependentes_nome ON dependentes;
+-- DROP INDEX ft_treinamentos_nome ON treinamentos;
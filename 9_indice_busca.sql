@@ -0,0 +1,38 @@
+-- 9_indice_busca.sql
+-- Índice unificado da busca global /search (database/indice_busca.py): um documento por
+-- registro pesquisável (obras, clientes, contratos, ARTs, funcionários, incidentes/acidentes e
+-- treinamentos), regravado pelos managers na MESMA transação da escrita do registro. O índice
+-- FULLTEXT ngram sobre Texto é o índice invertido; Modulo filtra pelas permissões do usuário.
+--
+-- A PK começa por tenant_id, então os documentos de um tenant ficam juntos no índice
+-- clusterizado. O InnoDB não aceita FULLTEXT em tabela particionada: o isolamento por tenant é
+-- o filtro tenant_id = %s, sempre presente nas consultas.
+--
+-- Mesmos requisitos do 8_indices_busca.sql (ngram_token_size = 2, stopwords desligadas na
+-- criação do índice; collation utf8mb4_0900_ai_ci = busca sem acento e sem caixa).
+--
+-- Aplicar manualmente, com backup prévio, DEPOIS do 8_indices_busca.sql. Em seguida montar os
+-- índices dos tenants existentes:
+--     flask --app app search-rebuild
+-- (tenant sem índice recebe resultados vazios até o comando rodar; a busca não monta o índice).
+-- Rollback: ver bloco DROP TABLE no final do arquivo (reverter junto o código dos managers).
+
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+CREATE TABLE busca_documentos (
+    tenant_id INT NOT NULL,
+    Entidade VARCHAR(30) NOT NULL,
+    Chave VARCHAR(50) NOT NULL,
+    Modulo VARCHAR(50) NOT NULL,
+    Titulo VARCHAR(300) NOT NULL DEFAULT '',
+    Subtitulo VARCHAR(300) DEFAULT NULL,
+    Texto TEXT NOT NULL,
+    Data_Modificacao DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (tenant_id, Entidade, Chave),
+    FULLTEXT KEY ft_busca_documentos_texto (Texto) WITH PARSER ngram
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+SET SESSION innodb_ft_enable_stopword = ON;
+
+-- Rollback
+-- DROP TABLE busca_documentos;
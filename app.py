@@ -13,6 +13,8 @@
 # ===============================================================
 
 # Necessária para carregar credenciais e senhas do .env
+import hmac
+import logging
 import os
 from dotenv import load_dotenv # Idem
 
@@ -21,11 +23,12 @@ from dotenv import load_dotenv # Idem
 # que nunca executa o bloco `if __name__ == '__main__':`)
 load_dotenv()
 
-from flask import Flask, render_template, redirect, url_for, request, flash, session, get_flashed_messages, jsonify # Adicionado jsonify
+from flask import Flask, render_template, redirect, url_for, request, flash, session, get_flashed_messages, jsonify, current_app # Adicionado jsonify
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 import mysql.connector              # Para a classe Error do MySQL
 from datetime import datetime, date # Garante que datetime e date estejam disponíveis
 from flask_wtf.csrf import CSRFProtect
+import click
 
 # Para a adição da opção exportar para Excel no módulo Pessoal
 from flask import send_file # Adicione este import no topo do seu app.py
@@ -33,14 +36,16 @@ import pandas as pd         # Adicione este import no topo do seu app.py
 from io import BytesIO      # Adicione este import no topo do seu app.py
 
 # Importações dos managers de banco de dados
-from database.db_base import DatabaseManager, init_pool
+from database.db_base import DatabaseManager, init_pool, release_request_connection
 from database.cache_ext import cache
-from database.db_user_manager import UserManager
-from database.db_tenant_manager import TenantManager
+from database.db_user_manager import UserManager, load_principal
+from database.db_tenant_manager import TenantManager, resolve_tenant
+from database import benchmark, dados_sinteticos, detector_consultas, indice_busca, kpi_summary, metricas, perfilador, rastreamento
 # from database.db_hr_manager import HrManager # Para o módulo de RH/DP (mantido para estrutura) <<< ver se ainda precisa! Pode apagar!!!
 from database.db_obras_manager import ObrasManager # Para o módulo Obras
 from database.db_seguranca_manager import SegurancaManager # Para o módulo Segurança
 from database.db_pessoal_manager import PessoalManager
+from database.warmup import readiness, warm_up # Aquecimento do worker e readiness
 
 # Imaportações para Blueprint
 from modulos.users_bp import users_bp
@@ -48,14 +53,16 @@ from modulos.pessoal_bp import pessoal_bp
 from modulos.obras_bp import obras_bp
 from modulos.seguranca_bp import seguranca_bp
 
+logger = logging.getLogger(__name__)
+
 # ===============================================================
 # 0.2 CONFIGURAÇÃO DA APLICAÇÃO
 # ===============================================================
-app = Flask(__name__)
-csrf = CSRFProtect(app)
-
-# **IMPORTANTE: A CHAVE SECRETA É LIDA DE VARIÁVEL DE AMBIENTE**
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback_secret_key_dev_only')
+# O app é montado por create_app() (application factory). Recursos que abrem sockets ou
+# guardam estado por processo — pool MySQL e backend do cache — ficam em init_worker(),
+# que roda de novo em cada worker do gunicorn pelo hook post_fork (gunicorn.conf.py).
+# Assim o --preload é seguro: nenhum worker usa conexão herdada do processo pai.
+csrf = CSRFProtect()
 
 # Configurações do Banco de Dados - Definidas GLOBALMENTE E em app.config
 db_config = { # <-- RESTAURADA AQUI COMO VARIÁVEL GLOBAL
@@ -64,12 +71,6 @@ db_config = { # <-- RESTAURADA AQUI COMO VARIÁVEL GLOBAL
     "user": os.getenv('DB_USER'),
     "password": os.getenv('DB_PASSWORD')
 }
-app.config['DB_CONFIG'] = db_config # Atribui a variável global a app.config
-
-init_pool(db_config) # Pool de conexões MySQL, inicializado uma única vez no startup
-
-app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'SimpleCache')
-cache.init_app(app)
 
 
 # Disponibilizar date.today() como 'today' no ambiente Jinja2 para aniversariantes do mês
@@ -80,9 +81,8 @@ cache.init_app(app)
 # o que é mais explícito para o uso no rodapé. A função 'today' para aniversariantes
 # (se utilizada) pode ser passada da mesma forma ou de forma mais específica no seu blueprint.
 
-# Inicialização do Flask-Login
+# Inicialização do Flask-Login (init_app em create_app)
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'login'
 # Se o usuário tentar acessar uma página protegida sem estar logado, será redirecionado para 'login'
 
@@ -110,27 +110,24 @@ class User(UserMixin):
 
 # Carregador de usuário para Flask-Login
 @login_manager.user_loader
+@rastreamento.span('load_user', 'auth')  # Parcela "auth" do Server-Timing
 def load_user(user_id):
     subdomain = request.host.split(':')[0].split('.')[0]
     try:
-        with DatabaseManager(**db_config) as db_base:
-            tenant = TenantManager(db_base).find_by_subdomain(subdomain)
-            if not tenant or not tenant['ativo']:
+        tenant = resolve_tenant(db_config, subdomain)
+        if not tenant or not tenant['ativo']:
+            return None
+
+        # Usuário + permissões vêm do cache do principal; o banco só é consultado em cache
+        # miss ou depois de uma escrita que trocou o carimbo de versão (ver db_user_manager)
+        principal = load_principal(db_config, tenant['id'], user_id)
+        if principal:
+            # Defesa em profundidade: se o tenant_id do usuário não bater com o
+            # tenant resolvido pelo subdomínio atual, recusa mesmo existindo
+            if principal['tenant_id'] != tenant['id']:
                 return None
-
-            user_manager = UserManager(db_base, tenant['id'])
-            # ALTERAÇÃO: user_data agora deve incluir 'email'
-            user_data = user_manager.find_user_by_id(user_id)
-            if user_data:
-                # Defesa em profundidade: se o tenant_id do usuário não bater com o
-                # tenant resolvido pelo subdomínio atual, recusa mesmo existindo
-                if user_data['tenant_id'] != tenant['id']:
-                    return None
-                # Carregar as permissões do usuário e anexar ao objeto User
-                user_permissions = user_manager.get_user_permissions(user_id)
-                # ALTERAÇÃO: Passando user_data['email'] para o construtor do User
-                return User(user_data['id'], user_data['username'], user_data['role'],
-                            user_data.get('email'), user_permissions, tenant_id=tenant['id'])
+            return User(principal['id'], principal['username'], principal['role'],
+                        principal['email'], principal['permissions'], tenant_id=tenant['id'])
         return None
     except mysql.connector.Error as e:
         print(f"Erro ao carregar usuário: {e}")
@@ -143,11 +140,9 @@ def load_user(user_id):
 # ===============================================================
 # 1.1 AUTENTICAÇÃO E ACESSO
 # ===============================================================
-@app.route('/')
 def index():
     return redirect(url_for('login'))
 
-@app.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('welcome'))
@@ -155,8 +150,7 @@ def login():
     # Resolve o tenant pelo subdomínio ANTES de qualquer coisa, inclusive antes de
     # olhar pra username/senha do formulário.
     subdomain = request.host.split(':')[0].split('.')[0]
-    with DatabaseManager(**db_config) as db_base:
-        tenant = TenantManager(db_base).find_by_subdomain(subdomain)
+    tenant = resolve_tenant(db_config, subdomain) # Registro em memória: não consulta o banco a cada request
 
     if not tenant or not tenant['ativo']:
         # Mensagem genérica pros dois casos (subdomínio inexistente OU tenant
@@ -221,7 +215,6 @@ def login():
     # Este return será alcançado se o método não for POST, ou se o POST não for AJAX e falhar no try/except.
     return render_template('login.html')
 
-@app.route('/logout')
 @login_required
 def logout():
     logout_user()
@@ -234,7 +227,6 @@ def logout():
 # ===============================================================
 # 1.2 BOAS VINDAS (WELCOME) APÓS LOGIN: APRESENTA OS MÓDULOS
 # ===============================================================
-@app.route('/welcome')
 @login_required
 def welcome():
     try:
@@ -268,14 +260,290 @@ def welcome():
         now=datetime.now() # AGORA SIM: 'now' será definido no template!
     )
 
+# ===============================================================
+# 1.3 READINESS (LOAD BALANCER / ORQUESTRADOR)
+# ===============================================================
+def ready():
+    """200 só depois do aquecimento deste worker (database/warmup.py); 503 antes disso."""
+    pronto, info = readiness(current_app._get_current_object())
+    return jsonify(info), (200 if pronto else 503)
+
+# ===============================================================
+# 1.4 COMANDOS DE MANUTENÇÃO (flask --app app <comando>)
+# ===============================================================
+@click.command('kpi-rebuild')
+@click.option('--tenant', 'tenant_id', type=int, default=None, help='Só este tenant (padrão: todos).')
+def kpi_rebuild_command(tenant_id):
+    """Recalcula do zero o resumo de KPIs dos dashboards (tenant_kpi_summary)."""
+    with DatabaseManager(**current_app.config['DB_CONFIG'], request_scoped=False) as db_base:
+        tenant_ids = [tenant_id] if tenant_id else [t['id'] for t in TenantManager(db_base).get_all()]
+        for tid in tenant_ids:
+            kpi_summary.reconstruir(db_base, tid)
+            click.echo(f"Tenant {tid}: resumo de KPIs reconstruído.")
+
+@click.command('search-rebuild')
+@click.option('--tenant', 'tenant_id', type=int, default=None, help='Só este tenant (padrão: todos).')
+def search_rebuild_command(tenant_id):
+    """Remonta do zero o índice da busca global (busca_documentos)."""
+    with DatabaseManager(**current_app.config['DB_CONFIG'], request_scoped=False) as db_base:
+        tenant_ids = [tenant_id] if tenant_id else [t['id'] for t in TenantManager(db_base).get_all()]
+        for tid in tenant_ids:
+            indice_busca.reconstruir(db_base, tid)
+            click.echo(f"Tenant {tid}: índice de busca reconstruído.")
+
+@click.command('bench-seed')
+@click.option('--tenants', type=int, default=1, show_default=True, help='Quantidade de tenants (bench1..benchN).')
+@click.option('--tamanho', type=click.Choice(sorted(dados_sinteticos.TAMANHOS)), default='pequeno', show_default=True)
+@click.option('--semente', type=int, default=42, show_default=True, help='Mesma semente = mesma massa.')
+@click.option('--data-base', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Data de referência (padrão: hoje).')
+@click.option('--yes', is_flag=True, help='Confirma que os dados dos tenants bench1..benchN podem ser apagados.')
+def bench_seed_command(tenants, tamanho, semente, data_base, yes):
+    """Recria os tenants de benchmark com massa sintética (apaga os dados anteriores deles)."""
+    if not yes:
+        raise click.ClickException(f"bench-seed apaga todos os dados dos tenants bench1..bench{tenants}; "
+                                   "confirme com --yes.")
+    with DatabaseManager(**current_app.config['DB_CONFIG'], request_scoped=False) as db_base:
+        try:
+            dados_sinteticos.gerar(db_base, tenants, tamanho, semente, data_base.date() if data_base else None, echo=click.echo)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+@click.command('bench-run')
+@click.option('--iteracoes', type=int, default=benchmark.BENCH_ITERACOES, show_default=True, help='Execuções medidas por caso e tenant.')
+@click.option('--aquecimento', type=int, default=1, show_default=True, help='Execuções descartadas antes das medidas.')
+@click.option('--modo', type=click.Choice(['frio', 'quente', 'ambos']), default='ambos', show_default=True)
+@click.option('--filtro', default=None, help='Só os casos com este texto no nome (ex: obras.get_all).')
+@click.option('--saida', type=click.Path(dir_okay=False), default=None, help='Arquivo JSON (padrão: BENCH_DIR/<data>-<commit>.json).')
+def bench_run_command(iteracoes, aquecimento, modo, filtro, saida):
+    """Mede os métodos de leitura dos managers nos tenants de benchmark e grava o JSON."""
+    modos = benchmark.MODOS if modo == 'ambos' else (modo,)
+    with DatabaseManager(**current_app.config['DB_CONFIG'], request_scoped=False) as db_base:
+        try:
+            dados_sinteticos.verificar_banco(db_base)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        tenant_ids = dados_sinteticos.tenants_de_benchmark(db_base)
+        if not tenant_ids:
+            raise click.ClickException("Nenhum tenant de benchmark; rode 'flask --app app bench-seed' antes.")
+        resultado = benchmark.executar(current_app._get_current_object(), db_base, tenant_ids, iteracoes, modos,
+                                       filtro, aquecimento, echo=click.echo)
+    click.echo(f"Resultado gravado em {benchmark.gravar(resultado, saida)}")
+
+@click.command('bench-compare')
+@click.argument('antes', type=click.Path(exists=True, dir_okay=False))
+@click.argument('depois', type=click.Path(exists=True, dir_okay=False))
+@click.option('--limite', type=float, default=benchmark.BENCH_LIMITE_REGRESSAO, show_default=True, help='Variação da mediana (%) tratada como regressão.')
+def bench_compare_command(antes, depois, limite):
+    """Compara dois resultados do bench-run; sai com código 1 se houver regressão."""
+    linhas = benchmark.comparar(benchmark.carregar(antes), benchmark.carregar(depois), limite)
+    for linha in linhas:
+        v = {k: '-' if valor is None else valor for k, valor in linha.items()}
+        variacao = '' if linha['variacao_pct'] is None else f"{linha['variacao_pct']:+.1f}%"
+        click.echo(f"{v['situacao']:9} {v['modo']:6} {v['caso']:70} {v['antes_ms']:>10} -> {v['depois_ms']:>10} ms "
+                   f"{variacao:>8}  consultas {v['consultas_antes']} -> {v['consultas_depois']}")
+    regressoes = sum(1 for linha in linhas if linha['situacao'] == 'regressao')
+    click.echo(f"{regressoes} regressão(ões), {sum(1 for linha in linhas if linha['situacao'] == 'melhora')} melhora(s).")
+    if regressoes:
+        raise click.exceptions.Exit(1)
+
+# ===============================================================
+# 1.5 BUSCA GLOBAL
+# ===============================================================
+# entidade do índice (database/indice_busca.py) -> (rótulo, ícone, endpoint de detalhes, argumento)
+BUSCA_RESULTADOS = {
+    'obras': ('Obras', 'building', 'obras_bp.obra_details', 'obra_id'),
+    'clientes': ('Clientes', 'handshake', 'obras_bp.cliente_details', 'cliente_id'),
+    'contratos': ('Contratos', 'file-contract', 'obras_bp.contrato_details', 'contrato_id'),
+    'arts': ('ARTs', 'file-signature', 'obras_bp.art_details', 'art_id'),
+    'funcionarios': ('Funcionários', 'user', 'pessoal_bp.funcionario_details', 'matricula'),
+    'incidentes_acidentes': ('Incidentes e Acidentes', 'exclamation-triangle', 'seguranca_bp.incidente_acidente_details', 'incidente_id'),
+    'treinamentos': ('Treinamentos', 'chalkboard-teacher', 'seguranca_bp.treinamento_details', 'treinamento_id'),
+}
+
+@login_required
+def search():
+    """
+    Busca global (?q=...) em todos os módulos que o usuário pode acessar, agrupada por tipo de
+    registro. HTML por padrão; JSON com ?formato=json ou Accept: application/json.
+    """
+    q = (request.args.get('q') or '').strip()
+    modulos = sorted({modulo for modulo, _, _, _ in indice_busca.DOCUMENTOS.values() if current_user.can_access_module(modulo)})
+
+    grupos = []
+    if q:
+        try:
+            with DatabaseManager(**db_config) as db_base:
+                resultados = indice_busca.buscar(db_base, current_user.tenant_id, q, modulos)
+        except mysql.connector.Error:
+            logger.exception("Erro de banco de dados na busca global")
+            flash('Não foi possível concluir a busca. Tente novamente.', 'danger')
+            resultados = {}
+        for entidade, itens in resultados.items():
+            rotulo, icone, endpoint, argumento = BUSCA_RESULTADOS[entidade]
+            grupos.append({
+                'entidade': entidade,
+                'rotulo': rotulo,
+                'icone': icone,
+                'itens': [
+                    {'titulo': item['Titulo'], 'subtitulo': item['Subtitulo'], 'url': url_for(endpoint, **{argumento: item['Chave']})}
+                    for item in itens
+                ],
+            })
+
+    if request.args.get('formato') == 'json' or request.accept_mimetypes.best == 'application/json':
+        return jsonify({'q': q, 'resultados': grupos})
+    return render_template('busca/search_results.html', user=current_user, q=q, grupos=grupos)
+
+# ===============================================================
+# 1.6 TYPEAHEAD DOS CAMPOS DE SELEÇÃO
+# ===============================================================
+# Os formulários não carregam mais a tabela inteira nos <select> de funcionário, obra, contrato,
+# cliente, treinamento e agendamento: static/js/typeahead.js busca as opções aqui conforme o
+# usuário digita (macro typeahead_select em templates/macros/ui.html).
+# entidade -> (módulos cujos formulários usam o campo, manager, método)
+TYPEAHEAD = {
+    'funcionarios': (('Pessoal', 'Segurança'), PessoalManager, 'typeahead_funcionarios'),
+    'obras': (('Obras', 'Segurança'), ObrasManager, 'typeahead_obras'),
+    'contratos': (('Obras',), ObrasManager, 'typeahead_contratos'),
+    'clientes': (('Obras',), ObrasManager, 'typeahead_clientes'),
+    'treinamentos': (('Segurança',), SegurancaManager, 'typeahead_treinamentos'),
+    'agendamentos': (('Segurança',), SegurancaManager, 'typeahead_agendamentos'),
+}
+
+# Validade da resposta no navegador: o mesmo prefixo digitado de novo não volta ao servidor
+TYPEAHEAD_BROWSER_TTL = int(os.getenv('TYPEAHEAD_BROWSER_TTL', '30'))
+
+@login_required
+def typeahead(entidade):
+    """
+    Opções de um campo de seleção em JSON: {'itens': [{'id', 'rotulo', 'prefixos'}, ...]}.
+    ?q=<prefixo>&limite=<n>, ou ?id=<chave> para o rótulo do valor já selecionado.
+    """
+    if entidade not in TYPEAHEAD:
+        return jsonify({'itens': [], 'erro': 'Campo desconhecido.'}), 404
+    modulos, manager_cls, metodo = TYPEAHEAD[entidade]
+    if not any(current_user.can_access_module(modulo) for modulo in modulos):
+        return jsonify({'itens': [], 'erro': 'Acesso negado.'}), 403
+
+    chave = request.args.get('id') or None
+    # Collation sem caixa: "ANA" e "ana" trazem as mesmas opções e dividem a entrada do cache
+    prefixo = (request.args.get('q') or '').strip().lower()
+    limite = request.args.get('limite', type=int)
+    try:
+        with DatabaseManager(**db_config) as db_base:
+            manager = manager_cls(db_base, current_user.tenant_id)
+            if chave is not None:
+                itens = getattr(manager, metodo)(chave=chave)
+            else:
+                itens = getattr(manager, metodo)(prefixo, limite)
+    except mysql.connector.Error:
+        logger.exception("Erro de banco de dados no typeahead de %s", entidade)
+        return jsonify({'itens': [], 'erro': 'Erro ao buscar opções.'}), 500
+
+    response = jsonify({'itens': itens})
+    response.headers['Cache-Control'] = f'private, max-age={TYPEAHEAD_BROWSER_TTL}'
+    return response
+
+# ===============================================================
+# 1.7 MÉTRICAS (PROMETHEUS)
+# ===============================================================
+# Coletadas pelos ganchos de request (metricas.instalar, no create_app) e do DatabaseManager;
+# ver database/metricas.py. O coletor se autentica com 'Authorization: Bearer <METRICS_TOKEN>';
+# sem METRICS_TOKEN configurado, /metrics fica fechado (403).
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+def metrics():
+    """
+    Métricas de todos os workers no formato de exposição em texto do Prometheus.
+    Só com o token (coletor da operação): as séries cobrem todos os tenants, com label tenant,
+    então admin de tenant não tem acesso.
+    """
+    autorizacao = request.headers.get('Authorization', '')
+    if not METRICS_TOKEN or not hmac.compare_digest(autorizacao, f'Bearer {METRICS_TOKEN}'):
+        return 'Acesso negado.', 403
+    response = current_app.response_class(metricas.exposicao(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 #################################################################
-# 99. REGISTRO DOS BLUEPRINTS (NOVO)
+# 99. APPLICATION FACTORY E REGISTRO DOS BLUEPRINTS
 #################################################################
-app.register_blueprint(users_bp) # Registra o Blueprint do Módulo Usuários
-app.register_blueprint(pessoal_bp)
-app.register_blueprint(obras_bp) # Registra o Blueprint do Módulo Obras
-app.register_blueprint(seguranca_bp)
+def create_app():
+    """Monta o app: configuração, extensões, rotas gerais e blueprints (nomes de endpoint inalterados)."""
+    app = Flask(__name__)
+
+    # **IMPORTANTE: A CHAVE SECRETA É LIDA DE VARIÁVEL DE AMBIENTE**
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback_secret_key_dev_only')
+    app.config['DB_CONFIG'] = db_config # Atribui a variável global a app.config
+    app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'database.cache_ext.TieredCache') # L1 em processo + L2 compartilhado
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL') # Sem Redis, o L2 é local ao processo
+
+    csrf.init_app(app)
+    login_manager.init_app(app)
+
+    # Uma conexão do pool por request, compartilhada por todos os 'with DatabaseManager(...)'
+    # do request (load_user, rota, managers) e devolvida aqui, no fim do request
+    app.teardown_request(release_request_connection)
+
+    # Latência, tempo de banco e consultas de todo request, sem editar as rotas (ver /metrics)
+    metricas.instalar(app)
+
+    # Span por request (consultas, cache, render_template) e cabeçalho Server-Timing
+    # (ver database/rastreamento.py)
+    rastreamento.instalar(app)
+
+    # Perfil de CPU por amostragem, pedido por admin ('?_perfil=1') ou PERFIL_AMOSTRAGEM
+    # (ver database/perfilador.py e users_bp.perfis)
+    perfilador.instalar(app)
+
+    # Desenvolvimento/homologação: N+1 e orçamento de consultas por endpoint (CONSULTAS_DETECTOR)
+    detector_consultas.instalar(app)
+
+    # Rotas gerais (1.x)
+    app.add_url_rule('/', 'index', index)
+    app.add_url_rule('/login', 'login', login, methods=['GET', 'POST'])
+    app.add_url_rule('/logout', 'logout', logout)
+    app.add_url_rule('/welcome', 'welcome', welcome)
+    app.add_url_rule('/ready', 'ready', ready)
+    app.add_url_rule('/search', 'search', search)
+    app.add_url_rule('/typeahead/<entidade>', 'typeahead', typeahead)
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    app.cli.add_command(kpi_rebuild_command)
+    app.cli.add_command(search_rebuild_command)
+    app.cli.add_command(bench_seed_command)
+    app.cli.add_command(bench_run_command)
+    app.cli.add_command(bench_compare_command)
+
+    app.register_blueprint(users_bp) # Registra o Blueprint do Módulo Usuários
+    app.register_blueprint(pessoal_bp)
+    app.register_blueprint(obras_bp) # Registra o Blueprint do Módulo Obras
+    app.register_blueprint(seguranca_bp)
+
+    # Sem gunicorn (python app.py, flask run) ou sem --preload, este processo já é o worker.
+    # Com --preload, o post_fork chama init_worker de novo em cada worker (ver gunicorn.conf.py).
+    init_worker(app)
+    return app
+
+
+def init_worker(app):
+    """
+    Recursos por processo: pool de conexões MySQL e backend do cache. Chamado no create_app
+    e no post_fork de cada worker; não abre conexões (o pool conecta sob demanda).
+
+    Com mais de um worker (WEB_CONCURRENCY) o cache precisa de Redis: sem ele cada worker tem
+    o seu, e os carimbos de versão (tabelas, usuário/permissões) trocados numa escrita só valem
+    no worker que escreveu — os outros serviriam dados e permissões antigos até o TTL.
+    """
+    if not app.config.get('CACHE_REDIS_URL') and int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        raise RuntimeError("WEB_CONCURRENCY > 1 exige CACHE_REDIS_URL: sem Redis o cache é por processo "
+                           "e as invalidações não chegam aos outros workers.")
+    init_pool(app.config['DB_CONFIG'])
+    cache.init_app(app)
+
+
+app = create_app()
 
 if __name__ == '__main__':
+    warm_up(app) # Sob gunicorn quem aquece é o post_worker_init (gunicorn.conf.py)
     app.run(debug=False) # Alterar para True quando for debugar apenas localmente, sem expor o app na rede.
     #app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
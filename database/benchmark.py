@@ -0,0 +1,399 @@
+# database/benchmark.py
+# Suíte de benchmarks dos métodos de leitura dos managers, contra um MySQL local com a massa
+# sintética de database/dados_sinteticos.py (tenants bench1..benchN).
+#
+# Cada caso chama um método de manager — listagens (primeira página com total exato e com filtro),
+# detalhes por id, dashboards, alertas, relatórios, exportações em streaming (gerador consumido até
+# o fim), typeahead e listas de referência — em cada tenant de benchmark, e mede:
+#   - tempo de parede da chamada (ms): min, mediana, p95, média e max das iterações;
+#   - consultas ao banco e tempo de banco por chamada (contados por metricas.registrar_consulta,
+#     o mesmo caminho do /metrics);
+#   - linhas devolvidas (itens da página, linhas do gerador, etc.).
+# Modos de cache:
+#   - 'frio': o cache do app é esvaziado antes de cada chamada (fora do tempo medido), então o
+#     método e todo @cached_query chamado dentro dele recalculam do banco. Esvazia o cache inteiro
+#     (L1 e Redis de CACHE_REDIS_URL): rode o benchmark com um Redis próprio, não o de produção;
+#   - 'quente': chamada normal, depois do aquecimento (mede o caminho do cache).
+#
+# O resultado é um JSON (commit, data, máquina, versão do MySQL, parâmetros, linhas por tabela
+# da massa e os números de cada caso), gravado em BENCH_DIR; comparar() confronta dois arquivos
+# (ex.: antes e depois de uma mudança em db_obras_manager.py) e aponta as regressões.
+#
+# Comandos:
+#   flask --app app bench-run [--iteracoes 5] [--modo ambos] [--filtro obras.]
+#   flask --app app bench-compare benchmarks/antes.json benchmarks/depois.json [--limite 10]
+
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from flask import g
+
+from database.cache_ext import cache
+from database.db_obras_manager import ObrasManager
+from database.db_pessoal_manager import PessoalManager
+from database.db_referencia_manager import ReferenciaManager
+from database.db_seguranca_manager import SegurancaManager
+
+logger = logging.getLogger(__name__)
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.getenv("BENCH_DIR", os.path.join(_RAIZ, 'benchmarks'))
+BENCH_ITERACOES = int(os.getenv("BENCH_ITERACOES", "5"))
+BENCH_LIMITE_REGRESSAO = float(os.getenv("BENCH_LIMITE_REGRESSAO", "10"))  # % na mediana
+MODOS = ('frio', 'quente')
+
+# Um caso: nome exibido, categoria, classe do manager, método e função amostra -> args (tupla) ou kwargs (dict)
+Caso = namedtuple('Caso', ['nome', 'categoria', 'manager', 'metodo', 'argumentos'])
+
+
+def _sem_argumentos(a):
+    return {}
+
+
+def _contagem(a):
+    return {'count': 'exact'}
+
+
+def _stream(a):
+    return {'stream': True}
+
+
+def _casos():
+    casos = []
+
+    def caso(categoria, manager, metodo, argumentos=_sem_argumentos, variante=None):
+        nome = f"{manager.__name__.replace('Manager', '').lower()}.{metodo}" + (f"[{variante}]" if variante else '')
+        casos.append(Caso(nome, categoria, manager, metodo, argumentos))
+
+    # --- Listagens (primeira página com total exato) e exportações (stream=True) ---
+    for manager, metodos in (
+        (ObrasManager, ('get_all_obras', 'get_all_clientes', 'get_all_contratos', 'get_all_arts', 'get_all_medicoes',
+                        'get_all_avancos_fisicos', 'get_all_reidis', 'get_all_seguros')),
+        (PessoalManager, ('get_all_cargos', 'get_all_niveis', 'get_all_salarios', 'get_all_ferias',
+                          'get_all_dependentes')),
+        (SegurancaManager, ('get_all_incidentes_acidentes', 'get_all_asos', 'get_all_treinamentos',
+                            'get_all_treinamentos_agendamentos', 'get_all_treinamentos_participantes')),
+    ):
+        for metodo in metodos:
+            caso('listagem', manager, metodo, _contagem, 'exact')
+            caso('exportacao', manager, metodo, _stream, 'stream')
+    caso('listagem', PessoalManager, 'get_all_funcionarios', _contagem, 'exact')
+    caso('exportacao', PessoalManager, 'get_all_funcionarios_completo', _stream, 'stream')
+
+    # --- Listagens com filtro ---
+    caso('listagem', ObrasManager, 'get_all_obras', lambda a: {'search_nome': a['nome_obra'][:4], 'count': 'exact'}, 'nome')
+    caso('listagem', ObrasManager, 'get_all_obras', lambda a: {'search_cliente_id': a['cliente'], 'count': 'exact'}, 'cliente')
+    caso('listagem', ObrasManager, 'get_all_medicoes', lambda a: {'search_obra_id': a['obra'], 'count': 'exact'}, 'obra')
+    caso('listagem', PessoalManager, 'get_all_funcionarios', lambda a: {'search_nome': a['nome_funcionario'][:4], 'count': 'exact'}, 'nome')
+    caso('listagem', PessoalManager, 'get_all_funcionarios', lambda a: {'search_status': 'Ativo', 'count': 'exact'}, 'status')
+    caso('listagem', SegurancaManager, 'get_all_asos', lambda a: {'search_matricula': a['matricula'], 'count': 'exact'}, 'matricula')
+
+    # --- Detalhes por id ---
+    for manager, metodo, chave in (
+        (ObrasManager, 'get_obra_by_id', 'obra'), (ObrasManager, 'get_cliente_by_id', 'cliente'),
+        (ObrasManager, 'get_contrato_by_id', 'contrato'), (ObrasManager, 'get_art_by_id', 'art'),
+        (ObrasManager, 'get_medicao_by_id', 'medicao'), (ObrasManager, 'get_avanco_fisico_by_id', 'avanco'),
+        (ObrasManager, 'get_reidi_by_id', 'reidi'), (ObrasManager, 'get_seguro_by_id', 'seguro'),
+        (ObrasManager, 'get_avanco_acumulado_para_obra', 'obra'),
+        (PessoalManager, 'get_funcionario_by_matricula', 'matricula'),
+        (PessoalManager, 'get_funcionario_dados_pessoais_documentos_by_matricula', 'matricula'),
+        (PessoalManager, 'get_funcionario_enderecos_by_matricula', 'matricula'),
+        (PessoalManager, 'get_funcionario_contatos_by_matricula', 'matricula'),
+        (PessoalManager, 'get_cargo_by_id', 'cargo'), (PessoalManager, 'get_nivel_by_id', 'nivel'),
+        (PessoalManager, 'get_salario_by_id', 'salario'), (PessoalManager, 'get_ferias_by_id', 'ferias'),
+        (PessoalManager, 'get_dependente_by_id', 'dependente'),
+        (SegurancaManager, 'get_incidente_acidente_by_id', 'incidente'), (SegurancaManager, 'get_aso_by_id', 'aso'),
+        (SegurancaManager, 'get_treinamento_by_id', 'treinamento'),
+        (SegurancaManager, 'get_treinamento_agendamento_by_id', 'agendamento'),
+        (SegurancaManager, 'get_treinamento_participante_by_id', 'participante'),
+    ):
+        caso('detalhe', manager, metodo, lambda a, chave=chave: (a[chave],))
+
+    # --- Dashboards ---
+    caso('dashboard', ObrasManager, 'get_dashboard_kpis')
+    caso('dashboard', ObrasManager, 'get_curva_s', lambda a: (a['obra'], a['inicio_obra'], a['fim_obra']))
+    for metodo in ('get_dashboard_kpis', 'get_funcionario_status_counts', 'get_funcionarios_by_cargo',
+                   'get_funcionarios_by_nivel'):
+        caso('dashboard', PessoalManager, metodo)
+    caso('dashboard', SegurancaManager, 'get_dashboard_kpis')
+
+    # --- Alertas ---
+    for metodo in ('get_proximas_ferias', 'get_aniversariantes_do_mes', 'get_periodos_experiencia_a_vencer',
+                   'get_documentos_contratos_a_vencer'):
+        caso('alerta', PessoalManager, metodo)
+
+    # --- Relatórios ---
+    caso('relatorio', ObrasManager, 'get_obras_andamento_para_relatorio')
+    caso('relatorio', SegurancaManager, 'get_treinamentos_para_relatorio')
+
+    # --- Typeahead (lista inicial e por prefixo) ---
+    for manager, metodo, chave in (
+        (ObrasManager, 'typeahead_obras', 'nome_obra'), (ObrasManager, 'typeahead_contratos', 'numero_contrato'),
+        (ObrasManager, 'typeahead_clientes', 'nome_cliente'),
+        (PessoalManager, 'typeahead_funcionarios', 'nome_funcionario'),
+        (SegurancaManager, 'typeahead_treinamentos', 'nome_treinamento'),
+        (SegurancaManager, 'typeahead_agendamentos', 'nome_treinamento'),
+    ):
+        caso('typeahead', manager, metodo, _sem_argumentos, 'vazio')
+        caso('typeahead', manager, metodo, lambda a, chave=chave: {'prefixo': a[chave][:3]}, 'prefixo')
+
+    # --- Listas de referência dos dropdowns ---
+    for metodo in ('cargos', 'niveis', 'clientes', 'contratos', 'obras', 'treinamentos', 'agendamentos'):
+        caso('referencia', ReferenciaManager, metodo)
+    return casos
+
+
+CASOS = _casos()
+
+
+# ===============================================================
+# AMOSTRA E AMBIENTE
+# ===============================================================
+# Chave da amostra -> (tabela, coluna); a amostra é a linha de menor id do tenant
+_AMOSTRA = {
+    'obra': ('obras', 'ID_Obras'), 'cliente': ('clientes', 'ID_Clientes'), 'contrato': ('contratos', 'ID_Contratos'),
+    'art': ('arts', 'ID_Arts'), 'medicao': ('medicoes', 'ID_Medicoes'), 'avanco': ('avancos_fisicos', 'ID_Avancos_Fisicos'),
+    'reidi': ('reidis', 'ID_Reidis'), 'seguro': ('seguros', 'ID_Seguros'), 'matricula': ('funcionarios', 'Matricula'),
+    'cargo': ('cargos', 'ID_Cargos'), 'nivel': ('niveis', 'ID_Niveis'), 'salario': ('salarios', 'ID_Salarios'),
+    'ferias': ('ferias', 'ID_Ferias'), 'dependente': ('dependentes', 'ID_Dependente'),
+    'incidente': ('incidentes_acidentes', 'ID_Incidente_Acidente'), 'aso': ('asos', 'ID_ASO'),
+    'treinamento': ('treinamentos', 'ID_Treinamento'), 'agendamento': ('treinamentos_agendamentos', 'ID_Agendamento'),
+    'participante': ('treinamentos_participantes', 'ID_Participante'),
+}
+_TABELAS_CONTADAS = sorted({tabela for tabela, _ in _AMOSTRA.values()} | {'funcionarios_documentos',
+                           'funcionarios_enderecos', 'funcionarios_contatos'})
+
+
+def amostra(db, tenant_id):
+    """Ids e textos do tenant usados como argumentos dos casos (None se a massa está incompleta)."""
+    resultado = {}
+    for chave, (tabela, coluna) in _AMOSTRA.items():
+        rows = db.execute_query(f"SELECT MIN({coluna}) AS v FROM {tabela} WHERE tenant_id = %s",
+                                (tenant_id,), fetch_results=True)
+        if not rows or rows[0]['v'] is None:
+            return None
+        resultado[chave] = rows[0]['v']
+    textos = db.execute_query(
+        """SELECT o.Nome_Obra, o.Data_Inicio_Prevista, o.Data_Fim_Prevista, c.Numero_Contrato, cl.Nome_Cliente,
+                  (SELECT Nome_Completo FROM funcionarios WHERE tenant_id = o.tenant_id AND Matricula = %s) AS Nome_Funcionario,
+                  (SELECT Nome_Treinamento FROM treinamentos WHERE tenant_id = o.tenant_id AND ID_Treinamento = %s) AS Nome_Treinamento
+           FROM obras o
+           JOIN contratos c ON c.ID_Contratos = o.ID_Contratos AND c.tenant_id = o.tenant_id
+           JOIN clientes cl ON cl.ID_Clientes = c.ID_Clientes AND cl.tenant_id = o.tenant_id
+           WHERE o.tenant_id = %s AND o.ID_Obras = %s""",
+        (resultado['matricula'], resultado['treinamento'], tenant_id, resultado['obra']), fetch_results=True)
+    if not textos:
+        return None
+    t = textos[0]
+    resultado.update(nome_obra=t['Nome_Obra'], numero_contrato=t['Numero_Contrato'], nome_cliente=t['Nome_Cliente'],
+                     nome_funcionario=t['Nome_Funcionario'] or '', nome_treinamento=t['Nome_Treinamento'] or '',
+                     inicio_obra=t['Data_Inicio_Prevista'] or date.today() - timedelta(days=365),
+                     fim_obra=t['Data_Fim_Prevista'] or date.today())
+    return resultado
+
+
+def contar_linhas(db, tenant_ids):
+    """Linhas por tabela somadas nos tenants de benchmark (o tamanho da massa medida)."""
+    marcadores = ', '.join(['%s'] * len(tenant_ids))
+    contagem = {}
+    for tabela in _TABELAS_CONTADAS:
+        rows = db.execute_query(f"SELECT COUNT(*) AS n FROM {tabela} WHERE tenant_id IN ({marcadores})",
+                                tuple(tenant_ids), fetch_results=True)
+        contagem[tabela] = rows[0]['n'] if rows else None
+    return contagem
+
+
+def _git(*args):
+    try:
+        return subprocess.run(('git',) + args, cwd=_RAIZ, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def ambiente(db):
+    rows = db.execute_query("SELECT VERSION() AS versao", fetch_results=True)
+    return {
+        'commit': _git('rev-parse', 'HEAD') or None,
+        'commit_assunto': _git('log', '-1', '--format=%s') or None,
+        'alteracoes_locais': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'maquina': platform.node(),
+        'python': platform.python_version(),
+        'mysql': rows[0]['versao'] if rows else None,
+    }
+
+
+# ===============================================================
+# EXECUÇÃO
+# ===============================================================
+def _linhas(resultado):
+    """Linhas devolvidas por um método (consome geradores: é o que a exportação faz)."""
+    if resultado is None:
+        return 0
+    if isinstance(resultado, dict):
+        itens = resultado.get('items')
+        return len(itens) if itens is not None else len(resultado)
+    if isinstance(resultado, (list, tuple)):
+        return len(resultado)
+    if not hasattr(resultado, '__iter__') or isinstance(resultado, str):
+        return 1  # Valor único (ex.: avanço acumulado)
+    return sum(1 for _ in resultado)
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+
+def estatisticas(tempos_ms):
+    return {
+        'min': round(min(tempos_ms), 3),
+        'mediana': round(statistics.median(tempos_ms), 3),
+        'p95': round(_percentil(tempos_ms, 95), 3),
+        'media': round(statistics.fmean(tempos_ms), 3),
+        'max': round(max(tempos_ms), 3),
+    }
+
+
+def medir(caso, manager, argumentos, modo, iteracoes, aquecimento=1):
+    """
+    Executa o caso (aquecimento + iterações) e devolve as amostras. Chamar dentro de um request
+    context: as consultas de cada chamada são contadas em g._metricas_db (metricas.registrar_consulta).
+    """
+    chamar = getattr(manager, caso.metodo)
+    args, kwargs = (argumentos, {}) if isinstance(argumentos, tuple) else ((), argumentos)
+    for _ in range(aquecimento):
+        _linhas(chamar(*args, **kwargs))
+    tempos, tempos_db, consultas, linhas = [], [], [], 0
+    for _ in range(iteracoes):
+        if modo == 'frio':
+            # Sem carimbos de versão nem resultados (inclusive os :last do stale_while_revalidate)
+            cache.clear()
+        g.pop('_metricas_db', None)
+        inicio = time.perf_counter()
+        linhas = _linhas(chamar(*args, **kwargs))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        segundos_db, total = g.pop('_metricas_db', None) or (0.0, 0)
+        tempos_db.append(segundos_db * 1000)
+        consultas.append(total)
+    return tempos, tempos_db, consultas, linhas
+
+
+def executar(app, db, tenant_ids, iteracoes=BENCH_ITERACOES, modos=MODOS, filtro=None, aquecimento=1,
+             echo=logger.info):
+    """
+    Roda os casos (os que contêm filtro no nome, se informado) nos tenants e devolve o dict do
+    resultado (ver gravar()). db deve ser um DatabaseManager(request_scoped=False).
+    """
+    casos = [c for c in CASOS if not filtro or filtro in c.nome]
+    amostras = {}
+    for tenant_id in tenant_ids:
+        a = amostra(db, tenant_id)
+        if a is None:
+            echo(f"Tenant {tenant_id}: massa incompleta, ignorado (rode bench-seed).")
+        else:
+            amostras[tenant_id] = a
+    if not amostras:
+        raise RuntimeError("Nenhum tenant de benchmark com dados; rode 'flask --app app bench-seed' antes.")
+
+    resultados = []
+    with app.test_request_context():
+        for modo in modos:
+            for caso in casos:
+                tempos, tempos_db, consultas, linhas, erro = [], [], [], 0, None
+                for tenant_id, a in amostras.items():
+                    manager = caso.manager(db, tenant_id)
+                    try:
+                        t, t_db, q, linhas = medir(caso, manager, caso.argumentos(a), modo, iteracoes, aquecimento)
+                    except Exception as e:
+                        erro = f"{type(e).__name__}: {e}"
+                        logger.exception("Benchmark %s (%s) falhou no tenant %s", caso.nome, modo, tenant_id)
+                        break
+                    tempos += t
+                    tempos_db += t_db
+                    consultas += q
+                item = {'caso': caso.nome, 'categoria': caso.categoria, 'modo': modo}
+                if erro:
+                    item['erro'] = erro
+                else:
+                    item.update(ms=estatisticas(tempos), db_ms=round(statistics.median(tempos_db), 3),
+                                consultas=round(statistics.median(consultas), 1), linhas=linhas)
+                resultados.append(item)
+                echo(f"{modo:6} {caso.nome:70} " + (item.get('erro') or
+                     f"{item['ms']['mediana']:9.2f} ms  {item['consultas']:5.1f} consultas  {linhas} linhas"))
+
+    return {
+        'ambiente': ambiente(db),
+        'parametros': {'tenants': sorted(amostras), 'iteracoes': iteracoes, 'aquecimento': aquecimento,
+                       'modos': list(modos), 'filtro': filtro},
+        'dados': contar_linhas(db, sorted(amostras)),
+        'resultados': resultados,
+    }
+
+
+# ===============================================================
+# ARQUIVOS E COMPARAÇÃO
+# ===============================================================
+def gravar(resultado, caminho=None):
+    """Grava o JSON (padrão: BENCH_DIR/<data>-<commit curto>.json) e devolve o caminho."""
+    if not caminho:
+        commit = (resultado['ambiente'].get('commit') or 'sem-commit')[:10]
+        if resultado['ambiente'].get('alteracoes_locais'):
+            commit += '-alterado'
+        carimbo = datetime.now().strftime('%Y%m%d-%H%M%S')
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        caminho = os.path.join(BENCH_DIR, f"{carimbo}-{commit}.json")
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2, default=str)
+    return caminho
+
+
+def carregar(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def comparar(antes, depois, limite=BENCH_LIMITE_REGRESSAO):
+    """
+    Confronta dois resultados caso a caso (mesmo caso e modo), pela mediana.
+
+    :return: Lista de dicts (caso, modo, antes_ms, depois_ms, variacao_pct, consultas_antes,
+             consultas_depois, situacao), com situacao 'regressao' (mais lento que o limite, em %,
+             ou mais consultas), 'melhora', 'igual', 'novo' ou 'removido'.
+    """
+    def indice(resultado):
+        return {(r['caso'], r['modo']): r for r in resultado['resultados'] if 'erro' not in r}
+
+    a, d = indice(antes), indice(depois)
+    linhas = []
+    for chave in sorted(a.keys() | d.keys()):
+        ra, rd = a.get(chave), d.get(chave)
+        linha = {'caso': chave[0], 'modo': chave[1],
+                 'antes_ms': ra['ms']['mediana'] if ra else None, 'depois_ms': rd['ms']['mediana'] if rd else None,
+                 'consultas_antes': ra['consultas'] if ra else None, 'consultas_depois': rd['consultas'] if rd else None,
+                 'variacao_pct': None}
+        if not ra:
+            linha['situacao'] = 'novo'
+        elif not rd:
+            linha['situacao'] = 'removido'
+        else:
+            base = max(linha['antes_ms'], 0.001)
+            linha['variacao_pct'] = round((linha['depois_ms'] - linha['antes_ms']) * 100 / base, 1)
+            if linha['variacao_pct'] > limite or linha['consultas_depois'] > linha['consultas_antes']:
+                linha['situacao'] = 'regressao'
+            elif linha['variacao_pct'] < -limite or linha['consultas_depois'] < linha['consultas_antes']:
+                linha['situacao'] = 'melhora'
+            else:
+                linha['situacao'] = 'igual'
+        linhas.append(linha)
+    return linhas
@@ -0,0 +1,123 @@
+# database/busca.py
+# Busca textual dos filtros search_* dos managers, sobre índices FULLTEXT com parser ngram
+# (ver 8_indices_busca.sql) em vez de LIKE '%termo%' (que varre todas as linhas do tenant).
+#
+# O parser ngram quebra o texto em pedaços de NGRAM_TOKEN_SIZE caracteres, então uma frase
+# "termo" em modo booleano casa com qualquer trecho do campo — mesma semântica de substring do
+# LIKE, mas resolvida pelo índice. Maiúsculas/minúsculas e acentos seguem o collation das colunas
+# (utf8mb4_0900_ai_ci): "jose" encontra "José", no índice e no LIKE de fallback.
+
+import os
+import re
+
+# Deve ser igual ao ngram_token_size do servidor MySQL (padrão 2): termos mais curtos que isso
+# não existem no índice e caem no LIKE
+NGRAM_TOKEN_SIZE = int(os.getenv("BUSCA_NGRAM_TOKEN_SIZE", "2"))
+
+# Caracteres com significado no modo booleano do MATCH ... AGAINST (viram separadores de termos)
+_OPERADORES_RE = re.compile(r'[+\-<>()~*"@]+')
+
+# Colunas com índice FULLTEXT ngram (8_indices_busca.sql). Coluna fora desta lista usa LIKE.
+COLUNAS_INDEXADAS = {
+    'obras': ('Numero_Obra', 'Nome_Obra'),
+    'clientes': ('Nome_Cliente',),
+    'contratos': ('Numero_Contrato',),
+    'arts': ('Numero_Art',),
+    'funcionarios': ('Nome_Completo',),
+    'dependentes': ('Nome_Completo',),
+    'treinamentos': ('Nome_Treinamento',),
+    'busca_documentos': ('Texto',),  # Índice da busca global (database/indice_busca.py)
+}
+
+
+def termos(texto):
+    """Palavras do texto de busca, sem os operadores do modo booleano."""
+    return _OPERADORES_RE.sub(' ', texto or '').split()
+
+
+def expressao_booleana(palavras):
+    """'+"w1" +"w2"': todas as palavras obrigatórias, cada uma como frase ngram (substring)."""
+    return ' '.join(f'+"{palavra}"' for palavra in palavras)
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def prefixo_like(texto):
+    """Padrão LIKE 'texto%' (busca por prefixo, que usa índice B-tree da coluna)."""
+    return f"{_escapar_like(texto.strip())}%"
+
+
+def filtro_texto(tabela, coluna, texto, alias=None):
+    """
+    Fragmento de WHERE e params para buscar texto numa coluna (todas as palavras precisam aparecer).
+
+    :param tabela: Tabela da coluna (decide se há índice FULLTEXT, ver COLUNAS_INDEXADAS).
+    :param coluna: Nome da coluna.
+    :param texto: Texto digitado pelo usuário.
+    :param alias: Alias da tabela na query, se houver.
+    :return: (sql, params). Palavras curtas demais para o índice ngram viram LIKE, combinado com o MATCH.
+    """
+    col = f"{alias}.{coluna}" if alias else coluna
+    palavras = termos(texto)
+    if coluna not in COLUNAS_INDEXADAS.get(tabela, ()):
+        return f"{col} LIKE %s", [f"%{_escapar_like(texto.strip())}%"]
+    if not palavras:
+        return "1 = 1", []
+
+    longas = [p for p in palavras if len(p) >= NGRAM_TOKEN_SIZE]
+    curtas = [p for p in palavras if len(p) < NGRAM_TOKEN_SIZE]
+    partes, params = [], []
+    if longas:
+        partes.append(f"MATCH({col}) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(expressao_booleana(longas))
+    for palavra in curtas:
+        partes.append(f"{col} LIKE %s")
+        params.append(f"%{_escapar_like(palavra)}%")
+    return ' AND '.join(partes), params
+
+
+def relevancia(tabela, colunas, texto, alias=None):
+    """
+    Expressão de relevância (soma dos MATCH das colunas indexadas) e params, para ordenar
+    resultados de busca. (None, []) se nenhuma palavra do texto alcança o índice.
+    """
+    longas = [p for p in termos(texto) if len(p) >= NGRAM_TOKEN_SIZE]
+    indexadas = [c for c in colunas if c in COLUNAS_INDEXADAS.get(tabela, ())]
+    if not longas or not indexadas:
+        return None, []
+    prefixo = f"{alias}." if alias else ''
+    expressao = expressao_booleana(longas)
+    sql = ' + '.join(f"MATCH({prefixo}{c}) AGAINST (%s IN BOOLEAN MODE)" for c in indexadas)
+    return f"({sql})", [expressao] * len(indexadas)
+
+
+def buscar(db, tenant_id, tabela, colunas, texto, selecionar, limite=10):
+    """
+    Linhas do tenant em que alguma das colunas contém todas as palavras do texto, da mais para
+    a menos relevante (desempate pela primeira coluna).
+
+    :param colunas: Colunas pesquisadas.
+    :param selecionar: Lista SQL das colunas devolvidas (ex: "ID_Obras, Numero_Obra, Nome_Obra").
+    :return: Lista de dicionários (vazia se o texto não tem palavras).
+    """
+    if not termos(texto):
+        return []
+    filtros, params_filtro = [], []
+    for coluna in colunas:
+        sql, params = filtro_texto(tabela, coluna, texto)
+        filtros.append(f"({sql})")
+        params_filtro.extend(params)
+    ordem, params_ordem = relevancia(tabela, colunas, texto)
+    if ordem:
+        selecionar += f", {ordem} AS Relevancia"
+    query = f"""
+        SELECT {selecionar}
+        FROM {tabela}
+        WHERE tenant_id = %s AND ({' OR '.join(filtros)})
+        ORDER BY {'Relevancia DESC, ' if ordem else ''}{colunas[0]}
+        LIMIT %s
+    """
+    params = params_ordem + [tenant_id] + params_filtro + [limite]
+    return db.execute_query(query, tuple(params), fetch_results=True) or []
@@ -1,7 +1,388 @@
 # database/cache_ext.py
 # Instância compartilhada do Flask-Caching. Fica separada de app.py pra evitar
 # import circular (managers precisam de `cache`, app.py importa os managers).
+#
+# Backend padrão: TieredCache (CACHE_TYPE=database.cache_ext.TieredCache), em duas camadas:
+#   L1 - LRU em memória do processo, pequeno e com validade curta (CACHE_L1_MAX, CACHE_L1_TTL).
+#   L2 - cache compartilhado por todos os workers: Redis (CACHE_REDIS_URL) ou, sem Redis,
+#        um SimpleCache local que faz o papel do Redis (desenvolvimento, testes, processo único;
+#        com WEB_CONCURRENCY > 1 o init_worker do app.py recusa subir sem Redis).
+# Toda escrita (set/add/delete/inc...) vai ao L2 e é anunciada num canal de invalidação
+# (pub/sub do Redis, ou LocalInvalidationBus); cada worker descarta na hora as chaves
+# anunciadas do seu L1. O CACHE_L1_TTL limita a defasagem se um anúncio se perder.
+#
+# Os valores passam pelo CompactSerializer (JSON com marcação de date/datetime/Decimal/
+# timedelta, zlib acima de CACHE_COMPRESS_MIN bytes) tanto no Redis quanto no L1 — o L1
+# guarda bytes, então quem recebe um valor do cache sempre recebe uma cópia própria.
+#
+# Cada operação da API do cachelib vira um span "cache.<operação>" do rastreamento do request
+# (database/rastreamento.py) e entra na parcela "cache" do Server-Timing.
 
+import functools
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from cachelib import SimpleCache
 from flask_caching import Cache
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.rediscache import RedisCache
+
+from database import rastreamento
+
+logger = logging.getLogger(__name__)
 
 cache = Cache()
+
+CACHE_L1_MAX = int(os.getenv("CACHE_L1_MAX", "2048"))           # Entradas no L1 de cada processo
+CACHE_L1_TTL = float(os.getenv("CACHE_L1_TTL", "30"))           # Validade máxima no L1, em segundos
+CACHE_COMPRESS_MIN = int(os.getenv("CACHE_COMPRESS_MIN", "1024"))
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+# ===============================================================
+# SERIALIZAÇÃO COMPACTA
+# ===============================================================
+class CompactSerializer:
+    """
+    dumps/loads no formato dos serializers do cachelib (RedisCache.serializer).
+
+    - int: texto ASCII puro (compatível com INCRBY/DECRBY de inc/dec, como no cachelib).
+    - b'j' + JSON (ou b'z' + JSON comprimido): dict/list/str/números/None e os tipos que
+      os managers devolvem do MySQL — date, datetime, time, timedelta e Decimal — marcados
+      como {"~d": "2024-05-01"}, {"~n": "1500.00"} etc. Tuplas voltam como listas.
+    - b'!' + pickle: qualquer outra coisa (ex: dict com chave não-str), como o RedisSerializer.
+    """
+    _TAGS = {
+        '~t': datetime.fromisoformat,
+        '~d': date.fromisoformat,
+        '~h': dt_time.fromisoformat,
+        '~s': lambda v: timedelta(seconds=v),
+        '~n': Decimal,
+    }
+
+    def dumps(self, value):
+        if type(value) is int:
+            return str(value).encode("ascii")
+        try:
+            data = json.dumps(self._encode(value), separators=(',', ':'), ensure_ascii=False).encode()
+        except (TypeError, ValueError):
+            return b"!" + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= CACHE_COMPRESS_MIN:
+            return b"z" + zlib.compress(data)
+        return b"j" + data
+
+    def loads(self, value):
+        if value is None:
+            return None
+        tag, data = value[:1], value[1:]
+        if tag == b"j":
+            return json.loads(data, object_hook=self._decode)
+        if tag == b"z":
+            return json.loads(zlib.decompress(data), object_hook=self._decode)
+        if tag == b"!":
+            try:
+                return pickle.loads(data)
+            except pickle.PickleError:
+                return None
+        try:
+            return int(value)
+        except ValueError:
+            return value
+
+    def _encode(self, value):
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return value
+        if isinstance(value, dict):
+            if not all(isinstance(k, str) for k in value):
+                raise TypeError("chave não-str")
+            return {k: self._encode(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(v) for v in value]
+        if isinstance(value, datetime):  # Antes de date: datetime é subclasse de date
+            return {'~t': value.isoformat()}
+        if isinstance(value, date):
+            return {'~d': value.isoformat()}
+        if isinstance(value, dt_time):
+            return {'~h': value.isoformat()}
+        if isinstance(value, timedelta):  # Colunas TIME do MySQL chegam como timedelta
+            return {'~s': value.total_seconds()}
+        if isinstance(value, Decimal):
+            return {'~n': str(value)}
+        raise TypeError(type(value).__name__)
+
+    def _decode(self, obj):
+        if len(obj) == 1:
+            tag, raw = next(iter(obj.items()))
+            decode = self._TAGS.get(tag)
+            if decode is not None:
+                return decode(raw)
+        return obj
+
+
+# ===============================================================
+# CANAIS DE INVALIDAÇÃO
+# ===============================================================
+class LocalInvalidationBus:
+    """Substituto em memória do pub/sub do Redis: entrega as mensagens aos caches do próprio processo."""
+    def __init__(self):
+        self._subscribers = []
+
+    def publish(self, message):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+
+class RedisInvalidationBus:
+    """Pub/sub do Redis, escutado por uma thread daemon em cada worker."""
+    def __init__(self, client, channel=CACHE_INVALIDATION_CHANNEL):
+        self.client = client
+        self.channel = channel
+        self._thread = None
+
+    def publish(self, message):
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            logger.error("Falha ao anunciar invalidação de cache: %s", e)
+
+    def subscribe(self, callback, on_error=None):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: lambda msg: callback(msg['data'])})
+
+        def exception_handler(ex, pubsub, thread):
+            # Conexão com o Redis caiu: anúncios podem ter se perdido enquanto isso
+            logger.error("Canal de invalidação de cache interrompido: %s", ex)
+            if on_error:
+                on_error()
+            time.sleep(1)
+
+        self._thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=exception_handler)
+
+
+class CompactRedisCache(RedisCache):
+    """RedisCache do Flask-Caching com o CompactSerializer no lugar do pickle."""
+    serializer = CompactSerializer()
+
+
+def _rastreado(operacao):
+    """Span de rastreamento para uma operação do TieredCache (chave, ou quantas chaves; hit nos get)."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            inicio = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            atributos = {'cache.operation': operacao}
+            if operacao == 'get':
+                atributos['cache.hit'] = result is not None
+            if args and isinstance(args[0], str) and operacao not in ('get_many', 'delete_many'):
+                atributos['cache.key'] = args[0]
+            elif args:
+                atributos['cache.keys'] = len(args[0]) if operacao == 'set_many' else len(args)
+            rastreamento.registrar(f'cache.{operacao}', 'cache', inicio, **atributos)
+            return result
+        return wrapper
+    return decorator
+
+
+# ===============================================================
+# CACHE EM DUAS CAMADAS
+# ===============================================================
+class TieredCache(BaseCache):
+    """
+    L1 (LRU em processo) na frente de um L2 compartilhado, com invalidação anunciada.
+
+    :param l2: Backend do cachelib compartilhado entre os workers (Redis ou substituto).
+    :param bus: Canal de invalidação (publish/subscribe), o mesmo para todos os workers.
+    :param l1_max: Máximo de entradas no L1.
+    :param l1_ttl: Validade máxima de uma entrada no L1, em segundos.
+    """
+    serializer = CompactSerializer()
+
+    def __init__(self, l2, bus, l1_max=CACHE_L1_MAX, l1_ttl=CACHE_L1_TTL, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.l2 = l2
+        self.bus = bus
+        self.l1_max = l1_max
+        self.l1_ttl = l1_ttl
+        self.node_id = uuid.uuid4().hex
+        self._l1 = OrderedDict()  # chave -> (expira_em, bytes serializados)
+        self._lock = threading.Lock()
+        self._epoch = 0  # Incrementado a cada invalidação recebida (ver _l1_store)
+        if isinstance(bus, RedisInvalidationBus):
+            bus.subscribe(self._on_message, on_error=self.clear_local)
+        else:
+            bus.subscribe(self._on_message)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        redis_url = config.get("CACHE_REDIS_URL")
+        default_timeout = config.get("CACHE_DEFAULT_TIMEOUT", 300)
+        if redis_url:
+            l2 = CompactRedisCache.factory(app, config, [], {'default_timeout': default_timeout})
+            bus = RedisInvalidationBus(l2._write_client)
+        else:
+            # Sem Redis: L2 local ao processo (um worker só, testes); o canal só alcança este processo
+            l2 = SimpleCache(default_timeout=default_timeout)
+            bus = LocalInvalidationBus()
+        return cls(l2, bus, config.get("CACHE_L1_MAX", CACHE_L1_MAX), config.get("CACHE_L1_TTL", CACHE_L1_TTL),
+                   default_timeout=default_timeout)
+
+    # ---------------------------------------------------------------
+    # L1
+    # ---------------------------------------------------------------
+    def _l1_lookup(self, key):
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+        return self.serializer.loads(data)
+
+    def _l1_store(self, key, value, timeout=None, epoch=None):
+        timeout = self._normalize_timeout(timeout)
+        ttl = min(timeout, self.l1_ttl) if timeout else self.l1_ttl
+        data = self.serializer.dumps(value)
+        with self._lock:
+            # Leitura do L2 que começou antes de uma invalidação pode ter trazido o valor antigo
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._l1[key] = (time.monotonic() + ttl, data)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_max:
+                self._l1.popitem(last=False)
+
+    def _l1_drop(self, keys):
+        with self._lock:
+            for key in keys:
+                self._l1.pop(key, None)
+
+    def clear_local(self):
+        """Esvazia só o L1 deste processo."""
+        with self._lock:
+            self._l1.clear()
+            self._epoch += 1
+
+    def _announce(self, keys):
+        self.bus.publish(json.dumps({'o': self.node_id, 'k': keys}))
+
+    def _on_message(self, message):
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        if payload.get('o') == self.node_id:
+            return  # Anúncio deste próprio processo: o L1 já foi atualizado na escrita
+        keys = payload.get('k')
+        with self._lock:
+            self._epoch += 1
+            if keys == '*':
+                self._l1.clear()
+            else:
+                for key in keys or ():
+                    self._l1.pop(key, None)
+
+    # ---------------------------------------------------------------
+    # API do cachelib
+    # ---------------------------------------------------------------
+    @_rastreado('get')
+    def get(self, key):
+        value = self._l1_lookup(key)
+        if value is not None:
+            return value
+        epoch = self._epoch
+        value = self.l2.get(key)
+        if value is not None:
+            self._l1_store(key, value, epoch=epoch)
+        return value
+
+    @_rastreado('get_many')
+    def get_many(self, *keys):
+        values = [self._l1_lookup(key) for key in keys]
+        missing = [i for i, v in enumerate(values) if v is None]
+        if missing:
+            epoch = self._epoch
+            for i, value in zip(missing, self.l2.get_many(*[keys[i] for i in missing])):
+                values[i] = value
+                if value is not None:
+                    self._l1_store(keys[i], value, epoch=epoch)
+        return values
+
+    @_rastreado('has')
+    def has(self, key):
+        return self._l1_lookup(key) is not None or self.l2.has(key)
+
+    @_rastreado('set')
+    def set(self, key, value, timeout=None):
+        result = self.l2.set(key, value, timeout=timeout)
+        self._l1_drop([key])
+        if result:
+            self._l1_store(key, value, timeout)
+        self._announce([key])
+        return result
+
+    @_rastreado('add')
+    def add(self, key, value, timeout=None):
+        result = self.l2.add(key, value, timeout=timeout)
+        if result:
+            self._l1_store(key, value, timeout)
+        return result
+
+    @_rastreado('set_many')
+    def set_many(self, mapping, timeout=None):
+        result = self.l2.set_many(mapping, timeout=timeout)
+        self._l1_drop(list(mapping))
+        for key in result:
+            self._l1_store(key, mapping[key], timeout)
+        self._announce(list(mapping))
+        return result
+
+    @_rastreado('delete')
+    def delete(self, key):
+        result = self.l2.delete(key)
+        self._l1_drop([key])
+        self._announce([key])
+        return result
+
+    @_rastreado('delete_many')
+    def delete_many(self, *keys):
+        result = self.l2.delete_many(*keys)
+        self._l1_drop(keys)
+        self._announce(list(keys))
+        return result
+
+    @_rastreado('inc')
+    def inc(self, key, delta=1):
+        result = self.l2.inc(key, delta)
+        self._l1_drop([key])
+        self._announce([key])
+        return result
+
+    @_rastreado('dec')
+    def dec(self, key, delta=1):
+        result = self.l2.dec(key, delta)
+        self._l1_drop([key])
+        self._announce([key])
+        return result
+
+    @_rastreado('clear')
+    def clear(self):
+        result = self.l2.clear()
+        self.clear_local()
+        self._announce('*')
+        return result
@@ -0,0 +1,489 @@
+# database/dados_sinteticos.py
+# Gerador de massa de dados sintética multi-tenant para os benchmarks (database/benchmark.py).
+#
+# Cria (ou recria) os tenants bench1..benchN e preenche cada um com o esquema do 1_estrutura.sql
+# (mais tenant_id e as colunas dos scripts 4-9): clientes -> contratos -> obras, com medições,
+# avanços físicos, ARTs, REIDIs e seguros por obra; cargos, níveis e salários; funcionários com
+# documentos, endereço, contatos, dependentes, férias e ASOs; treinamentos com agendamentos e
+# participantes; incidentes/acidentes ligados a obras e funcionários. No fim, o resumo de KPIs
+# (kpi_summary) e o índice da busca global (indice_busca) de cada tenant são remontados.
+#
+# Reprodutível: a mesma semente, o mesmo tamanho e a mesma data-base geram exatamente os mesmos
+# dados (a data-base — hoje, por padrão — posiciona aniversários, vencimentos e férias em relação
+# aos alertas). Chaves únicas globais do esquema (matrícula, número de obra/contrato/ART/apólice,
+# CNPJ, CPF, nomes de cargo/nível/treinamento) levam o número do tenant, para não colidirem.
+#
+# Comando: flask --app app bench-seed --tenants 3 --tamanho medio --yes
+# Só roda num banco de benchmark: o nome do banco conectado (DB_DATABASE) precisa casar com
+# BENCH_BANCO_RE (padrão: conter "bench"), senão gerar() recusa antes de apagar qualquer coisa.
+# Tenants de benchmark são exatamente os de subdomínio bench<N>.
+
+import logging
+import os
+import random
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from database import indice_busca, kpi_summary
+from database.db_base import TenantBoundDatabase, TenantScopedManager
+from database.db_tenant_manager import TenantManager
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_SUBDOMINIO = 'bench'
+SUBDOMINIO_RE = rf"^{PREFIXO_SUBDOMINIO}[0-9]+$"   # REGEXP_LIKE do MySQL: bench1, bench2... e nada mais
+BENCH_BANCO_RE = re.compile(os.getenv("BENCH_BANCO_RE", "bench"), re.IGNORECASE)
+
+# Quantidades por tenant. Os filhos de funcionário (documentos, endereço, contatos, dependentes,
+# férias, ASOs) e de obra (ARTs, REIDIs, seguros) seguem das contagens principais.
+TAMANHOS = {
+    'pequeno': dict(funcionarios=50, clientes=5, contratos_por_cliente=2, obras_por_contrato=2,
+                    medicoes_por_obra=6, avancos_por_obra=6, treinamentos=8, agendamentos_por_treinamento=3,
+                    participantes_por_agendamento=8, incidentes=20),
+    'medio': dict(funcionarios=500, clientes=30, contratos_por_cliente=2, obras_por_contrato=3,
+                  medicoes_por_obra=12, avancos_por_obra=12, treinamentos=20, agendamentos_por_treinamento=6,
+                  participantes_por_agendamento=15, incidentes=200),
+    'grande': dict(funcionarios=5000, clientes=150, contratos_por_cliente=3, obras_por_contrato=3,
+                   medicoes_por_obra=24, avancos_por_obra=24, treinamentos=40, agendamentos_por_treinamento=12,
+                   participantes_por_agendamento=25, incidentes=2000),
+}
+
+# Tabelas do tenant, na ordem em que podem ser apagadas (filhas antes das mães)
+TABELAS = (
+    'treinamentos_participantes', 'treinamentos_agendamentos', 'treinamentos', 'incidentes_acidentes',
+    'asos', 'ferias', 'dependentes', 'funcionarios_contatos', 'funcionarios_enderecos',
+    'funcionarios_documentos', 'funcionarios', 'salarios', 'cargos', 'niveis',
+    'medicoes', 'avancos_fisicos', 'arts', 'reidis', 'seguros', 'obras', 'contratos', 'clientes',
+    'tenant_kpi_summary', 'busca_documentos',
+)
+
+# Valores dos selects dos formulários (modulos/*_bp.py)
+STATUS_OBRA = ('Planejamento', 'Em Andamento', 'Em Andamento', 'Em Andamento', 'Concluída', 'Pausada', 'Cancelada')
+STATUS_CONTRATO = ('Ativo', 'Ativo', 'Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado')
+STATUS_MEDICAO = ('Emitida', 'Aprovada', 'Paga', 'Paga', 'Rejeitada')
+STATUS_ART = ('Paga', 'Emitida', 'Cancelada', 'Em Análise')
+STATUS_REIDI = ('Ativo', 'Inativo', 'Vencido', 'Em Análise')
+STATUS_SEGURO = ('Ativo', 'Vencido', 'Cancelado', 'Em Renovação')
+TIPOS_SEGURO = ('Responsabilidade Civil', 'Riscos de Engenharia', 'Garantia', 'Frota', 'Outros')
+STATUS_FUNCIONARIO = ('Ativo',) * 8 + ('Inativo', 'Ferias', 'Afastado')
+TIPOS_CONTRATACAO = ('CLT',) * 6 + ('PJ', 'Temporario')
+ESTADOS_CIVIS = ('Solteiro(a)', 'Casado(a)', 'Divorciado(a)', 'Viuvo(a)', 'Uniao Estavel')
+GENEROS = ('Masculino', 'Feminino', 'Outro', 'Prefiro nao informar')
+PARENTESCOS = ('Filho(a)', 'Cônjuge', 'Pai', 'Mãe', 'Irmão(ã)', 'Outro')
+STATUS_FERIAS = ('Programada', 'Aprovada', 'Gozo', 'Concluída', 'Cancelada')
+TIPOS_ASO = ('Admissional', 'Periódico', 'Mudança de Função', 'Retorno ao Trabalho', 'Demissional', 'Outro')
+RESULTADOS_ASO = ('Apto',) * 6 + ('Inapto', 'Apto com Restrições')
+TIPOS_TREINAMENTO = ('Obrigatório', 'Reciclagem', 'Voluntário', 'Outro')
+STATUS_AGENDAMENTO = ('Programado', 'Realizado', 'Realizado', 'Cancelado', 'Adiado')
+TIPOS_REGISTRO = ('Incidente', 'Incidente', 'Acidente')
+STATUS_REGISTRO = ('Aberto', 'Em Investigação', 'Concluído', 'Fechado')
+
+CARGOS = ('Engenheiro Civil', 'Técnico de Segurança', 'Mestre de Obras', 'Pedreiro', 'Eletricista', 'Encanador',
+          'Carpinteiro', 'Armador', 'Servente', 'Almoxarife', 'Auxiliar Administrativo', 'Topógrafo')
+NIVEIS = ('Estagiário', 'Júnior', 'Pleno', 'Sênior', 'Especialista', 'N/A')
+TREINAMENTOS = ('NR-35 Trabalho em Altura', 'NR-10 Segurança em Eletricidade', 'NR-18 Construção Civil',
+                'NR-33 Espaço Confinado', 'NR-12 Máquinas e Equipamentos', 'NR-06 EPI', 'Primeiros Socorros',
+                'Combate a Incêndio', 'Direção Defensiva', 'Integração de Segurança')
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+         'Karina', 'Lucas', 'Mariana', 'Nicolas', 'Olívia', 'Paulo', 'Quésia', 'Rafael', 'Sofia', 'Thiago',
+         'Úrsula', 'Vinícius', 'Wesley', 'Yasmin', 'José', 'Maria', 'Antônio', 'Francisca', 'Raimundo', 'Luíza')
+SOBRENOMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+              'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes',
+              'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Mendes')
+EMPRESAS = ('Construtora', 'Incorporadora', 'Engenharia', 'Saneamento', 'Energia', 'Logística', 'Prefeitura de',
+            'Companhia de Águas de', 'Shopping', 'Hospital', 'Indústria', 'Condomínio')
+CIDADES = (('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'),
+           ('Porto Alegre', 'RS'), ('Salvador', 'BA'), ('Recife', 'PE'), ('Fortaleza', 'CE'), ('Goiânia', 'GO'),
+           ('Campinas', 'SP'), ('Florianópolis', 'SC'), ('Vitória', 'ES'))
+OBRAS = ('Ponte', 'Viaduto', 'Edifício Residencial', 'Galpão Logístico', 'Estação de Tratamento', 'Escola',
+         'Pavimentação', 'Drenagem', 'Subestação', 'Reforma', 'Creche', 'Unidade de Saúde', 'Rodovia', 'Adutora')
+RUAS = ('Rua das Flores', 'Avenida Brasil', 'Rua XV de Novembro', 'Avenida Paulista', 'Rua da Paz',
+        'Avenida Getúlio Vargas', 'Rua Sete de Setembro', 'Travessa do Comércio', 'Alameda Santos')
+
+
+# ===============================================================
+# GERAÇÃO (em memória, sem banco)
+# ===============================================================
+class Gerador:
+    """Linhas de um tenant, geradas em memória a partir da semente (ids do banco entram depois)."""
+
+    def __init__(self, numero, tamanho, semente, data_base):
+        self.numero = numero                 # 1 para bench1, 2 para bench2...
+        self.q = TAMANHOS[tamanho]
+        self.rnd = random.Random(f"{semente}:{numero}")
+        self.hoje = data_base
+        self.sufixo = f"B{numero}"           # Nas chaves únicas globais
+
+    # --- Valores ----------------------------------------------------
+    def nome(self):
+        return f"{self.rnd.choice(NOMES)} {self.rnd.choice(SOBRENOMES)} {self.rnd.choice(SOBRENOMES)}"
+
+    def data(self, dias_min, dias_max):
+        """Data entre hoje + dias_min e hoje + dias_max (negativo = passado)."""
+        return self.hoje + timedelta(days=self.rnd.randint(dias_min, dias_max))
+
+    def dinheiro(self, minimo, maximo):
+        return Decimal(self.rnd.randint(minimo * 100, maximo * 100)) / 100
+
+    def cpf(self, n):
+        return f"{self.numero:03d}.{n // 1000:03d}.{n % 1000:03d}-{(self.numero + n) % 100:02d}"
+
+    def cnpj(self, n):
+        return f"{self.numero:02d}.{n:03d}.{self.rnd.randint(0, 999):03d}/0001-{n % 100:02d}"
+
+    def telefone(self):
+        return f"({self.rnd.randint(11, 99)}) 9{self.rnd.randint(1000, 9999)}-{self.rnd.randint(1000, 9999)}"
+
+    # --- Tabelas ----------------------------------------------------
+    def cargos(self):
+        return [{'Nome_Cargo': f"{nome} {self.sufixo}", 'Descricao_Cargo': f"Cargo de {nome.lower()}",
+                 'Cbo': f"{self.rnd.randint(100000, 999999)}"} for nome in CARGOS]
+
+    def niveis(self):
+        return [{'Nome_Nivel': f"{nome} {self.sufixo}", 'Descricao': f"Nível {nome}"} for nome in NIVEIS]
+
+    def salarios(self, id_cargos, id_niveis):
+        return [{'ID_Cargos': c, 'ID_Niveis': n, 'Salario_Base': self.dinheiro(1500, 25000),
+                 'Periculosidade': self.rnd.random() < 0.3, 'Insalubridade': self.rnd.random() < 0.3,
+                 'Ajuda_De_Custo': self.dinheiro(0, 800), 'Vale_Refeicao': self.dinheiro(300, 900),
+                 'Gratificacao': self.dinheiro(0, 2000), 'Cesta_Basica': self.rnd.random() < 0.5,
+                 'Data_Vigencia': self.data(-720, 0)}
+                for c in id_cargos for n in id_niveis]
+
+    def clientes(self):
+        linhas = []
+        for n in range(1, self.q['clientes'] + 1):
+            cidade, uf = self.rnd.choice(CIDADES)
+            nome = f"{self.rnd.choice(EMPRESAS)} {self.rnd.choice(SOBRENOMES)} {n}"
+            linhas.append({'Nome_Cliente': nome, 'CNPJ_Cliente': self.cnpj(n), 'Razao_Social_Cliente': f"{nome} Ltda",
+                           'Endereco_Cliente': f"{self.rnd.choice(RUAS)}, {self.rnd.randint(1, 3000)} - {cidade}/{uf}",
+                           'Telefone_Cliente': self.telefone(), 'Email_Cliente': f"contato{n}@cliente{self.numero}.com.br",
+                           'Contato_Principal_Nome': self.nome()})
+        return linhas
+
+    def contratos(self, id_clientes):
+        linhas, n = [], 0
+        for id_cliente in id_clientes:
+            for _ in range(self.q['contratos_por_cliente']):
+                n += 1
+                assinatura = self.data(-1500, -30)
+                prazo = self.rnd.choice((180, 365, 540, 730, 1095))
+                linhas.append({'ID_Clientes': id_cliente, 'Numero_Contrato': f"{self.sufixo}-CT-{n:05d}",
+                               'Valor_Contrato': self.dinheiro(200_000, 50_000_000), 'Data_Assinatura': assinatura,
+                               'Data_Ordem_Inicio': assinatura + timedelta(days=15), 'Prazo_Contrato_Dias': prazo,
+                               'Data_Termino_Previsto': assinatura + timedelta(days=prazo),
+                               'Status_Contrato': self.rnd.choice(STATUS_CONTRATO), 'Observacoes': None})
+        return linhas
+
+    def obras(self, contratos):
+        """Obras e, por obra (na mesma ordem), os avanços físicos — que dão as colunas denormalizadas da obra."""
+        obras, avancos, n = [], [], 0
+        for contrato in contratos:
+            for _ in range(self.q['obras_por_contrato']):
+                n += 1
+                inicio = contrato['Data_Ordem_Inicio']
+                cidade, uf = self.rnd.choice(CIDADES)
+                lancamentos = self._avancos(inicio)
+                ultimo = lancamentos[-1] if lancamentos else None
+                obras.append({
+                    'ID_Contratos': contrato['id'], 'Numero_Obra': f"{self.sufixo}-OB-{n:05d}",
+                    'Nome_Obra': f"{self.rnd.choice(OBRAS)} {self.rnd.choice(SOBRENOMES)} {n}",
+                    'Endereco_Obra': f"{self.rnd.choice(RUAS)}, {self.rnd.randint(1, 3000)} - {cidade}/{uf}",
+                    'Escopo_Obra': 'Execução completa da obra, incluindo fornecimento de materiais e mão de obra.',
+                    'Valor_Obra': (contrato['Valor_Contrato'] / self.q['obras_por_contrato']).quantize(Decimal('0.01')),
+                    'Valor_Aditivo_Total': self.dinheiro(0, 500_000) if self.rnd.random() < 0.3 else Decimal('0.00'),
+                    'Status_Obra': self.rnd.choice(STATUS_OBRA), 'Data_Inicio_Prevista': inicio,
+                    'Data_Fim_Prevista': contrato['Data_Termino_Previsto'],
+                    'Ultimo_Avanco_Percentual': ultimo['Percentual_Avanco_Fisico'] if ultimo else None,
+                    'Ultima_Data_Avanco': ultimo['Data_Avanco'] if ultimo else None,
+                    'Avanco_Acumulado': sum((a['Percentual_Avanco_Fisico'] for a in lancamentos), Decimal('0.00')),
+                })
+                avancos.append(lancamentos)
+        return obras, avancos
+
+    def _avancos(self, inicio):
+        """Avanços mensais a partir do início, somando no máximo 100%."""
+        restante, linhas = Decimal(100), []
+        for mes in range(self.q['avancos_por_obra']):
+            data_avanco = inicio + timedelta(days=30 * (mes + 1))
+            if data_avanco > self.hoje or restante <= 0:
+                break
+            percentual = min(restante, Decimal(self.rnd.randint(100, 1500)) / 100)
+            restante -= percentual
+            linhas.append({'Percentual_Avanco_Fisico': percentual, 'Data_Avanco': data_avanco})
+        return linhas
+
+    def filhos_de_obra(self, obras):
+        """Medições, ARTs, REIDIs e seguros das obras (já com 'id')."""
+        medicoes, arts, reidis, seguros = [], [], [], []
+        for obra in obras:
+            valor_mensal = (obra['Valor_Obra'] or Decimal(0)) / max(self.q['medicoes_por_obra'], 1)
+            for numero in range(1, self.q['medicoes_por_obra'] + 1):
+                data_medicao = obra['Data_Inicio_Prevista'] + timedelta(days=30 * numero)
+                if data_medicao > self.hoje:
+                    break
+                status = self.rnd.choice(STATUS_MEDICAO)
+                medicoes.append({'ID_Obras': obra['id'], 'Numero_Medicao': numero,
+                                 'Valor_Medicao': (valor_mensal * Decimal(self.rnd.uniform(0.6, 1.2))).quantize(Decimal('0.01')),
+                                 'Data_Medicao': data_medicao, 'Mes_Referencia': data_medicao.strftime('%m/%Y'),
+                                 'Data_Aprovacao': data_medicao + timedelta(days=10) if status in ('Aprovada', 'Paga') else None,
+                                 'Status_Medicao': status, 'Observacao_Medicao': None})
+            for _ in range(self.rnd.randint(1, 2)):
+                arts.append({'ID_Obras': obra['id'], 'Numero_Art': f"{self.sufixo}-ART-{len(arts) + 1:06d}",
+                             'Data_Pagamento': self.data(-900, 0), 'Valor_Pagamento': self.dinheiro(100, 3000),
+                             'Status_Art': self.rnd.choice(STATUS_ART)})
+            if self.rnd.random() < 0.5:
+                aprovacao = self.data(-1000, -30)
+                reidis.append({'ID_Obras': obra['id'], 'Numero_Portaria': f"{self.sufixo}-PORT-{len(reidis) + 1:05d}",
+                               'Numero_Ato_Declaratorio': f"{self.sufixo}-ADE-{len(reidis) + 1:05d}",
+                               'Data_Aprovacao_Reidi': aprovacao, 'Data_Validade_Reidi': aprovacao + timedelta(days=1825),
+                               'Status_Reidi': self.rnd.choice(STATUS_REIDI), 'Observacoes_Reidi': None})
+            for _ in range(self.rnd.randint(1, 2)):
+                vigencia = self.data(-700, 0)
+                seguros.append({'ID_Obras': obra['id'], 'Numero_Apolice': f"{self.sufixo}-AP-{len(seguros) + 1:06d}",
+                                'Seguradora': f"Seguradora {self.rnd.choice(SOBRENOMES)}",
+                                'Tipo_Seguro': self.rnd.choice(TIPOS_SEGURO), 'Valor_Segurado': self.dinheiro(100_000, 20_000_000),
+                                'Data_Inicio_Vigencia': vigencia, 'Data_Fim_Vigencia': vigencia + timedelta(days=365),
+                                'Status_Seguro': self.rnd.choice(STATUS_SEGURO), 'Observacoes_Seguro': None})
+        return medicoes, arts, reidis, seguros
+
+    def funcionarios(self, id_cargos, id_niveis):
+        """Funcionários e os filhos de cada um: documentos, endereço, contatos, dependentes, férias, ASOs."""
+        r = dict(funcionarios=[], documentos=[], enderecos=[], contatos=[], dependentes=[], ferias=[], asos=[])
+        for n in range(1, self.q['funcionarios'] + 1):
+            matricula = f"{self.sufixo}-{n:06d}"
+            # Parte dos admitidos nos últimos 90 dias (alerta de fim de experiência)
+            admissao = self.data(-89, -1) if self.rnd.random() < 0.1 else self.data(-5000, -90)
+            status = self.rnd.choice(STATUS_FUNCIONARIO)
+            cidade, uf = self.rnd.choice(CIDADES)
+            r['funcionarios'].append({'Matricula': matricula, 'Nome_Completo': self.nome(), 'Data_Admissao': admissao,
+                                      'ID_Cargos': self.rnd.choice(id_cargos), 'ID_Niveis': self.rnd.choice(id_niveis),
+                                      'Status': status, 'Tipo_Contratacao': self.rnd.choice(TIPOS_CONTRATACAO)})
+            tem_cnh = self.rnd.random() < 0.4
+            r['documentos'].append({
+                'Matricula_Funcionario': matricula, 'Data_Nascimento': self.data(-365 * 60, -365 * 18),
+                'Estado_Civil': self.rnd.choice(ESTADOS_CIVIS), 'Nacionalidade': 'Brasileira',
+                'Naturalidade': cidade, 'Genero': self.rnd.choice(GENEROS),
+                'Rg_Numero': f"{self.numero}{n:07d}", 'Rg_OrgaoEmissor': 'SSP', 'Rg_UfEmissor': uf,
+                'Rg_DataEmissao': self.data(-7000, -365), 'Cpf_Numero': self.cpf(n),
+                'Ctps_Numero': f"{n:07d}", 'Ctps_Serie': f"{self.rnd.randint(1, 999):03d}", 'Pispasep': f"{self.numero}{n:010d}",
+                'Cnh_Numero': f"{self.numero}{n:09d}" if tem_cnh else None,
+                'Cnh_Categoria': self.rnd.choice(('B', 'C', 'D', 'AB')) if tem_cnh else None,
+                'Cnh_DataValidade': self.data(-60, 1500) if tem_cnh else None,
+                'Cnh_OrgaoEmissor': 'DETRAN' if tem_cnh else None,
+                'TitEleitor_Numero': f"{self.numero}{n:011d}", 'TitEleitor_Zona': f"{self.rnd.randint(1, 400):03d}",
+                'TitEleitor_Secao': f"{self.rnd.randint(1, 900):04d}", 'Observacoes': None, 'Link_Foto': None,
+            })
+            r['enderecos'].append({'Matricula_Funcionario': matricula, 'Tipo_Endereco': 'Residencial',
+                                   'Logradouro': self.rnd.choice(RUAS), 'Numero': str(self.rnd.randint(1, 3000)),
+                                   'Complemento': None, 'Bairro': 'Centro', 'Cidade': cidade, 'Estado': uf,
+                                   'Cep': f"{self.rnd.randint(10000, 99999)}-{self.rnd.randint(0, 999):03d}"})
+            r['contatos'].append({'Matricula_Funcionario': matricula, 'Tipo_Contato': 'Telefone Celular',
+                                  'Valor_Contato': self.telefone(), 'Observacoes': None})
+            r['contatos'].append({'Matricula_Funcionario': matricula, 'Tipo_Contato': 'Email Pessoal',
+                                  'Valor_Contato': f"{matricula.lower()}@email.com", 'Observacoes': None})
+            for _ in range(self.rnd.choice((0, 0, 1, 1, 2, 3))):
+                r['dependentes'].append({'Matricula_Funcionario': matricula, 'Nome_Completo': self.nome(),
+                                         'Parentesco': self.rnd.choice(PARENTESCOS), 'Data_Nascimento': self.data(-365 * 40, -30),
+                                         'Cpf': None, 'Contato_Emergencia': self.rnd.random() < 0.3,
+                                         'Telefone_Emergencia': self.telefone(), 'Observacoes': None})
+            for periodo in range(self.rnd.randint(0, 2)):
+                aquisitivo = admissao + timedelta(days=365 * periodo)
+                gozo = self.data(-300, 120)
+                r['ferias'].append({'Matricula_Funcionario': matricula, 'Periodo_Aquisitivo_Inicio': aquisitivo,
+                                    'Periodo_Aquisitivo_Fim': aquisitivo + timedelta(days=364),
+                                    'Data_Inicio_Gozo': gozo, 'Data_Fim_Gozo': gozo + timedelta(days=29), 'Dias_Gozo': 30,
+                                    'Status_Ferias': self.rnd.choice(STATUS_FERIAS), 'Observacoes': None})
+            for _ in range(self.rnd.randint(1, 3)):
+                emissao = self.data(-700, 0)
+                r['asos'].append({'Matricula_Funcionario': matricula, 'Tipo_ASO': self.rnd.choice(TIPOS_ASO),
+                                  'Data_Emissao': emissao, 'Data_Vencimento': emissao + timedelta(days=365),
+                                  'Resultado': self.rnd.choice(RESULTADOS_ASO), 'Medico_Responsavel': f"Dr(a). {self.nome()}",
+                                  'Observacoes': None})
+        return r
+
+    def treinamentos(self):
+        linhas = []
+        for n in range(self.q['treinamentos']):
+            base = TREINAMENTOS[n % len(TREINAMENTOS)]
+            linhas.append({'Nome_Treinamento': f"{base} {self.sufixo}-{n + 1}", 'Descricao': f"Treinamento {base}",
+                           'Carga_Horaria_Horas': Decimal(self.rnd.choice((4, 8, 16, 40))),
+                           'Tipo_Treinamento': self.rnd.choice(TIPOS_TREINAMENTO),
+                           'Validade_Dias': self.rnd.choice((None, 365, 730)), 'Instrutor_Responsavel': self.nome()})
+        return linhas
+
+    def agendamentos(self, id_treinamentos):
+        linhas = []
+        for id_treinamento in id_treinamentos:
+            for _ in range(self.q['agendamentos_por_treinamento']):
+                inicio = datetime.combine(self.data(-400, 90), datetime.min.time()) + timedelta(hours=self.rnd.choice((8, 13)))
+                linhas.append({'ID_Treinamento': id_treinamento, 'Data_Hora_Inicio': inicio,
+                               'Data_Hora_Fim': inicio + timedelta(hours=4),
+                               'Local_Treinamento': self.rnd.choice(('Sala 1', 'Sala 2', 'Canteiro', 'Online')),
+                               'Status_Agendamento': self.rnd.choice(STATUS_AGENDAMENTO), 'Observacoes': None})
+        return linhas
+
+    def participantes(self, agendamentos, matriculas):
+        linhas = []
+        quantidade = min(self.q['participantes_por_agendamento'], len(matriculas))
+        for agendamento in agendamentos:
+            for matricula in self.rnd.sample(matriculas, quantidade):
+                presente = self.rnd.random() < 0.85
+                linhas.append({'ID_Agendamento': agendamento['id'], 'Matricula_Funcionario': matricula,
+                               'Presenca': presente, 'Nota_Avaliacao': self.dinheiro(5, 10) if presente else None,
+                               'Data_Conclusao': agendamento['Data_Hora_Inicio'].date() if presente else None,
+                               'Certificado_Emitido': presente and self.rnd.random() < 0.7})
+        return linhas
+
+    def incidentes(self, id_obras, matriculas):
+        linhas = []
+        for _ in range(self.q['incidentes']):
+            status = self.rnd.choice(STATUS_REGISTRO)
+            ocorrencia = datetime.combine(self.data(-720, 0), datetime.min.time()) + timedelta(minutes=self.rnd.randint(360, 1080))
+            linhas.append({'Tipo_Registro': self.rnd.choice(TIPOS_REGISTRO), 'Data_Hora_Ocorrencia': ocorrencia,
+                           'Local_Ocorrencia': 'Canteiro de obras', 'ID_Obras': self.rnd.choice(id_obras) if id_obras else None,
+                           'Descricao_Resumida': 'Ocorrência registrada durante a execução dos serviços.',
+                           'Causas_Identificadas': None, 'Acoes_Corretivas_Tomadas': None,
+                           'Acoes_Preventivas_Recomendadas': None, 'Status_Registro': status,
+                           'Responsavel_Investigacao_Funcionario_Matricula': self.rnd.choice(matriculas) if matriculas else None,
+                           'Data_Fechamento': ocorrencia.date() + timedelta(days=30) if status == 'Fechado' else None,
+                           'Observacoes': None})
+        return linhas
+
+
+# ===============================================================
+# GRAVAÇÃO
+# ===============================================================
+class _Carga(TenantScopedManager):
+    """INSERTs multi-linha no tenant (insert_rows) e leitura dos ids gerados pelo banco."""
+
+    def gravar(self, tabela, linhas, timestamps=True):
+        if linhas:
+            colunas = [c for c in linhas[0] if c != 'id']
+            self.insert_rows(tabela, colunas, linhas, timestamps=timestamps)
+
+    def ids(self, tabela, coluna_id, coluna_chave=None):
+        """{chave: id} (ou a lista de ids, na ordem de inserção, se não há coluna_chave)."""
+        clause, tenant_param = self.tenant_clause()
+        colunas = f"{coluna_id}, {coluna_chave}" if coluna_chave else coluna_id
+        rows = self.db.execute_query(f"SELECT {colunas} FROM {tabela} WHERE {clause} ORDER BY {coluna_id}",
+                                     (tenant_param,), fetch_results=True) or []
+        if coluna_chave:
+            return {row[coluna_chave]: row[coluna_id] for row in rows}
+        return [row[coluna_id] for row in rows]
+
+    def atribuir_ids(self, tabela, coluna_id, linhas, coluna_chave=None):
+        """Preenche linha['id'] com o id gerado (pela chave natural ou pela ordem de inserção)."""
+        ids = self.ids(tabela, coluna_id, coluna_chave)
+        for i, linha in enumerate(linhas):
+            linha['id'] = ids[linha[coluna_chave]] if coluna_chave else ids[i]
+        return [linha['id'] for linha in linhas]
+
+
+def _tenant(db, numero):
+    """Id do tenant benchN (criado se ainda não existe)."""
+    subdominio = f"{PREFIXO_SUBDOMINIO}{numero}"
+    tenant = TenantManager(db).find_by_subdomain(subdominio)
+    if not tenant:
+        db.execute_query("INSERT INTO tenants (subdomain, nome_fantasia, ativo) VALUES (%s, %s, 1)",
+                         (subdominio, f"Benchmark {numero}"), fetch_results=False)
+        tenant = TenantManager(db).find_by_subdomain(subdominio)
+    return tenant['id']
+
+
+def limpar(db, tenant_id):
+    """Apaga todos os dados do tenant (filhas antes das mães), numa transação."""
+    db = TenantBoundDatabase(db, tenant_id)
+    with db.transaction():
+        for tabela in TABELAS:
+            db.execute_write(f"DELETE FROM {tabela} WHERE tenant_id = %s", (tenant_id,))
+
+
+def popular(db, tenant_id, gerador):
+    """Grava a massa do gerador no tenant (que deve estar vazio). Retorna {tabela: linhas}."""
+    carga = _Carga(db, tenant_id)
+    contagem = {}
+
+    def gravar(tabela, linhas, **kwargs):
+        carga.gravar(tabela, linhas, **kwargs)
+        contagem[tabela] = contagem.get(tabela, 0) + len(linhas)
+
+    with carga.db.transaction():
+        cargos, niveis = gerador.cargos(), gerador.niveis()
+        gravar('cargos', cargos)
+        gravar('niveis', niveis)
+        id_cargos = carga.atribuir_ids('cargos', 'ID_Cargos', cargos, 'Nome_Cargo')
+        id_niveis = carga.atribuir_ids('niveis', 'ID_Niveis', niveis, 'Nome_Nivel')
+        gravar('salarios', gerador.salarios(id_cargos, id_niveis))
+
+        clientes = gerador.clientes()
+        gravar('clientes', clientes)
+        contratos = gerador.contratos(carga.atribuir_ids('clientes', 'ID_Clientes', clientes, 'CNPJ_Cliente'))
+        gravar('contratos', contratos)
+        carga.atribuir_ids('contratos', 'ID_Contratos', contratos, 'Numero_Contrato')
+        obras, avancos = gerador.obras(contratos)
+        gravar('obras', obras)
+        id_obras = carga.atribuir_ids('obras', 'ID_Obras', obras, 'Numero_Obra')
+        gravar('avancos_fisicos', [dict(a, ID_Obras=obra['id']) for obra, lista in zip(obras, avancos) for a in lista])
+        medicoes, arts, reidis, seguros = gerador.filhos_de_obra(obras)
+        gravar('medicoes', medicoes)
+        gravar('arts', arts)
+        gravar('reidis', reidis)
+        gravar('seguros', seguros)
+
+        pessoal = gerador.funcionarios(id_cargos, id_niveis)
+        gravar('funcionarios', pessoal['funcionarios'])
+        gravar('funcionarios_documentos', pessoal['documentos'])
+        gravar('funcionarios_enderecos', pessoal['enderecos'])
+        gravar('funcionarios_contatos', pessoal['contatos'])
+        gravar('dependentes', pessoal['dependentes'])
+        gravar('ferias', pessoal['ferias'])
+        gravar('asos', pessoal['asos'])
+        matriculas = [f['Matricula'] for f in pessoal['funcionarios']]
+
+        treinamentos = gerador.treinamentos()
+        gravar('treinamentos', treinamentos)
+        agendamentos = gerador.agendamentos(
+            carga.atribuir_ids('treinamentos', 'ID_Treinamento', treinamentos, 'Nome_Treinamento'))
+        gravar('treinamentos_agendamentos', agendamentos)
+        carga.atribuir_ids('treinamentos_agendamentos', 'ID_Agendamento', agendamentos)
+        gravar('treinamentos_participantes', gerador.participantes(agendamentos, matriculas))
+        gravar('incidentes_acidentes', gerador.incidentes(id_obras, matriculas))
+
+    kpi_summary.reconstruir(db, tenant_id)
+    indice_busca.reconstruir(carga.db, tenant_id)
+    return contagem
+
+
+def verificar_banco(db):
+    """Levanta RuntimeError se o banco conectado não for de benchmark (ver BENCH_BANCO_RE)."""
+    rows = db.execute_query("SELECT DATABASE() AS banco", fetch_results=True) or []
+    banco = rows[0]['banco'] if rows else None
+    if not banco or not BENCH_BANCO_RE.search(banco):
+        raise RuntimeError(f"Banco '{banco}' não é de benchmark (BENCH_BANCO_RE={BENCH_BANCO_RE.pattern!r}); "
+                           "aponte DB_DATABASE para o banco de benchmark.")
+    return banco
+
+
+def gerar(db, tenants=1, tamanho='pequeno', semente=42, data_base=None, echo=logger.info):
+    """
+    Recria os tenants bench1..bench<tenants> com a massa sintética (os dados anteriores deles são
+    apagados). Recusa (RuntimeError) fora de um banco de benchmark. Retorna {tenant_id: {tabela: linhas}}.
+    """
+    verificar_banco(db)
+    data_base = data_base or date.today()
+    resultado = {}
+    for numero in range(1, tenants + 1):
+        tenant_id = _tenant(db, numero)
+        limpar(db, tenant_id)
+        resultado[tenant_id] = popular(db, tenant_id, Gerador(numero, tamanho, semente, data_base))
+        echo(f"Tenant {tenant_id} ({PREFIXO_SUBDOMINIO}{numero}): {sum(resultado[tenant_id].values())} linhas.")
+    return resultado
+
+
+def tenants_de_benchmark(db):
+    """Ids dos tenants criados por gerar(), em ordem."""
+    rows = db.execute_query("SELECT id FROM tenants WHERE REGEXP_LIKE(subdomain, %s, 'c') ORDER BY id",
+                            (SUBDOMINIO_RE,), fetch_results=True) or []
+    return [row['id'] for row in rows]
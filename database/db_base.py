@@ -1,28 +1,319 @@
 # database/db_base.py
 
+import base64
+import hashlib
+import json
 import logging
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
 
 import mysql.connector
-from mysql.connector import Error, pooling
+from flask import g, has_request_context
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+from database import busca, detector_consultas, metricas, rastreamento
+from database.query_cache import bump_tables, cached_value, tables_read, tables_written
 
 logger = logging.getLogger(__name__)
 
+# Pool do processo atual. Depois de um fork (gunicorn --preload) o filho NÃO usa o pool herdado:
+# get_pool() percebe o PID novo e cria outro (ver init_pool).
 _pool = None
+_pool_pid = None
+_pool_config = None
+_inherited_pools = []
+_pool_lock = threading.Lock()
+
+# Paginação das listagens (ver TenantScopedManager.fetch_page)
+DEFAULT_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = 500
+_PAGE_TOKEN_VERSION = 1
+
+# Campos de seleção com busca por prefixo (ver TenantScopedManager.fetch_typeahead)
+TYPEAHEAD_LIMIT = int(os.getenv("TYPEAHEAD_LIMIT", "20"))
+TYPEAHEAD_MAX_LIMIT = 100
+TYPEAHEAD_CACHE_TTL = int(os.getenv("TYPEAHEAD_CACHE_TTL", "600"))
+
+# Leitura em streaming (ver DatabaseManager.iter_batches): linhas trazidas do servidor por vez
+STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "1000"))
+
+# Escrita em lote (ver TenantScopedManager.insert_rows): linhas por INSERT multi-linha
+BULK_INSERT_ROWS = int(os.getenv("DB_BULK_INSERT_ROWS", "500"))
+
+# Catálogo global de módulos (ver UserManager.get_all_modules)
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "3600"))
+
+
+# Pool de conexões (ver ConnectionPool). O padrão do tamanho acompanha as threads por worker:
+# com a conexão por request, cada thread segura no máximo uma conexão.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or os.getenv("GUNICORN_THREADS") or "5")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", str(DB_POOL_SIZE)))  # Abertas já no aquecimento do worker
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "2"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))
 
 
 def init_pool(db_config):
-    """Inicializa o pool de conexões uma única vez, no startup do app."""
-    global _pool
-    _pool = pooling.MySQLConnectionPool(
-        pool_name="lumob_pool",
-        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
-        pool_reset_session=True,
+    """
+    Inicializa o pool de conexões do processo atual (no startup do app e, sob gunicorn, de novo
+    em cada worker via post_fork). Nenhuma conexão é aberta aqui: o pool conecta sob demanda.
+    """
+    global _pool, _pool_pid, _pool_config
+    if _pool is not None and _pool_pid != os.getpid():
+        # Pool herdado do processo pai: as conexões dele pertencem ao pai. Mantém a referência
+        # para o coletor de lixo não fechá-las (o close mandaria COM_QUIT no socket do pai).
+        _inherited_pools.append(_pool)
+    _pool_pid = os.getpid()
+    _pool_config = db_config
+    _pool = ConnectionPool(
+        size=DB_POOL_SIZE,
+        min_size=DB_POOL_MIN,
+        max_overflow=DB_POOL_MAX_OVERFLOW,
+        timeout=DB_POOL_TIMEOUT,
+        idle_timeout=DB_POOL_IDLE_TIMEOUT,
+        ping_after=DB_POOL_PING_AFTER,
         host=db_config["host"],
         database=db_config["database"],
         user=db_config["user"],
         password=db_config["password"],
     )
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    logger.info(
+        "Pool MySQL: %d conexões + %d de overflow por worker; com %d worker(s), até %d conexões no servidor.",
+        _pool.size, _pool.max_overflow, workers, workers * (_pool.size + _pool.max_overflow),
+    )
+
+
+def get_pool():
+    """Pool do processo atual; recriado se este processo é um fork de quem chamou init_pool."""
+    if _pool is None:
+        raise RuntimeError("Pool de conexões não inicializado — chame database.db_base.init_pool() no startup do app.")
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                init_pool(_pool_config)
+    return _pool
+
+
+def pool_stats():
+    """Métricas do pool do processo atual (ver ConnectionPool.stats), ou None antes do init_pool."""
+    return get_pool().stats() if _pool is not None else None
+
+
+# ---------------------------------------------------------------
+# Pool de conexões
+# ---------------------------------------------------------------
+class PooledConnection:
+    """
+    Conexão emprestada pelo ConnectionPool. Repassa tudo para a conexão MySQL real;
+    close() devolve ao pool em vez de fechar (mesmo contrato do pooling do mysql-connector).
+    """
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise Error("Conexão já devolvida ao pool.")
+        return getattr(self._cnx, name)
+
+    def is_connected(self):
+        return self._cnx is not None and self._cnx.is_connected()
+
+    def close(self):
+        cnx, self._cnx = self._cnx, None
+        if cnx is not None:
+            self._pool._checkin(cnx)
+
+
+class ConnectionPool:
+    """
+    Pool de conexões MySQL que ESPERA por uma conexão livre em vez de falhar na hora
+    (o MySQLConnectionPool levanta PoolError assim que esgota).
+
+    - size conexões ficam abertas e reaproveitadas; sob pico, até max_overflow conexões extras
+      são abertas e fechadas na devolução.
+    - Esgotado o pool, o checkout aguarda na fila até timeout segundos e então levanta PoolError
+      (subclasse de mysql.connector.Error, tratada pelos mesmos except de antes).
+    - Conexões ociosas há mais de idle_timeout segundos são descartadas no checkout; as
+      ociosas há mais de ping_after segundos são validadas com ping antes de serem entregues.
+    - stats() expõe espera no checkout, conexões em uso/ociosas e timeouts.
+    """
+    def __init__(self, size=5, min_size=0, max_overflow=0, timeout=5.0, idle_timeout=300.0, ping_after=30.0,
+                 reset_session=True, **connect_args):
+        self.size = size
+        self.min_size = min(min_size, size)
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.reset_session = reset_session
+        self._connect_args = connect_args
+        self._idle = deque()  # (conexão, devolvida_em); a mais recente no fim
+        self._open = 0        # conexões abertas (ociosas + em uso)
+        self._cond = threading.Condition()
+        self._stats = dict(checkouts=0, timeouts=0, waits=0, wait_total_s=0.0, wait_max_s=0.0,
+                           created=0, discarded=0)
+
+    def get_connection(self):
+        """Empresta uma conexão, aguardando até self.timeout segundos se o pool estiver esgotado."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            cnx = None
+            with self._cond:
+                while not self._idle and self._open >= self.size + self.max_overflow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolError(f"Pool de conexões esgotado: nenhuma conexão livre em {self.timeout:g}s.")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    cnx, idle_since = self._idle.pop()
+                else:
+                    self._open += 1  # reserva a vaga; a conexão é aberta fora do lock
+            if cnx is None:
+                cnx = self._connect()
+            else:
+                cnx = self._validate(cnx, time.monotonic() - idle_since)
+                if cnx is None:
+                    continue
+            self._record_checkout(time.monotonic() - start, waited)
+            return PooledConnection(self, cnx)
+
+    def prefill(self):
+        """Abre conexões ociosas até min_size (aquecimento do worker). Retorna quantas abriu."""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._open >= self.min_size:
+                    return opened
+                self._open += 1
+            cnx = self._connect()
+            with self._cond:
+                self._idle.append((cnx, time.monotonic()))
+                self._cond.notify()
+            opened += 1
+
+    def stats(self):
+        """Snapshot das métricas: tamanho, em uso, ociosas, espera no checkout e timeouts."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(size=self.size, max_overflow=self.max_overflow, open=self._open,
+                         idle=len(self._idle), in_use=self._open - len(self._idle))
+        return stats
+
+    def _connect(self):
+        try:
+            cnx = mysql.connector.connect(**self._connect_args)
+        except BaseException:
+            self._release_slot()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return cnx
+
+    def _validate(self, cnx, idle_for):
+        """Conexão ociosa pronta para uso, ou None (descartada) se expirou ou não responde ao ping."""
+        if idle_for > self.idle_timeout:
+            self._discard(cnx)
+            return None
+        if idle_for > self.ping_after:
+            try:
+                cnx.ping(reconnect=False)
+            except Error:
+                self._discard(cnx)
+                return None
+        return cnx
+
+    def _checkin(self, cnx):
+        with self._cond:
+            overflow = len(self._idle) >= self.size
+        if overflow:
+            self._discard(cnx)  # Conexão de overflow: fecha em vez de guardar
+            return
+        try:
+            if cnx.unread_result:
+                cnx.consume_results()
+            if self.reset_session:
+                cnx.reset_session()
+            elif cnx.in_transaction:
+                cnx.rollback()
+        except Error as e:
+            logger.warning("Conexão descartada na devolução ao pool: %s", e)
+            self._discard(cnx)
+            return
+        with self._cond:
+            self._idle.append((cnx, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, cnx):
+        try:
+            cnx.close()
+        except Error:
+            pass
+        with self._cond:
+            self._stats['discarded'] += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _record_checkout(self, wait, waited):
+        metricas.registrar_espera_pool(wait)
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_total_s'] += wait
+            self._stats['wait_max_s'] = max(self._stats['wait_max_s'], wait)
+            if waited:
+                self._stats['waits'] += 1
+
+
+# ---------------------------------------------------------------
+# Conexão por request
+# ---------------------------------------------------------------
+# Dentro de um request Flask, todos os 'with DatabaseManager(...)' (load_user, corpo da rota,
+# managers dos blueprints) compartilham UMA conexão do pool, guardada em flask.g: o checkout
+# (e o round trip de reset de sessão do pool) acontece uma vez por request, e a conexão volta
+# ao pool no teardown (release_request_connection, registrado no app.py).
+def request_connection():
+    """Conexão do pool presa ao request atual (checkout na primeira chamada)."""
+    conn = g.get('_db_connection')
+    if conn is None:
+        conn = get_pool().get_connection()
+        g._db_connection = conn
+    return conn
+
+
+def release_request_connection(exc=None):
+    """teardown_request: devolve ao pool a conexão do request, se alguma foi usada."""
+    conn = g.pop('_db_connection', None)
+    if conn is not None:
+        try:
+            conn.close() # Com pool, devolve a conexão (o pool faz o reset da sessão)
+        except Error as e:
+            logger.warning("Erro ao devolver a conexão do request ao pool: %s", e)
+
+
+def _registrar_consulta(query, inicio, erro=False):
+    """
+    Métricas (/metrics), span de rastreamento e contagem do detector de N+1 de uma consulta
+    iniciada em time.perf_counter() = inicio.
+    """
+    metricas.registrar_consulta(query, time.perf_counter() - inicio, erro)
+    rastreamento.registrar_consulta(query, inicio, erro)
+    detector_consultas.registrar(query)
 
 
 # 1. Definição da classe DatabaseManager
@@ -30,21 +321,29 @@ class DatabaseManager:
     """
     Gerencia a conexão com o banco de dados MySQL e operações CRUD.
     Utiliza context manager para garantir que a conexão seja devolvida ao pool automaticamente.
+
+    Dentro de um request Flask o bloco 'with' reaproveita a conexão do request (ver
+    request_connection) e não a devolve na saída — quem devolve é o teardown do request.
+    Fora de um request (scripts, testes) ou com request_scoped=False, cada bloco faz o
+    próprio checkout, como antes.
     """
-    def __init__(self, host, database, user, password):
+    def __init__(self, host, database, user, password, request_scoped=True):
         """Inicializa o gerenciador com as credenciais do banco de dados."""
         self.host = host
         self.database = database
         self.user = user
         self.password = password
+        self.request_scoped = request_scoped
         self.connection = None
+        self._shared = False
+        self._tx_depth = 0
 
     def __enter__(self):
-        """Obtém uma conexão do pool ao entrar no bloco 'with'."""
-        if _pool is None:
-            raise RuntimeError("Pool de conexões não inicializado — chame database.db_base.init_pool() no startup do app.")
+        """Obtém uma conexão do pool (ou a do request atual) ao entrar no bloco 'with'."""
+        pool = get_pool()
         try:
-            self.connection = _pool.get_connection()
+            self._shared = self.request_scoped and has_request_context()
+            self.connection = request_connection() if self._shared else pool.get_connection()
             return self # Retorna a instância da classe para ser usada no 'as db_manager'
         except Error as e:
             logger.error("Erro ao conectar ao MySQL: %s", e)
@@ -52,9 +351,15 @@ class DatabaseManager:
             raise # Re-lança a exceção para que o problema seja visível
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Devolve a conexão ao pool ao sair do bloco 'with'."""
-        if self.connection and self.connection.is_connected():
-            self.connection.close() # Com pool, isso devolve a conexão em vez de destruí-la
+        """Devolve a conexão ao pool ao sair do bloco 'with' (a do request só no teardown)."""
+        if self._shared:
+            if exc_type is not None and issubclass(exc_type, Error) and not self.connection.is_connected():
+                # Conexão caiu no meio do request: descarta para o próximo bloco pegar outra do pool
+                release_request_connection()
+            self.connection = None
+            return
+        if self.connection:
+            self.connection.close() # Com pool, isso devolve a conexão em vez de destruí-la (se caiu, o pool descarta)
 
     def execute_query(self, query, params=None, fetch_results=True):
         """
@@ -69,6 +374,7 @@ class DatabaseManager:
             return None
 
         cursor = self.connection.cursor(dictionary=True)
+        inicio, erro = time.perf_counter(), False
         try:
             cursor.execute(query, params or ())
 
@@ -79,11 +385,110 @@ class DatabaseManager:
                 self.connection.commit()
                 return True
         except Error as e:
+            erro = True
             logger.error("Erro ao executar a consulta '%s': %s", query, e)
             self.connection.rollback()
             return False
         finally:
             cursor.close()
+            _registrar_consulta(query, inicio, erro)
+
+    def iter_batches(self, query, params=None, batch_size=STREAM_BATCH_SIZE):
+        """
+        Executa um SELECT num cursor NÃO bufferizado e devolve as linhas em lotes
+        (listas de dicionários) de até batch_size, sem carregar o resultado inteiro em memória.
+
+        A conexão fica ocupada até o gerador terminar ou ser fechado: enquanto isso, não
+        chame execute_query nesta mesma instância (o MySQL não aceita outra query com
+        resultado pendente). Se o consumidor parar no meio, o restante é descartado no close().
+        Diferente de execute_query, erros são re-lançados — o chamador já recebeu parte dos dados.
+        """
+        if not self.connection or not self.connection.is_connected():
+            logger.error("Nenhuma conexão ativa com o banco de dados.")
+            return
+
+        cursor = self.connection.cursor(dictionary=True, buffered=False)
+        try:
+            inicio, erro = time.perf_counter(), False
+            try:
+                cursor.execute(query, params or ())
+            except Error:
+                erro = True
+                raise
+            finally:
+                # Só a execução até a primeira linha: o resto do tempo é do consumidor do gerador
+                _registrar_consulta(query, inicio, erro)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        except Error as e:
+            logger.error("Erro ao ler em streaming a consulta '%s': %s", query, e)
+            raise
+        finally:
+            try:
+                if self.connection.unread_result:
+                    self.connection.consume_results() # Consumidor saiu antes do fim: descarta o resto
+            finally:
+                cursor.close()
+
+    def iter_query(self, query, params=None, batch_size=STREAM_BATCH_SIZE):
+        """Mesmo que iter_batches, mas entrega uma linha (dicionário) por vez."""
+        for rows in self.iter_batches(query, params, batch_size):
+            yield from rows
+
+    @contextmanager
+    def transaction(self, commit=True):
+        """
+        Agrupa várias escritas (execute_write) numa transação só: commit ao sair do bloco,
+        rollback se qualquer exceção escapar (e a exceção é re-lançada).
+        Com commit=False o bloco é sempre desfeito no final — usado em simulações (dry-run),
+        que assim passam pelas mesmas constraints do banco sem gravar nada.
+        """
+        if not self.connection or not self.connection.is_connected():
+            raise Error("Nenhuma conexão ativa com o banco de dados.")
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.connection.rollback()
+            raise
+        finally:
+            self._tx_depth -= 1
+        if commit:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+
+    def end_read_snapshot(self):
+        """
+        Encerra a transação de leitura implícita aberta pelos SELECTs anteriores (autocommit
+        desligado + REPEATABLE READ = a conexão do request enxerga o banco como estava no
+        primeiro SELECT). A próxima leitura vê tudo o que já foi commitado. Não faz nada
+        dentro de transaction().
+        """
+        if self._tx_depth == 0 and self.connection and self.connection.in_transaction:
+            self.connection.commit()
+
+    def execute_write(self, query, params=None):
+        """
+        Executa um INSERT/UPDATE/DELETE SEM commit, para uso dentro de transaction().
+        Diferente de execute_query, erros são logados e re-lançados (quem decide o rollback
+        é a transação). Retorna o número de linhas afetadas.
+        """
+        cursor = self.connection.cursor()
+        inicio, erro = time.perf_counter(), False
+        try:
+            cursor.execute(query, params or ())
+            return cursor.rowcount
+        except Error as e:
+            erro = True
+            logger.error("Erro ao executar a escrita '%s': %s", query[:200], e)
+            raise
+        finally:
+            cursor.close()
+            _registrar_consulta(query, inicio, erro)
 
     def get_id_by_name(self, table_name, name_column, name_value, id_column=None):
         """
@@ -104,16 +509,299 @@ class DatabaseManager:
         return None
 
 
+class TenantBoundDatabase:
+    """
+    DatabaseManager visto por um manager de tenant: repassa tudo ao DatabaseManager e, a cada
+    escrita commitada, troca a versão das tabelas escritas no cache de consultas do tenant
+    (database/query_cache.py), o que invalida os resultados de @cached_query que as leem.
+
+    - execute_query(fetch_results=False) com sucesso: troca na hora (já commitou).
+    - execute_write dentro de transaction(): acumula as tabelas e troca só depois do commit;
+      rollback ou simulação (commit=False) não invalidam nada.
+    """
+    def __init__(self, db, tenant_id):
+        self._db = db
+        self._tenant_id = tenant_id
+        self._pending = None
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def execute_query(self, query, params=None, fetch_results=True):
+        result = self._db.execute_query(query, params, fetch_results)
+        if not fetch_results and result:
+            self._written(tables_written(query))
+        return result
+
+    def execute_write(self, query, params=None):
+        rowcount = self._db.execute_write(query, params)
+        self._written(tables_written(query))
+        return rowcount
+
+    @contextmanager
+    def transaction(self, commit=True):
+        outer = self._pending is None
+        if outer:
+            self._pending = set()
+        try:
+            with self._db.transaction(commit=commit):
+                yield self
+            if outer and commit:
+                bump_tables(self._tenant_id, self._pending)
+        finally:
+            if outer:
+                self._pending = None
+
+    def _written(self, tables):
+        if self._pending is not None:
+            self._pending.update(tables)
+        else:
+            bump_tables(self._tenant_id, tables)
+
+
 class TenantScopedManager:
     """
     Base para managers de tabelas de negócio. tenant_id é fixado uma vez,
     na criação do manager (uma instância por request), não repetido em cada chamada.
+    As escritas feitas por self.db invalidam o cache de consultas do tenant (ver TenantBoundDatabase).
     """
     def __init__(self, db, tenant_id):
-        self.db = db
+        self.db = db if isinstance(db, TenantBoundDatabase) else TenantBoundDatabase(db, tenant_id)
         self.tenant_id = tenant_id
 
     def tenant_clause(self, alias=None, column='tenant_id'):
         """Retorna (fragmento_sql, valor) pra entrar no WHERE/JOIN e nos params."""
         col = f"{alias}.{column}" if alias else column
-        return f"{col} = %s", self.tenant_id
\ No newline at end of file
+        return f"{col} = %s", self.tenant_id
+
+    def iter_rows(self, query, params, formatter=None, batch_size=STREAM_BATCH_SIZE):
+        """Versão em streaming de uma listagem: gera os itens (já formatados) sem montar a lista inteira."""
+        for item in self.db.iter_query(query, tuple(params), batch_size):
+            yield formatter(item) if formatter else item
+
+    def insert_rows(self, table, columns, rows, timestamps=False, batch_size=BULK_INSERT_ROWS):
+        """
+        INSERT multi-linha (INSERT ... VALUES (...), (...), ...) de várias linhas numa tabela do
+        tenant, SEM commit: chamar dentro de self.db.transaction().
+
+        :param table: Nome da tabela.
+        :param columns: Colunas a gravar (sem tenant_id, que é preenchido aqui).
+        :param rows: Lista de dicts com as chaves de columns (ausentes viram NULL).
+        :param timestamps: Se True, grava Data_Criacao/Data_Modificacao = NOW().
+        :param batch_size: Linhas por comando INSERT (limita o tamanho do pacote enviado).
+        :return: Total de linhas inseridas.
+        """
+        cols = ['tenant_id'] + list(columns)
+        placeholders = ', '.join(['%s'] * len(cols))
+        if timestamps:
+            cols += ['Data_Criacao', 'Data_Modificacao']
+            placeholders += ', NOW(), NOW()'
+        prefix = f"INSERT INTO {table} ({', '.join(cols)}) VALUES "
+
+        total = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            params = []
+            for row in batch:
+                params.append(self.tenant_id)
+                params.extend(row.get(col) for col in columns)
+            total += self.db.execute_write(prefix + ', '.join([f"({placeholders})"] * len(batch)), params)
+        return total
+
+    # ---------------------------------------------------------------
+    # Typeahead (campos de seleção buscados por prefixo)
+    # ---------------------------------------------------------------
+    def fetch_typeahead(self, query, params, prefix_columns, order_by, prefix='', limit=None, key_column=None, key=None):
+        """
+        Opções de um campo de seleção cujo texto começa com prefix, em vez da tabela inteira.
+
+        :param query: SELECT já filtrado por tenant, SEM ORDER BY (precisa ter WHERE). Devolve as
+                      colunas id e rotulo, mais as de prefix_columns (pelo nome sem alias de
+                      tabela) e as usadas em order_by.
+        :param prefix_columns: Colunas comparadas por prefixo (LIKE 'x%'). Cada uma vira um ramo do
+                               UNION ordenado pela própria coluna e com LIMIT, que é um range scan
+                               no índice (tenant_id, coluna, ...) e para no limite.
+        :param order_by: Ordenação final, por nomes de colunas do SELECT (ex: 'Nome_Obra').
+        :param prefix: Texto digitado. Vazio: as primeiras opções na ordem de order_by.
+        :param limit: Máximo de opções (limitado a TYPEAHEAD_MAX_LIMIT).
+        :param key_column: Coluna da chave, para key.
+        :param key: Se informado, devolve só a opção dessa chave (rótulo do valor já selecionado).
+        :return: Lista de {'id', 'rotulo', 'prefixos'}; prefixos são os textos comparados com o
+                 prefixo, para o navegador refinar uma resposta sem voltar ao servidor.
+        """
+        limit = max(1, min(int(limit or TYPEAHEAD_LIMIT), TYPEAHEAD_MAX_LIMIT))
+        params = tuple(params)
+        prefix = (prefix or '').strip()
+        if key is not None:
+            sql, sql_params = f"{query} AND {key_column} = %s", params + (key,)
+        elif not prefix:
+            sql, sql_params = f"{query} ORDER BY {order_by} LIMIT %s", params + (limit,)
+        else:
+            like = busca.prefixo_like(prefix)
+            ramos = [f"({query} AND {col} LIKE %s ORDER BY {col}, {order_by} LIMIT %s)" for col in prefix_columns]
+            sql = f"SELECT * FROM ({' UNION '.join(ramos)}) AS opcoes ORDER BY {order_by} LIMIT %s"
+            sql_params = (params + (like, limit)) * len(prefix_columns) + (limit,)
+        rows = self.db.execute_query(sql, sql_params, fetch_results=True) or []
+        colunas = [col.split('.')[-1] for col in prefix_columns]
+        return [{'id': row['id'], 'rotulo': row['rotulo'], 'prefixos': [row[col] for col in colunas]} for row in rows]
+
+    # ---------------------------------------------------------------
+    # Paginação keyset (seek)
+    # ---------------------------------------------------------------
+    def fetch_page(self, query, params, sort_keys, page_token=None, page_size=DEFAULT_PAGE_SIZE,
+                   count=None, formatter=None):
+        """
+        Executa uma listagem paginada por keyset (seek) em vez de OFFSET.
+
+        :param query: SELECT já filtrado por tenant, SEM ORDER BY (precisa ter WHERE).
+        :param params: Parâmetros da query, na ordem dos placeholders.
+        :param sort_keys: Lista de (expressao_sql, chave_no_resultado, 'ASC'|'DESC'). A última
+                          entrada deve ser a PK, para desempate estável. Todas as colunas precisam
+                          ser NOT NULL e, de preferência, cobertas por índice (tenant_id, ...). Coluna
+                          de LEFT JOIN entra como COALESCE(...) também exposto no SELECT sob a chave.
+        :param page_token: Token opaco recebido em next_token/prev_token da página anterior.
+        :param page_size: Quantidade de itens por página (limitada a MAX_PAGE_SIZE).
+        :param count: None (não conta) ou 'exact' (COUNT(*) da listagem com filtros e JOINs; o 'rows'
+                      do EXPLAIN não serve: é a estimativa da primeira tabela do plano, não do resultado).
+                      O total fica no cache de consultas por (tenant, listagem, filtros) e só é contado
+                      de novo depois de uma escrita numa das tabelas lidas: navegar entre as páginas
+                      não varre a tabela a cada página.
+        :param formatter: Função aplicada em cada item DEPOIS de extrair as chaves do cursor.
+        :return: dict com items, next_token, prev_token, page_size e total.
+        """
+        page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        fingerprint = _sort_fingerprint(sort_keys)
+        cursor = decode_page_token(page_token, fingerprint, len(sort_keys))
+        backwards = bool(cursor) and cursor['d'] == 'p'
+
+        page_query = query
+        page_params = list(params)
+        if cursor:
+            seek_sql, seek_params = _seek_predicate(sort_keys, cursor['k'], backwards)
+            page_query += f" AND ({seek_sql})"
+            page_params.extend(seek_params)
+
+        order_sql = ", ".join(
+            f"{expr} {_flip(direction) if backwards else direction}" for expr, _, direction in sort_keys
+        )
+        page_query += f" ORDER BY {order_sql} LIMIT %s"
+        page_params.append(page_size + 1) # Uma linha a mais só pra saber se existe página seguinte
+
+        rows = self.db.execute_query(page_query, tuple(page_params), fetch_results=True) or []
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        if backwards:
+            has_prev, has_next = has_more, True
+        else:
+            has_prev, has_next = cursor is not None, has_more
+
+        next_token = prev_token = None
+        if rows and has_next:
+            next_token = encode_page_token([rows[-1][key] for _, key, _ in sort_keys], 'n', fingerprint)
+        if rows and has_prev:
+            prev_token = encode_page_token([rows[0][key] for _, key, _ in sort_keys], 'p', fingerprint)
+
+        total = None
+        if count == 'exact':
+            def contar():
+                # Snapshot novo: o total é guardado sob os carimbos lidos agora (ver cached_query)
+                self.db.end_read_snapshot()
+                result = self.db.execute_query(f"SELECT COUNT(*) AS total FROM ({query}) AS _pagina", tuple(params), fetch_results=True)
+                return result[0]['total'] if result else None
+            total = cached_value('lista:total', self.tenant_id, tables_read(query), (query, tuple(params)), contar)
+
+        if formatter:
+            rows = [formatter(item) for item in rows]
+
+        return {
+            'items': rows,
+            'next_token': next_token,
+            'prev_token': prev_token,
+            'page_size': page_size,
+            'total': total,
+        }
+
+
+# ===============================================================
+# Token de página (formato estável: base64url de JSON versionado)
+# ===============================================================
+def _flip(direction):
+    return 'ASC' if direction == 'DESC' else 'DESC'
+
+
+def _sort_fingerprint(sort_keys):
+    """Identifica a ordenação: token de outra listagem (ou de uma ordenação antiga) é descartado."""
+    spec = "|".join(f"{expr}:{direction}" for expr, _, direction in sort_keys)
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:8]
+
+
+def _seek_predicate(sort_keys, values, backwards):
+    """
+    Monta a condição "linha vem depois do cursor" na forma expandida
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., que aceita direções mistas (ASC/DESC).
+    """
+    branches, params = [], []
+    for i, (expr, _, direction) in enumerate(sort_keys):
+        going_up = (direction == 'ASC') != backwards
+        parts = [f"{prev_expr} = %s" for prev_expr, _, _ in sort_keys[:i]]
+        parts.append(f"{expr} {'>' if going_up else '<'} %s")
+        branches.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return " OR ".join(branches), params
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$n": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+        if "$n" in value:
+            return Decimal(value["$n"])
+    return value
+
+
+def encode_page_token(values, direction, fingerprint):
+    """Serializa o cursor (valores das chaves de ordenação + direção) num token opaco para URL."""
+    payload = {"v": _PAGE_TOKEN_VERSION, "s": fingerprint, "d": direction,
+               "k": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_page_token(token, fingerprint, size):
+    """
+    Retorna o cursor decodificado ou None (token ausente, inválido ou de outra ordenação = primeira página).
+    size é a quantidade de chaves de ordenação: o cursor precisa de um valor (escalar) para cada uma.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            return None
+        if payload.get("v") != _PAGE_TOKEN_VERSION or payload.get("s") != fingerprint or payload.get("d") not in ("n", "p"):
+            return None
+        if not isinstance(payload.get("k"), list) or len(payload["k"]) != size:
+            return None
+        valores = [_decode_value(v) for v in payload["k"]]
+        if any(isinstance(v, (dict, list)) for v in valores):
+            return None
+        return {"d": payload["d"], "k": valores}
+    except (ValueError, TypeError, KeyError, InvalidOperation) as e:
+        logger.warning("Token de página inválido descartado: %s", e)
+        return None
\ No newline at end of file
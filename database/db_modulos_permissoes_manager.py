@@ -2,6 +2,8 @@
 
 # Importa DatabaseManager para o bloco de teste e para a tipagem (se necessário)
 from database.db_base import DatabaseManager 
+from database.cache_ext import cache
+from database.db_user_manager import MODULOS_CACHE_KEY, bump_principal_version # Invalida o principal em cache (load_user)
 import mysql.connector # Para poder pegar erros específicos do MySQL
 
 class DBModulosPermissoesManager:
@@ -84,6 +86,8 @@ class DBModulosPermissoesManager:
                 (nome_modulo,)
             )
             self.db_manager.connection.commit() 
+            bump_principal_version() # Admins enxergam todos os módulos: muda o principal de todos
+            cache.delete(MODULOS_CACHE_KEY)
             print(f"Módulo '{nome_modulo}' adicionado com sucesso.")
             return True
         except mysql.connector.Error as e:
@@ -114,6 +118,7 @@ class DBModulosPermissoesManager:
                 (id_usuario, id_modulo)
             )
             self.db_manager.connection.commit()
+            bump_principal_version(id_usuario)
             print(f"Permissão concedida: Usuário {id_usuario} para Módulo {id_modulo}.")
             return True
         except mysql.connector.Error as e:
@@ -145,6 +150,7 @@ class DBModulosPermissoesManager:
                 (id_usuario, id_modulo)
             )
             self.db_manager.connection.commit()
+            bump_principal_version(id_usuario)
             if cursor.rowcount > 0:
                 print(f"Permissão removida: Usuário {id_usuario} do Módulo {id_modulo}.")
             else:
@@ -3,17 +3,28 @@
 import mysql.connector
 from datetime import datetime, date
 
-from database.db_base import TenantScopedManager
-from database.cache_ext import cache
+import numpy as np
+
+from database.db_base import TYPEAHEAD_CACHE_TTL, TenantScopedManager
+from database.db_referencia_manager import ReferenciaManager
+from database import busca
+from database import indice_busca
+from database import kpi_summary
+from database.query_cache import cached_query
+
+MESES_ABREV = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+# Valor do último avanço físico da obra o (mesma ordem da listagem de avanços, PK como desempate)
+ULTIMO_AVANCO_SQL = """
+    SELECT af.{coluna}
+    FROM avancos_fisicos af
+    WHERE af.tenant_id = o.tenant_id AND af.ID_Obras = o.ID_Obras
+    ORDER BY af.Data_Avanco DESC, af.Data_Criacao DESC, af.ID_Avancos_Fisicos DESC
+    LIMIT 1
+"""
 
 class ObrasManager(TenantScopedManager):
 
-    def _dashboard_cache_key(self):
-        return f"dash:obras:kpis:{self.tenant_id}"
-
-    def _invalidate_dashboard_cache(self):
-        cache.delete(self._dashboard_cache_key())
-
     def _format_date_fields(self, item):
         """
         Função auxiliar para converter campos de data em dicionários de resultados
@@ -27,7 +38,7 @@ class ObrasManager(TenantScopedManager):
         # em todas as tabelas gerenciadas por esta classe, e que serão exibidos nos templates.
         date_fields_to_format = [
             'Data_Criacao', 'Data_Modificacao', # Comuns em quase todas as tabelas
-            'Data_Inicio_Prevista', 'Data_Fim_Prevista', # Obras
+            'Data_Inicio_Prevista', 'Data_Fim_Prevista', 'Ultima_Data_Avanco', # Obras
             'Data_Assinatura', 'Data_Ordem_Inicio', 'Data_Termino_Previsto', # Contratos
             'Data_Pagamento', # Arts
             'Data_Medicao', 'Data_Aprovacao', # Medicoes
@@ -67,7 +78,7 @@ class ObrasManager(TenantScopedManager):
 
         return item
     # --- Métodos OBRAS ---
-    def get_all_obras(self, search_numero=None, search_nome=None, search_status=None, search_cliente_id=None):
+    def get_all_obras(self, search_numero=None, search_nome=None, search_status=None, search_cliente_id=None, page_token=None, page_size=None, count=None, stream=False):
         c_clause, c_param = self.tenant_clause('c')
         cl_clause, cl_param = self.tenant_clause('cl')
         o_clause, o_param = self.tenant_clause('o')
@@ -99,11 +110,13 @@ class ObrasManager(TenantScopedManager):
         params = [c_param, cl_param, o_param]
 
         if search_numero:
-            query += " AND o.Numero_Obra LIKE %s"
-            params.append(f"%{search_numero}%")
+            filtro, filtro_params = busca.filtro_texto('obras', 'Numero_Obra', search_numero, alias='o')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_nome:
-            query += " AND o.Nome_Obra LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('obras', 'Nome_Obra', search_nome, alias='o')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_status:
             query += " AND o.Status_Obra = %s"
             params.append(search_status)
@@ -111,8 +124,18 @@ class ObrasManager(TenantScopedManager):
             query += " AND cl.ID_Clientes = %s"
             params.append(search_cliente_id)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('o.Nome_Obra', 'Nome_Obra', 'ASC'),
+                ('o.ID_Obras', 'ID_Obras', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY o.Nome_Obra"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -124,9 +147,7 @@ class ObrasManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, id_contratos, numero_obra, nome_obra, endereco_obra, escopo_obra, valor_obra, valor_aditivo_total, status_obra, data_inicio_prevista, data_fim_prevista)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'obras', [kpi_summary.NOVO])
         return result
 
     def get_obra_by_id(self, obra_id):
@@ -206,17 +227,13 @@ class ObrasManager(TenantScopedManager):
             WHERE {clause} AND ID_Obras = %s
         """
         params = (id_contratos, numero_obra, nome_obra, endereco_obra, escopo_obra, valor_obra, valor_aditivo_total, status_obra, data_inicio_prevista, data_fim_prevista, tenant_param, obra_id)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'obras', [obra_id])
         return result
 
     def delete_obra(self, obra_id):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM obras WHERE {clause} AND ID_Obras = %s"
-        result = self.db.execute_query(query, (tenant_param, obra_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, (tenant_param, obra_id), 'obras', [obra_id])
         return result
 
     def get_obra_by_numero(self, numero_obra):
@@ -226,39 +243,57 @@ class ObrasManager(TenantScopedManager):
         return result[0] if result else None
 
     def get_all_obras_for_dropdown(self):
+        """Opções de obra dos dropdowns ("Número - Nome"): tupla de Opcao(id, rotulo), do cache de dados de referência."""
+        return ReferenciaManager(self.db, self.tenant_id).obras()
+
+    def get_all_contratos_for_dropdown(self):
+        """Opções de contrato dos dropdowns ("Número (Cliente)"): tupla de Opcao(id, rotulo), do cache de dados de referência."""
+        return ReferenciaManager(self.db, self.tenant_id).contratos()
+
+    def get_all_clientes_for_dropdown(self):
+        """Opções de cliente dos dropdowns: tupla de Opcao(id, rotulo), do cache de dados de referência."""
+        return ReferenciaManager(self.db, self.tenant_id).clientes()
+
+    # --- Métodos CLIENTES ---
+
+    @cached_query('typeahead:obras', tables=('obras',), timeout=TYPEAHEAD_CACHE_TTL)
+    def typeahead_obras(self, prefixo='', limite=None, chave=None):
+        """Opções do campo de obra dos formulários: prefixo do nome ou do número da obra."""
         clause, tenant_param = self.tenant_clause()
         query = f"""
-            SELECT
-                ID_Obras,
-                Numero_Obra,
-                Nome_Obra
-            FROM
-                obras
+            SELECT ID_Obras AS id, CONCAT(Numero_Obra, ' - ', Nome_Obra) AS rotulo, Nome_Obra, Numero_Obra
+            FROM obras
             WHERE {clause}
-            ORDER BY Nome_Obra
         """
-        return self.db.execute_query(query, (tenant_param,), fetch_results=True)
+        return self.fetch_typeahead(query, (tenant_param,), ('Nome_Obra', 'Numero_Obra'), 'Nome_Obra',
+                                    prefixo, limite, key_column='ID_Obras', key=chave)
 
-    def get_all_contratos_for_dropdown(self):
+    @cached_query('typeahead:contratos', tables=('contratos', 'clientes'), timeout=TYPEAHEAD_CACHE_TTL)
+    def typeahead_contratos(self, prefixo='', limite=None, chave=None):
+        """Opções do campo de contrato dos formulários: prefixo do número do contrato ou do nome do cliente."""
         cl_clause, cl_param = self.tenant_clause('cl')
         c_clause, c_param = self.tenant_clause('c')
         query = f"""
-            SELECT
-                c.ID_Contratos,
-                c.Numero_Contrato,
-                cl.Nome_Cliente
-            FROM
-                contratos c
-            JOIN
-                clientes cl ON c.ID_Clientes = cl.ID_Clientes AND {cl_clause}
+            SELECT c.ID_Contratos AS id, CONCAT(c.Numero_Contrato, ' (', cl.Nome_Cliente, ')') AS rotulo, c.Numero_Contrato, cl.Nome_Cliente
+            FROM contratos c
+            JOIN clientes cl ON c.ID_Clientes = cl.ID_Clientes AND {cl_clause}
             WHERE {c_clause}
-            ORDER BY c.Numero_Contrato
         """
-        return self.db.execute_query(query, (cl_param, c_param), fetch_results=True)
-
+        return self.fetch_typeahead(query, (cl_param, c_param), ('c.Numero_Contrato', 'cl.Nome_Cliente'), 'Numero_Contrato',
+                                    prefixo, limite, key_column='c.ID_Contratos', key=chave)
 
-    # --- Métodos CLIENTES ---
-    def get_all_clientes(self, search_nome=None, search_cnpj=None):
+    @cached_query('typeahead:clientes', tables=('clientes',), timeout=TYPEAHEAD_CACHE_TTL)
+    def typeahead_clientes(self, prefixo='', limite=None, chave=None):
+        """Opções do campo de cliente dos formulários: prefixo do nome ou do CNPJ."""
+        clause, tenant_param = self.tenant_clause()
+        query = f"""
+            SELECT ID_Clientes AS id, CONCAT(Nome_Cliente, ' (', CNPJ_Cliente, ')') AS rotulo, Nome_Cliente, CNPJ_Cliente
+            FROM clientes
+            WHERE {clause}
+        """
+        return self.fetch_typeahead(query, (tenant_param,), ('Nome_Cliente', 'CNPJ_Cliente'), 'Nome_Cliente',
+                                    prefixo, limite, key_column='ID_Clientes', key=chave)
+    def get_all_clientes(self, search_nome=None, search_cnpj=None, page_token=None, page_size=None, count=None, stream=False):
         clause, tenant_param = self.tenant_clause()
         query = f"""
             SELECT
@@ -279,14 +314,25 @@ class ObrasManager(TenantScopedManager):
         params = [tenant_param]
 
         if search_nome:
-            query += " AND Nome_Cliente LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('clientes', 'Nome_Cliente', search_nome)
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_cnpj:
             query += " AND CNPJ_Cliente LIKE %s"
             params.append(f"%{search_cnpj}%")
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('Nome_Cliente', 'Nome_Cliente', 'ASC'),
+                ('ID_Clientes', 'ID_Clientes', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY Nome_Cliente"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -299,7 +345,8 @@ class ObrasManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, nome_cliente, cnpj_cliente, razao_social_cliente, endereco_cliente, telefone_cliente, email_cliente, contato_principal_nome)
-        return self.db.execute_query(query, params, fetch_results=False)
+        result = indice_busca.escrever(self, query, params, 'clientes', [], novo=True)
+        return result
 
     def get_cliente_by_id(self, cliente_id):
         clause, tenant_param = self.tenant_clause()
@@ -340,12 +387,14 @@ class ObrasManager(TenantScopedManager):
             WHERE {clause} AND ID_Clientes = %s
         """
         params = (nome_cliente, cnpj_cliente, razao_social_cliente, endereco_cliente, telefone_cliente, email_cliente, contato_principal_nome, tenant_param, cliente_id)
-        return self.db.execute_query(query, params, fetch_results=False)
+        result = indice_busca.escrever(self, query, params, 'clientes', [cliente_id])
+        return result
 
     def delete_cliente(self, cliente_id):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM clientes WHERE {clause} AND ID_Clientes = %s"
-        return self.db.execute_query(query, (tenant_param, cliente_id), fetch_results=False)
+        result = indice_busca.escrever(self, query, (tenant_param, cliente_id), 'clientes', [cliente_id])
+        return result
 
     def get_cliente_by_cnpj(self, cnpj_cliente):
         clause, tenant_param = self.tenant_clause()
@@ -354,7 +403,7 @@ class ObrasManager(TenantScopedManager):
         return result[0] if result else None
 
     # --- Métodos CONTRATOS ---
-    def get_all_contratos(self, search_numero=None, search_cliente_id=None, search_status=None):
+    def get_all_contratos(self, search_numero=None, search_cliente_id=None, search_status=None, page_token=None, page_size=None, count=None, stream=False):
         cl_clause, cl_param = self.tenant_clause('cl')
         c_clause, c_param = self.tenant_clause('c')
         query = f"""
@@ -381,8 +430,9 @@ class ObrasManager(TenantScopedManager):
         params = [cl_param, c_param]
 
         if search_numero:
-            query += " AND c.Numero_Contrato LIKE %s"
-            params.append(f"%{search_numero}%")
+            filtro, filtro_params = busca.filtro_texto('contratos', 'Numero_Contrato', search_numero, alias='c')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_cliente_id:
             query += " AND c.ID_Clientes = %s"
             params.append(search_cliente_id)
@@ -390,8 +440,18 @@ class ObrasManager(TenantScopedManager):
             query += " AND c.Status_Contrato = %s"
             params.append(search_status)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('c.Numero_Contrato', 'Numero_Contrato', 'ASC'),
+                ('c.ID_Contratos', 'ID_Contratos', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY c.Numero_Contrato"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -403,9 +463,7 @@ class ObrasManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, id_clientes, numero_contrato, valor_contrato, data_assinatura, data_ordem_inicio, prazo_contrato_dias, data_termino_previsto, status_contrato, observacoes)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'contratos', [kpi_summary.NOVO])
         return result
 
     def get_contrato_by_id(self, contrato_id):
@@ -455,17 +513,13 @@ class ObrasManager(TenantScopedManager):
             WHERE {clause} AND ID_Contratos = %s
         """
         params = (id_clientes, numero_contrato, valor_contrato, data_assinatura, data_ordem_inicio, prazo_contrato_dias, data_termino_previsto, status_contrato, observacoes, tenant_param, contrato_id)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'contratos', [contrato_id])
         return result
 
     def delete_contrato(self, contrato_id):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM contratos WHERE {clause} AND ID_Contratos = %s"
-        result = self.db.execute_query(query, (tenant_param, contrato_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, (tenant_param, contrato_id), 'contratos', [contrato_id])
         return result
 
     def get_contrato_by_numero(self, numero_contrato):
@@ -476,7 +530,7 @@ class ObrasManager(TenantScopedManager):
 
 
     # --- Métodos ARTS ---
-    def get_all_arts(self, search_numero=None, search_obra_id=None, search_status=None):
+    def get_all_arts(self, search_numero=None, search_obra_id=None, search_status=None, page_token=None, page_size=None, count=None, stream=False):
         o_clause, o_param = self.tenant_clause('o')
         a_clause, a_param = self.tenant_clause('a')
         query = f"""
@@ -500,8 +554,9 @@ class ObrasManager(TenantScopedManager):
         params = [o_param, a_param]
 
         if search_numero:
-            query += " AND a.Numero_Art LIKE %s"
-            params.append(f"%{search_numero}%")
+            filtro, filtro_params = busca.filtro_texto('arts', 'Numero_Art', search_numero, alias='a')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_obra_id:
             query += " AND a.ID_Obras = %s"
             params.append(search_obra_id)
@@ -509,8 +564,18 @@ class ObrasManager(TenantScopedManager):
             query += " AND a.Status_Art = %s"
             params.append(search_status)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('a.Numero_Art', 'Numero_Art', 'ASC'),
+                ('a.ID_Arts', 'ID_Arts', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY a.Numero_Art"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -522,7 +587,7 @@ class ObrasManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, id_obras, numero_art, data_pagamento, valor_pagamento, status_art)
-        return self.db.execute_query(query, params, fetch_results=False)
+        return indice_busca.escrever(self, query, params, 'arts', [], novo=True)
 
     def get_art_by_id(self, art_id):
         o_clause, o_param = self.tenant_clause('o')
@@ -564,12 +629,12 @@ class ObrasManager(TenantScopedManager):
             WHERE {clause} AND ID_Arts = %s
         """
         params = (id_obras, numero_art, data_pagamento, valor_pagamento, status_art, tenant_param, art_id)
-        return self.db.execute_query(query, params, fetch_results=False)
+        return indice_busca.escrever(self, query, params, 'arts', [art_id])
 
     def delete_art(self, art_id):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM arts WHERE {clause} AND ID_Arts = %s"
-        return self.db.execute_query(query, (tenant_param, art_id), fetch_results=False)
+        return indice_busca.escrever(self, query, (tenant_param, art_id), 'arts', [art_id])
 
     def get_art_by_numero(self, numero_art):
         clause, tenant_param = self.tenant_clause()
@@ -578,7 +643,7 @@ class ObrasManager(TenantScopedManager):
         return result[0] if result else None
 
     # --- Métodos MEDIÇÕES ---
-    def get_all_medicoes(self, search_numero_medicao=None, search_obra_id=None, search_status=None):
+    def get_all_medicoes(self, search_numero_medicao=None, search_obra_id=None, search_status=None, page_token=None, page_size=None, count=None, stream=False):
         o_clause, o_param = self.tenant_clause('o')
         m_clause, m_param = self.tenant_clause('m')
         query = f"""
@@ -594,6 +659,7 @@ class ObrasManager(TenantScopedManager):
                 m.Observacao_Medicao,
                 o.Numero_Obra,
                 o.Nome_Obra,
+                COALESCE(o.Numero_Obra, '') AS Ordem_Obra,
                 m.Data_Criacao,
                 m.Data_Modificacao
             FROM
@@ -614,8 +680,19 @@ class ObrasManager(TenantScopedManager):
             query += " AND m.Status_Medicao = %s"
             params.append(search_status)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(o.Numero_Obra, '')", 'Ordem_Obra', 'ASC'),
+                ('m.Numero_Medicao', 'Numero_Medicao', 'ASC'),
+                ('m.ID_Medicoes', 'ID_Medicoes', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY o.Numero_Obra, m.Numero_Medicao"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -627,9 +704,7 @@ class ObrasManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, id_obras, numero_medicao, valor_medicao, data_medicao, mes_referencia, data_aprovacao, status_medicao, observacao_medicao)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'medicoes', [kpi_summary.NOVO])
         return result
 
     def get_medicao_by_id(self, medicao_id):
@@ -678,17 +753,13 @@ class ObrasManager(TenantScopedManager):
             WHERE {clause} AND ID_Medicoes = %s
         """
         params = (id_obras, numero_medicao, valor_medicao, data_medicao, mes_referencia, data_aprovacao, status_medicao, observacao_medicao, tenant_param, medicao_id)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'medicoes', [medicao_id])
         return result
 
     def delete_medicao(self, medicao_id):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM medicoes WHERE {clause} AND ID_Medicoes = %s"
-        result = self.db.execute_query(query, (tenant_param, medicao_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, (tenant_param, medicao_id), 'medicoes', [medicao_id])
         return result
 
     def get_medicao_by_obra_numero(self, id_obras, numero_medicao):
@@ -698,7 +769,7 @@ class ObrasManager(TenantScopedManager):
         return result[0] if result else None
 
     # --- Métodos AVANÇOS FÍSICOS ---
-    def get_all_avancos_fisicos(self, search_obra_id=None, search_data_inicio=None, search_data_fim=None):
+    def get_all_avancos_fisicos(self, search_obra_id=None, search_data_inicio=None, search_data_fim=None, page_token=None, page_size=None, count=None, stream=False):
         o_clause, o_param = self.tenant_clause('o')
         af_clause, af_param = self.tenant_clause('af')
         query = f"""
@@ -709,6 +780,7 @@ class ObrasManager(TenantScopedManager):
                 af.Data_Avanco,
                 o.Numero_Obra,
                 o.Nome_Obra,
+                COALESCE(o.Nome_Obra, '') AS Ordem_Obra,
                 af.Data_Criacao,
                 af.Data_Modificacao
             FROM
@@ -729,8 +801,19 @@ class ObrasManager(TenantScopedManager):
             query += " AND af.Data_Avanco <= %s"
             params.append(search_data_fim)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(o.Nome_Obra, '')", 'Ordem_Obra', 'ASC'),
+                ('af.Data_Avanco', 'Data_Avanco', 'DESC'),
+                ('af.ID_Avancos_Fisicos', 'ID_Avancos_Fisicos', 'DESC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY o.Nome_Obra, af.Data_Avanco DESC"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -742,9 +825,8 @@ class ObrasManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, id_obras, percentual_avanco_fisico, data_avanco)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'obras', [id_obras],
+                                      posterior=self._atualizar_avanco_das_obras([id_obras]))
         return result
 
     def get_avanco_fisico_by_id(self, avanco_id):
@@ -792,44 +874,80 @@ class ObrasManager(TenantScopedManager):
             WHERE {clause} AND ID_Avancos_Fisicos = %s
         """
         params = (id_obras, percentual_avanco_fisico, data_avanco, tenant_param, avanco_id)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        obras_afetadas = [self._obra_do_avanco(avanco_id), id_obras]
+        result = kpi_summary.escrever(self, query, params, 'obras', obras_afetadas,
+                                      posterior=self._atualizar_avanco_das_obras(obras_afetadas))
         return result
 
+    def _obra_do_avanco(self, avanco_id):
+        """ID_Obras do avanço físico (a obra cujo último avanço muda ao editar/excluir o avanço)."""
+        clause, tenant_param = self.tenant_clause()
+        query = f"SELECT ID_Obras FROM avancos_fisicos WHERE {clause} AND ID_Avancos_Fisicos = %s"
+        result = self.db.execute_query(query, (tenant_param, avanco_id), fetch_results=True)
+        return result[0]['ID_Obras'] if result else None
+
     def delete_avanco_fisico(self, avanco_id):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM avancos_fisicos WHERE {clause} AND ID_Avancos_Fisicos = %s"
-        result = self.db.execute_query(query, (tenant_param, avanco_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        obras_afetadas = [self._obra_do_avanco(avanco_id)]
+        result = kpi_summary.escrever(self, query, (tenant_param, avanco_id), 'obras', obras_afetadas,
+                                      posterior=self._atualizar_avanco_das_obras(obras_afetadas))
         return result
 
+    def _atualizar_avanco_das_obras(self, obras_ids):
+        """
+        Função (db) que recalcula, na transação da escrita do avanço, as colunas denormalizadas
+        das obras (Ultimo_Avanco_Percentual, Ultima_Data_Avanco, Avanco_Acumulado — ver
+        7_avanco_obra.sql). As linhas das obras já estão travadas pela captura do resumo de KPIs,
+        então escritas concorrentes de avanços da mesma obra não se sobrepõem.
+        """
+        obras_ids = [obra_id for obra_id in dict.fromkeys(obras_ids) if obra_id is not None]
+
+        def atualizar(db):
+            if not obras_ids:
+                return
+            marcadores = ', '.join(['%s'] * len(obras_ids))
+            query = f"""
+                UPDATE obras o
+                LEFT JOIN (
+                    SELECT ID_Obras, SUM(Percentual_Avanco_Fisico) AS Acumulado
+                    FROM avancos_fisicos
+                    WHERE tenant_id = %s AND ID_Obras IN ({marcadores})
+                    GROUP BY ID_Obras
+                ) s ON s.ID_Obras = o.ID_Obras
+                SET
+                    o.Avanco_Acumulado = COALESCE(s.Acumulado, 0),
+                    o.Ultimo_Avanco_Percentual = ({ULTIMO_AVANCO_SQL.format(coluna='Percentual_Avanco_Fisico')}),
+                    o.Ultima_Data_Avanco = ({ULTIMO_AVANCO_SQL.format(coluna='Data_Avanco')}),
+                    o.Data_Modificacao = o.Data_Modificacao -- Lançar avanço não é modificar o cadastro da obra
+                WHERE o.tenant_id = %s AND o.ID_Obras IN ({marcadores})
+            """
+            db.execute_write(query, (self.tenant_id, *obras_ids, self.tenant_id, *obras_ids))
+        return atualizar
+
     # ----------------------------------------------------------------------------------------------------------------------------------
     # --- NOVO MÉTODO: Avanço Físico Acumulado para uma Obra --------------------------------------------------------------------------
     # ----------------------------------------------------------------------------------------------------------------------------------
     def get_avanco_acumulado_para_obra(self, obra_id, avanco_id_excluir=None):
         """
         Retorna o percentual de avanço físico acumulado para uma obra específica,
-        somando todos os percentuais pontuais até a data mais recente.
+        lido da coluna Avanco_Acumulado da obra (mantida pelas escritas de avanços).
         Se avanco_id_excluir for fornecido, ele exclui o percentual desse avanço do cálculo (útil na edição).
         """
-        clause, tenant_param = self.tenant_clause('af')
+        o_clause, o_param = self.tenant_clause('o')
         query = f"""
             SELECT
-                SUM(af.Percentual_Avanco_Fisico) AS Avanco_Acumulado
+                o.Avanco_Acumulado - COALESCE((
+                    SELECT af.Percentual_Avanco_Fisico
+                    FROM avancos_fisicos af
+                    WHERE af.tenant_id = o.tenant_id AND af.ID_Obras = o.ID_Obras AND af.ID_Avancos_Fisicos = %s
+                ), 0) AS Avanco_Acumulado
             FROM
-                avancos_fisicos af
+                obras o
             WHERE
-                {clause} AND af.ID_Obras = %s
+                {o_clause} AND o.ID_Obras = %s
         """
-        params = [tenant_param, obra_id]
-
-        if avanco_id_excluir:
-            query += " AND af.ID_Avancos_Fisicos != %s"
-            params.append(avanco_id_excluir)
-
-        result = self.db.execute_query(query, tuple(params), fetch_results=True)
+        result = self.db.execute_query(query, (avanco_id_excluir, o_param, obra_id), fetch_results=True)
 
         # Retorna a soma como float. Se não houver avanços, retorna 0.0
         return float(result[0]['Avanco_Acumulado']) if result and result[0]['Avanco_Acumulado'] is not None else 0.0
@@ -838,7 +956,7 @@ class ObrasManager(TenantScopedManager):
     # --- NOVO MÉTODO: Contagem Total de Obras -----------------------------------------------------------------------------------------
     # ----------------------------------------------------------------------------------------------------------------------------------
     # --- Métodos REIDIS ---
-    def get_all_reidis(self, search_numero_portaria=None, search_numero_ato=None, search_obra_id=None, search_status=None):
+    def get_all_reidis(self, search_numero_portaria=None, search_numero_ato=None, search_obra_id=None, search_status=None, page_token=None, page_size=None, count=None, stream=False):
         o_clause, o_param = self.tenant_clause('o')
         r_clause, r_param = self.tenant_clause('r')
         query = f"""
@@ -853,6 +971,7 @@ class ObrasManager(TenantScopedManager):
                 r.Observacoes_Reidi,
                 o.Numero_Obra,
                 o.Nome_Obra,
+                COALESCE(o.Numero_Obra, '') AS Ordem_Obra,
                 r.Data_Criacao,
                 r.Data_Modificacao
             FROM
@@ -876,8 +995,19 @@ class ObrasManager(TenantScopedManager):
             query += " AND r.Status_Reidi = %s"
             params.append(search_status)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(o.Numero_Obra, '')", 'Ordem_Obra', 'ASC'),
+                ('r.Numero_Portaria', 'Numero_Portaria', 'ASC'),
+                ('r.ID_Reidis', 'ID_Reidis', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY o.Numero_Obra, r.Numero_Portaria"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -955,7 +1085,7 @@ class ObrasManager(TenantScopedManager):
         return result[0] if result else None
 
     # --- Métodos SEGUROS ---
-    def get_all_seguros(self, search_numero_apolice=None, search_obra_id=None, search_status=None, search_tipo=None):
+    def get_all_seguros(self, search_numero_apolice=None, search_obra_id=None, search_status=None, search_tipo=None, page_token=None, page_size=None, count=None, stream=False):
         o_clause, o_param = self.tenant_clause('o')
         s_clause, s_param = self.tenant_clause('s')
         query = f"""
@@ -972,6 +1102,7 @@ class ObrasManager(TenantScopedManager):
                 s.Observacoes_Seguro,
                 o.Numero_Obra,
                 o.Nome_Obra,
+                COALESCE(o.Numero_Obra, '') AS Ordem_Obra,
                 s.Data_Criacao,
                 s.Data_Modificacao
             FROM
@@ -995,8 +1126,19 @@ class ObrasManager(TenantScopedManager):
             query += " AND s.Tipo_Seguro = %s"
             params.append(search_tipo)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(o.Numero_Obra, '')", 'Ordem_Obra', 'ASC'),
+                ('s.Numero_Apolice', 'Numero_Apolice', 'ASC'),
+                ('s.ID_Seguros', 'ID_Seguros', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY o.Numero_Obra, s.Numero_Apolice"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -1133,60 +1275,92 @@ class ObrasManager(TenantScopedManager):
             return [self._format_date_fields(item) for item in results]
         return []
 
-    def get_dashboard_kpis(self):
+    @cached_query('obras:curva_s', tables=('avancos_fisicos', 'medicoes'))
+    def get_curva_s(self, obra_id, inicio, fim):
         """
-        KPIs do dashboard de Obras em 2 round-trips (antes eram 5), com cache por tenant
-        (TTL 5 min, invalidado nas escritas de obras/contratos/medições/avanços físicos).
+        Curva S da obra (avanço físico e financeiro) mês a mês entre inicio e fim (datas; só o
+        ano/mês importa), em qualquer intervalo, inclusive de vários anos.
+
+        O agrupamento por mês é feito no banco (uma linha por série e mês, não uma por lançamento);
+        tudo que é anterior ao intervalo vem somado numa linha só, ponto de partida dos acumulados,
+        que saem de um cumsum. Cacheado por obra e intervalo; escritas em avanços ou medições
+        invalidam.
+
+        :return: dict com 'months' (rótulos), 'monthly_physical', 'monthly_financial',
+                 'accumulated_physical' e 'accumulated_financial' (listas de floats do mesmo tamanho).
         """
-        cached = cache.get(self._dashboard_cache_key())
-        if cached is not None:
-            return cached
+        inicio = date(inicio.year, inicio.month, 1)
+        total_meses = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+        # Primeiro dia do mês seguinte ao fim: limite exclusivo das datas
+        limite = date(fim.year + fim.month // 12, fim.month % 12 + 1, 1)
 
-        status_clause, status_param = self.tenant_clause()
-        status_query = f"""
-            SELECT Status_Obra, COUNT(ID_Obras) AS Count
-            FROM obras
-            WHERE {status_clause}
-            GROUP BY Status_Obra
-            ORDER BY Status_Obra
+        clause, tenant_param = self.tenant_clause()
+        query = f"""
+            SELECT 'F' AS Serie,
+                   IF(Data_Avanco < %s, '', DATE_FORMAT(Data_Avanco, '%Y-%m')) AS Mes,
+                   SUM(Percentual_Avanco_Fisico) AS Total
+            FROM avancos_fisicos
+            WHERE {clause} AND ID_Obras = %s AND Data_Avanco < %s
+            GROUP BY Mes
+            UNION ALL
+            SELECT 'M' AS Serie,
+                   IF(Data_Medicao < %s, '', DATE_FORMAT(Data_Medicao, '%Y-%m')) AS Mes,
+                   SUM(Valor_Medicao) AS Total
+            FROM medicoes
+            WHERE {clause} AND ID_Obras = %s AND Status_Medicao IN ('Aprovada', 'Paga') AND Data_Medicao < %s
+            GROUP BY Mes
         """
-        status_counts_list = self.db.execute_query(status_query, (status_param,), fetch_results=True) or []
-        total_obras_geral = sum(item['Count'] for item in status_counts_list)
+        params = (inicio, tenant_param, obra_id, limite, inicio, tenant_param, obra_id, limite)
+        results = self.db.execute_query(query, params, fetch_results=True)
+        if not isinstance(results, list): # False = erro na consulta, None = sem conexão
+            return None
 
-        contratos_clause, contratos_param = self.tenant_clause()
-        medicoes_clause, medicoes_param = self.tenant_clause()
-        af_clause, af_param = self.tenant_clause()
-        o_clause, o_param = self.tenant_clause('o')
-        agg_query = f"""
-            SELECT
-                (SELECT COALESCE(SUM(Valor_Contrato), 0) FROM contratos WHERE {contratos_clause} AND Status_Contrato = 'Ativo') AS Total_Valor_Contratos,
-                (SELECT COALESCE(SUM(Valor_Medicao), 0) FROM medicoes WHERE {medicoes_clause} AND Status_Medicao IN ('Paga', 'Aprovada')) AS Total_Valor_Medicoes,
-                (
-                    SELECT AVG(t1.Percentual_Avanco_Fisico)
-                    FROM (
-                        SELECT
-                            ID_Obras,
-                            Percentual_Avanco_Fisico,
-                            Data_Avanco,
-                            ROW_NUMBER() OVER (PARTITION BY ID_Obras ORDER BY Data_Avanco DESC, Data_Criacao DESC) AS rn
-                        FROM avancos_fisicos
-                        WHERE {af_clause}
-                    ) AS t1
-                    JOIN obras o ON t1.ID_Obras = o.ID_Obras AND {o_clause}
-                    WHERE t1.rn = 1 AND o.Status_Obra = 'Em Andamento'
-                ) AS Media_Avanco_Fisico
+        mensal = {'F': np.zeros(total_meses), 'M': np.zeros(total_meses)}
+        anterior = {'F': 0.0, 'M': 0.0}
+        for row in results:
+            total = float(row['Total'] or 0)
+            if not row['Mes']:
+                anterior[row['Serie']] = total
+                continue
+            ano, mes = map(int, row['Mes'].split('-'))
+            mensal[row['Serie']][(ano - inicio.year) * 12 + mes - inicio.month] = total
+
+        # Rótulo só com o mês quando o intervalo cabe num ano; com o ano quando atravessa anos
+        mesmo_ano = inicio.year == fim.year
+        months = [
+            MESES_ABREV[m % 12] if mesmo_ano else f"{MESES_ABREV[m % 12]}/{(inicio.year + m // 12) % 100:02d}"
+            for m in range(inicio.month - 1, inicio.month - 1 + total_meses)
+        ]
+        return {
+            'months': months,
+            'monthly_physical': mensal['F'].tolist(),
+            'monthly_financial': mensal['M'].tolist(),
+            'accumulated_physical': (anterior['F'] + np.cumsum(mensal['F'])).tolist(),
+            'accumulated_financial': (anterior['M'] + np.cumsum(mensal['M'])).tolist(),
+        }
+
+    @cached_query('dash:obras:kpis', tables=('tenant_kpi_summary',), stale_while_revalidate=True)
+    def get_dashboard_kpis(self):
+        """
+        KPIs do dashboard de Obras lidos do resumo do tenant (tenant_kpi_summary, ver
+        database/kpi_summary.py), mantido na mesma transação das escritas de obras, contratos,
+        medições e avanços físicos — uma consulta, sem agregar o histórico.
         """
-        agg_result = self.db.execute_query(agg_query, (contratos_param, medicoes_param, af_param, o_param), fetch_results=True)
-        agg_row = agg_result[0] if agg_result else {}
+        resumo = kpi_summary.ler(self.db, self.tenant_id, (
+            'obras_status', 'obras_avanco_andamento', 'contratos_ativos', 'medicoes_realizadas'
+        ))
+        status_counts = {status: quantidade for status, (quantidade, _) in sorted(resumo['obras_status'].items())}
+        _, total_contratos = resumo['contratos_ativos'].get('', (0, 0))
+        _, total_medicoes = resumo['medicoes_realizadas'].get('', (0, 0))
+        obras_com_avanco, soma_avanco = resumo['obras_avanco_andamento'].get('', (0, 0))
 
         kpis = {
-            'status_counts': {item['Status_Obra']: item['Count'] for item in status_counts_list},
-            'total_obras_geral': total_obras_geral,
-            'total_contratos_ativos': float(agg_row.get('Total_Valor_Contratos') or 0.0),
-            'total_medicoes_realizadas': float(agg_row.get('Total_Valor_Medicoes') or 0.0),
-            'avg_avanco_fisico': float(agg_row.get('Media_Avanco_Fisico') or 0.0),
+            'status_counts': status_counts,
+            'total_obras_geral': sum(status_counts.values()),
+            'total_contratos_ativos': float(total_contratos),
+            'total_medicoes_realizadas': float(total_medicoes),
+            'avg_avanco_fisico': float(soma_avanco) / obras_com_avanco if obras_com_avanco else 0.0,
         }
-        cache.set(self._dashboard_cache_key(), kpis, timeout=300)
         return kpis
 
     # ----------------------------------------------------------------------------------------------------------------------------------
@@ -1197,8 +1371,6 @@ class ObrasManager(TenantScopedManager):
         Retorna dados detalhados para o relatório de andamento de obras,
         incluindo o último percentual de avanço físico e a data desse avanço.
         """
-        af1_clause, af1_param = self.tenant_clause('af')
-        af2_clause, af2_param = self.tenant_clause('af')
         co_clause, co_param = self.tenant_clause('co')
         c_clause, c_param = self.tenant_clause('c')
         o_clause, o_param = self.tenant_clause('o')
@@ -1211,25 +1383,9 @@ class ObrasManager(TenantScopedManager):
                 o.Data_Inicio_Prevista,
                 o.Data_Fim_Prevista,
                 c.Nome_Cliente,
-                -- Subquery para obter o último percentual e data de avanço físico para cada obra
-                (SELECT
-                    af.Percentual_Avanco_Fisico
-                FROM
-                    avancos_fisicos af
-                WHERE
-                    af.ID_Obras = o.ID_Obras AND {af1_clause}
-                ORDER BY
-                    af.Data_Avanco DESC, af.Data_Criacao DESC
-                LIMIT 1) AS Ultimo_Avanco_Percentual,
-                (SELECT
-                    af.Data_Avanco
-                FROM
-                    avancos_fisicos af
-                WHERE
-                    af.ID_Obras = o.ID_Obras AND {af2_clause}
-                ORDER BY
-                    af.Data_Avanco DESC, af.Data_Criacao DESC
-                LIMIT 1) AS Ultima_Data_Avanco
+                -- Último percentual e data de avanço físico: colunas da obra, mantidas pelas escritas de avanços
+                o.Ultimo_Avanco_Percentual,
+                o.Ultima_Data_Avanco
             FROM
                 obras o
             LEFT JOIN
@@ -1238,14 +1394,16 @@ class ObrasManager(TenantScopedManager):
                 clientes c ON co.ID_Clientes = c.ID_Clientes AND {c_clause}
             WHERE {o_clause}
         """
-        params = [af1_param, af2_param, co_param, c_param, o_param]
+        params = [co_param, c_param, o_param]
 
         if search_numero:
-            query += " AND o.Numero_Obra LIKE %s"
-            params.append(f"%{search_numero}%")
+            filtro, filtro_params = busca.filtro_texto('obras', 'Numero_Obra', search_numero, alias='o')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_nome:
-            query += " AND o.Nome_Obra LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('obras', 'Nome_Obra', search_nome, alias='o')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_status:
             query += " AND o.Status_Obra = %s"
             params.append(search_status)
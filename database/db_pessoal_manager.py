@@ -4,17 +4,15 @@
 import mysql.connector
 from datetime import datetime, date, timedelta
 import pandas as pd
-from database.db_base import TenantScopedManager
-from database.cache_ext import cache
+from database.db_base import TYPEAHEAD_CACHE_TTL, TenantScopedManager
+from database.db_referencia_manager import ReferenciaManager
+from database import busca
+from database import indice_busca
+from database import kpi_summary
+from database.query_cache import cached_query
 
 class PessoalManager(TenantScopedManager):
 
-    def _dashboard_cache_key(self):
-        return f"dash:pessoal:kpis:{self.tenant_id}"
-
-    def _invalidate_dashboard_cache(self):
-        cache.delete(self._dashboard_cache_key())
-
     # ==================================================================================================================================
     # === MÉTODOS AUXILIARES GERAIS ====================================================================================================
     # ==================================================================================================================================
@@ -90,7 +88,7 @@ class PessoalManager(TenantScopedManager):
     # ----------------------------------------------------------------------------------------------------------------------------------
     # --- MÉTODOS CRUD PRINCIPAIS DE FUNCIONÁRIOS (TABELA 'funcionarios') --------------------------------------------------------------
     # ----------------------------------------------------------------------------------------------------------------------------------
-    def get_all_funcionarios(self, search_matricula=None, search_nome=None, search_status=None, search_cargo_id=None):
+    def get_all_funcionarios(self, search_matricula=None, search_nome=None, search_status=None, search_cargo_id=None, page_token=None, page_size=None, count=None):
         """
         Retorna uma lista de todos os funcionários, opcionalmente filtrada,
         incluindo informações de cargo e nível.
@@ -122,8 +120,9 @@ class PessoalManager(TenantScopedManager):
             query += " AND f.Matricula LIKE %s"
             params.append(f"%{search_matricula}%")
         if search_nome:
-            query += " AND f.Nome_Completo LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('funcionarios', 'Nome_Completo', search_nome, alias='f')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_status:
             query += " AND f.Status = %s"
             params.append(search_status)
@@ -131,6 +130,13 @@ class PessoalManager(TenantScopedManager):
             query += " AND f.ID_Cargos = %s"
             params.append(search_cargo_id)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('f.Nome_Completo', 'Nome_Completo', 'ASC'),
+                ('f.Matricula', 'Matricula', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY f.Nome_Completo"
 
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
@@ -138,6 +144,18 @@ class PessoalManager(TenantScopedManager):
             return [self._format_date_fields(item) for item in results]
         return results
 
+    @cached_query('typeahead:funcionarios', tables=('funcionarios',), timeout=TYPEAHEAD_CACHE_TTL)
+    def typeahead_funcionarios(self, prefixo='', limite=None, chave=None):
+        """Opções do campo de funcionário dos formulários: prefixo do nome ou da matrícula."""
+        clause, tenant_param = self.tenant_clause()
+        query = f"""
+            SELECT Matricula AS id, CONCAT(Matricula, ' - ', Nome_Completo) AS rotulo, Nome_Completo, Matricula
+            FROM funcionarios
+            WHERE {clause}
+        """
+        return self.fetch_typeahead(query, (tenant_param,), ('Nome_Completo', 'Matricula'), 'Nome_Completo',
+                                    prefixo, limite, key_column='Matricula', key=chave)
+
     def add_funcionario(self, matricula, nome_completo, data_admissao, id_cargos, id_niveis, status, tipo_contratacao):
         """
         Adiciona um novo funcionário, incluindo o tipo de contratação.
@@ -148,9 +166,7 @@ class PessoalManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
         params = (self.tenant_id, matricula, nome_completo, data_admissao, id_cargos, id_niveis, status, tipo_contratacao)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'funcionarios', [], [matricula])
         return result
 
     def get_funcionario_by_matricula(self, matricula):
@@ -201,18 +217,14 @@ class PessoalManager(TenantScopedManager):
             WHERE {clause} AND Matricula = %s
         """
         params = (new_matricula, nome_completo, data_admissao, id_cargos, id_niveis, status, tenant_param, old_matricula)
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'funcionarios', [old_matricula], [new_matricula])
         return result
 
     def delete_funcionario(self, matricula):
         """Exclui um funcionário pelo ID. ON DELETE CASCADE cuidará das tabelas relacionadas."""
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM funcionarios WHERE {clause} AND Matricula = %s"
-        result = self.db.execute_query(query, (tenant_param, matricula), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, (tenant_param, matricula), 'funcionarios', [matricula])
         return result
 
     # ----------------------------------------------------------------------------------------------------------------------------------
@@ -257,7 +269,8 @@ class PessoalManager(TenantScopedManager):
                 WHERE {clause} AND Matricula_Funcionario = %s
             """
             update_params = params + (tenant_param, matricula)
-            return self.db.execute_query(query, update_params, fetch_results=False)
+            # O CPF entra no documento de busca do funcionário
+            return indice_busca.escrever(self, query, update_params, 'funcionarios', [matricula])
         else:
             # INSERIR novo registro
             query = """
@@ -272,7 +285,7 @@ class PessoalManager(TenantScopedManager):
                 )
             """
             insert_params = (self.tenant_id, matricula) + params
-            return self.db.execute_query(query, insert_params, fetch_results=False)
+            return indice_busca.escrever(self, query, insert_params, 'funcionarios', [matricula])
 
     def get_funcionario_dados_pessoais_documentos_by_matricula(self, matricula):
         """
@@ -302,10 +315,12 @@ class PessoalManager(TenantScopedManager):
     # ----------------------------------------------------------------------------------------------------------------------------------
     # --- MÉTODO PARA EXPORTAÇÃO COMPLETA DE FUNCIONÁRIOS (AGORA MAIS EFICIENTE) ------------------------------------------------------
     # ----------------------------------------------------------------------------------------------------------------------------------
-    def get_all_funcionarios_completo(self, search_matricula=None, search_nome=None, search_status=None, search_cargo_id=None):
+    def get_all_funcionarios_completo(self, search_matricula=None, search_nome=None, search_status=None, search_cargo_id=None, stream=False):
         """
         Retorna uma lista de todos os funcionários com todos os dados associados (pessoais, documentos, endereços, contatos)
         para fins de exportação ou relatórios detalhados, utilizando JOINs.
+        Com stream=True devolve um gerador (cursor não bufferizado, memória constante); a conexão
+        fica ocupada até o gerador ser consumido.
         """
         f_clause, f_param = self.tenant_clause('f')
         fd_clause, fd_param = self.tenant_clause('fd')
@@ -342,8 +357,9 @@ class PessoalManager(TenantScopedManager):
             query += " AND f.Matricula LIKE %s"
             params.append(f"%{search_matricula}%")
         if search_nome:
-            query += " AND f.Nome_Completo LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('funcionarios', 'Nome_Completo', search_nome, alias='f')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_status:
             query += " AND f.Status = %s"
             params.append(search_status)
@@ -353,6 +369,9 @@ class PessoalManager(TenantScopedManager):
 
         query += " ORDER BY f.Nome_Completo"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -366,15 +385,50 @@ class PessoalManager(TenantScopedManager):
         """Retorna um conjunto (set) de todas as matrículas de funcionários existentes do tenant."""
         clause, tenant_param = self.tenant_clause()
         query = f"SELECT Matricula FROM funcionarios WHERE {clause}"
-        results = self.db.execute_query(query, (tenant_param,), fetch_results=True)
-        return {row['Matricula'] for row in results} if results else set()
+        return {row['Matricula'] for row in self.db.iter_query(query, (tenant_param,))}
 
     def get_all_cpfs(self):
         """Retorna um conjunto (set) de todos os CPFs existentes na tabela de documentos do tenant."""
         clause, tenant_param = self.tenant_clause()
         query = f"SELECT Cpf_Numero FROM funcionarios_documentos WHERE {clause} AND Cpf_Numero IS NOT NULL AND Cpf_Numero != ''"
-        results = self.db.execute_query(query, (tenant_param,), fetch_results=True)
-        return {row['Cpf_Numero'] for row in results} if results else set()
+        return {row['Cpf_Numero'] for row in self.db.iter_query(query, (tenant_param,))}
+
+    # Colunas gravadas pela importação em lote, na ordem dos INSERTs multi-linha
+    IMPORT_COLUNAS_FUNCIONARIOS = ['Matricula', 'Nome_Completo', 'Data_Admissao', 'ID_Cargos', 'ID_Niveis', 'Status', 'Tipo_Contratacao']
+    IMPORT_COLUNAS_DOCUMENTOS = [
+        'Matricula_Funcionario', 'Data_Nascimento', 'Estado_Civil', 'Nacionalidade', 'Naturalidade', 'Genero',
+        'Rg_Numero', 'Rg_OrgaoEmissor', 'Rg_UfEmissor', 'Rg_DataEmissao', 'Cpf_Numero',
+        'Ctps_Numero', 'Ctps_Serie', 'Pispasep', 'Cnh_Numero', 'Cnh_Categoria', 'Cnh_DataValidade', 'Cnh_OrgaoEmissor',
+        'TitEleitor_Numero', 'TitEleitor_Zona', 'TitEleitor_Secao', 'Observacoes', 'Link_Foto'
+    ]
+    IMPORT_COLUNAS_ENDERECOS = ['Matricula_Funcionario', 'Tipo_Endereco', 'Logradouro', 'Numero', 'Complemento', 'Bairro', 'Cidade', 'Estado', 'Cep']
+    IMPORT_COLUNAS_CONTATOS = ['Matricula_Funcionario', 'Tipo_Contato', 'Valor_Contato', 'Observacoes']
+
+    def bulk_add_funcionarios(self, registros, commit=True):
+        """
+        Grava um lote de funcionários já validados numa única transação, com um INSERT
+        multi-linha por tabela (funcionarios, funcionarios_documentos, funcionarios_enderecos
+        e funcionarios_contatos). Ou o lote inteiro entra, ou nada entra: qualquer erro faz
+        rollback e é re-lançado para o chamador decidir (ex: reprocessar um a um).
+
+        :param registros: Lista de dicts com 'funcionario' e 'documentos' (dicts por coluna),
+                          'endereco' (dict ou None) e 'contatos' (lista de dicts).
+        :param commit: False = simulação (dry-run): executa tudo e desfaz no final.
+        :return: Quantidade de funcionários gravados (ou que seriam gravados).
+        """
+        enderecos = [r['endereco'] for r in registros if r.get('endereco')]
+        contatos = [c for r in registros for c in r.get('contatos', [])]
+
+        with self.db.transaction(commit=commit):
+            self.insert_rows('funcionarios', self.IMPORT_COLUNAS_FUNCIONARIOS, [r['funcionario'] for r in registros])
+            self.insert_rows('funcionarios_documentos', self.IMPORT_COLUNAS_DOCUMENTOS, [r['documentos'] for r in registros], timestamps=True)
+            if enderecos:
+                self.insert_rows('funcionarios_enderecos', self.IMPORT_COLUNAS_ENDERECOS, enderecos, timestamps=True)
+            if contatos:
+                self.insert_rows('funcionarios_contatos', self.IMPORT_COLUNAS_CONTATOS, contatos, timestamps=True)
+            kpi_summary.aplicar(self.db, self.tenant_id, 'funcionarios', [], [r['funcionario'] for r in registros])
+            indice_busca.indexar(self.db, self.tenant_id, 'funcionarios', [r['funcionario']['Matricula'] for r in registros])
+        return len(registros)
 
     # ==================================================================================================================================
     # === MÉTODOS DO SUBMÓDULO: ENDEREÇOS DE FUNCIONÁRIOS ==============================================================================
@@ -486,12 +540,10 @@ class PessoalManager(TenantScopedManager):
     # ==================================================================================================================================
 
     def get_all_cargos_for_dropdown(self):
-        """Retorna uma lista de cargos para preencher dropdowns."""
-        clause, tenant_param = self.tenant_clause()
-        query = f"SELECT ID_Cargos, Nome_Cargo FROM cargos WHERE {clause} ORDER BY Nome_Cargo"
-        return self.db.execute_query(query, (tenant_param,), fetch_results=True)
+        """Opções de cargo dos dropdowns: tupla de Opcao(id, rotulo), do cache de dados de referência."""
+        return ReferenciaManager(self.db, self.tenant_id).cargos()
 
-    def get_all_cargos(self, search_nome=None):
+    def get_all_cargos(self, search_nome=None, page_token=None, page_size=None, count=None, stream=False):
         """Retorna uma lista de todos os cargos, opcionalmente filtrada."""
         clause, tenant_param = self.tenant_clause()
         query = f"""
@@ -505,8 +557,18 @@ class PessoalManager(TenantScopedManager):
             query += " AND Nome_Cargo LIKE %s"
             params.append(f"%{search_nome}%")
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('Nome_Cargo', 'Nome_Cargo', 'ASC'),
+                ('ID_Cargos', 'ID_Cargos', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY Nome_Cargo"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -519,7 +581,8 @@ class PessoalManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, nome_cargo, descricao_cargo, cbo)
-        return self.db.execute_query(query, params, fetch_results=False)
+        result = self.db.execute_query(query, params, fetch_results=False)
+        return result
 
     def get_cargo_by_id(self, cargo_id):
         """Retorna os dados de um cargo pelo ID."""
@@ -545,7 +608,8 @@ class PessoalManager(TenantScopedManager):
             WHERE {clause} AND ID_Cargos = %s
         """
         params = (nome_cargo, descricao_cargo, cbo, tenant_param, cargo_id)
-        return self.db.execute_query(query, params, fetch_results=False)
+        result = self.db.execute_query(query, params, fetch_results=False)
+        return result
 
     def delete_cargo(self, cargo_id):
         """
@@ -559,7 +623,8 @@ class PessoalManager(TenantScopedManager):
             print(f"Não é possível excluir o cargo ID {cargo_id}: Existem funcionários associados.")
             return False
         query = f"DELETE FROM cargos WHERE {clause} AND ID_Cargos = %s"
-        return self.db.execute_query(query, (tenant_param, cargo_id), fetch_results=False)
+        result = self.db.execute_query(query, (tenant_param, cargo_id), fetch_results=False)
+        return result
 
     def get_cargo_by_nome(self, nome_cargo):
         """Verifica se um cargo com o dado nome já existe."""
@@ -573,12 +638,10 @@ class PessoalManager(TenantScopedManager):
     # ==================================================================================================================================
 
     def get_all_niveis_for_dropdown(self):
-        """Retorna uma lista de níveis para preencher dropdowns."""
-        clause, tenant_param = self.tenant_clause()
-        query = f"SELECT ID_Niveis, Nome_Nivel FROM niveis WHERE {clause} ORDER BY Nome_Nivel"
-        return self.db.execute_query(query, (tenant_param,), fetch_results=True)
+        """Opções de nível dos dropdowns: tupla de Opcao(id, rotulo), do cache de dados de referência."""
+        return ReferenciaManager(self.db, self.tenant_id).niveis()
 
-    def get_all_niveis(self, search_nome=None):
+    def get_all_niveis(self, search_nome=None, page_token=None, page_size=None, count=None, stream=False):
         """Retorna uma lista de todos os níveis, opcionalmente filtrada."""
         clause, tenant_param = self.tenant_clause()
         query = f"""
@@ -592,8 +655,18 @@ class PessoalManager(TenantScopedManager):
             query += " AND Nome_Nivel LIKE %s"
             params.append(f"%{search_nome}%")
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('Nome_Nivel', 'Nome_Nivel', 'ASC'),
+                ('ID_Niveis', 'ID_Niveis', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY Nome_Nivel"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -606,7 +679,8 @@ class PessoalManager(TenantScopedManager):
             VALUES (%s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, nome_nivel, descricao)
-        return self.db.execute_query(query, params, fetch_results=False)
+        result = self.db.execute_query(query, params, fetch_results=False)
+        return result
 
     def get_nivel_by_id(self, nivel_id):
         """Retorna os dados de um nível pelo ID."""
@@ -632,7 +706,8 @@ class PessoalManager(TenantScopedManager):
             WHERE {clause} AND ID_Niveis = %s
         """
         params = (nome_nivel, descricao, tenant_param, nivel_id)
-        return self.db.execute_query(query, params, fetch_results=False)
+        result = self.db.execute_query(query, params, fetch_results=False)
+        return result
 
     def delete_nivel(self, nivel_id):
         """
@@ -646,7 +721,8 @@ class PessoalManager(TenantScopedManager):
             print(f"Não é possível excluir o nível ID {nivel_id}: Existem funcionários associados.")
             return False
         query = f"DELETE FROM niveis WHERE {clause} AND ID_Niveis = %s"
-        return self.db.execute_query(query, (tenant_param, nivel_id), fetch_results=False)
+        result = self.db.execute_query(query, (tenant_param, nivel_id), fetch_results=False)
+        return result
 
     def get_nivel_by_nome(self, nome_nivel):
         """Verifica se um nível com o dado nome já existe."""
@@ -659,7 +735,7 @@ class PessoalManager(TenantScopedManager):
     # === MÉTODOS DO SUBMÓDULO: SALÁRIOS E BENEFÍCIOS ==================================================================================
     # ==================================================================================================================================
 
-    def get_all_salarios(self, search_cargo_id=None, search_nivel_id=None):
+    def get_all_salarios(self, search_cargo_id=None, search_nivel_id=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os pacotes salariais, opcionalmente filtrada,
         incluindo informações de cargo e nível.
@@ -670,6 +746,7 @@ class PessoalManager(TenantScopedManager):
                 s.ID_Salarios, s.ID_Cargos, s.ID_Niveis, s.Salario_Base, s.Periculosidade,
                 s.Insalubridade, s.Ajuda_De_Custo, s.Vale_Refeicao, s.Gratificacao, s.Cesta_Basica,
                 s.Outros_Beneficios, s.Data_Vigencia, c.Nome_Cargo, n.Nome_Nivel,
+                COALESCE(c.Nome_Cargo, '') AS Ordem_Cargo, COALESCE(n.Nome_Nivel, '') AS Ordem_Nivel,
                 s.Data_Criacao, s.Data_Modificacao
             FROM salarios s
             LEFT JOIN cargos c ON s.ID_Cargos = c.ID_Cargos
@@ -685,8 +762,20 @@ class PessoalManager(TenantScopedManager):
             query += " AND s.ID_Niveis = %s"
             params.append(search_nivel_id)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(c.Nome_Cargo, '')", 'Ordem_Cargo', 'ASC'),
+                ("COALESCE(n.Nome_Nivel, '')", 'Ordem_Nivel', 'ASC'),
+                ('s.Data_Vigencia', 'Data_Vigencia', 'DESC'),
+                ('s.ID_Salarios', 'ID_Salarios', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY c.Nome_Cargo, n.Nome_Nivel, s.Data_Vigencia DESC"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -751,7 +840,7 @@ class PessoalManager(TenantScopedManager):
     # === MÉTODOS DO SUBMÓDULO: FÉRIAS =================================================================================================
     # ==================================================================================================================================
 
-    def get_all_ferias(self, search_matricula=None, search_status=None, search_periodo_inicio=None, search_periodo_fim=None):
+    def get_all_ferias(self, search_matricula=None, search_status=None, search_periodo_inicio=None, search_periodo_fim=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os registros de férias, opcionalmente filtrada,
         incluindo informações do funcionário.
@@ -762,7 +851,8 @@ class PessoalManager(TenantScopedManager):
             SELECT
                 f.ID_Ferias, f.Matricula_Funcionario, f.Periodo_Aquisitivo_Inicio, f.Periodo_Aquisitivo_Fim,
                 f.Data_Inicio_Gozo, f.Data_Fim_Gozo, f.Dias_Gozo, f.Status_Ferias, f.Observacoes,
-                func.Nome_Completo AS Nome_Funcionario, f.Data_Criacao, f.Data_Modificacao
+                func.Nome_Completo AS Nome_Funcionario, COALESCE(func.Nome_Completo, '') AS Ordem_Funcionario,
+                f.Data_Criacao, f.Data_Modificacao
             FROM ferias f
             LEFT JOIN funcionarios func ON f.Matricula_Funcionario = func.Matricula AND {func_clause}
             WHERE {f_clause}
@@ -782,8 +872,19 @@ class PessoalManager(TenantScopedManager):
             query += " AND f.Periodo_Aquisitivo_Fim <= %s"
             params.append(search_periodo_fim)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('f.Periodo_Aquisitivo_Inicio', 'Periodo_Aquisitivo_Inicio', 'DESC'),
+                ("COALESCE(func.Nome_Completo, '')", 'Ordem_Funcionario', 'ASC'),
+                ('f.ID_Ferias', 'ID_Ferias', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY f.Periodo_Aquisitivo_Inicio DESC, func.Nome_Completo"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -797,8 +898,6 @@ class PessoalManager(TenantScopedManager):
         """
         params = (self.tenant_id, matricula_funcionario, periodo_aquisitivo_inicio, periodo_aquisitivo_fim, data_inicio_gozo, data_fim_gozo, dias_gozo, status_ferias, observacoes)
         result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
         return result
 
     def get_ferias_by_id(self, ferias_id):
@@ -832,8 +931,6 @@ class PessoalManager(TenantScopedManager):
         """
         params = (matricula_funcionario, periodo_aquisitivo_inicio, periodo_aquisitivo_fim, data_inicio_gozo, data_fim_gozo, dias_gozo, status_ferias, observacoes, tenant_param, ferias_id)
         result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
         return result
 
     def delete_ferias(self, ferias_id):
@@ -841,15 +938,13 @@ class PessoalManager(TenantScopedManager):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM ferias WHERE {clause} AND ID_Ferias = %s"
         result = self.db.execute_query(query, (tenant_param, ferias_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
         return result
 
     # ==================================================================================================================================
     # === MÉTODOS DO SUBMÓDULO: DEPENDENTES ============================================================================================
     # ==================================================================================================================================
 
-    def get_all_dependentes(self, search_matricula=None, search_nome=None, search_parentesco=None):
+    def get_all_dependentes(self, search_matricula=None, search_nome=None, search_parentesco=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os dependentes, opcionalmente filtrada,
         incluindo informações do funcionário.
@@ -860,7 +955,8 @@ class PessoalManager(TenantScopedManager):
             SELECT
                 d.ID_Dependente, d.Matricula_Funcionario, d.Nome_Completo, d.Parentesco, d.Data_Nascimento,
                 d.Cpf, d.Contato_Emergencia, d.Telefone_Emergencia, d.Observacoes,
-                func.Nome_Completo AS Nome_Funcionario, d.Data_Criacao, d.Data_Modificacao
+                func.Nome_Completo AS Nome_Funcionario, COALESCE(func.Nome_Completo, '') AS Ordem_Funcionario,
+                d.Data_Criacao, d.Data_Modificacao
             FROM dependentes d
             LEFT JOIN funcionarios func ON d.Matricula_Funcionario = func.Matricula AND {func_clause}
             WHERE {d_clause}
@@ -871,14 +967,26 @@ class PessoalManager(TenantScopedManager):
             query += " AND d.Matricula_Funcionario LIKE %s"
             params.append(f"%{search_matricula}%")
         if search_nome:
-            query += " AND d.Nome_Completo LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('dependentes', 'Nome_Completo', search_nome, alias='d')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_parentesco:
             query += " AND d.Parentesco = %s"
             params.append(search_parentesco)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(func.Nome_Completo, '')", 'Ordem_Funcionario', 'ASC'),
+                ('d.Nome_Completo', 'Nome_Completo', 'ASC'),
+                ('d.ID_Dependente', 'ID_Dependente', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY func.Nome_Completo, d.Nome_Completo"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -946,25 +1054,36 @@ class PessoalManager(TenantScopedManager):
     # === MÉTODOS PARA DASHBOARD E RELATÓRIOS (MÓDULO PESSOAL) =========================================================================
     # ==================================================================================================================================
 
+    # TTL curto: 'proximas_ferias' depende da data de hoje, não só das tabelas
+    @cached_query('dash:pessoal:kpis', tables=('tenant_kpi_summary', 'cargos', 'niveis', 'ferias'), timeout=300,
+                  stale_while_revalidate=True)
     def get_dashboard_kpis(self):
         """
-        KPIs do dashboard de Pessoal. Continuam 4 round-trips (são 4 agregações
-        genuinamente distintas, sem redundância a eliminar) mas agora com cache por
-        tenant (TTL 5 min, invalidado nas escritas de funcionários/férias).
+        KPIs do dashboard de Pessoal. Contagens lidas do resumo do tenant (tenant_kpi_summary,
+        mantido nas escritas de funcionários) com os nomes dos dropdowns de cargo/nível;
+        só as próximas férias (janela relativa a hoje) continuam uma consulta própria.
         """
-        cached = cache.get(self._dashboard_cache_key())
-        if cached is not None:
-            return cached
-
+        resumo = kpi_summary.ler(self.db, self.tenant_id, ('funcionarios_status', 'funcionarios_cargo', 'funcionarios_nivel'))
         kpis = {
-            'status_counts': self.get_funcionario_status_counts(),
-            'funcionarios_por_cargo': self.get_funcionarios_by_cargo(),
-            'funcionarios_por_nivel': self.get_funcionarios_by_nivel(),
+            'status_counts': {status: quantidade for status, (quantidade, _) in resumo['funcionarios_status'].items()},
+            'funcionarios_por_cargo': self._contagem_por_nome(
+                resumo['funcionarios_cargo'], self.get_all_cargos_for_dropdown(), 'Nome_Cargo'),
+            'funcionarios_por_nivel': self._contagem_por_nome(
+                resumo['funcionarios_nivel'], self.get_all_niveis_for_dropdown(), 'Nome_Nivel'),
             'proximas_ferias': self.get_proximas_ferias(dias_antecedencia=60),
         }
-        cache.set(self._dashboard_cache_key(), kpis, timeout=300)
         return kpis
 
+    @staticmethod
+    def _contagem_por_nome(contagens, referencia, coluna_nome):
+        """{ID (texto): (quantidade, _)} do resumo -> [{coluna_nome, 'Total'}] por nome, maior total primeiro."""
+        nomes = {str(opcao.id): opcao.rotulo for opcao in referencia or []}
+        totais = {}
+        for chave, (quantidade, _) in contagens.items():
+            if chave in nomes:
+                totais[nomes[chave]] = totais.get(nomes[chave], 0) + quantidade
+        return [{coluna_nome: nome, 'Total': total} for nome, total in sorted(totais.items(), key=lambda t: -t[1])]
+
     def get_funcionario_status_counts(self):
         """Retorna a contagem de funcionários por status."""
         clause, tenant_param = self.tenant_clause()
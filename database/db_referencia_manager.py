@@ -0,0 +1,119 @@
+# database/db_referencia_manager.py
+# Dados de referência dos campos de seleção e filtros das listagens: cargos, níveis, clientes,
+# contratos, obras, treinamentos e agendamentos de treinamento do tenant. Tabelas que mudam pouco
+# e são lidas em quase toda listagem/formulário — uma fonte só para PessoalManager, ObrasManager e
+# SegurancaManager (os get_all_*_for_dropdown de cada um delegam para cá).
+#
+# Cada lista vai para o cache de consultas do tenant (database/query_cache.py) só como pares
+# [id, rótulo] — o JSON compacto do CompactSerializer, sem dicionário por linha com colunas que o
+# <select> não usa — com o rótulo já montado no SELECT (nada de formatação em Python a cada render).
+# Na leitura os pares viram Opcao(id, rotulo). Uma escrita em qualquer tabela lida invalida a lista
+# (carimbos de versão do query_cache).
+
+import functools
+from collections import namedtuple
+
+from database.db_base import TenantScopedManager
+from database.query_cache import cached_query
+
+# Opção de um campo de seleção. Nos templates: opcao.id / opcao.rotulo
+# (ou form_select(..., value_attr='id', label_attr='rotulo')).
+Opcao = namedtuple('Opcao', ['id', 'rotulo'])
+
+
+def lista_de_opcoes(family, tables):
+    """
+    @cached_query para métodos que devolvem pares (id, rótulo): o cache guarda só os pares e a
+    chamada devolve uma tupla de Opcao (None em erro de consulta, como o método).
+    """
+    def decorator(method):
+        cached = cached_query(family, tables)(method)
+
+        @functools.wraps(cached)  # Mantém cache_family/cache_tables
+        def wrapper(self):
+            pares = cached(self)
+            return None if pares is None else tuple(Opcao(*par) for par in pares)
+        return wrapper
+    return decorator
+
+
+class ReferenciaManager(TenantScopedManager):
+    """Listas de opções (id, rótulo) do tenant, em cache e invalidadas pelas escritas."""
+
+    def _opcoes(self, query, params):
+        """Executa um SELECT de colunas id/rotulo e devolve os pares. None em erro (não vai para o cache)."""
+        results = self.db.execute_query(query, params, fetch_results=True)
+        if results is None:
+            return None
+        return [(row['id'], row['rotulo']) for row in results]
+
+    @lista_de_opcoes('ref:cargos', tables=('cargos',))
+    def cargos(self):
+        clause, tenant_param = self.tenant_clause()
+        query = f"SELECT ID_Cargos AS id, Nome_Cargo AS rotulo FROM cargos WHERE {clause} ORDER BY Nome_Cargo"
+        return self._opcoes(query, (tenant_param,))
+
+    @lista_de_opcoes('ref:niveis', tables=('niveis',))
+    def niveis(self):
+        clause, tenant_param = self.tenant_clause()
+        query = f"SELECT ID_Niveis AS id, Nome_Nivel AS rotulo FROM niveis WHERE {clause} ORDER BY Nome_Nivel"
+        return self._opcoes(query, (tenant_param,))
+
+    @lista_de_opcoes('ref:clientes', tables=('clientes',))
+    def clientes(self):
+        clause, tenant_param = self.tenant_clause()
+        query = f"SELECT ID_Clientes AS id, Nome_Cliente AS rotulo FROM clientes WHERE {clause} ORDER BY Nome_Cliente"
+        return self._opcoes(query, (tenant_param,))
+
+    @lista_de_opcoes('ref:contratos', tables=('contratos', 'clientes'))
+    def contratos(self):
+        """Rótulo "Número (Cliente)", como no typeahead de contratos."""
+        cl_clause, cl_param = self.tenant_clause('cl')
+        c_clause, c_param = self.tenant_clause('c')
+        query = f"""
+            SELECT c.ID_Contratos AS id, CONCAT(c.Numero_Contrato, ' (', cl.Nome_Cliente, ')') AS rotulo
+            FROM contratos c
+            JOIN clientes cl ON c.ID_Clientes = cl.ID_Clientes AND {cl_clause}
+            WHERE {c_clause}
+            ORDER BY c.Numero_Contrato
+        """
+        return self._opcoes(query, (cl_param, c_param))
+
+    @lista_de_opcoes('ref:obras', tables=('obras',))
+    def obras(self):
+        """Rótulo "Número - Nome", ordenado pelo nome."""
+        clause, tenant_param = self.tenant_clause()
+        query = f"""
+            SELECT ID_Obras AS id, CONCAT(Numero_Obra, ' - ', Nome_Obra) AS rotulo
+            FROM obras
+            WHERE {clause}
+            ORDER BY Nome_Obra
+        """
+        return self._opcoes(query, (tenant_param,))
+
+    @lista_de_opcoes('ref:treinamentos', tables=('treinamentos',))
+    def treinamentos(self):
+        clause, tenant_param = self.tenant_clause()
+        query = f"""
+            SELECT ID_Treinamento AS id, Nome_Treinamento AS rotulo
+            FROM treinamentos
+            WHERE {clause}
+            ORDER BY Nome_Treinamento
+        """
+        return self._opcoes(query, (tenant_param,))
+
+    @lista_de_opcoes('ref:agendamentos', tables=('treinamentos_agendamentos', 'treinamentos'))
+    def agendamentos(self):
+        """Rótulo "Treinamento (dd/mm/aaaa hh:mm)" (só o nome se não há data de início), mais recentes primeiro."""
+        clause, tenant_param = self.tenant_clause('ta')
+        t_clause, t_param = self.tenant_clause('t')
+        query = f"""
+            SELECT ta.ID_Agendamento AS id,
+                   IF(ta.Data_Hora_Inicio IS NULL, t.Nome_Treinamento,
+                      CONCAT(t.Nome_Treinamento, ' (', DATE_FORMAT(ta.Data_Hora_Inicio, '%d/%m/%Y %H:%i'), ')')) AS rotulo
+            FROM treinamentos_agendamentos ta
+            JOIN treinamentos t ON ta.ID_Treinamento = t.ID_Treinamento AND {t_clause}
+            WHERE {clause}
+            ORDER BY ta.Data_Hora_Inicio DESC
+        """
+        return self._opcoes(query, (t_param, tenant_param))
@@ -5,17 +5,15 @@
 import mysql.connector
 from datetime import datetime, date
 
-from database.db_base import TenantScopedManager
-from database.cache_ext import cache
+from database.db_base import TYPEAHEAD_CACHE_TTL, TenantScopedManager
+from database.db_referencia_manager import ReferenciaManager
+from database import busca
+from database import indice_busca
+from database import kpi_summary
+from database.query_cache import cached_query
 
 class SegurancaManager(TenantScopedManager):
 
-    def _dashboard_cache_key(self):
-        return f"dash:seguranca:kpis:{self.tenant_id}"
-
-    def _invalidate_dashboard_cache(self):
-        cache.delete(self._dashboard_cache_key())
-
     def _format_date_fields(self, item):
         """
         Função auxiliar para converter campos de data em dicionários de resultados
@@ -64,7 +62,7 @@ class SegurancaManager(TenantScopedManager):
         return item
 
     # --- Métodos de Incidentes e Acidentes ---
-    def get_all_incidentes_acidentes(self, search_tipo=None, search_status=None, search_obra_id=None, search_responsavel_matricula=None):
+    def get_all_incidentes_acidentes(self, search_tipo=None, search_status=None, search_obra_id=None, search_responsavel_matricula=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os incidentes/acidentes, opcionalmente filtrada.
         """
@@ -113,8 +111,18 @@ class SegurancaManager(TenantScopedManager):
             query += " AND ia.Responsavel_Investigacao_Funcionario_Matricula = %s"
             params.append(search_responsavel_matricula)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('ia.Data_Hora_Ocorrencia', 'Data_Hora_Ocorrencia', 'DESC'),
+                ('ia.ID_Incidente_Acidente', 'ID_Incidente_Acidente', 'DESC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY ia.Data_Hora_Ocorrencia DESC"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -139,9 +147,7 @@ class SegurancaManager(TenantScopedManager):
             acoes_preventivas_recomendadas, status_registro, responsavel_investigacao_matricula,
             data_fechamento, observacoes
         )
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'incidentes_acidentes', [kpi_summary.NOVO])
         return result
 
     def get_incidente_acidente_by_id(self, incidente_id):
@@ -212,9 +218,7 @@ class SegurancaManager(TenantScopedManager):
             acoes_preventivas_recomendadas, status_registro, responsavel_investigacao_matricula,
             data_fechamento, observacoes, tenant_param, incidente_id
         )
-        result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, params, 'incidentes_acidentes', [incidente_id])
         return result
 
     def delete_incidente_acidente(self, incidente_id):
@@ -223,13 +227,11 @@ class SegurancaManager(TenantScopedManager):
         """
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM incidentes_acidentes WHERE {clause} AND ID_Incidente_Acidente = %s"
-        result = self.db.execute_query(query, (tenant_param, incidente_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
+        result = kpi_summary.escrever(self, query, (tenant_param, incidente_id), 'incidentes_acidentes', [incidente_id])
         return result
 
     # --- Métodos de ASOs ---
-    def get_all_asos(self, search_matricula=None, search_tipo=None, search_resultado=None, search_data_emissao_inicio=None, search_data_emissao_fim=None):
+    def get_all_asos(self, search_matricula=None, search_tipo=None, search_resultado=None, search_data_emissao_inicio=None, search_data_emissao_fim=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os ASOs, opcionalmente filtrada,
         incluindo informações do funcionário.
@@ -247,6 +249,7 @@ class SegurancaManager(TenantScopedManager):
                 a.Medico_Responsavel,
                 a.Observacoes,
                 f.Nome_Completo AS Nome_Funcionario,
+                COALESCE(f.Nome_Completo, '') AS Ordem_Funcionario,
                 a.Data_Criacao,
                 a.Data_Modificacao
             FROM
@@ -273,8 +276,19 @@ class SegurancaManager(TenantScopedManager):
             query += " AND a.Data_Emissao <= %s"
             params.append(search_data_emissao_fim)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('a.Data_Emissao', 'Data_Emissao', 'DESC'),
+                ("COALESCE(f.Nome_Completo, '')", 'Ordem_Funcionario', 'ASC'),
+                ('a.ID_ASO', 'ID_ASO', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY a.Data_Emissao DESC, f.Nome_Completo"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -290,8 +304,6 @@ class SegurancaManager(TenantScopedManager):
         """
         params = (self.tenant_id, matricula_funcionario, tipo_aso, data_emissao, data_vencimento, resultado, medico_responsavel, observacoes)
         result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
         return result
 
     def get_aso_by_id(self, aso_id):
@@ -344,8 +356,6 @@ class SegurancaManager(TenantScopedManager):
         """
         params = (matricula_funcionario, tipo_aso, data_emissao, data_vencimento, resultado, medico_responsavel, observacoes, tenant_param, aso_id)
         result = self.db.execute_query(query, params, fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
         return result
 
     def delete_aso(self, aso_id):
@@ -355,12 +365,10 @@ class SegurancaManager(TenantScopedManager):
         clause, tenant_param = self.tenant_clause()
         query = f"DELETE FROM asos WHERE {clause} AND ID_ASO = %s"
         result = self.db.execute_query(query, (tenant_param, aso_id), fetch_results=False)
-        if result:
-            self._invalidate_dashboard_cache()
         return result
 
  # --- NOVOS MÉTODOS DE TREINAMENTOS (Catálogo) ---
-    def get_all_treinamentos(self, search_nome=None, search_tipo=None):
+    def get_all_treinamentos(self, search_nome=None, search_tipo=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os tipos de treinamento, opcionalmente filtrada.
         """
@@ -383,14 +391,25 @@ class SegurancaManager(TenantScopedManager):
         params = [tenant_param]
 
         if search_nome:
-            query += " AND Nome_Treinamento LIKE %s"
-            params.append(f"%{search_nome}%")
+            filtro, filtro_params = busca.filtro_texto('treinamentos', 'Nome_Treinamento', search_nome)
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_tipo:
             query += " AND Tipo_Treinamento = %s"
             params.append(search_tipo)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('Nome_Treinamento', 'Nome_Treinamento', 'ASC'),
+                ('ID_Treinamento', 'ID_Treinamento', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY Nome_Treinamento"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -405,7 +424,7 @@ class SegurancaManager(TenantScopedManager):
             VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
         """
         params = (self.tenant_id, nome_treinamento, descricao, carga_horaria_horas, tipo_treinamento, validade_dias, instrutor_responsavel)
-        return self.db.execute_query(query, params, fetch_results=False)
+        return indice_busca.escrever(self, query, params, 'treinamentos', [], novo=True)
 
     def get_treinamento_by_id(self, treinamento_id):
         """
@@ -450,7 +469,7 @@ class SegurancaManager(TenantScopedManager):
             WHERE {clause} AND ID_Treinamento = %s
         """
         params = (nome_treinamento, descricao, carga_horaria_horas, tipo_treinamento, validade_dias, instrutor_responsavel, tenant_param, treinamento_id)
-        return self.db.execute_query(query, params, fetch_results=False)
+        return indice_busca.escrever(self, query, params, 'treinamentos', [treinamento_id])
 
     def delete_treinamento(self, treinamento_id):
         """
@@ -465,7 +484,7 @@ class SegurancaManager(TenantScopedManager):
             return False
 
         query = f"DELETE FROM treinamentos WHERE {clause} AND ID_Treinamento = %s"
-        return self.db.execute_query(query, (tenant_param, treinamento_id), fetch_results=False)
+        return indice_busca.escrever(self, query, (tenant_param, treinamento_id), 'treinamentos', [treinamento_id])
 
     def get_treinamento_by_nome(self, nome_treinamento):
         """
@@ -477,7 +496,7 @@ class SegurancaManager(TenantScopedManager):
         return result[0] if result else None
 
     # --- NOVOS MÉTODOS DE AGENDAMENTOS DE TREINAMENTOS ---
-    def get_all_treinamentos_agendamentos(self, search_treinamento_id=None, search_status=None, search_data_inicio=None, search_data_fim=None):
+    def get_all_treinamentos_agendamentos(self, search_treinamento_id=None, search_status=None, search_data_inicio=None, search_data_fim=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os agendamentos de treinamentos, opcionalmente filtrada.
         """
@@ -516,8 +535,18 @@ class SegurancaManager(TenantScopedManager):
             query += " AND ta.Data_Hora_Fim <= %s"
             params.append(search_data_fim)
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ('ta.Data_Hora_Inicio', 'Data_Hora_Inicio', 'DESC'),
+                ('ta.ID_Agendamento', 'ID_Agendamento', 'DESC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY ta.Data_Hora_Inicio DESC"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -599,7 +628,7 @@ class SegurancaManager(TenantScopedManager):
         return self.db.execute_query(query, (tenant_param, agendamento_id), fetch_results=False)
 
     # --- NOVOS MÉTODOS DE PARTICIPANTES DE TREINAMENTOS ---
-    def get_all_treinamentos_participantes(self, search_agendamento_id=None, search_matricula=None, search_presenca=None):
+    def get_all_treinamentos_participantes(self, search_agendamento_id=None, search_matricula=None, search_presenca=None, page_token=None, page_size=None, count=None, stream=False):
         """
         Retorna uma lista de todos os participantes de treinamentos, opcionalmente filtrada.
         """
@@ -617,6 +646,8 @@ class SegurancaManager(TenantScopedManager):
                 ta.Data_Hora_Inicio,
                 t.Nome_Treinamento,
                 f.Nome_Completo AS Nome_Funcionario,
+                COALESCE(ta.Data_Hora_Inicio, CAST('1000-01-01' AS DATETIME)) AS Ordem_Inicio,
+                COALESCE(f.Nome_Completo, '') AS Ordem_Funcionario,
                 tp.Data_Criacao,
                 tp.Data_Modificacao
             FROM
@@ -641,8 +672,19 @@ class SegurancaManager(TenantScopedManager):
             query += " AND tp.Presenca = %s"
             params.append(int(search_presenca)) # BOOLEAN em MySQL é 0 ou 1
 
+        # Com page_size, devolve uma página keyset (ver TenantScopedManager.fetch_page)
+        if page_size:
+            return self.fetch_page(query, params, [
+                ("COALESCE(ta.Data_Hora_Inicio, CAST('1000-01-01' AS DATETIME))", 'Ordem_Inicio', 'DESC'),
+                ("COALESCE(f.Nome_Completo, '')", 'Ordem_Funcionario', 'ASC'),
+                ('tp.ID_Participante', 'ID_Participante', 'ASC'),
+            ], page_token, page_size, count=count, formatter=self._format_date_fields)
+
         query += " ORDER BY ta.Data_Hora_Inicio DESC, f.Nome_Completo"
 
+        if stream:
+            return self.iter_rows(query, params, formatter=self._format_date_fields)
+
         results = self.db.execute_query(query, tuple(params), fetch_results=True)
         if results:
             return [self._format_date_fields(item) for item in results]
@@ -735,22 +777,8 @@ class SegurancaManager(TenantScopedManager):
         result = self.db.execute_query(query, tuple(params), fetch_results=True)
         return result[0] if result else None
 
-    # --- Métodos auxiliares para dropdowns (já devem existir ou serão adicionados) ---
-    def get_all_obras_for_dropdown(self): # Do ObrasManager, mas pode ser útil aqui se não tiver o ObrasManager importado
-        """Retorna uma lista de obras para preencher dropdowns."""
-        clause, tenant_param = self.tenant_clause()
-        query = f"""
-            SELECT
-                ID_Obras,
-                Numero_Obra,
-                Nome_Obra
-            FROM
-                obras
-            WHERE {clause}
-            ORDER BY Nome_Obra
-        """
-        return self.db.execute_query(query, (tenant_param,), fetch_results=True)
-
+    # --- Métodos auxiliares para dropdowns ---
+    # (obras: ObrasManager.get_all_obras_for_dropdown; listas em database/db_referencia_manager.py)
     def get_all_funcionarios_for_dropdown(self): # Do PessoalManager, mas pode ser útil aqui
         """Retorna uma lista de funcionários para preencher dropdowns."""
         clause, tenant_param = self.tenant_clause()
@@ -758,88 +786,80 @@ class SegurancaManager(TenantScopedManager):
         return self.db.execute_query(query, (tenant_param,), fetch_results=True)
 
     def get_all_treinamentos_for_dropdown(self):
-        """Retorna uma lista de treinamentos para preencher dropdowns."""
-        clause, tenant_param = self.tenant_clause()
-        query = f"SELECT ID_Treinamento, Nome_Treinamento FROM treinamentos WHERE {clause} ORDER BY Nome_Treinamento"
-        return self.db.execute_query(query, (tenant_param,), fetch_results=True)
+        """Opções de treinamento dos dropdowns: tupla de Opcao(id, rotulo), do cache de dados de referência."""
+        return ReferenciaManager(self.db, self.tenant_id).treinamentos()
 
     def get_all_agendamentos_for_dropdown(self):
-        """Retorna uma lista de agendamentos para preencher dropdowns."""
+        """
+        Opções de agendamento dos dropdowns: tupla de Opcao(id, rotulo), do cache de dados de referência,
+        com o rótulo "Treinamento (dd/mm/aaaa hh:mm)" já montado.
+        """
+        return ReferenciaManager(self.db, self.tenant_id).agendamentos()
+
+    @cached_query('typeahead:treinamentos', tables=('treinamentos',), timeout=TYPEAHEAD_CACHE_TTL)
+    def typeahead_treinamentos(self, prefixo='', limite=None, chave=None):
+        """Opções do campo de treinamento dos formulários: prefixo do nome do treinamento."""
+        clause, tenant_param = self.tenant_clause()
+        query = f"""
+            SELECT ID_Treinamento AS id, CONCAT(Nome_Treinamento, ' (', Tipo_Treinamento, ')') AS rotulo, Nome_Treinamento
+            FROM treinamentos
+            WHERE {clause}
+        """
+        return self.fetch_typeahead(query, (tenant_param,), ('Nome_Treinamento',), 'Nome_Treinamento',
+                                    prefixo, limite, key_column='ID_Treinamento', key=chave)
+
+    @cached_query('typeahead:agendamentos', tables=('treinamentos_agendamentos', 'treinamentos'), timeout=TYPEAHEAD_CACHE_TTL)
+    def typeahead_agendamentos(self, prefixo='', limite=None, chave=None):
+        """
+        Opções do campo de agendamento dos formulários: prefixo do nome do treinamento, os mais
+        recentes primeiro. Rótulo igual ao de get_all_agendamentos_for_dropdown.
+        """
         clause, tenant_param = self.tenant_clause('ta')
+        t_clause, t_param = self.tenant_clause('t')
         query = f"""
-            SELECT
-                ta.ID_Agendamento,
-                ta.Data_Hora_Inicio,
-                t.Nome_Treinamento
-            FROM
-                treinamentos_agendamentos ta
-            JOIN
-                treinamentos t ON ta.ID_Treinamento = t.ID_Treinamento
+            SELECT ta.ID_Agendamento AS id,
+                   IF(ta.Data_Hora_Inicio IS NULL, t.Nome_Treinamento,
+                      CONCAT(t.Nome_Treinamento, ' (', DATE_FORMAT(ta.Data_Hora_Inicio, '%d/%m/%Y %H:%i'), ')')) AS rotulo,
+                   t.Nome_Treinamento, ta.Data_Hora_Inicio
+            FROM treinamentos_agendamentos ta
+            JOIN treinamentos t ON ta.ID_Treinamento = t.ID_Treinamento AND {t_clause}
             WHERE {clause}
-            ORDER BY ta.Data_Hora_Inicio DESC
         """
-        results = self.db.execute_query(query, (tenant_param,), fetch_results=True)
-        # Formatar a data/hora para o dropdown
-        if results:
-            for item in results:
-                if item.get('Data_Hora_Inicio'):
-                    item['Nome_Agendamento_Formatado'] = f"{item['Nome_Treinamento']} ({item['Data_Hora_Inicio'].strftime('%d/%m/%Y %H:%M')})"
-                else:
-                    item['Nome_Agendamento_Formatado'] = item['Nome_Treinamento']
-        return results
+        return self.fetch_typeahead(query, (t_param, tenant_param), ('t.Nome_Treinamento',), 'Data_Hora_Inicio DESC, Nome_Treinamento',
+                                    prefixo, limite, key_column='ta.ID_Agendamento', key=chave)
 
     # ==================================================================================================================================
     # === MÉTODOS PARA DASHBOARD E RELATÓRIOS DE SEGURANÇA =============================================================================
     # ==================================================================================================================================
 
+    # Ordem dos ENUMs da tabela (o ORDER BY do MySQL em coluna ENUM segue a declaração)
+    ORDEM_TIPO_REGISTRO = ['Incidente', 'Acidente']
+    ORDEM_STATUS_REGISTRO = ['Aberto', 'Em Investigação', 'Concluído', 'Fechado']
+
+    @cached_query('dash:seguranca:kpis', tables=('tenant_kpi_summary',), stale_while_revalidate=True)
     def get_dashboard_kpis(self):
         """
-        KPIs do dashboard de Segurança em 3 round-trips (antes eram 4 — o total geral era
-        uma query redundante com a soma dos status), com cache por tenant (TTL 5 min,
-        invalidado nas escritas de incidentes/acidentes e ASOs).
-        """
-        cached = cache.get(self._dashboard_cache_key())
-        if cached is not None:
-            return cached
-
-        type_clause, type_param = self.tenant_clause()
-        type_query = f"""
-            SELECT Tipo_Registro, COUNT(ID_Incidente_Acidente) AS Count
-            FROM incidentes_acidentes
-            WHERE {type_clause}
-            GROUP BY Tipo_Registro
-            ORDER BY Tipo_Registro
-        """
-        type_counts = self.db.execute_query(type_query, (type_param,), fetch_results=True) or []
-
-        status_clause, status_param = self.tenant_clause()
-        status_query = f"""
-            SELECT Status_Registro, COUNT(ID_Incidente_Acidente) AS Count
-            FROM incidentes_acidentes
-            WHERE {status_clause}
-            GROUP BY Status_Registro
-            ORDER BY Status_Registro
-        """
-        status_counts = self.db.execute_query(status_query, (status_param,), fetch_results=True) or []
-        total_incidentes_acidentes = sum(item['Count'] for item in status_counts)
-
-        month_clause, month_param = self.tenant_clause()
-        month_query = f"""
-            SELECT DATE_FORMAT(Data_Hora_Ocorrencia, '%Y-%m') AS AnoMes, COUNT(ID_Incidente_Acidente) AS Count
-            FROM incidentes_acidentes
-            WHERE {month_clause}
-            GROUP BY AnoMes
-            ORDER BY AnoMes
-        """
-        monthly_counts = self.db.execute_query(month_query, (month_param,), fetch_results=True) or []
+        KPIs do dashboard de Segurança lidos do resumo do tenant (tenant_kpi_summary, ver
+        database/kpi_summary.py), mantido na mesma transação das escritas de incidentes/acidentes.
+        """
+        resumo = kpi_summary.ler(self.db, self.tenant_id, ('incidentes_tipo', 'incidentes_status', 'incidentes_mes'))
+
+        def ordenar(contagens, ordem):
+            return sorted(contagens.items(), key=lambda item: (ordem.index(item[0]) if item[0] in ordem else len(ordem), item[0]))
+
+        type_counts = [{'Tipo_Registro': tipo, 'Count': quantidade}
+                       for tipo, (quantidade, _) in ordenar(resumo['incidentes_tipo'], self.ORDEM_TIPO_REGISTRO)]
+        status_counts = [{'Status_Registro': status, 'Count': quantidade}
+                         for status, (quantidade, _) in ordenar(resumo['incidentes_status'], self.ORDEM_STATUS_REGISTRO)]
+        monthly_counts = [{'AnoMes': ano_mes, 'Count': quantidade}
+                          for ano_mes, (quantidade, _) in sorted(resumo['incidentes_mes'].items())]
 
         kpis = {
-            'total_incidentes_acidentes': total_incidentes_acidentes,
+            'total_incidentes_acidentes': sum(item['Count'] for item in status_counts),
             'type_counts': type_counts,
             'status_counts': status_counts,
             'monthly_counts': monthly_counts,
         }
-        cache.set(self._dashboard_cache_key(), kpis, timeout=300)
         return kpis
 
     # ----------------------------------------------------------------------------------------------------------------------------------
@@ -887,8 +907,9 @@ class SegurancaManager(TenantScopedManager):
         params = [f_param, t_param]
 
         if search_nome_treinamento:
-            query += " AND t.Nome_Treinamento LIKE %s"
-            params.append(f"%{search_nome_treinamento}%")
+            filtro, filtro_params = busca.filtro_texto('treinamentos', 'Nome_Treinamento', search_nome_treinamento, alias='t')
+            query += f" AND {filtro}"
+            params.extend(filtro_params)
         if search_tipo_treinamento:
             query += " AND t.Tipo_Treinamento = %s"
             params.append(search_tipo_treinamento)
@@ -1,14 +1,134 @@
 # database/db_tenant_manager.py
 
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from mysql.connector import Error
+
+from database.db_base import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Registro de tenants em memória (ver TenantRegistry): validade das entradas, em segundos
+TENANT_CACHE_TTL = int(os.getenv("TENANT_CACHE_TTL", "300"))
+TENANT_CACHE_NEGATIVE_TTL = int(os.getenv("TENANT_CACHE_NEGATIVE_TTL", "60"))
+TENANT_CACHE_MAX = int(os.getenv("TENANT_CACHE_MAX", "1024"))
+
+
 class TenantManager:
     """
     Resolve o tenant a partir do subdomínio. Não herda TenantScopedManager —
     é quem descobre o tenant, não pode depender de um tenant_id que ainda não existe.
     """
+    QUERY_BY_SUBDOMAIN = "SELECT id, subdomain, nome_fantasia, ativo FROM tenants WHERE subdomain = %s"
+
     def __init__(self, db):
         self.db = db
 
     def find_by_subdomain(self, subdomain):
-        query = "SELECT id, subdomain, nome_fantasia, ativo FROM tenants WHERE subdomain = %s"
-        result = self.db.execute_query(query, (subdomain,), fetch_results=True)
+        result = self.db.execute_query(self.QUERY_BY_SUBDOMAIN, (subdomain,), fetch_results=True)
+        return result[0] if result else None
+
+    def get_all(self):
+        """Todos os tenants (usado no aquecimento do worker para pré-carregar o tenant_registry)."""
+        query = "SELECT id, subdomain, nome_fantasia, ativo FROM tenants ORDER BY id"
+        return self.db.execute_query(query, fetch_results=True) or []
+
+    def set_ativo(self, tenant_id, ativo):
+        """Ativa/desativa um tenant e invalida o registro em memória deste processo."""
+        query = "UPDATE tenants SET ativo = %s WHERE id = %s"
+        success = self.db.execute_query(query, (1 if ativo else 0, tenant_id), fetch_results=False)
+        if success:
+            tenant_registry.invalidate()
+        return success
+
+
+class TenantRegistry:
+    """
+    Cache em processo (TTL + LRU) de subdomínio -> linha de tenants, na frente de
+    TenantManager.find_by_subdomain: load_user e login resolvem o tenant sem ir ao MySQL.
+
+    - Subdomínio desconhecido também é guardado (cache negativo, TTL mais curto), para que
+      varreduras com subdomínios aleatórios não virem uma consulta por request.
+    - O tamanho é limitado a max_size entradas (sai a usada há mais tempo).
+    - invalidate() limpa só o processo atual; nos demais workers a mudança vale em até ttl
+      segundos — a tabela tenants muda raramente.
+    """
+    _AUSENTE = object()
+
+    def __init__(self, ttl=TENANT_CACHE_TTL, negative_ttl=TENANT_CACHE_NEGATIVE_TTL, max_size=TENANT_CACHE_MAX):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # subdomínio -> (expira_em, tenant ou None)
+        self._lock = threading.Lock()
+
+    def get(self, subdomain, loader):
+        """
+        Devolve o tenant (dict) ou None se o subdomínio não existe.
+        :param loader: Função () -> tenant ou None, chamada só em cache miss/expiração.
+        """
+        key = (subdomain or '').lower()
+        tenant = self._lookup(key)
+        if tenant is self._AUSENTE:
+            tenant = loader()
+            self._store(key, tenant)
+        return dict(tenant) if tenant else None
+
+    def preload(self, tenants):
+        """Carrega de uma vez as linhas de tenants (aquecimento do worker)."""
+        for tenant in tenants:
+            self._store((tenant['subdomain'] or '').lower(), tenant)
+
+    def invalidate(self, subdomain=None):
+        """Remove um subdomínio do cache, ou tudo se subdomain for None."""
+        with self._lock:
+            if subdomain is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(subdomain.lower(), None)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self._AUSENTE
+            expires_at, tenant = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return self._AUSENTE
+            self._entries.move_to_end(key)
+            return tenant
+
+    def _store(self, key, tenant):
+        ttl = self.ttl if tenant else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, dict(tenant) if tenant else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+tenant_registry = TenantRegistry()
+
+
+def resolve_tenant(db_config, subdomain):
+    """
+    Tenant do subdomínio via tenant_registry; só abre conexão com o banco em cache miss.
+    Erro de banco devolve None (como find_by_subdomain) mas NÃO entra no cache negativo.
+    """
+    def load():
+        with DatabaseManager(**db_config) as db_base:
+            result = db_base.execute_query(TenantManager.QUERY_BY_SUBDOMAIN, (subdomain,), fetch_results=True)
+        if result is None or result is False:
+            raise Error("Falha ao consultar a tabela tenants.")
         return result[0] if result else None
+
+    try:
+        return tenant_registry.get(subdomain, load)
+    except Error as e:
+        logger.error("Erro ao resolver o tenant '%s': %s", subdomain, e)
+        return None
@@ -1,17 +1,94 @@
 # database/db_user_manager.py
 # rev01 - alterações para tratar a adição do campo email na tabela usuarios
 # rev02 - migração pra TenantScopedManager (isolamento por tenant_id)
+# rev03 - cache do principal autenticado (usuário + permissões) com carimbo de versão
+import os
+import uuid
+
 import bcrypt
 from passlib.context import CryptContext
 
-from database.db_base import TenantScopedManager
+from database.db_base import REFERENCE_CACHE_TTL, DatabaseManager, TenantScopedManager
+from database.cache_ext import cache
 
 # Configuração do contexto para hashing de senhas com scrypt
 # Certifique-se de que 'scrypt' esteja instalado (pip install passlib[scrypt])
 pwd_context = CryptContext(schemes=["scrypt"], deprecated="auto")
 
+# Validade máxima do principal em cache (rede de segurança; a invalidação normal é pelo carimbo)
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "600"))
+
+# Catálogo global de módulos (tabela modulos), invalidado por DBModulosPermissoesManager.adicionar_modulo
+MODULOS_CACHE_KEY = "ref:modulos"
+
+# ===============================================================
+# CACHE DO PRINCIPAL (usuário + permissões) COM CARIMBO DE VERSÃO
+# ===============================================================
+# O principal fica no cache sob uma chave que inclui o carimbo de versão do usuário e o
+# carimbo global (catálogo de módulos, que define as permissões dos admins). Toda escrita
+# que muda o que load_user monta troca o carimbo (bump_principal_version): as entradas
+# antigas deixam de ser lidas e expiram sozinhas.
+_PRINCIPAL_GLOBAL = 'global'
+
+
+def _principal_version(scope):
+    key = f"principal:ver:{scope}"
+    version = cache.get(key)
+    if version is None:
+        # Carimbo ausente (primeiro uso ou descartado pelo cache): gera um novo, o que
+        # torna inalcançável qualquer principal gravado sob um carimbo anterior
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=0):
+            version = cache.get(key) or version
+    return version
+
+
+def bump_principal_version(user_id=None):
+    """Invalida o principal em cache de um usuário (ou de todos, se user_id for None)."""
+    scope = user_id if user_id is not None else _PRINCIPAL_GLOBAL
+    cache.set(f"principal:ver:{scope}", uuid.uuid4().hex, timeout=0)
+
+
+def _principal_cache_key(tenant_id, user_id):
+    return (f"principal:{tenant_id}:{user_id}:"
+            f"{_principal_version(user_id)}:{_principal_version(_PRINCIPAL_GLOBAL)}")
+
+
+def load_principal(db_config, tenant_id, user_id):
+    """
+    Principal do usuário para o load_user: servido do cache e só abre conexão com o
+    banco em cache miss (ou quando as permissões mudaram desde a última leitura).
+    """
+    cached = cache.get(_principal_cache_key(tenant_id, user_id))
+    if cached is not None:
+        return cached
+    with DatabaseManager(**db_config) as db_base:
+        return UserManager(db_base, tenant_id).get_principal(user_id)
+
+
 class UserManager(TenantScopedManager):
 
+    def get_principal(self, user_id):
+        """
+        Dados que o load_user precisa (id, username, role, email, tenant_id, permissions),
+        com cache por tenant/usuário invalidado por bump_principal_version.
+        """
+        key = _principal_cache_key(self.tenant_id, user_id)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        user = self.find_user_by_id(user_id)
+        if not user:
+            return None
+        principal = {
+            'id': user['id'], 'username': user['username'], 'role': user['role'],
+            'email': user.get('email'), 'tenant_id': user['tenant_id'],
+            'permissions': self.get_user_permissions(user_id, user=user),
+        }
+        cache.set(key, principal, timeout=PRINCIPAL_CACHE_TTL)
+        return principal
+
     def find_user_by_id(self, user_id):
         """
         Retorna um registro de usuário pelo ID, incluindo o email.
@@ -51,12 +128,14 @@ class UserManager(TenantScopedManager):
                 return None
         return None
 
-    def get_user_permissions(self, user_id):
+    def get_user_permissions(self, user_id, user=None):
         """
         Retorna uma lista de nomes de módulos que o usuário tem permissão.
         Admins têm acesso a todos os módulos existentes na tabela 'modulos'.
+        :param user: Registro do usuário já carregado (evita buscar de novo por ID).
         """
-        user = self.find_user_by_id(user_id)
+        if user is None:
+            user = self.find_user_by_id(user_id)
         if not user:
             return []
 
@@ -133,7 +212,10 @@ class UserManager(TenantScopedManager):
         params.append(tenant_param)
         params.append(user_id) # O ID do usuário sempre vai no final
 
-        return self.db.execute_query(query, tuple(params), fetch_results=False)
+        success = self.db.execute_query(query, tuple(params), fetch_results=False)
+        if success:
+            bump_principal_version(user_id)
+        return success
 
     def reset_password(self, user_id, default_password="lumob@123"):
         """Reseta a senha de um usuário para uma senha padrão."""
@@ -151,13 +233,21 @@ class UserManager(TenantScopedManager):
 
         # Depois, deleta o usuário
         query_delete_user = f"DELETE FROM usuarios WHERE {clause} AND id = %s"
-        return self.db.execute_query(query_delete_user, (tenant_param, user_id), fetch_results=False)
+        success = self.db.execute_query(query_delete_user, (tenant_param, user_id), fetch_results=False)
+        bump_principal_version(user_id) # As permissões já foram removidas acima, mesmo se o DELETE do usuário falhar
+        return success
 
     def get_all_modules(self):
         """Retorna todos os módulos disponíveis (ID_Modulo, Nome_Modulo).
         'modulos' é catálogo global da plataforma — sem filtro de tenant."""
+        cached = cache.get(MODULOS_CACHE_KEY)
+        if cached is not None:
+            return cached
         query = "SELECT ID_Modulo, Nome_Modulo FROM modulos ORDER BY Nome_Modulo"
-        return self.db.execute_query(query, fetch_results=True)
+        result = self.db.execute_query(query, fetch_results=True)
+        if result:
+            cache.set(MODULOS_CACHE_KEY, result, timeout=REFERENCE_CACHE_TTL)
+        return result
 
     def get_user_module_permissions(self, user_id):
         """Retorna os IDs dos módulos que um usuário tem permissão explícita."""
@@ -187,5 +277,7 @@ class UserManager(TenantScopedManager):
                     fetch_results=False
                 ):
                     all_success = False
+            bump_principal_version(user_id) # Depois de gravar tudo, para nenhum request cachear o estado intermediário
             return all_success
+        bump_principal_version(user_id)
         return True # Se module_ids está vazio, apenas removeu as permissões existentes, o que é um sucesso.
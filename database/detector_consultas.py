@@ -0,0 +1,137 @@
+# database/detector_consultas.py
+# Detector de N+1 e orçamento de consultas por request, para desenvolvimento/homologação.
+#
+# Liga com CONSULTAS_DETECTOR (desligado por padrão; custo zero em produção):
+#   - 'aviso': loga os problemas e segue;
+#   - 'erro': além de logar, levanta OrcamentoConsultasExcedido no fim do request que estourou o
+#     orçamento (after_request: o request vira 500 — para testes automatizados e homologação
+#     pegarem a regressão). Não levanta na consulta: o except Exception das rotas engoliria o
+#     erro (flash + redirect) e a consulta perderia o próprio resultado.
+#
+# Toda consulta do DatabaseManager passa por registrar() (ver db_base._registrar_consulta), que
+# conta as consultas do request e agrupa as que só diferem nos parâmetros pela impressão digital
+# do SQL (rastreamento.fingerprint: "SELECT ... WHERE ID_Funcionario = ?"). Sinaliza:
+#   - provável N+1: a mesma impressão digital CONSULTAS_REPETICAO vezes ou mais no request
+#     (consulta em laço: carregar/gravar item a item em vez de um IN (...) ou INSERT multi-linha);
+#   - orçamento estourado: mais consultas do que o orçamento do endpoint — CONSULTAS_ORCAMENTO,
+#     ou o valor do endpoint em CONSULTAS_ORCAMENTO_POR_ENDPOINT
+#     ("pessoal_bp.edit_funcionario=40,users_bp.manage_user_permissions=15").
+# Cada sinal é logado uma vez por request, com a pilha (só código do projeto) da consulta que o
+# disparou. No fim do request, o cabeçalho X-Consultas resume a contagem, e o log traz as
+# impressões digitais repetidas.
+
+import logging
+import os
+import traceback
+
+from flask import g, has_request_context, request
+
+from database import rastreamento
+
+logger = logging.getLogger(__name__)
+
+CONSULTAS_DETECTOR = os.getenv("CONSULTAS_DETECTOR", "").lower()            # '', 'aviso' ou 'erro'
+CONSULTAS_ORCAMENTO = int(os.getenv("CONSULTAS_ORCAMENTO", "30"))           # Consultas por request
+CONSULTAS_REPETICAO = int(os.getenv("CONSULTAS_REPETICAO", "5"))            # Repetições = provável N+1
+CONSULTAS_CABECALHO = 'X-Consultas'
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_IGNORAR_NA_PILHA = (os.path.join(_RAIZ, 'database', 'db_base.py'), os.path.abspath(__file__))
+
+
+def _orcamentos_por_endpoint(texto):
+    orcamentos = {}
+    for item in (texto or '').split(','):
+        endpoint, _, valor = item.partition('=')
+        if endpoint.strip() and valor.strip().isdigit():
+            orcamentos[endpoint.strip()] = int(valor)
+    return orcamentos
+
+
+ORCAMENTOS_POR_ENDPOINT = _orcamentos_por_endpoint(os.getenv("CONSULTAS_ORCAMENTO_POR_ENDPOINT"))
+
+
+class OrcamentoConsultasExcedido(RuntimeError):
+    """Request passou do orçamento de consultas do endpoint (só com CONSULTAS_DETECTOR=erro)."""
+
+
+def ativo():
+    return CONSULTAS_DETECTOR in ('aviso', 'erro')
+
+
+def orcamento(endpoint):
+    return ORCAMENTOS_POR_ENDPOINT.get(endpoint, CONSULTAS_ORCAMENTO)
+
+
+class Contagem:
+    """Consultas de um request (em flask.g)."""
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.orcamento = orcamento(endpoint)
+        self.total = 0
+        self.por_impressao = {}   # impressão digital -> vezes
+        self.sinalizadas = set()  # Impressões digitais já logadas como N+1
+        self.estourado = False
+
+
+def _pilha():
+    """Pilha da consulta atual, só com os quadros do projeto (rota, manager), sem o DatabaseManager."""
+    quadros = [q for q in traceback.extract_stack()
+               if q.filename.startswith(_RAIZ) and q.filename not in _IGNORAR_NA_PILHA]
+    return ''.join(traceback.format_list(quadros)).rstrip()
+
+
+def registrar(query):
+    """Uma consulta do DatabaseManager no request atual."""
+    if not ativo() or not has_request_context():
+        return
+    contagem = g.get('_consultas')
+    if contagem is None:
+        contagem = g._consultas = Contagem(request.endpoint)
+    contagem.total += 1
+    impressao = rastreamento.fingerprint(query)
+    vezes = contagem.por_impressao[impressao] = contagem.por_impressao.get(impressao, 0) + 1
+
+    if vezes == CONSULTAS_REPETICAO and impressao not in contagem.sinalizadas:
+        contagem.sinalizadas.add(impressao)
+        logger.warning("Provável N+1 em %s %s (%s): %d execuções de\n  %s\nPilha:\n%s",
+                       request.method, request.path, contagem.endpoint, vezes, impressao[:500], _pilha())
+
+    if contagem.total > contagem.orcamento and not contagem.estourado:
+        contagem.estourado = True
+        logger.warning("Orçamento de consultas estourado em %s %s (%s): consulta %d de %d permitidas\n  %s\nPilha:\n%s",
+                       request.method, request.path, contagem.endpoint, contagem.total, contagem.orcamento,
+                       impressao[:500], _pilha())
+
+
+# ===============================================================
+# MIDDLEWARE DE REQUEST
+# ===============================================================
+def instalar(app):
+    """
+    Cabeçalho X-Consultas e resumo no log dos requests com N+1 ou orçamento estourado; no modo
+    'erro', o request que estourou o orçamento vira 500. Instalar depois dos demais ganchos: o
+    after_request roda primeiro, e a resposta de erro ainda passa por todos eles.
+    """
+    if ativo():
+        app.after_request(_fim_request)
+
+
+def _fim_request(response):
+    contagem = g.pop('_consultas', None)
+    if contagem is None:
+        return response
+    repetidas = sorted(((vezes, impressao) for impressao, vezes in contagem.por_impressao.items()
+                        if vezes >= CONSULTAS_REPETICAO), reverse=True)
+    response.headers[CONSULTAS_CABECALHO] = (
+        f"{contagem.total}; orcamento={contagem.orcamento}; distintas={len(contagem.por_impressao)}; "
+        f"repetidas={len(repetidas)}")
+    if repetidas or contagem.estourado:
+        logger.warning("%s %s (%s): %d consultas (orçamento %d), %d distintas. Repetidas:\n%s",
+                       request.method, request.path, contagem.endpoint, contagem.total, contagem.orcamento,
+                       len(contagem.por_impressao),
+                       '\n'.join(f"  {vezes}x {impressao[:300]}" for vezes, impressao in repetidas) or '  (nenhuma)')
+    if contagem.estourado and CONSULTAS_DETECTOR == 'erro':
+        raise OrcamentoConsultasExcedido(
+            f"{contagem.endpoint}: {contagem.total} consultas no request (orçamento {contagem.orcamento})")
+    return response
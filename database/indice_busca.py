@@ -0,0 +1,173 @@
+# database/indice_busca.py
+# Índice unificado da busca global (/search): tabela busca_documentos (ver 9_indice_busca.sql),
+# um documento por registro pesquisável de cada tenant — obras, clientes, contratos, ARTs,
+# funcionários, incidentes/acidentes e treinamentos — com o texto de busca já montado e um
+# índice FULLTEXT ngram (índice invertido) sobre ele. Uma consulta responde por todos os módulos,
+# em vez de uma varredura por tabela.
+#
+# O documento de um registro é regravado na MESMA transação da escrita do registro:
+#   - entidades do resumo de KPIs: por kpi_summary.escrever (obras, contratos, funcionários, incidentes);
+#   - as demais (clientes, ARTs, treinamentos) e os documentos do funcionário (CPF): por escrever() daqui.
+# reconstruir() remonta o índice de um tenant (comando `flask --app app search-rebuild`). A busca
+# nunca monta o índice: tenant ainda sem índice recebe resultados vazios até o comando rodar.
+
+import logging
+from collections import defaultdict
+
+from mysql.connector import Error
+
+from database import busca
+
+logger = logging.getLogger(__name__)
+
+ENTIDADE_CONSTRUIDO = '_construido'
+
+# Resultados por entidade numa busca global
+RESULTADOS_POR_ENTIDADE = 5
+
+# entidade -> (módulo da permissão, tabela, coluna chave, SELECT do documento)
+# O SELECT devolve as colunas de busca_documentos na ordem do INSERT e termina no filtro de tenant
+# (indexar() acrescenta o filtro de chaves). Números de documento entram também só com os dígitos
+# ("12.345.678/0001-90" e "12345678000190" encontram o mesmo cliente).
+DOCUMENTOS = {
+    'obras': ('Obras', 'obras', 'ID_Obras', """
+        SELECT t.tenant_id, 'obras', CAST(t.ID_Obras AS CHAR), 'Obras',
+               t.Nome_Obra, CONCAT('Obra ', t.Numero_Obra),
+               CONCAT_WS(' ', t.Numero_Obra, t.Nome_Obra, t.Endereco_Obra)
+        FROM obras t WHERE t.tenant_id = %s"""),
+    'clientes': ('Obras', 'clientes', 'ID_Clientes', """
+        SELECT t.tenant_id, 'clientes', CAST(t.ID_Clientes AS CHAR), 'Obras',
+               t.Nome_Cliente, t.CNPJ_Cliente,
+               CONCAT_WS(' ', t.Nome_Cliente, t.Razao_Social_Cliente, t.CNPJ_Cliente,
+                         REGEXP_REPLACE(t.CNPJ_Cliente, '[^0-9]', ''))
+        FROM clientes t WHERE t.tenant_id = %s"""),
+    'contratos': ('Obras', 'contratos', 'ID_Contratos', """
+        SELECT t.tenant_id, 'contratos', CAST(t.ID_Contratos AS CHAR), 'Obras',
+               CONCAT('Contrato ', t.Numero_Contrato), t.Status_Contrato,
+               t.Numero_Contrato
+        FROM contratos t WHERE t.tenant_id = %s"""),
+    'arts': ('Obras', 'arts', 'ID_Arts', """
+        SELECT t.tenant_id, 'arts', CAST(t.ID_Arts AS CHAR), 'Obras',
+               CONCAT('ART ', t.Numero_Art), t.Status_Art,
+               t.Numero_Art
+        FROM arts t WHERE t.tenant_id = %s"""),
+    'funcionarios': ('Pessoal', 'funcionarios', 'Matricula', """
+        SELECT t.tenant_id, 'funcionarios', t.Matricula, 'Pessoal',
+               t.Nome_Completo, CONCAT('Matrícula ', t.Matricula),
+               CONCAT_WS(' ', t.Nome_Completo, t.Matricula, fd.Cpf_Numero,
+                         REGEXP_REPLACE(fd.Cpf_Numero, '[^0-9]', ''))
+        FROM funcionarios t
+        LEFT JOIN funcionarios_documentos fd ON fd.Matricula_Funcionario = t.Matricula AND fd.tenant_id = t.tenant_id
+        WHERE t.tenant_id = %s"""),
+    'incidentes_acidentes': ('Segurança', 'incidentes_acidentes', 'ID_Incidente_Acidente', """
+        SELECT t.tenant_id, 'incidentes_acidentes', CAST(t.ID_Incidente_Acidente AS CHAR), 'Segurança',
+               CONCAT(t.Tipo_Registro, ' em ', DATE_FORMAT(t.Data_Hora_Ocorrencia, '%d/%m/%Y')),
+               LEFT(t.Descricao_Resumida, 200),
+               CONCAT_WS(' ', t.Descricao_Resumida, t.Local_Ocorrencia)
+        FROM incidentes_acidentes t WHERE t.tenant_id = %s"""),
+    'treinamentos': ('Segurança', 'treinamentos', 'ID_Treinamento', """
+        SELECT t.tenant_id, 'treinamentos', CAST(t.ID_Treinamento AS CHAR), 'Segurança',
+               t.Nome_Treinamento, t.Tipo_Treinamento,
+               CONCAT_WS(' ', t.Nome_Treinamento, t.Descricao)
+        FROM treinamentos t WHERE t.tenant_id = %s"""),
+}
+
+_INSERT = "INSERT INTO busca_documentos (tenant_id, Entidade, Chave, Modulo, Titulo, Subtitulo, Texto) "
+
+
+# ===============================================================
+# MANUTENÇÃO INCREMENTAL
+# ===============================================================
+def indexar(db, tenant_id, entidade, chaves, novo=False):
+    """
+    Regrava os documentos dos registros com as chaves dadas (SEM commit: roda na transação da
+    escrita). Registro que não existe mais só perde o documento. Erros são re-lançados.
+
+    :param chaves: Chaves dos registros afetados (antes e depois da escrita).
+    :param novo: True = inclui o registro recém-inserido (LAST_INSERT_ID()).
+    """
+    _, _, coluna, select = DOCUMENTOS[entidade]
+    chaves = [str(c) for c in dict.fromkeys(chaves) if c is not None]
+    if chaves:
+        marcadores = ', '.join(['%s'] * len(chaves))
+        db.execute_write(
+            f"DELETE FROM busca_documentos WHERE tenant_id = %s AND Entidade = %s AND Chave IN ({marcadores})",
+            (tenant_id, entidade, *chaves),
+        )
+        db.execute_write(_INSERT + select + f" AND t.{coluna} IN ({marcadores})", (tenant_id, *chaves))
+    if novo:
+        db.execute_write(_INSERT + select + f" AND t.{coluna} = LAST_INSERT_ID()", (tenant_id,))
+
+
+def escrever(manager, query, params, entidade, chaves, novo=False):
+    """
+    Executa um INSERT/UPDATE/DELETE do manager e regrava o documento de busca na mesma transação.
+
+    :param chaves: Chaves dos registros afetados ([] num INSERT com AUTO_INCREMENT, com novo=True).
+    :return: True/False, como execute_query(fetch_results=False).
+    """
+    db, tenant_id = manager.db, manager.tenant_id
+    try:
+        with db.transaction():
+            db.execute_write(query, params)
+            indexar(db, tenant_id, entidade, chaves, novo=novo)
+        return True
+    except Error as e:
+        logger.error("Erro ao gravar %s com atualização do índice de busca: %s", entidade, e)
+        return False
+
+
+# ===============================================================
+# BUSCA E RECONSTRUÇÃO
+# ===============================================================
+def buscar(db, tenant_id, texto, modulos, por_entidade=RESULTADOS_POR_ENTIDADE):
+    """
+    Documentos do tenant que contêm todas as palavras do texto, só dos módulos dados (os que o
+    usuário pode acessar), os mais relevantes de cada entidade.
+
+    :return: {entidade: [{'Chave', 'Titulo', 'Subtitulo', 'Relevancia'}, ...]} na ordem de DOCUMENTOS,
+             só com as entidades que tiveram resultado.
+    """
+    if not modulos or not busca.termos(texto):
+        return {}
+    filtro, params_filtro = busca.filtro_texto('busca_documentos', 'Texto', texto)
+    ordem, params_ordem = busca.relevancia('busca_documentos', ('Texto',), texto)
+    ordem = ordem or '0'
+    query = f"""
+        SELECT Entidade, Chave, Titulo, Subtitulo, Relevancia
+        FROM (
+            SELECT Entidade, Chave, Titulo, Subtitulo, {ordem} AS Relevancia,
+                   ROW_NUMBER() OVER (PARTITION BY Entidade ORDER BY {ordem} DESC, Titulo) AS Posicao
+            FROM busca_documentos
+            WHERE tenant_id = %s AND Modulo IN ({', '.join(['%s'] * len(modulos))}) AND {filtro}
+        ) AS r
+        WHERE Posicao <= %s
+        ORDER BY Entidade, Posicao
+    """
+    params = (*params_ordem, *params_ordem, tenant_id, *modulos, *params_filtro, por_entidade)
+    rows = db.execute_query(query, params, fetch_results=True) or []
+    if not rows and not _construido(db, tenant_id):
+        # Sem reconstruir aqui: buscas simultâneas disputariam o DELETE/INSERT do índice
+        logger.warning("Índice de busca do tenant %s ainda não montado; rode 'flask --app app search-rebuild'.", tenant_id)
+
+    grupos = defaultdict(list)
+    for row in rows:
+        grupos[row.pop('Entidade')].append(row)
+    return {entidade: grupos[entidade] for entidade in DOCUMENTOS if grupos.get(entidade)}
+
+
+def _construido(db, tenant_id):
+    result = db.execute_query(
+        "SELECT 1 FROM busca_documentos WHERE tenant_id = %s AND Entidade = %s AND Chave = ''",
+        (tenant_id, ENTIDADE_CONSTRUIDO), fetch_results=True,
+    )
+    return bool(result)
+
+
+def reconstruir(db, tenant_id):
+    """Remonta do zero o índice de busca do tenant, numa transação."""
+    with db.transaction():
+        db.execute_write("DELETE FROM busca_documentos WHERE tenant_id = %s", (tenant_id,))
+        for _, _, _, select in DOCUMENTOS.values():
+            db.execute_write(_INSERT + select, (tenant_id,))
+        db.execute_write(_INSERT + "VALUES (%s, %s, '', '', '', '', '')", (tenant_id, ENTIDADE_CONSTRUIDO))
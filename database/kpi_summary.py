@@ -0,0 +1,252 @@
+# database/kpi_summary.py
+# Modelo de leitura dos KPIs de dashboard: tabela tenant_kpi_summary (ver 6_resumo_kpis.sql).
+#
+# Cada escrita de obras, contratos, medições, avanços físicos, funcionários e incidentes passa
+# por escrever(), que na MESMA transação:
+#   1. captura as linhas afetadas antes da escrita (com lock, serializando escritas concorrentes),
+#   2. executa a escrita,
+#   3. captura as mesmas linhas depois,
+#   4. aplica em tenant_kpi_summary a diferença entre as contribuições de antes e de depois.
+# Assim o dashboard lê contadores prontos (uma consulta pela PK), sem agregar o histórico.
+# Na mesma transação, o documento da busca global dos registros afetados é regravado
+# (database/indice_busca.py), para as entidades que têm documento.
+#
+# reconstruir() recalcula o resumo de um tenant do zero (comando `flask --app app kpi-rebuild`),
+# para a carga inicial e para corrigir divergências de escritas feitas fora dos managers. A leitura
+# nunca reconstrói: tenant ainda sem resumo (sem o marcador) tem os KPIs agregados direto das
+# tabelas a cada leitura, como antes do resumo, até o comando rodar.
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from mysql.connector import Error
+
+from database import indice_busca
+from database.db_base import TenantBoundDatabase
+
+logger = logging.getLogger(__name__)
+
+# Marcador de "linha recém-inserida": a captura depois do INSERT usa LAST_INSERT_ID()
+NOVO = object()
+
+METRICA_CONSTRUIDO = '_construido'
+
+STATUS_MEDICAO_REALIZADA = ('Paga', 'Aprovada')
+
+# ===============================================================
+# CONTRIBUIÇÕES DE CADA LINHA
+# ===============================================================
+# Cada função devolve [(metrica, chave, quantidade, valor)] com o que a linha soma no resumo.
+def _chave(valor):
+    return '' if valor is None else str(valor)
+
+
+def _contrib_obra(row):
+    contribs = [('obras_status', _chave(row['Status_Obra']), 1, 0)]
+    if row['Status_Obra'] == 'Em Andamento' and row.get('Ultimo_Avanco') is not None:
+        contribs.append(('obras_avanco_andamento', '', 1, row['Ultimo_Avanco']))
+    return contribs
+
+
+def _contrib_contrato(row):
+    if row['Status_Contrato'] == 'Ativo':
+        return [('contratos_ativos', '', 1, row['Valor_Contrato'] or 0)]
+    return []
+
+
+def _contrib_medicao(row):
+    if row['Status_Medicao'] in STATUS_MEDICAO_REALIZADA:
+        return [('medicoes_realizadas', '', 1, row['Valor_Medicao'] or 0)]
+    return []
+
+
+def _contrib_funcionario(row):
+    return [
+        ('funcionarios_status', _chave(row['Status']), 1, 0),
+        ('funcionarios_cargo', _chave(row['ID_Cargos']), 1, 0),
+        ('funcionarios_nivel', _chave(row['ID_Niveis']), 1, 0),
+    ]
+
+
+def _contrib_incidente(row):
+    ocorrencia = row['Data_Hora_Ocorrencia']
+    return [
+        ('incidentes_tipo', _chave(row['Tipo_Registro']), 1, 0),
+        ('incidentes_status', _chave(row['Status_Registro']), 1, 0),
+        ('incidentes_mes', ocorrencia.strftime('%Y-%m') if ocorrencia else '', 1, 0),
+    ]
+
+
+# entidade -> (tabela, coluna chave, colunas capturadas, contribuições)
+ENTIDADES = {
+    'obras': ('obras', 'ID_Obras', "t.ID_Obras, t.Status_Obra, t.Ultimo_Avanco_Percentual AS Ultimo_Avanco", _contrib_obra),
+    'contratos': ('contratos', 'ID_Contratos', "t.ID_Contratos, t.Status_Contrato, t.Valor_Contrato", _contrib_contrato),
+    'medicoes': ('medicoes', 'ID_Medicoes', "t.ID_Medicoes, t.Status_Medicao, t.Valor_Medicao", _contrib_medicao),
+    'funcionarios': ('funcionarios', 'Matricula', "t.Matricula, t.Status, t.ID_Cargos, t.ID_Niveis", _contrib_funcionario),
+    'incidentes_acidentes': ('incidentes_acidentes', 'ID_Incidente_Acidente',
+                             "t.ID_Incidente_Acidente, t.Tipo_Registro, t.Status_Registro, t.Data_Hora_Ocorrencia",
+                             _contrib_incidente),
+}
+
+
+# ===============================================================
+# MANUTENÇÃO INCREMENTAL
+# ===============================================================
+def escrever(manager, query, params, entidade, chaves, chaves_depois=None, posterior=None):
+    """
+    Executa um INSERT/UPDATE/DELETE do manager e atualiza tenant_kpi_summary na mesma transação.
+
+    :param entidade: Entidade cujas linhas afetadas são capturadas (chave de ENTIDADES).
+    :param chaves: Chaves dessas linhas antes da escrita ([NOVO] num INSERT com AUTO_INCREMENT).
+    :param chaves_depois: Chaves depois da escrita, se mudarem (ex: troca de matrícula).
+    :param posterior: Função (db) chamada depois da escrita e antes da captura final, na mesma
+                      transação (ex: atualizar colunas denormalizadas das linhas capturadas).
+    :return: True/False, como execute_query(fetch_results=False).
+    """
+    db, tenant_id = manager.db, manager.tenant_id
+    try:
+        with db.transaction():
+            antes = capturar(db, tenant_id, entidade, chaves, bloquear=True) if chaves != [NOVO] else []
+            db.execute_write(query, params)
+            if posterior:
+                posterior(db)
+            depois = capturar(db, tenant_id, entidade, chaves if chaves_depois is None else chaves_depois)
+            aplicar(db, tenant_id, entidade, antes, depois)
+            if entidade in indice_busca.DOCUMENTOS:
+                coluna = ENTIDADES[entidade][1]
+                indice_busca.indexar(db, tenant_id, entidade, [row[coluna] for row in antes + depois])
+        return True
+    except Error as e:
+        logger.error("Erro ao gravar %s com atualização do resumo de KPIs: %s", entidade, e)
+        return False
+
+
+def capturar(db, tenant_id, entidade, chaves, bloquear=False):
+    """
+    Linhas atuais da entidade com as chaves dadas (NOVO = a recém-inserida), no formato que
+    as funções de contribuição esperam. bloquear=True trava as linhas (FOR UPDATE) até o fim
+    da transação. Erros são re-lançados (roda dentro de transaction()).
+    """
+    tabela, coluna, colunas, _ = ENTIDADES[entidade]
+    chaves = [c for c in dict.fromkeys(chaves) if c is not None]
+    if not chaves:
+        return []
+    if chaves == [NOVO]:
+        filtro, params = f"t.{coluna} = LAST_INSERT_ID()", [tenant_id]
+    else:
+        filtro, params = f"t.{coluna} IN ({', '.join(['%s'] * len(chaves))})", [tenant_id] + chaves
+    query = f"SELECT {colunas} FROM {tabela} t WHERE t.tenant_id = %s AND {filtro}"
+    if bloquear:
+        query += " FOR UPDATE OF t"
+    return list(db.iter_query(query, tuple(params)))
+
+
+def aplicar(db, tenant_id, entidade, antes, depois):
+    """Soma em tenant_kpi_summary as contribuições de depois menos as de antes (sem commit)."""
+    contribuicoes = ENTIDADES[entidade][3]
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for sinal, rows in ((-1, antes), (1, depois)):
+        for row in rows:
+            for metrica, chave, quantidade, valor in contribuicoes(row):
+                delta = deltas[(metrica, chave)]
+                delta[0] += sinal * quantidade
+                delta[1] += sinal * Decimal(valor)
+
+    linhas = [(metrica, chave, q, v) for (metrica, chave), (q, v) in deltas.items() if q or v]
+    if not linhas:
+        return
+    params = []
+    for metrica, chave, quantidade, valor in linhas:
+        params.extend((tenant_id, metrica, chave, quantidade, valor))
+    db.execute_write(
+        "INSERT INTO tenant_kpi_summary (tenant_id, Metrica, Chave, Quantidade, Valor) VALUES "
+        + ', '.join(['(%s, %s, %s, %s, %s)'] * len(linhas))
+        + " AS novo ON DUPLICATE KEY UPDATE"
+          " Quantidade = tenant_kpi_summary.Quantidade + novo.Quantidade,"
+          " Valor = tenant_kpi_summary.Valor + novo.Valor",
+        params,
+    )
+
+
+# ===============================================================
+# LEITURA E RECONSTRUÇÃO
+# ===============================================================
+def ler(db, tenant_id, metricas):
+    """
+    {metrica: {chave: (quantidade, valor)}} das métricas pedidas (linhas zeradas omitidas).
+    Tenant cujo resumo ainda não foi montado (sem o marcador) tem as métricas agregadas direto
+    das tabelas, só leitura: a montagem é só pelo `flask --app app kpi-rebuild`, nunca na
+    leitura — requests simultâneos reconstruindo o mesmo tenant disputariam o DELETE/INSERT e o
+    perdedor estouraria em deadlock/chave duplicada.
+    """
+    query = f"""
+        SELECT Metrica, Chave, Quantidade, Valor
+        FROM tenant_kpi_summary
+        WHERE tenant_id = %s AND Metrica IN ({', '.join(['%s'] * (len(metricas) + 1))})
+    """
+    params = (tenant_id, METRICA_CONSTRUIDO) + tuple(metricas)
+    rows = db.execute_query(query, params, fetch_results=True) or []
+    resumo = {metrica: {} for metrica in metricas}
+    if not any(row['Metrica'] == METRICA_CONSTRUIDO for row in rows):
+        logger.warning("Resumo de KPIs do tenant %s ainda não montado (agregando das tabelas); "
+                       "rode 'flask --app app kpi-rebuild'.", tenant_id)
+        rows = []
+        for metrica in metricas:
+            rows += db.execute_query(_RECONSTRUCAO[metrica], (tenant_id,), fetch_results=True) or []
+
+    for row in rows:
+        if row['Metrica'] in resumo and (row['Quantidade'] or row['Valor']):
+            resumo[row['Metrica']][row['Chave']] = (row['Quantidade'], row['Valor'])
+    return resumo
+
+
+# Agregações da reconstrução, por métrica: mesmas regras das funções de contribuição, em SQL.
+# As colunas seguem as de tenant_kpi_summary, para o INSERT ... SELECT e para a leitura direta.
+_RECONSTRUCAO = {
+    'obras_status':
+        """SELECT tenant_id, 'obras_status' AS Metrica, Status_Obra AS Chave, COUNT(*) AS Quantidade, 0 AS Valor
+             FROM obras WHERE tenant_id = %s GROUP BY tenant_id, Status_Obra""",
+    'obras_avanco_andamento':
+        """SELECT tenant_id, 'obras_avanco_andamento' AS Metrica, '' AS Chave,
+                  COUNT(Ultimo_Avanco_Percentual) AS Quantidade, COALESCE(SUM(Ultimo_Avanco_Percentual), 0) AS Valor
+             FROM obras WHERE tenant_id = %s AND Status_Obra = 'Em Andamento' GROUP BY tenant_id""",
+    'contratos_ativos':
+        """SELECT tenant_id, 'contratos_ativos' AS Metrica, '' AS Chave, COUNT(*) AS Quantidade,
+                  COALESCE(SUM(Valor_Contrato), 0) AS Valor
+             FROM contratos WHERE tenant_id = %s AND Status_Contrato = 'Ativo' GROUP BY tenant_id""",
+    'medicoes_realizadas':
+        """SELECT tenant_id, 'medicoes_realizadas' AS Metrica, '' AS Chave, COUNT(*) AS Quantidade,
+                  COALESCE(SUM(Valor_Medicao), 0) AS Valor
+             FROM medicoes WHERE tenant_id = %s AND Status_Medicao IN ('Paga', 'Aprovada') GROUP BY tenant_id""",
+    'funcionarios_status':
+        """SELECT tenant_id, 'funcionarios_status' AS Metrica, COALESCE(Status, '') AS Chave, COUNT(*) AS Quantidade, 0 AS Valor
+             FROM funcionarios WHERE tenant_id = %s GROUP BY tenant_id, Status""",
+    'funcionarios_cargo':
+        """SELECT tenant_id, 'funcionarios_cargo' AS Metrica, COALESCE(ID_Cargos, '') AS Chave, COUNT(*) AS Quantidade, 0 AS Valor
+             FROM funcionarios WHERE tenant_id = %s GROUP BY tenant_id, ID_Cargos""",
+    'funcionarios_nivel':
+        """SELECT tenant_id, 'funcionarios_nivel' AS Metrica, COALESCE(ID_Niveis, '') AS Chave, COUNT(*) AS Quantidade, 0 AS Valor
+             FROM funcionarios WHERE tenant_id = %s GROUP BY tenant_id, ID_Niveis""",
+    'incidentes_tipo':
+        """SELECT tenant_id, 'incidentes_tipo' AS Metrica, Tipo_Registro AS Chave, COUNT(*) AS Quantidade, 0 AS Valor
+             FROM incidentes_acidentes WHERE tenant_id = %s GROUP BY tenant_id, Tipo_Registro""",
+    'incidentes_status':
+        """SELECT tenant_id, 'incidentes_status' AS Metrica, COALESCE(Status_Registro, '') AS Chave, COUNT(*) AS Quantidade, 0 AS Valor
+             FROM incidentes_acidentes WHERE tenant_id = %s GROUP BY tenant_id, Status_Registro""",
+    'incidentes_mes':
+        """SELECT tenant_id, 'incidentes_mes' AS Metrica, DATE_FORMAT(Data_Hora_Ocorrencia, '%Y-%m') AS Chave,
+                  COUNT(*) AS Quantidade, 0 AS Valor
+             FROM incidentes_acidentes WHERE tenant_id = %s GROUP BY tenant_id, DATE_FORMAT(Data_Hora_Ocorrencia, '%Y-%m')""",
+}
+
+
+def reconstruir(db, tenant_id):
+    """Recalcula do zero o resumo do tenant, numa transação (o cache de KPIs é invalidado no commit)."""
+    db = db if isinstance(db, TenantBoundDatabase) else TenantBoundDatabase(db, tenant_id)
+    insert = "INSERT INTO tenant_kpi_summary (tenant_id, Metrica, Chave, Quantidade, Valor) "
+    with db.transaction():
+        db.execute_write("DELETE FROM tenant_kpi_summary WHERE tenant_id = %s", (tenant_id,))
+        for select in _RECONSTRUCAO.values():
+            db.execute_write(insert + select, (tenant_id,))
+        db.execute_write(insert + "VALUES (%s, %s, '', 1, 0)", (tenant_id, METRICA_CONSTRUIDO))
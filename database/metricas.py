@@ -0,0 +1,398 @@
+# database/metricas.py
+# Métricas de desempenho no formato texto do Prometheus, expostas em /metrics (app.py).
+#
+# Coletadas sem editar nenhuma rota:
+#   - latência por endpoint (e por tenant), tempo de banco e nº de consultas por request:
+#     before/after_request instalados por instalar(app) + DatabaseManager (registrar_consulta);
+#   - latência de cada consulta por operação e tabela, e erros de consulta;
+#   - hit/miss do cache de consultas por família (query_cache.cached_query);
+#   - espera por conexão no pool (ConnectionPool) e o estado do pool no momento da coleta;
+#   - duração, linhas e tamanho das exportações (modulos/exportacao.py) e das importações.
+#
+# Cada worker acumula em memória e uma thread dele (iniciada no primeiro request do processo)
+# publica, a cada METRICAS_PUBLICAR_S segundos, um snapshot no cache compartilhado — também com o
+# worker ocioso, que assim não some da soma (o que o Prometheus leria como reset dos contadores).
+# O snapshot vai numa chave só do worker: uma das METRICAS_MAX_WORKERS
+# vagas (metricas:vaga:<n>), ocupada com cache.add — atômico, dois workers nunca ficam com a
+# mesma vaga, e nenhum sobrescreve a lista dos outros. /metrics soma as vagas ocupadas (snapshot
+# mais velho que METRICAS_SNAPSHOT_TTL = worker que morreu: a vaga expira e sai da soma). Sem
+# Redis o cache é local e /metrics mostra só o worker que respondeu.
+#
+# Tenant entra como label só nas séries sem buckets por endpoint, e só para os primeiros
+# METRICAS_MAX_TENANTS tenants vistos pelo processo (os demais somam em tenant="outros").
+
+import bisect
+import functools
+import logging
+import os
+import re
+import socket
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+
+from database.cache_ext import cache
+
+logger = logging.getLogger(__name__)
+
+METRICAS_PUBLICAR_S = float(os.getenv("METRICAS_PUBLICAR_S", "10"))
+METRICAS_SNAPSHOT_TTL = int(os.getenv("METRICAS_SNAPSHOT_TTL", "300"))
+METRICAS_MAX_TENANTS = int(os.getenv("METRICAS_MAX_TENANTS", "50"))
+METRICAS_MAX_WORKERS = int(os.getenv("METRICAS_MAX_WORKERS", "64"))  # Vagas de snapshot (workers somados)
+
+TENANT_OUTROS = 'outros'
+
+# Buckets (limites superiores, em segundos / unidades)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+BUCKETS_QUANTIDADE = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_LONGOS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BUCKETS_LINHAS = (10, 100, 1000, 10000, 50000, 100000, 500000)
+BUCKETS_BYTES = (10_000, 100_000, 1_000_000, 10_000_000, 50_000_000, 200_000_000)
+
+_CHAVE_VAGA = 'metricas:vaga:{}'
+
+_OPERACAO_RE = re.compile(r"^\s*\(?\s*(\w+)", re.IGNORECASE)
+_TABELA_RE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)`?", re.IGNORECASE
+)
+
+
+# ===============================================================
+# TIPOS DE MÉTRICA
+# ===============================================================
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(nomes, valores, extra=''):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador (só cresce). Valores por combinação de labels."""
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, labels=()):
+        self.nome, self.ajuda, self.labels = nome, ajuda, tuple(labels)
+        self.valores = {}
+
+    def inc(self, *labels, valor=1):
+        with _lock:
+            self.valores[labels] = self.valores.get(labels, 0) + valor
+
+    def vazio(self):
+        return {}
+
+    def somar(self, acumulado, valores):
+        for chave, valor in valores.items():
+            acumulado[chave] = acumulado.get(chave, 0) + valor
+
+    def linhas(self, valores):
+        for labels, valor in sorted(valores.items()):
+            yield f"{self.nome}{_rotulos(self.labels, labels)} {_numero(valor)}"
+
+
+class Medidor(Contador):
+    """Valor instantâneo (gauge); na soma dos workers, os valores se somam (ex: conexões em uso)."""
+    tipo = 'gauge'
+
+    def set(self, *labels, valor):
+        with _lock:
+            self.valores[labels] = valor
+
+
+class Histograma(Contador):
+    """Histograma com buckets fixos: [contagem por bucket..., +Inf, soma] por combinação de labels."""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, labels=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, labels)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, *labels):
+        posicao = bisect.bisect_left(self.buckets, valor)
+        with _lock:
+            serie = self.valores.get(labels)
+            if serie is None:
+                serie = self.valores[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            serie[posicao] += 1
+            serie[-1] += valor
+
+    def somar(self, acumulado, valores):
+        for chave, serie in valores.items():
+            atual = acumulado.get(chave)
+            acumulado[chave] = list(serie) if atual is None else [a + b for a, b in zip(atual, serie)]
+
+    def linhas(self, valores):
+        for labels, serie in sorted(valores.items()):
+            total = 0
+            for limite, quantidade in zip(self.buckets + ('+Inf',), serie[:-1]):
+                total += quantidade
+                le = 'le="{}"'.format(limite if limite == '+Inf' else _numero(float(limite)))
+                yield f"{self.nome}_bucket{_rotulos(self.labels, labels, le)} {total}"
+            yield f"{self.nome}_sum{_rotulos(self.labels, labels)} {_numero(float(serie[-1]))}"
+            yield f"{self.nome}_count{_rotulos(self.labels, labels)} {total}"
+
+
+_lock = threading.Lock()
+_pid = os.getpid()
+_tenants = set()
+_estado = {'vaga': None, 'publicador': None}
+_publicar_lock = threading.Lock()  # Thread de publicação e /metrics do mesmo processo: uma vaga só
+
+REQUEST_DURACAO = Histograma(
+    'lumob_http_request_duration_seconds', 'Duração dos requests por endpoint.', ('endpoint', 'metodo'))
+REQUESTS = Contador('lumob_http_requests_total', 'Requests por endpoint e status HTTP.', ('endpoint', 'status'))
+TENANT_DURACAO = Histograma(
+    'lumob_tenant_request_duration_seconds', 'Duração dos requests por tenant.', ('tenant',))
+DB_TEMPO_REQUEST = Histograma(
+    'lumob_db_request_seconds', 'Tempo gasto no banco por request.', ('endpoint',), BUCKETS_LATENCIA)
+DB_CONSULTAS_REQUEST = Histograma(
+    'lumob_db_request_queries', 'Consultas ao banco por request.', ('endpoint',), BUCKETS_QUANTIDADE)
+TENANT_DB_TEMPO = Contador('lumob_tenant_db_seconds_total', 'Tempo de banco acumulado por tenant.', ('tenant',))
+TENANT_DB_CONSULTAS = Contador('lumob_tenant_db_queries_total', 'Consultas ao banco por tenant.', ('tenant',))
+CONSULTA_DURACAO = Histograma(
+    'lumob_db_query_duration_seconds', 'Duração de cada consulta por operação e tabela.',
+    ('operacao', 'tabela'), BUCKETS_CONSULTA)
+CONSULTA_ERROS = Contador('lumob_db_query_errors_total', 'Consultas que falharam.', ('operacao', 'tabela'))
+CACHE_CONSULTAS = Contador(
+    'lumob_query_cache_total', 'Leituras do cache de consultas por família e resultado (hit, miss, stale).',
+    ('familia', 'resultado', 'tenant'))
+POOL_ESPERA = Histograma(
+    'lumob_db_pool_wait_seconds', 'Espera por uma conexão livre no pool.', (), BUCKETS_CONSULTA)
+POOL_ESTADO = Medidor('lumob_db_pool_connections', 'Conexões do pool por estado.', ('estado',))
+POOL_TIMEOUTS = Medidor('lumob_db_pool_timeouts', 'Checkouts que desistiram por pool esgotado (desde o início do worker).')
+EXPORT_DURACAO = Histograma(
+    'lumob_export_duration_seconds', 'Duração das exportações.', ('arquivo', 'formato'), BUCKETS_LONGOS)
+EXPORT_LINHAS = Histograma(
+    'lumob_export_rows', 'Linhas por exportação.', ('arquivo', 'formato'), BUCKETS_LINHAS)
+EXPORT_BYTES = Histograma(
+    'lumob_export_bytes', 'Tamanho do arquivo exportado.', ('arquivo', 'formato'), BUCKETS_BYTES)
+IMPORT_DURACAO = Histograma(
+    'lumob_import_duration_seconds', 'Duração das importações em lote.', ('entidade', 'modo'), BUCKETS_LONGOS)
+IMPORT_LINHAS = Histograma(
+    'lumob_import_rows', 'Linhas por importação.', ('entidade', 'modo'), BUCKETS_LINHAS)
+IMPORT_ERROS = Contador(
+    'lumob_import_rejected_rows_total', 'Linhas recusadas nas importações.', ('entidade', 'modo'))
+
+METRICAS = [
+    REQUEST_DURACAO, REQUESTS, TENANT_DURACAO, DB_TEMPO_REQUEST, DB_CONSULTAS_REQUEST, TENANT_DB_TEMPO,
+    TENANT_DB_CONSULTAS, CONSULTA_DURACAO, CONSULTA_ERROS, CACHE_CONSULTAS, POOL_ESPERA, POOL_ESTADO,
+    POOL_TIMEOUTS, EXPORT_DURACAO, EXPORT_LINHAS, EXPORT_BYTES, IMPORT_DURACAO, IMPORT_LINHAS, IMPORT_ERROS,
+]
+
+
+def _processo_atual():
+    """Depois de um fork o filho começa do zero (o que o mestre acumulou não é deste worker)."""
+    global _pid
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                for metrica in METRICAS:
+                    metrica.valores = {}
+                _tenants.clear()
+                _estado['vaga'] = None
+                _estado['publicador'] = None  # Threads não sobrevivem ao fork
+                _pid = os.getpid()
+
+
+def tenant_label(tenant_id):
+    """Label do tenant, limitado a METRICAS_MAX_TENANTS valores distintos por processo."""
+    if tenant_id is None:
+        return ''
+    chave = str(tenant_id)
+    if chave in _tenants:
+        return chave
+    with _lock:
+        if len(_tenants) < METRICAS_MAX_TENANTS:
+            _tenants.add(chave)
+            return chave
+    return TENANT_OUTROS
+
+
+# ===============================================================
+# REGISTRO (chamado pelos ganchos)
+# ===============================================================
+@functools.lru_cache(maxsize=2048)
+def _classificar(query):
+    """(operação, tabela principal) de um comando SQL, para os labels das consultas."""
+    operacao = _OPERACAO_RE.match(query)
+    tabela = _TABELA_RE.search(query)
+    return (operacao.group(1).upper() if operacao else '-'), (tabela.group(1).lower() if tabela else '-')
+
+
+def registrar_consulta(query, segundos, erro=False):
+    """Uma consulta executada pelo DatabaseManager (execute_query, execute_write, iter_batches)."""
+    _processo_atual()
+    operacao, tabela = _classificar(query)
+    CONSULTA_DURACAO.observar(segundos, operacao, tabela)
+    if erro:
+        CONSULTA_ERROS.inc(operacao, tabela)
+    if has_request_context():
+        acumulado = g.get('_metricas_db')
+        if acumulado is None:
+            acumulado = g._metricas_db = [0.0, 0]
+        acumulado[0] += segundos
+        acumulado[1] += 1
+
+
+def registrar_cache(familia, resultado, tenant_id):
+    """Leitura de um @cached_query: resultado = 'hit', 'miss' ou 'stale'."""
+    _processo_atual()
+    CACHE_CONSULTAS.inc(familia, resultado, tenant_label(tenant_id))
+
+
+def registrar_espera_pool(segundos):
+    _processo_atual()
+    POOL_ESPERA.observar(segundos)
+
+
+def registrar_exportacao(arquivo, formato, segundos, linhas, tamanho):
+    _processo_atual()
+    EXPORT_DURACAO.observar(segundos, arquivo, formato)
+    EXPORT_LINHAS.observar(linhas, arquivo, formato)
+    EXPORT_BYTES.observar(tamanho, arquivo, formato)
+
+
+def registrar_importacao(entidade, modo, segundos, linhas, recusadas):
+    _processo_atual()
+    IMPORT_DURACAO.observar(segundos, entidade, modo)
+    IMPORT_LINHAS.observar(linhas, entidade, modo)
+    if recusadas:
+        IMPORT_ERROS.inc(entidade, modo, valor=recusadas)
+
+
+# ===============================================================
+# MIDDLEWARE DE REQUEST
+# ===============================================================
+def instalar(app):
+    """Registra os ganchos before/after_request que medem todos os requests do app."""
+    app.before_request(_inicio_request)
+    app.after_request(_fim_request)
+
+
+def _inicio_request():
+    g._metricas_inicio = time.perf_counter()
+
+
+def _fim_request(response):
+    inicio = g.pop('_metricas_inicio', None)
+    if inicio is None:
+        return response
+    _processo_atual()
+    duracao = time.perf_counter() - inicio
+    endpoint = request.endpoint or 'sem_rota'
+    REQUEST_DURACAO.observar(duracao, endpoint, request.method)
+    REQUESTS.inc(endpoint, str(response.status_code))
+
+    segundos_db, consultas = g.pop('_metricas_db', None) or (0.0, 0)
+    DB_TEMPO_REQUEST.observar(segundos_db, endpoint)
+    DB_CONSULTAS_REQUEST.observar(consultas, endpoint)
+
+    # Usuário só se já foi carregado no request (não força o load_user por causa da métrica)
+    tenant = tenant_label(getattr(g.get('_login_user'), 'tenant_id', None))
+    if tenant:
+        TENANT_DURACAO.observar(duracao, tenant)
+        TENANT_DB_TEMPO.inc(tenant, valor=segundos_db)
+        TENANT_DB_CONSULTAS.inc(tenant, valor=consultas)
+
+    if _estado['publicador'] is None:
+        _iniciar_publicador(current_app._get_current_object())
+    return response
+
+
+# ===============================================================
+# AGREGAÇÃO ENTRE WORKERS E EXPOSIÇÃO
+# ===============================================================
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _snapshot():
+    """Valores deste processo, serializáveis pelo cache: {métrica: [[labels, valor], ...]}."""
+    from database.db_base import pool_stats  # Import local: db_base importa este módulo
+
+    _processo_atual()
+    stats = pool_stats()
+    if stats:
+        for estado in ('in_use', 'idle', 'open'):
+            POOL_ESTADO.set(estado, valor=stats[estado])
+        POOL_TIMEOUTS.set(valor=stats['timeouts'])
+    with _lock:
+        return {m.nome: [[list(labels), valor] for labels, valor in m.valores.items()] for m in METRICAS}
+
+
+def _iniciar_publicador(app):
+    """Thread (daemon) deste processo que publica o snapshot a cada METRICAS_PUBLICAR_S segundos."""
+    with _lock:
+        if _estado['publicador'] is not None:
+            return
+
+        def publicar_sempre():
+            while True:
+                with app.app_context():
+                    publicar()
+                time.sleep(METRICAS_PUBLICAR_S)
+
+        _estado['publicador'] = threading.Thread(target=publicar_sempre, name='metricas-publicar', daemon=True)
+        _estado['publicador'].start()
+
+
+def publicar():
+    """Grava o snapshot deste worker na vaga dele no cache compartilhado (ocupa uma na primeira vez)."""
+    with _publicar_lock:
+        _publicar()
+
+
+def _publicar():
+    worker = _worker_id()
+    try:
+        snapshot = dict(_snapshot(), _worker=worker)
+        vaga = _estado['vaga']
+        if vaga is not None:
+            atual = cache.get(_CHAVE_VAGA.format(vaga))
+            if atual is not None and atual.get('_worker') == worker:
+                cache.set(_CHAVE_VAGA.format(vaga), snapshot, timeout=METRICAS_SNAPSHOT_TTL)
+                return
+            if atual is None and cache.add(_CHAVE_VAGA.format(vaga), snapshot, timeout=METRICAS_SNAPSHOT_TTL):
+                return  # A vaga tinha expirado (worker ocioso) e continuava livre
+        # Sem vaga (ou a antiga foi ocupada por outro worker depois de expirar): a primeira livre
+        _estado['vaga'] = None
+        for n in range(METRICAS_MAX_WORKERS):
+            if cache.add(_CHAVE_VAGA.format(n), snapshot, timeout=METRICAS_SNAPSHOT_TTL):
+                _estado['vaga'] = n
+                return
+        logger.warning("Sem vaga para as métricas do worker %s (METRICAS_MAX_WORKERS=%d).", worker, METRICAS_MAX_WORKERS)
+    except Exception as e:
+        # Métrica nunca derruba o request
+        logger.warning("Falha ao publicar as métricas do worker %s: %s", worker, e)
+
+
+def exposicao():
+    """Texto no formato de exposição do Prometheus com a soma dos workers vivos."""
+    publicar()  # O worker que responde entra com os valores de agora
+    snapshots = [s for s in cache.get_many(*[_CHAVE_VAGA.format(n) for n in range(METRICAS_MAX_WORKERS)])
+                 if s is not None]
+
+    linhas = []
+    for metrica in METRICAS:
+        acumulado = metrica.vazio()
+        for snapshot in snapshots:
+            if snapshot:
+                metrica.somar(acumulado, {tuple(labels): valor for labels, valor in snapshot.get(metrica.nome, [])})
+        linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+        linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        linhas.extend(metrica.linhas(acumulado))
+    linhas.append("# HELP lumob_metrics_workers Workers somados nesta coleta.")
+    linhas.append("# TYPE lumob_metrics_workers gauge")
+    linhas.append(f"lumob_metrics_workers {len(snapshots)}")
+    return '\n'.join(linhas) + '\n'
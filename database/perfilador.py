@@ -0,0 +1,364 @@
+# database/perfilador.py
+# Perfilador estatístico por request, sob demanda: mostra onde vai o tempo de CPU das rotas que as
+# métricas de banco (/metrics) e o rastreamento (Server-Timing) não explicam — edit_funcionario,
+# edit_obra etc.
+#
+# Um request é perfilado quando:
+#   - um admin logado pede: '?_perfil=1' na URL ou cabeçalho 'X-Perfil: 1' (a resposta volta com
+#     'X-Perfil: <endpoint>/<id>', o perfil gravado);
+#   - cai na amostragem PERFIL_AMOSTRAGEM (fração de todos os requests; padrão 0 = desligada).
+#
+# Enquanto houver request perfilado, uma thread do processo lê a pilha da thread de cada um a cada
+# PERFIL_INTERVALO_MS (sys._current_frames, sem instrumentar chamada nenhuma: custo fixo por amostra,
+# independente de quantas funções a rota chama) e conta as pilhas no formato "folded"
+# (quadro;quadro;...;quadro). Sem request perfilado, a thread dorme.
+#
+# Cada perfil vai para PERFIL_DIR/<endpoint>/<id>.json (dados do request, tabelas top-N por tempo
+# próprio e acumulado, pilhas) e <id>.svg (flame graph), gravados pela própria thread do
+# perfilador, fora do request. Ficam os PERFIL_MAX_POR_ENDPOINT mais recentes de cada endpoint.
+# Navegação: users_bp.perfis (/users/perfis), só admin, só perfis do próprio tenant.
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from flask import g, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+PERFIL_DIR = os.getenv("PERFIL_DIR", os.path.join(_RAIZ, "perfis"))
+PERFIL_AMOSTRAGEM = float(os.getenv("PERFIL_AMOSTRAGEM", "0"))            # Fração de requests perfilados
+PERFIL_INTERVALO = float(os.getenv("PERFIL_INTERVALO_MS", "5")) / 1000      # Entre amostras
+PERFIL_MAX_POR_ENDPOINT = int(os.getenv("PERFIL_MAX_POR_ENDPOINT", "20"))   # Perfis guardados por endpoint
+PERFIL_TOP = 25            # Linhas das tabelas top-N
+PERFIL_PARAMETRO = '_perfil'
+PERFIL_CABECALHO = 'X-Perfil'
+
+_NOME_RE = re.compile(r"^\w[\w.\-]*$")  # Endpoint e id vindos da URL (não começam com ponto: nada de '..')
+_ENTRADA_WSGI = 'Flask.wsgi_app '     # Quadros acima deste (servidor WSGI) não entram nas pilhas
+_CODIGO_PROPRIO = ('(app.py:', '(utils.py:', '(database/', '(modulos/')
+
+
+class Sessao:
+    """Um request sendo perfilado: pilhas contadas pela thread do perfilador."""
+    def __init__(self, thread_id, motivo):
+        self.thread_id = thread_id
+        self.motivo = motivo  # 'admin' ou 'amostragem'
+        self.criado_em = datetime.now()
+        self.id = f"{self.criado_em:%Y%m%d-%H%M%S-%f}-{os.getpid()}-{os.urandom(3).hex()}"
+        self.pilhas = Counter()
+        self.inicio = time.perf_counter()
+        self.meta = {}
+
+
+# ===============================================================
+# AMOSTRAGEM
+# ===============================================================
+def _rotulo(code):
+    """'função (arquivo:linha)' com o arquivo relativo ao projeto ou ao site-packages."""
+    arquivo = code.co_filename
+    if arquivo.startswith(_RAIZ):
+        arquivo = arquivo[len(_RAIZ):]
+    else:
+        i = arquivo.rfind('site-packages' + os.sep)
+        arquivo = arquivo[i + len('site-packages') + 1:] if i >= 0 else os.path.basename(arquivo)
+    nome = getattr(code, 'co_qualname', code.co_name)
+    return f"{nome} ({arquivo.replace(os.sep, '/')}:{code.co_firstlineno})".replace(';', ',')
+
+
+class Amostrador:
+    """Thread única por processo que amostra as pilhas dos requests perfilados e grava os perfis."""
+
+    def __init__(self):
+        self._sessoes = {}   # thread_id -> Sessao
+        self._gravar = []    # Sessões encerradas, aguardando gravação
+        self._rotulos = {}   # code -> rótulo
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._pid = None
+
+    def iniciar(self, sessao):
+        if self._pid != os.getpid():
+            # Thread própria por processo (a do mestre não sobrevive ao fork do gunicorn)
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._sessoes, self._gravar = {}, []
+                    threading.Thread(target=self._executar, name='perfilador', daemon=True).start()
+                    self._pid = os.getpid()
+        with self._lock:
+            self._sessoes[sessao.thread_id] = sessao
+        self._acordar.set()
+
+    def encerrar(self, sessao, gravar=True):
+        with self._lock:
+            self._sessoes.pop(sessao.thread_id, None)
+            if gravar:
+                self._gravar.append(sessao)
+        self._acordar.set()
+
+    def _pilha(self, frame):
+        rotulos = []
+        while frame is not None:
+            code = frame.f_code
+            rotulo = self._rotulos.get(code)
+            if rotulo is None:
+                rotulo = self._rotulos[code] = _rotulo(code)
+            rotulos.append(rotulo)
+            if rotulo.startswith(_ENTRADA_WSGI):
+                break
+            frame = frame.f_back
+        rotulos.reverse()
+        return ';'.join(rotulos)
+
+    def _executar(self):
+        while True:
+            with self._lock:
+                ativas = list(self._sessoes.values())
+                pendentes, self._gravar = self._gravar, []
+            for sessao in pendentes:
+                try:
+                    gravar(sessao)
+                except Exception as e:
+                    logger.warning("Falha ao gravar o perfil %s: %s", sessao.id, e)
+            if not ativas:
+                self._acordar.wait()
+                self._acordar.clear()
+                continue
+            frames = sys._current_frames()
+            for sessao in ativas:
+                frame = frames.get(sessao.thread_id)
+                if frame is not None:
+                    sessao.pilhas[self._pilha(frame)] += 1
+            del frames, frame
+            time.sleep(PERFIL_INTERVALO)
+
+
+_amostrador = Amostrador()
+
+
+# ===============================================================
+# MIDDLEWARE DE REQUEST
+# ===============================================================
+def instalar(app):
+    """Liga o perfil por request (pedido por admin ou por amostragem)."""
+    app.before_request(_inicio_request)
+    app.after_request(_fim_request)
+    app.teardown_request(_descartar)
+
+
+def _inicio_request():
+    if request.endpoint in (None, 'static'):
+        return
+    if request.args.get(PERFIL_PARAMETRO) == '1' or request.headers.get(PERFIL_CABECALHO) == '1':
+        if not (current_user.is_authenticated and current_user.role == 'admin'):
+            return
+        motivo = 'admin'
+    elif PERFIL_AMOSTRAGEM and random.random() < PERFIL_AMOSTRAGEM:
+        motivo = 'amostragem'
+    else:
+        return
+    sessao = g._perfil = Sessao(threading.get_ident(), motivo)
+    _amostrador.iniciar(sessao)
+
+
+def _fim_request(response):
+    sessao = g.pop('_perfil', None)
+    if sessao is None:
+        return response
+    sessao.meta = {
+        'endpoint': request.endpoint,
+        'metodo': request.method,
+        'caminho': request.path,
+        'status': response.status_code,
+        'duracao_ms': round((time.perf_counter() - sessao.inicio) * 1000, 1),
+        'tenant_id': getattr(g.get('_login_user'), 'tenant_id', None),  # Sem forçar o load_user
+        'trace_id': getattr(g.get('_rastro'), 'trace_id', None),        # Trace do mesmo request
+    }
+    _amostrador.encerrar(sessao)
+    if sessao.motivo == 'admin':
+        response.headers[PERFIL_CABECALHO] = f"{request.endpoint}/{sessao.id}"
+    return response
+
+
+def _descartar(exc=None):
+    """Request que terminou em exceção não tratada (sem after_request): para de amostrar, não grava."""
+    sessao = g.pop('_perfil', None)
+    if sessao is not None:
+        _amostrador.encerrar(sessao, gravar=False)
+
+
+# ===============================================================
+# GRAVAÇÃO
+# ===============================================================
+def top_funcoes(pilhas, n=PERFIL_TOP):
+    """Funções com mais amostras: tempo próprio (no topo da pilha) e acumulado (em qualquer ponto dela)."""
+    proprio, acumulado = Counter(), Counter()
+    for pilha, amostras in pilhas.items():
+        quadros = pilha.split(';')
+        proprio[quadros[-1]] += amostras
+        for quadro in set(quadros):
+            acumulado[quadro] += amostras
+    return {'proprio': proprio.most_common(n), 'acumulado': acumulado.most_common(n)}
+
+
+def gravar(sessao):
+    # Request amostrado que terminou antes da primeira amostra não diz nada
+    if not sessao.pilhas and sessao.motivo == 'amostragem':
+        return
+    pasta = os.path.join(PERFIL_DIR, sessao.meta['endpoint'])
+    os.makedirs(pasta, exist_ok=True)
+    dados = dict(sessao.meta, id=sessao.id, motivo=sessao.motivo, criado_em=sessao.criado_em.strftime('%d/%m/%Y %H:%M:%S'),
+                 amostras=sum(sessao.pilhas.values()), intervalo_ms=PERFIL_INTERVALO * 1000,
+                 top=top_funcoes(sessao.pilhas), pilhas=dict(sessao.pilhas))
+    titulo = f"{dados['metodo']} {dados['caminho']} ({dados['duracao_ms']} ms, {dados['amostras']} amostras)"
+    base = os.path.join(pasta, sessao.id)
+    with open(base + '.svg', 'w', encoding='utf-8') as arquivo:
+        arquivo.write(flamegraph_svg(sessao.pilhas, titulo))
+    # O .json é o que as páginas listam: só aparece completo (troca atômica do temporário)
+    with open(base + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+    os.replace(base + '.tmp', base + '.json')
+    _podar(pasta)
+
+
+def _podar(pasta):
+    """Apaga os perfis mais antigos do endpoint além de PERFIL_MAX_POR_ENDPOINT (o id começa pela data)."""
+    perfis = sorted(nome[:-5] for nome in os.listdir(pasta) if nome.endswith('.json'))
+    for perfil_id in perfis[:-PERFIL_MAX_POR_ENDPOINT]:
+        for extensao in ('.json', '.svg'):
+            try:
+                os.remove(os.path.join(pasta, perfil_id + extensao))
+            except FileNotFoundError:
+                pass
+
+
+# ===============================================================
+# FLAME GRAPH
+# ===============================================================
+def _cor(rotulo):
+    """Cor estável por função: azul para o código do projeto, tons quentes para bibliotecas."""
+    h = zlib.crc32(rotulo.encode())
+    if any(marca in rotulo for marca in _CODIGO_PROPRIO):
+        return f"rgb({80 + h % 50},{140 + h % 60},{220 + h % 35})"
+    return f"rgb({205 + h % 50},{90 + (h >> 8) % 130},{40 + (h >> 16) % 50})"
+
+
+def flamegraph_svg(pilhas, titulo, largura=1200, altura_linha=16):
+    """
+    Flame graph em SVG a partir das pilhas "folded": a largura de cada quadro é a fração das amostras
+    em que ele estava na pilha; a raiz fica embaixo e os chamados empilham por cima. O texto completo
+    (função, arquivo, amostras) fica no <title> de cada quadro (tooltip no navegador).
+    """
+    raiz = {'amostras': 0, 'filhos': {}}
+    for pilha, amostras in pilhas.items():
+        no = raiz
+        no['amostras'] += amostras
+        for quadro in pilha.split(';'):
+            no = no['filhos'].setdefault(quadro, {'amostras': 0, 'filhos': {}})
+            no['amostras'] += amostras
+    total = raiz['amostras'] or 1
+    escala = (largura - 20) / total
+
+    quadros, pendentes = [], [(raiz, 'todas as amostras', 10.0, 0)]
+    while pendentes:
+        no, rotulo, x, nivel = pendentes.pop()
+        largura_quadro = no['amostras'] * escala
+        if largura_quadro < 0.5:
+            continue
+        quadros.append((x, nivel, largura_quadro, rotulo, no['amostras']))
+        filho_x = x
+        for filho_rotulo, filho in sorted(no['filhos'].items()):
+            pendentes.append((filho, filho_rotulo, filho_x, nivel + 1))
+            filho_x += filho['amostras'] * escala
+
+    niveis = max(nivel for _, nivel, _, _, _ in quadros) + 1
+    altura = niveis * altura_linha + 40
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura}" height="{altura}" '
+        f'viewBox="0 0 {largura} {altura}" font-family="monospace" font-size="11">',
+        f'<rect width="{largura}" height="{altura}" fill="#f8fafc"/>',
+        f'<text x="{largura / 2}" y="20" text-anchor="middle" font-size="13">{escape(titulo)}</text>',
+    ]
+    for x, nivel, largura_quadro, rotulo, amostras in quadros:
+        y = altura - 10 - (nivel + 1) * altura_linha
+        caracteres = int((largura_quadro - 6) / 7)
+        texto = rotulo if len(rotulo) <= caracteres else rotulo[:caracteres - 2] + '..'
+        partes.append(
+            f'<g><title>{escape(rotulo)} — {amostras} amostras ({amostras * 100 / total:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{largura_quadro:.1f}" height="{altura_linha - 1}" '
+            f'rx="2" fill="{_cor(rotulo)}"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + altura_linha - 4}">{escape(texto)}</text>' if caracteres >= 3 else '')
+            + '</g>'
+        )
+    partes.append('</svg>')
+    return '\n'.join(partes)
+
+
+# ===============================================================
+# LEITURA (páginas de admin)
+# ===============================================================
+def _visivel(dados, tenant_id):
+    # Só perfis do próprio tenant; sem tenant_id (request sem login) não aparece para ninguém
+    return dados.get('tenant_id') is not None and dados.get('tenant_id') == tenant_id
+
+
+def _caminho(endpoint, perfil_id, extensao):
+    """Arquivo do perfil dentro de PERFIL_DIR, ou None se o nome é inválido ou sai da pasta."""
+    if not (_NOME_RE.match(endpoint) and _NOME_RE.match(perfil_id)):
+        return None
+    raiz = os.path.realpath(PERFIL_DIR)
+    caminho = os.path.realpath(os.path.join(raiz, endpoint, perfil_id + extensao))
+    return caminho if caminho.startswith(raiz + os.sep) else None
+
+
+def carregar(endpoint, perfil_id, tenant_id):
+    """Perfil gravado (dicionário do .json), ou None se não existe ou é de outro tenant."""
+    caminho = _caminho(endpoint, perfil_id, '.json')
+    if caminho is None:
+        return None
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return dados if _visivel(dados, tenant_id) else None
+
+
+def caminho_svg(endpoint, perfil_id, tenant_id):
+    """Arquivo do flame graph do perfil, ou None (mesmas regras de carregar)."""
+    if carregar(endpoint, perfil_id, tenant_id) is None:
+        return None
+    caminho = _caminho(endpoint, perfil_id, '.svg')
+    return caminho if caminho and os.path.exists(caminho) else None
+
+
+def listar(tenant_id):
+    """Perfis visíveis para o tenant por endpoint (mais recentes primeiro), sem as pilhas."""
+    por_endpoint = {}
+    try:
+        endpoints = sorted(os.listdir(PERFIL_DIR))
+    except FileNotFoundError:
+        return por_endpoint
+    for endpoint in endpoints:
+        pasta = os.path.join(PERFIL_DIR, endpoint)
+        if not (os.path.isdir(pasta) and _NOME_RE.match(endpoint)):
+            continue
+        for nome in sorted(os.listdir(pasta), reverse=True):
+            if nome.endswith('.json'):
+                dados = carregar(endpoint, nome[:-5], tenant_id)
+                if dados:
+                    dados.pop('pilhas', None)
+                    por_endpoint.setdefault(endpoint, []).append(dados)
+    return por_endpoint
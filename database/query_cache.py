@@ -0,0 +1,217 @@
+# database/query_cache.py
+# Cache read-through de métodos de manager, por tenant, marcado com as tabelas que o método lê.
+#
+# Cada tabela de cada tenant tem um carimbo de versão no cache (tv:<tenant>:<tabela>). Toda escrita
+# feita por um manager de tenant (execute_query com fetch_results=False, ou execute_write dentro de
+# transaction(), ver TenantBoundDatabase em db_base.py) troca o carimbo das tabelas escritas. A chave
+# de um resultado em cache inclui os carimbos das tabelas que ele lê, então qualquer escrita numa
+# delas torna o resultado inalcançável na hora — sem lista manual de invalidações por escrita e sem
+# depender de TTL curto. O TTL (QUERY_CACHE_TTL) é só a rede de segurança para escritas feitas fora
+# dos managers (scripts SQL, console).
+
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+from database import metricas
+from database.cache_ext import cache
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_STALE_TTL = int(os.getenv("QUERY_CACHE_STALE_TTL", "86400"))  # Último resultado (stale_while_revalidate)
+QUERY_CACHE_LOCK_TTL = 60     # Validade do lock de cálculo (protege contra quem morreu segurando o lock)
+QUERY_CACHE_LOCK_WAIT = float(os.getenv("QUERY_CACHE_LOCK_WAIT", "10"))  # Espera máxima de quem não pegou o lock
+
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)`?", re.IGNORECASE
+)
+_READ_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+
+# Tabelas alteradas pelo banco quando a tabela-mãe recebe DELETE (FKs ON DELETE CASCADE / SET NULL
+# do 1_estrutura.sql): uma escrita na mãe também troca a versão delas.
+CASCADE_TABLES = {
+    'funcionarios': ('funcionarios_documentos', 'funcionarios_enderecos', 'funcionarios_contatos',
+                     'dependentes', 'ferias', 'asos', 'incidentes_acidentes'),
+    'obras': ('incidentes_acidentes',),
+    'treinamentos_agendamentos': ('treinamentos_participantes',),
+}
+
+
+def tables_written(query):
+    """Tabelas cuja versão muda com esta escrita (a do comando + as afetadas em cascata)."""
+    match = _WRITE_TABLE_RE.match(query)
+    if not match:
+        return ()
+    table = match.group(1).lower()
+    return (table,) + CASCADE_TABLES.get(table, ())
+
+
+def tables_read(query):
+    """Tabelas lidas por um SELECT (as do FROM e dos JOINs)."""
+    return tuple(dict.fromkeys(table.lower() for table in _READ_TABLE_RE.findall(query)))
+
+
+def _version_key(tenant_id, table):
+    return f"tv:{tenant_id}:{table}"
+
+
+def table_versions(tenant_id, tables):
+    """Carimbos atuais das tabelas do tenant (cria os que ainda não existem)."""
+    keys = [_version_key(tenant_id, t) for t in tables]
+    versions = list(cache.get_many(*keys))
+    for i, version in enumerate(versions):
+        if version is None:
+            # Carimbo ausente (primeiro uso ou descartado pelo backend): um novo carimbo torna
+            # inalcançável qualquer resultado gravado sob o anterior
+            version = uuid.uuid4().hex
+            if not cache.add(keys[i], version, timeout=0):
+                version = cache.get(keys[i]) or version
+            versions[i] = version
+    return versions
+
+
+def bump_tables(tenant_id, tables):
+    """Troca o carimbo de versão das tabelas do tenant (chamado depois do commit da escrita)."""
+    if tables:
+        cache.set_many({_version_key(tenant_id, t): uuid.uuid4().hex for t in set(tables)}, timeout=0)
+
+
+def cached_query(family, tables, timeout=QUERY_CACHE_TTL, stale_while_revalidate=False):
+    """
+    Decorator read-through para métodos de TenantScopedManager.
+
+    :param family: Prefixo da chave (ex: 'dash:obras:kpis'); identifica a família nas métricas.
+    :param tables: Tabelas lidas pelo método. Uma escrita em qualquer uma delas invalida o resultado.
+    :param timeout: Validade máxima da entrada, em segundos.
+    :param stale_while_revalidate: Se True, depois do primeiro cálculo um miss (escrita ou TTL)
+                                   devolve na hora o último resultado e recalcula em segundo plano.
+
+    A chave é <family>:<tenant>:<hash dos argumentos>:<hash dos carimbos das tabelas>.
+    None/False (erro de consulta) não são guardados.
+
+    Miss com cálculo único (single-flight): só quem obtém o lock:<chave> (cache.add, atômico
+    no Redis) executa o método; os demais recebem o último resultado (se houver e
+    stale_while_revalidate) ou esperam o resultado aparecer no cache, até QUERY_CACHE_LOCK_WAIT s.
+    """
+    tables = tuple(tables)
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            versions = table_versions(self.tenant_id, tables)
+            base = "{}:{}:{}".format(
+                family, self.tenant_id, hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()[:16]
+            )
+            key = "{}:{}".format(base, hashlib.sha1(':'.join(versions).encode()).hexdigest()[:16])
+            cached = cache.get(key)
+            if cached is not None:
+                metricas.registrar_cache(family, 'hit', self.tenant_id)
+                return cached
+
+            stale = cache.get(f"{base}:last") if stale_while_revalidate else None
+            lock_key = f"lock:{key}"
+            locked = cache.add(lock_key, os.getpid(), timeout=QUERY_CACHE_LOCK_TTL)
+            if not locked:
+                # Outro thread/worker já está calculando esta chave
+                if stale is not None:
+                    metricas.registrar_cache(family, 'stale', self.tenant_id)
+                    return stale['value']
+                cached = _wait_for(key)
+                if cached is not None:
+                    metricas.registrar_cache(family, 'hit', self.tenant_id)
+                    return cached
+                # Quem tinha o lock demorou demais (ou morreu): calcula aqui mesmo, sem apagar
+                # o lock, que continua sendo dele (apagar reabriria a corrida para os demais)
+
+            metricas.registrar_cache(family, 'stale' if stale is not None else 'miss', self.tenant_id)
+            if stale is not None:
+                _refresh_in_background(self, method, args, kwargs, key, base, lock_key, timeout, stale_while_revalidate)
+                return stale['value']
+
+            try:
+                # Leitura com snapshot novo: sob REPEATABLE READ uma transação de leitura aberta antes
+                # da última escrita devolveria dados anteriores aos carimbos que acabamos de ler
+                self.db.end_read_snapshot()
+                return _compute(self, method, args, kwargs, key, base, timeout, stale_while_revalidate)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+
+        wrapper.cache_family = family
+        wrapper.cache_tables = tables
+        return wrapper
+    return decorator
+
+
+def cached_value(family, tenant_id, tables, args, compute, timeout=QUERY_CACHE_TTL):
+    """
+    Versão enxuta de cached_query para valores que não vêm de um método de manager (ex: o total
+    de uma listagem paginada): compute() só roda quando alguma das tabelas mudou desde o último
+    cálculo com os mesmos args. Sem single-flight nem stale; None não é guardado.
+    """
+    versions = table_versions(tenant_id, tables)
+    key = "{}:{}:{}:{}".format(
+        family, tenant_id, hashlib.sha1(repr(args).encode()).hexdigest()[:16],
+        hashlib.sha1(':'.join(versions).encode()).hexdigest()[:16],
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        metricas.registrar_cache(family, 'hit', tenant_id)
+        return cached
+    metricas.registrar_cache(family, 'miss', tenant_id)
+    value = compute()
+    if value is not None:
+        cache.set(key, value, timeout=timeout)
+    return value
+
+
+def _compute(manager, method, args, kwargs, key, base, timeout, keep_last):
+    result = method(manager, *args, **kwargs)
+    if result is not None and result is not False:
+        cache.set(key, result, timeout=timeout)
+        if keep_last:
+            # Último resultado, independente dos carimbos: servido enquanto o próximo é calculado
+            cache.set(f"{base}:last", {'value': result, 'at': time.time()}, timeout=QUERY_CACHE_STALE_TTL)
+    return result
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + QUERY_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    return None
+
+
+def _refresh_in_background(manager, method, args, kwargs, key, base, lock_key, timeout, keep_last):
+    """
+    Recalcula numa thread com conexão própria do pool e um manager novo do mesmo tipo e tenant —
+    a conexão do request não pode ser usada fora do thread do request.
+    """
+    from database.db_base import DatabaseManager  # Import local: db_base importa este módulo
+
+    app = current_app._get_current_object()
+    manager_cls, tenant_id = type(manager), manager.tenant_id
+
+    def run():
+        try:
+            with app.app_context():
+                with DatabaseManager(**app.config['DB_CONFIG'], request_scoped=False) as db:
+                    _compute(manager_cls(db, tenant_id), method, args, kwargs, key, base, timeout, keep_last)
+        except Exception as e:
+            logger.error("Falha ao recalcular %s em segundo plano: %s", key, e)
+        finally:
+            with app.app_context():
+                cache.delete(lock_key)
+
+    threading.Thread(target=run, name=f"refresh-{base}", daemon=True).start()
@@ -0,0 +1,348 @@
+# database/rastreamento.py
+# Rastreamento (tracing) por request no modelo do OpenTelemetry, e cabeçalho Server-Timing.
+#
+# Cada request ganha um span raiz ("GET /obras/<int:obra_id>") e spans filhos para:
+#   - cada consulta do DatabaseManager (db.query, com a impressão digital do SQL: literais,
+#     números e parâmetros viram '?', listas IN (...) colapsam), ver fingerprint();
+#   - cada operação do cache (TieredCache em database/cache_ext.py: get, set, add, delete...);
+#   - cada render_template (sinais before_render_template/template_rendered do Flask);
+#   - trechos marcados com span(...) — load_user, etapas pandas da importação.
+#
+# O Server-Timing (db, cache, render, auth, pandas, total) sai em TODO request, para o painel
+# Network/Timing do DevTools; render inclui as consultas feitas durante o render.
+#
+# Os spans só são guardados e exportados se houver destino configurado e o request for amostrado
+# (RASTREAMENTO_AMOSTRAGEM, ou a decisão do chamador no cabeçalho W3C traceparent, que também
+# dá o trace_id e o span pai):
+#   - RASTREAMENTO_ARQUIVO: uma linha JSON por trace, no formato OTLP/JSON (ExportTraceServiceRequest);
+#   - OTEL_EXPORTER_OTLP_ENDPOINT: POST OTLP/HTTP JSON em <endpoint>/v1/traces (coletor OpenTelemetry).
+# A exportação roda numa thread por processo com fila limitada: fila cheia = trace descartado,
+# nunca request mais lento.
+
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+
+logger = logging.getLogger(__name__)
+
+RASTREAMENTO_ARQUIVO = os.getenv("RASTREAMENTO_ARQUIVO")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "lumob")
+RASTREAMENTO_AMOSTRAGEM = float(os.getenv("RASTREAMENTO_AMOSTRAGEM", "1.0"))  # Fração de requests rastreados
+RASTREAMENTO_MAX_SPANS = int(os.getenv("RASTREAMENTO_MAX_SPANS", "2000"))     # Por trace; o resto só conta
+RASTREAMENTO_FILA = 1000  # Traces aguardando exportação
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# Tipos de span do OTLP
+SPAN_INTERNO = 1
+SPAN_SERVIDOR = 2
+SPAN_CLIENTE = 3
+
+# Ordem das entradas no Server-Timing
+CATEGORIAS = ('db', 'cache', 'render', 'auth', 'pandas')
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMERO_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETRO_RE = re.compile(r"%s|%\(\w+\)s")
+_LISTA_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACOS_RE = re.compile(r"\s+")
+
+
+# ===============================================================
+# SPANS
+# ===============================================================
+class Span:
+    __slots__ = ('nome', 'tipo', 'span_id', 'pai', 'inicio_ns', 'fim_ns', 'atributos', 'erro')
+
+    def __init__(self, nome, tipo, pai, inicio_ns, atributos):
+        self.nome = nome
+        self.tipo = tipo
+        self.span_id = os.urandom(8).hex()
+        self.pai = pai
+        self.inicio_ns = inicio_ns
+        self.fim_ns = None
+        self.atributos = atributos
+        self.erro = False
+
+    def otlp(self, trace_id):
+        return {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.pai or '',
+            'name': self.nome,
+            'kind': self.tipo,
+            'startTimeUnixNano': str(self.inicio_ns),
+            'endTimeUnixNano': str(self.fim_ns or self.inicio_ns),
+            'attributes': [{'key': k, 'value': _valor_otlp(v)} for k, v in self.atributos.items() if v is not None],
+            'status': {'code': 2} if self.erro else {},
+        }
+
+
+class Rastro:
+    """Estado do trace de um request (em flask.g)."""
+    def __init__(self, trace_id, pai_remoto, amostrado):
+        self.trace_id = trace_id
+        self.amostrado = amostrado
+        self.pilha = []       # Spans abertos; o topo é o pai do próximo
+        self.spans = []       # Spans fechados (só se amostrado)
+        self.descartados = 0  # Acima de RASTREAMENTO_MAX_SPANS
+        self.tempos = dict.fromkeys(CATEGORIAS, 0.0)
+        self.contagens = dict.fromkeys(CATEGORIAS, 0)
+        self.pai_remoto = pai_remoto
+
+    def pai_atual(self):
+        return self.pilha[-1].span_id if self.pilha else self.pai_remoto
+
+    def guardar(self, span):
+        if len(self.spans) < RASTREAMENTO_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.descartados += 1
+
+
+def _valor_otlp(valor):
+    if isinstance(valor, bool):
+        return {'boolValue': valor}
+    if isinstance(valor, int):
+        return {'intValue': str(valor)}
+    if isinstance(valor, float):
+        return {'doubleValue': valor}
+    return {'stringValue': str(valor)}
+
+
+def _rastro():
+    return g.get('_rastro') if has_request_context() else None
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(query):
+    """SQL sem valores: literais, números e parâmetros viram '?'; listas IN (?, ?, ...) viram (...)."""
+    texto = _LITERAL_RE.sub('?', query)
+    texto = _PARAMETRO_RE.sub('?', texto)
+    texto = _NUMERO_RE.sub('?', texto)
+    texto = _LISTA_RE.sub('(...)', texto)
+    return _ESPACOS_RE.sub(' ', texto).strip()[:2000]
+
+
+@contextmanager
+def span(nome, categoria=None, tipo=SPAN_INTERNO, **atributos):
+    """
+    Span filho do span aberto no momento (context manager ou decorator). Fora de um request,
+    ou sem rastro, não faz nada. A duração entra no Server-Timing da categoria, se houver.
+    """
+    rastro = _rastro()
+    if rastro is None:
+        yield None
+        return
+    atual = Span(nome, tipo, rastro.pai_atual(), time.time_ns(), atributos)
+    rastro.pilha.append(atual)
+    inicio = time.perf_counter()
+    try:
+        yield atual
+    except BaseException:
+        atual.erro = True
+        raise
+    finally:
+        _fechar(rastro, atual, categoria, time.perf_counter() - inicio)
+
+
+def _fechar(rastro, atual, categoria, duracao):
+    if atual in rastro.pilha:
+        rastro.pilha.remove(atual)
+    atual.fim_ns = atual.inicio_ns + int(duracao * 1e9)
+    if categoria:
+        rastro.tempos[categoria] += duracao
+        rastro.contagens[categoria] += 1
+    if rastro.amostrado:
+        rastro.guardar(atual)
+
+
+def registrar(nome, categoria, inicio, erro=False, tipo=SPAN_INTERNO, **atributos):
+    """
+    Span folha de uma operação que já terminou (começou em time.perf_counter() = inicio): mais
+    barato que span() nos caminhos quentes (consultas, cache), que não têm filhos.
+    """
+    rastro = _rastro()
+    if rastro is None:
+        return
+    duracao = time.perf_counter() - inicio
+    rastro.tempos[categoria] += duracao
+    rastro.contagens[categoria] += 1
+    if rastro.amostrado:
+        atual = Span(nome, tipo, rastro.pai_atual(), time.time_ns() - int(duracao * 1e9), atributos)
+        atual.fim_ns = atual.inicio_ns + int(duracao * 1e9)
+        atual.erro = erro
+        rastro.guardar(atual)
+
+
+def registrar_consulta(query, inicio, erro=False):
+    """Consulta do DatabaseManager (o SQL só é normalizado se o trace for guardado)."""
+    rastro = _rastro()
+    if rastro is None:
+        return
+    if rastro.amostrado:
+        operacao = query.lstrip().split(None, 1)[0].upper() if query.strip() else ''
+        registrar('db.query', 'db', inicio, erro, SPAN_CLIENTE, **{
+            'db.system': 'mysql', 'db.operation.name': operacao, 'db.query.text': fingerprint(query)})
+    else:
+        registrar('db.query', 'db', inicio, erro)
+
+
+# ===============================================================
+# MIDDLEWARE DE REQUEST
+# ===============================================================
+def instalar(app):
+    """Span raiz por request, spans de render_template e o cabeçalho Server-Timing."""
+    app.before_request(_inicio_request)
+    app.after_request(_fim_request)
+    before_render_template.connect(_inicio_render, app)
+    template_rendered.connect(_fim_render, app)
+
+
+def _exportando():
+    return bool(RASTREAMENTO_ARQUIVO or OTLP_ENDPOINT)
+
+
+def _inicio_request():
+    pai_remoto, amostrado = None, random.random() < RASTREAMENTO_AMOSTRAGEM
+    match = _TRACEPARENT_RE.match(request.headers.get('traceparent', '').strip().lower())
+    if match:
+        trace_id, pai_remoto, flags = match.groups()
+        amostrado = bool(int(flags, 16) & 1)
+    else:
+        trace_id = os.urandom(16).hex()
+    rastro = g._rastro = Rastro(trace_id, pai_remoto, amostrado and _exportando())
+    rota = request.url_rule.rule if request.url_rule else request.path
+    raiz = Span(f"{request.method} {rota}", SPAN_SERVIDOR, pai_remoto, time.time_ns(), {
+        'http.request.method': request.method,
+        'http.route': rota,
+        'url.path': request.path,
+        'server.address': request.host,
+    })
+    rastro.pilha.append(raiz)
+    g._rastro_inicio = time.perf_counter()
+
+
+def _fim_request(response):
+    rastro = g.pop('_rastro', None)
+    if rastro is None:
+        return response
+    total = time.perf_counter() - g.pop('_rastro_inicio')
+    raiz = rastro.pilha[0] if rastro.pilha else None
+
+    if SERVER_TIMING:
+        partes = [f'{c};dur={rastro.tempos[c] * 1000:.1f};desc="{c} ({rastro.contagens[c]})"'
+                  for c in CATEGORIAS if rastro.contagens[c]]
+        partes.append(f'total;dur={total * 1000:.1f}')
+        if rastro.amostrado:
+            partes.append(f'trace;desc="{rastro.trace_id}"')
+        response.headers.add('Server-Timing', ', '.join(partes))
+
+    if rastro.amostrado and raiz is not None:
+        # Spans que ficaram abertos (ex: render que levantou exceção) fecham junto com a raiz
+        for aberto in reversed(rastro.pilha[1:]):
+            aberto.erro = True
+            _fechar(rastro, aberto, None, (time.time_ns() - aberto.inicio_ns) / 1e9)
+        raiz.atributos['http.response.status_code'] = response.status_code
+        tenant_id = getattr(g.get('_login_user'), 'tenant_id', None)  # Sem forçar o load_user
+        raiz.atributos['lumob.tenant_id'] = tenant_id
+        if rastro.descartados:
+            raiz.atributos['lumob.spans_descartados'] = rastro.descartados
+        raiz.erro = response.status_code >= 500
+        raiz.fim_ns = raiz.inicio_ns + int(total * 1e9)
+        rastro.spans.append(raiz)
+        _enfileirar(rastro)
+    return response
+
+
+def _inicio_render(sender, template, context, **extra):
+    rastro = _rastro()
+    if rastro is None:
+        return
+    atual = Span('render_template', SPAN_INTERNO, rastro.pai_atual(), time.time_ns(),
+                 {'template.name': template.name})
+    rastro.pilha.append(atual)
+    g.setdefault('_rastro_renders', []).append((atual, time.perf_counter()))
+
+
+def _fim_render(sender, template, context, **extra):
+    rastro = _rastro()
+    renders = g.get('_rastro_renders')
+    if rastro is None or not renders:
+        return
+    atual, inicio = renders.pop()
+    _fechar(rastro, atual, 'render', time.perf_counter() - inicio)
+
+
+# ===============================================================
+# EXPORTAÇÃO
+# ===============================================================
+_fila = None
+_fila_pid = None
+_fila_lock = threading.Lock()
+
+
+def _enfileirar(rastro):
+    global _fila, _fila_pid
+    if _fila_pid != os.getpid():
+        # Thread própria por processo (a do mestre não sobrevive ao fork do gunicorn)
+        with _fila_lock:
+            if _fila_pid != os.getpid():
+                _fila = queue.Queue(maxsize=RASTREAMENTO_FILA)
+                threading.Thread(target=_exportar_continuamente, args=(_fila,), name='rastreamento', daemon=True).start()
+                _fila_pid = os.getpid()
+    try:
+        _fila.put_nowait([s.otlp(rastro.trace_id) for s in rastro.spans])
+    except queue.Full:
+        pass
+
+
+def _documento(spans):
+    """ExportTraceServiceRequest do OTLP/JSON."""
+    return {'resourceSpans': [{
+        'resource': {'attributes': [
+            {'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}},
+            {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}},
+        ]},
+        'scopeSpans': [{'scope': {'name': 'lumob.rastreamento'}, 'spans': spans}],
+    }]}
+
+
+def _exportar_continuamente(fila):
+    while True:
+        lote = [fila.get()]
+        # Junta o que mais estiver na fila num envio só
+        while len(lote) < 50:
+            try:
+                lote.append(fila.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            exportar([span for spans in lote for span in spans], lote)
+        except Exception as e:
+            logger.warning("Falha ao exportar %d traces: %s", len(lote), e)
+
+
+def exportar(spans, traces=None):
+    """Grava no arquivo (uma linha por trace) e/ou envia ao coletor OTLP (um POST por lote)."""
+    if RASTREAMENTO_ARQUIVO:
+        with open(RASTREAMENTO_ARQUIVO, 'a', encoding='utf-8') as arquivo:
+            for trace in traces or [spans]:
+                arquivo.write(json.dumps(_documento(trace), ensure_ascii=False, separators=(',', ':')) + '\n')
+    if OTLP_ENDPOINT:
+        corpo = json.dumps(_documento(spans), separators=(',', ':')).encode()
+        pedido = urllib.request.Request(f"{OTLP_ENDPOINT.rstrip('/')}/v1/traces", data=corpo,
+                                        headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(pedido, timeout=5):
+            pass
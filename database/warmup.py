@@ -0,0 +1,119 @@
+# database/warmup.py
+# Aquecimento do worker: roda uma vez por processo, antes do worker atender requests
+# (gunicorn post_worker_init, ver gunicorn.conf.py; ou no __main__ do app.py).
+#
+# 1. Abre as conexões mínimas do pool (handshakes fora do caminho do primeiro request).
+# 2. Pré-carrega o tenant_registry, o catálogo de módulos e os dados de referência dos
+#    dropdowns de cada tenant ativo (ReferenciaManager: cargos, níveis, clientes, contratos, obras,
+#    treinamentos e agendamentos).
+# 3. Opcionalmente calcula os KPIs de dashboard dos tenants mais ativos.
+#
+# readiness() só responde "pronto" depois que o aquecimento deste processo terminou.
+
+import logging
+import os
+import threading
+import time
+
+from database.db_base import DatabaseManager, get_pool
+from database.db_obras_manager import ObrasManager
+from database.db_pessoal_manager import PessoalManager
+from database.db_referencia_manager import ReferenciaManager
+from database.db_seguranca_manager import SegurancaManager
+from database.db_tenant_manager import TenantManager, tenant_registry
+from database.db_user_manager import UserManager
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_MAX_TENANTS = int(os.getenv("WARMUP_MAX_TENANTS", "100"))  # Tenants com referência pré-carregada
+WARMUP_KPI_TENANTS = int(os.getenv("WARMUP_KPI_TENANTS", "0"))    # Tenants com KPIs pré-calculados (0 = não)
+WARMUP_RETRY_S = 30  # Intervalo mínimo entre novas tentativas depois de uma falha
+
+PRONTO = 'pronto'
+AQUECENDO = 'aquecendo'
+FALHOU = 'falhou'
+
+_state = {'pid': None, 'status': None, 'iniciado_em': 0.0, 'duracao_s': None, 'erro': None, 'detalhes': {}}
+_lock = threading.Lock()
+
+
+def warm_up(app):
+    """Executa o aquecimento deste processo (idempotente: só roda de novo após falha)."""
+    with _lock:
+        if _state['pid'] == os.getpid() and _state['status'] in (PRONTO, AQUECENDO):
+            return _state['status']
+        _state.update(pid=os.getpid(), status=AQUECENDO, iniciado_em=time.monotonic(), erro=None, detalhes={})
+
+    if not WARMUP_ENABLED:
+        _state.update(status=PRONTO, duracao_s=0.0)
+        return PRONTO
+
+    inicio = time.monotonic()
+    try:
+        with app.app_context():
+            detalhes = _aquecer(app.config['DB_CONFIG'])
+        _state.update(status=PRONTO, duracao_s=round(time.monotonic() - inicio, 3), detalhes=detalhes)
+        logger.info("Worker %s aquecido em %.2fs: %s", os.getpid(), _state['duracao_s'], detalhes)
+    except Exception as e:
+        # Worker sobe mesmo assim (o cache enche sob demanda); readiness acusa a falha e tenta de novo
+        _state.update(status=FALHOU, duracao_s=round(time.monotonic() - inicio, 3), erro=str(e))
+        logger.error("Falha no aquecimento do worker %s: %s", os.getpid(), e)
+    return _state['status']
+
+
+def readiness(app):
+    """
+    (pronto?, detalhes) deste processo. Fora do gunicorn (flask run, outro servidor WSGI) o
+    aquecimento ainda não rodou: roda aqui, na primeira verificação. Depois de uma falha,
+    tenta de novo no máximo a cada WARMUP_RETRY_S segundos.
+    """
+    if _state['pid'] != os.getpid() or (
+            _state['status'] == FALHOU and time.monotonic() - _state['iniciado_em'] >= WARMUP_RETRY_S):
+        warm_up(app)
+    info = {k: _state[k] for k in ('status', 'duracao_s', 'erro', 'detalhes')}
+    return _state['status'] == PRONTO, info
+
+
+def _aquecer(db_config):
+    detalhes = {'conexoes_abertas': get_pool().prefill()}
+
+    with DatabaseManager(**db_config, request_scoped=False) as db_base:
+        tenants = TenantManager(db_base).get_all()
+        tenant_registry.preload(tenants)
+        ativos = [t['id'] for t in tenants if t['ativo']][:WARMUP_MAX_TENANTS]
+        detalhes['tenants'] = len(tenants)
+
+        detalhes['modulos'] = len(UserManager(db_base, None).get_all_modules() or [])
+
+        for tenant_id in ativos:
+            referencia = ReferenciaManager(db_base, tenant_id)
+            for lista in (referencia.cargos, referencia.niveis, referencia.clientes, referencia.contratos,
+                          referencia.obras, referencia.treinamentos, referencia.agendamentos):
+                lista()
+        detalhes['tenants_com_referencia'] = len(ativos)
+
+        if WARMUP_KPI_TENANTS > 0:
+            mais_ativos = _tenants_mais_ativos(db_base, WARMUP_KPI_TENANTS)
+            for tenant_id in mais_ativos:
+                ObrasManager(db_base, tenant_id).get_dashboard_kpis()
+                PessoalManager(db_base, tenant_id).get_dashboard_kpis()
+                SegurancaManager(db_base, tenant_id).get_dashboard_kpis()
+            detalhes['tenants_com_kpis'] = len(mais_ativos)
+
+    return detalhes
+
+
+def _tenants_mais_ativos(db_base, limite):
+    """Tenants ativos com mais avanços físicos lançados nos últimos 30 dias."""
+    query = """
+        SELECT af.tenant_id, COUNT(*) AS Lancamentos
+        FROM avancos_fisicos af
+        JOIN tenants t ON t.id = af.tenant_id AND t.ativo = 1
+        WHERE af.Data_Avanco >= CURDATE() - INTERVAL 30 DAY
+        GROUP BY af.tenant_id
+        ORDER BY Lancamentos DESC
+        LIMIT %s
+    """
+    result = db_base.execute_query(query, (limite,), fetch_results=True) or []
+    return [row['tenant_id'] for row in result]
@@ -0,0 +1,38 @@
+# gunicorn.conf.py
+# Configuração do gunicorn para produção: gunicorn app:app (este arquivo é lido automaticamente).
+#
+# Com preload_app o app é importado uma vez no processo mestre e os workers nascem por fork,
+# compartilhando a memória do código (copy-on-write) e subindo mais rápido. Tudo que é por
+# processo (pool MySQL, backend do cache) é recriado em cada worker no post_fork, e o worker
+# só passa a atender depois do aquecimento (post_worker_init).
+#
+# Com mais de um worker, CACHE_REDIS_URL é obrigatório (ver init_worker em app.py).
+
+import os
+
+preload_app = True
+
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# O pool por worker acompanha as threads (ver DB_POOL_SIZE em database/db_base.py)
+os.environ.setdefault("GUNICORN_THREADS", str(threads))
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+
+
+def post_fork(server, worker):
+    """Roda em cada worker logo após o fork: pool e cache próprios, nada herdado do mestre."""
+    from app import app, init_worker
+    init_worker(app)
+
+
+def post_worker_init(worker):
+    """
+    Aquecimento (database/warmup.py) antes do worker aceitar conexões: conexões mínimas do pool,
+    tenants, módulos e dados de referência já carregados. /ready responde 200 a partir daqui.
+    """
+    from app import app
+    from database.warmup import warm_up
+    warm_up(app)
@@ -0,0 +1,332 @@
+# modulos/exportacao.py
+# Exportação declarativa em streaming (XLSX/CSV) usada pelas rotas export_*_excel dos blueprints.
+#
+# Cada entidade declara um ExportSpec (colunas, nome do arquivo, mensagens, rota de retorno) e a rota
+# só informa como obter as linhas: uma função que recebe o DatabaseManager e devolve o gerador do
+# manager (get_all_*(..., stream=True)). As linhas saem do cursor não bufferizado em lotes e o corpo
+# da resposta é escrito à medida que chega, então a memória por requisição não cresce com o volume
+# exportado e o primeiro byte sai logo após a primeira linha.
+
+import csv
+import logging
+import re
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from flask import Response, current_app, flash, redirect, request, stream_with_context, url_for
+
+from database import metricas
+from database.db_base import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de linhas escritas entre um envio e outro do corpo da resposta
+EXPORT_FLUSH_ROWS = 500
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_MIMETYPE = 'text/csv; charset=utf-8'
+
+
+# ===============================================================
+# DECLARAÇÃO DAS EXPORTAÇÕES
+# ===============================================================
+def sim_nao(valor):
+    """Conversor de coluna para flags booleanas (TINYINT) -> 'Sim'/'Não'."""
+    return 'Sim' if valor else 'Não'
+
+
+class ExportSpec:
+    """
+    Descrição declarativa de uma exportação.
+
+    :param arquivo: Nome base do arquivo baixado (sem extensão), ex: 'relatorio_obras'.
+    :param colunas: Lista, na ordem da planilha, de (chave_no_resultado, cabecalho) ou
+                    (chave_no_resultado, cabecalho, conversor). O conversor recebe o valor da chave.
+    :param rotulo: Nome da entidade usado nas mensagens de erro, ex: 'obras'.
+    :param msg_vazio: Mensagem exibida (flash 'info') quando o filtro não retorna nenhuma linha.
+    :param retorno: Endpoint para onde o usuário volta em caso de lista vazia ou erro.
+    """
+    def __init__(self, arquivo, colunas, rotulo, msg_vazio, retorno):
+        self.arquivo = arquivo
+        self.colunas = [c if len(c) == 3 else (c[0], c[1], None) for c in colunas]
+        self.rotulo = rotulo
+        self.msg_vazio = msg_vazio
+        self.retorno = retorno
+
+    @property
+    def cabecalhos(self):
+        return [cabecalho for _, cabecalho, _ in self.colunas]
+
+    def valores(self, item):
+        """Extrai os valores de uma linha do banco na ordem das colunas, aplicando os conversores."""
+        valores = []
+        for chave, _, conversor in self.colunas:
+            valor = item.get(chave)
+            valores.append(conversor(valor) if conversor else valor)
+        return valores
+
+
+# ===============================================================
+# ROTA GENÉRICA DE EXPORTAÇÃO
+# ===============================================================
+def exportar(spec, carregar_linhas):
+    """
+    Responde a uma rota export_*_excel em streaming.
+
+    :param spec: ExportSpec da entidade.
+    :param carregar_linhas: Função (db_base) -> iterável de dicts, normalmente
+                            lambda db_base: Manager(db_base, tenant).get_all_x(..., stream=True).
+    O formato vem de ?formato=xlsx (padrão) ou ?formato=csv, então as URLs antigas continuam valendo.
+    """
+    inicio = time.perf_counter()
+    formato = (request.args.get('formato') or 'xlsx').lower()
+    if formato not in _ESCRITORES:
+        formato = 'xlsx'
+
+    linhas = _linhas_do_banco(current_app.config['DB_CONFIG'], carregar_linhas)
+    try:
+        # Lê a primeira linha ANTES de abrir a resposta: lista vazia e erro de conexão/consulta ainda
+        # podem virar flash + redirect, como nas rotas antigas
+        primeira = next(linhas, None)
+    except Exception as e:
+        linhas.close()
+        flash(f"Ocorreu um erro ao exportar {spec.rotulo} para Excel: {e}", 'danger')
+        logger.exception("Erro ao exportar %s (%s)", spec.rotulo, formato)
+        return redirect(url_for(spec.retorno))
+
+    if primeira is None:
+        flash(spec.msg_vazio, 'info')
+        return redirect(url_for(spec.retorno))
+
+    escritor, mimetype = _ESCRITORES[formato]
+
+    def corpo():
+        contagem = {'linhas': 0, 'bytes': 0}
+
+        def contadas(itens):
+            for item in itens:
+                contagem['linhas'] += 1
+                yield item
+
+        try:
+            for bloco in escritor(spec, contadas(chain([primeira], linhas))):
+                contagem['bytes'] += len(bloco)
+                yield bloco
+        except Exception:
+            # Cabeçalhos já enviados: não há como redirecionar. Re-lançar faz o servidor WSGI
+            # abortar a conexão, e o download falha no navegador em vez de sair truncado como se
+            # estivesse completo (CSV sem as últimas linhas, XLSX com o zip corrompido)
+            logger.exception("Erro ao exportar %s (%s): streaming interrompido", spec.rotulo, formato)
+            raise
+        finally:
+            linhas.close()  # Devolve a conexão ao pool mesmo se o cliente abortar o download
+            metricas.registrar_exportacao(spec.arquivo, formato, time.perf_counter() - inicio,
+                                          contagem['linhas'], contagem['bytes'])
+
+    response = Response(stream_with_context(corpo()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{spec.arquivo}.{formato}"'
+    return response
+
+
+def _linhas_do_banco(db_config, carregar_linhas):
+    """Mantém a conexão do pool aberta enquanto o gerador do manager estiver sendo consumido."""
+    with DatabaseManager(**db_config) as db_base:
+        for item in carregar_linhas(db_base):
+            yield item
+
+
+# ===============================================================
+# ESCRITOR CSV
+# ===============================================================
+def _valor_csv(valor):
+    # Formatos pt-BR para o Excel abrir o CSV sem assistente de importação
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%d/%m/%Y %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, (Decimal, float)):
+        return str(valor).replace('.', ',')
+    return valor
+
+
+def escrever_csv(spec, linhas):
+    """Gera o CSV (UTF-8 com BOM, separador ';') em blocos de EXPORT_FLUSH_ROWS linhas."""
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    buffer.write('\ufeff')  # BOM: o Excel só reconhece UTF-8 no CSV com ele
+    writer.writerow(spec.cabecalhos)
+    for n, item in enumerate(linhas, start=1):
+        writer.writerow([_valor_csv(v) for v in spec.valores(item)])
+        if n % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# ===============================================================
+# ESCRITOR XLSX (write-only, em streaming)
+# ===============================================================
+# O XLSX é um ZIP de XMLs. O zipfile da stdlib sabe gravar em um destino não "seekable" (usa data
+# descriptors), então a planilha é escrita direto no ZIP e os bytes comprimidos são drenados a cada
+# lote de linhas, sem nunca ter o arquivo inteiro em memória.
+
+_XML_INVALIDO = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EPOCA_EXCEL = datetime(1899, 12, 30)
+
+# Estilos (índices em cellXfs de _STYLES): 0 = padrão, 1 = data, 2 = data/hora, 3 = cabeçalho
+_ESTILO_DATA = 1
+_ESTILO_DATA_HORA = 2
+_ESTILO_CABECALHO = 3
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm:ss"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+
+class _SaidaDrenavel:
+    """Destino de escrita do ZIP (não seekable) que acumula bytes até serem drenados para a resposta."""
+    def __init__(self):
+        self._partes = []
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _letra_coluna(indice):
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celula_xlsx(ref, valor, estilo=None):
+    if valor is None:
+        return ''
+    s = f' s="{estilo}"' if estilo else ''
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" t="b"{s}><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        if isinstance(valor, float) and valor != valor:  # NaN
+            return ''
+        return f'<c r="{ref}"{s}><v>{valor}</v></c>'
+    if isinstance(valor, datetime):
+        serial = (valor.replace(tzinfo=None) - _EPOCA_EXCEL) / timedelta(days=1)
+        return f'<c r="{ref}" s="{estilo or _ESTILO_DATA_HORA}"><v>{serial}</v></c>'
+    if isinstance(valor, date):
+        serial = (valor - _EPOCA_EXCEL.date()).days
+        return f'<c r="{ref}" s="{estilo or _ESTILO_DATA}"><v>{serial}</v></c>'
+    texto = _XML_INVALIDO.sub('', str(valor))
+    return f'<c r="{ref}" t="inlineStr"{s}><is><t xml:space="preserve">{escape(texto)}</t></is></c>'
+
+
+def _linha_xlsx(numero, letras, valores, estilo=None):
+    celulas = ''.join(_celula_xlsx(f'{letras[i]}{numero}', v, estilo) for i, v in enumerate(valores))
+    return f'<row r="{numero}">{celulas}</row>'
+
+
+def escrever_xlsx(spec, linhas):
+    """Gera um XLSX mínimo (uma planilha, strings inline) em blocos de EXPORT_FLUSH_ROWS linhas."""
+    saida = _SaidaDrenavel()
+    letras = [_letra_coluna(i) for i in range(len(spec.colunas))]
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', _STYLES)
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>'
+                + _linha_xlsx(1, letras, spec.cabecalhos, _ESTILO_CABECALHO)
+            ).encode('utf-8'))
+            yield saida.drenar()
+            bloco = []
+            for numero, item in enumerate(linhas, start=2):
+                bloco.append(_linha_xlsx(numero, letras, spec.valores(item)))
+                if len(bloco) >= EXPORT_FLUSH_ROWS:
+                    planilha.write(''.join(bloco).encode('utf-8'))
+                    bloco = []
+                    yield saida.drenar()
+            planilha.write((''.join(bloco) + '</sheetData></worksheet>').encode('utf-8'))
+    yield saida.drenar()
+
+
+_ESCRITORES = {
+    'xlsx': (escrever_xlsx, XLSX_MIMETYPE),
+    'csv': (escrever_csv, CSV_MIMETYPE),
+}
@@ -0,0 +1,225 @@
+# modulos/importacao_funcionarios.py
+# Pipeline de importação em lote de funcionários (rota pessoal_bp.import_funcionarios).
+#
+# 1. Leitura da planilha e validação/normalização por COLUNA inteira com pandas (sem iterrows).
+# 2. Gravação em lotes de IMPORT_CHUNK_SIZE funcionários: uma transação por lote, com INSERT
+#    multi-linha por tabela (PessoalManager.bulk_add_funcionarios). Se o lote falhar no banco,
+#    ele é reprocessado um funcionário por transação, isolando só quem deu erro — cada
+#    funcionário entra completo (funcionarios + documentos + endereço + contatos) ou não entra.
+# 3. Modo simulação (dry-run): mesmo caminho, mas cada transação é desfeita no final.
+# 4. Relatório por linha (CSV) com a situação de cada linha da planilha e as mensagens.
+#
+# As etapas com pandas viram spans do rastreamento (parcela "pandas" do Server-Timing).
+
+import logging
+import os
+import time
+
+import pandas as pd
+
+from database import metricas, rastreamento
+from utils import MAPA_ESTADO_CIVIL, MAPA_GENERO, MAPA_STATUS_FUNCIONARIO, MAPA_TIPO_CONTRATACAO
+from modulos.exportacao import ExportSpec, escrever_csv
+
+logger = logging.getLogger(__name__)
+
+# Funcionários por transação/lote de INSERTs
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+# Padrão oficial de colunas da planilha de importação (também usado no download do template)
+COLUNAS_TEMPLATE = [
+    'Matricula', 'Nome_Completo', 'Data_Admissao', 'ID_Cargos', 'ID_Niveis', 'Status', 'Tipo_Contratacao',
+    'Data_Nascimento', 'Estado_Civil', 'Nacionalidade', 'Naturalidade', 'Genero', 'Rg_Numero',
+    'Rg_OrgaoEmissor', 'Rg_UfEmissor', 'Rg_DataEmissao', 'Cpf_Numero', 'Ctps_Numero', 'Ctps_Serie',
+    'Pispasep', 'Cnh_Numero', 'Cnh_Categoria', 'Cnh_DataValidade', 'Cnh_OrgaoEmissor',
+    'TitEleitor_Numero', 'TitEleitor_Zona', 'TitEleitor_Secao', 'Link_Foto',
+    # Nomes simplificados para endereço e contatos
+    'Logradouro', 'Numero', 'Complemento', 'Bairro', 'Cidade', 'Estado', 'CEP',
+    'Telefone_Principal', 'Email_Pessoal'
+]
+
+COLUNAS_OBRIGATORIAS = {
+    'Matricula': 'Matrícula', 'Nome_Completo': 'Nome Completo', 'Cpf_Numero': 'CPF',
+    'Data_Admissao': 'Data de Admissão', 'ID_Cargos': 'Cargo (ID_Cargos)', 'ID_Niveis': 'Nível (ID_Niveis)',
+}
+COLUNAS_DATA = ['Data_Admissao', 'Data_Nascimento', 'Rg_DataEmissao', 'Cnh_DataValidade']
+
+SITUACAO_IMPORTADO = 'Importado'
+SITUACAO_SIMULADO = 'Válido (simulação)'
+SITUACAO_ERRO = 'Erro'
+
+RELATORIO_SPEC = ExportSpec('relatorio_importacao_funcionarios', [
+    ('Linha', 'Linha da Planilha'),
+    ('Matricula', 'Matrícula'),
+    ('Nome_Completo', 'Nome Completo'),
+    ('Situacao', 'Situação'),
+    ('Mensagens', 'Mensagens'),
+], 'relatório de importação', 'Nenhuma linha processada.', 'pessoal_bp.add_funcionario')
+
+
+# ===============================================================
+# LEITURA E VALIDAÇÃO (VETORIZADA)
+# ===============================================================
+@rastreamento.span('importacao.ler_planilha', 'pandas')
+def ler_planilha(file):
+    """Lê o CSV/Excel enviado como texto, com todas as colunas do template presentes e sem espaços nas pontas."""
+    if file.filename.lower().endswith('.csv'):
+        df = pd.read_csv(file, dtype=str)
+    else:
+        df = pd.read_excel(file, dtype=str)
+    df = df.fillna('').reindex(columns=list(dict.fromkeys(list(df.columns) + COLUNAS_TEMPLATE)), fill_value='')
+    return df.apply(lambda col: col.str.strip())
+
+
+def _parse_datas(col):
+    # ISO (AAAA-MM-DD, inclusive o 'AAAA-MM-DD 00:00:00' que o Excel devolve) e, no que sobrar, DD/MM/AAAA
+    iso = pd.to_datetime(col, errors='coerce', format='ISO8601')
+    br = pd.to_datetime(col, errors='coerce', format='%d/%m/%Y')
+    datas = iso.fillna(br)
+    return datas.dt.date.astype(object).where(datas.notna(), None)
+
+
+def _normalizar_enum(col, mapa, padrao=None):
+    """Versão por coluna de utils.normalizar_valor_enum: devolve (valores normalizados, máscara de não reconhecidos)."""
+    normalizado = col.str.lower().map(mapa)
+    nao_reconhecido = (col != '') & normalizado.isna()
+    if padrao is not None:
+        normalizado = normalizado.fillna(padrao)
+    return normalizado.astype(object).where(normalizado.notna(), None), nao_reconhecido
+
+
+def _juntar_mensagens(problemas, index):
+    """[(máscara, mensagem str ou Series)] -> Series com as mensagens de cada linha separadas por '; '."""
+    if not problemas:
+        return pd.Series('', index=index)
+    partes = pd.concat(
+        [pd.Series(msg, index=index).where(mask, '') for mask, msg in problemas], axis=1
+    )
+    return partes.apply(lambda linha: '; '.join(m for m in linha if m), axis=1)
+
+
+@rastreamento.span('importacao.validar', 'pandas')
+def validar(df, matriculas_no_banco, cpfs_no_banco, ids_cargos, ids_niveis):
+    """
+    Valida e normaliza a planilha inteira de uma vez.
+
+    :return: (df normalizado, Series de erros por linha, Series de avisos por linha). Linhas com
+             erro != '' não devem ser gravadas; avisos são informativos (valor ignorado/padrão).
+    """
+    erros, avisos = [], []
+    norm = pd.DataFrame(index=df.index)
+
+    for col, rotulo in COLUNAS_OBRIGATORIAS.items():
+        erros.append((df[col] == '', f"{rotulo} é obrigatório"))
+
+    for col in COLUNAS_DATA:
+        norm[col] = _parse_datas(df[col])
+        erros.append(((df[col] != '') & norm[col].isna(), f"{col} inválida: '" + df[col] + "' (use AAAA-MM-DD ou DD/MM/AAAA)"))
+
+    for col, validos in (('ID_Cargos', ids_cargos), ('ID_Niveis', ids_niveis)):
+        ids = pd.to_numeric(df[col], errors='coerce')
+        norm[col] = pd.Series([int(v) if v in validos else None for v in ids], index=df.index, dtype=object)
+        erros.append(((df[col] != '') & ~ids.isin(list(validos)), f"{col} '" + df[col] + "' não existe"))
+
+    # Duplicidade: contra o banco e dentro do próprio arquivo (a primeira ocorrência vale)
+    for col, rotulo, existentes in (('Matricula', 'Matrícula', matriculas_no_banco), ('Cpf_Numero', 'CPF', cpfs_no_banco)):
+        preenchido = df[col] != ''
+        erros.append((preenchido & df[col].isin(existentes), f"{rotulo} '" + df[col] + "' já existe"))
+        erros.append((preenchido & df[col].duplicated(keep='first'), f"{rotulo} '" + df[col] + "' duplicado(a) no arquivo"))
+
+    for col, mapa, padrao in (('Status', MAPA_STATUS_FUNCIONARIO, 'Ativo'), ('Tipo_Contratacao', MAPA_TIPO_CONTRATACAO, 'CLT'),
+                              ('Estado_Civil', MAPA_ESTADO_CIVIL, None), ('Genero', MAPA_GENERO, None)):
+        norm[col], nao_reconhecido = _normalizar_enum(df[col], mapa, padrao)
+        destino = f"usado '{padrao}'" if padrao else 'campo deixado em branco'
+        avisos.append((nao_reconhecido, f"{col} '" + df[col] + f"' não reconhecido, {destino}"))
+
+    # Demais colunas: texto livre, string vazia vira NULL
+    texto = df.drop(columns=list(norm.columns))
+    norm = pd.concat([norm, texto.astype(object).where(texto != '', None)], axis=1)
+    return norm, _juntar_mensagens(erros, df.index), _juntar_mensagens(avisos, df.index)
+
+
+@rastreamento.span('importacao.montar_registros', 'pandas')
+def montar_registros(norm):
+    """Converte as linhas válidas no formato de PessoalManager.bulk_add_funcionarios."""
+    registros = []
+    for linha, r in zip(norm.index, norm.to_dict('records')):
+        matricula = r['Matricula']
+        registro = {
+            'linha': linha,
+            'funcionario': {
+                'Matricula': matricula, 'Nome_Completo': r['Nome_Completo'], 'Data_Admissao': r['Data_Admissao'],
+                'ID_Cargos': r['ID_Cargos'], 'ID_Niveis': r['ID_Niveis'],
+                'Status': r['Status'], 'Tipo_Contratacao': r['Tipo_Contratacao'],
+            },
+            'documentos': dict(r, Matricula_Funcionario=matricula, Observacoes=None),
+            'endereco': None,
+            'contatos': [],
+        }
+        if r['Logradouro']:
+            registro['endereco'] = {
+                'Matricula_Funcionario': matricula, 'Tipo_Endereco': 'Residencial',
+                'Logradouro': r['Logradouro'], 'Numero': r['Numero'], 'Complemento': r['Complemento'],
+                'Bairro': r['Bairro'], 'Cidade': r['Cidade'], 'Estado': r['Estado'], 'Cep': r['CEP'],
+            }
+        for coluna, tipo in (('Telefone_Principal', 'Telefone Principal'), ('Email_Pessoal', 'Email Pessoal')):
+            if r[coluna]:
+                registro['contatos'].append({'Matricula_Funcionario': matricula, 'Tipo_Contato': tipo, 'Valor_Contato': r[coluna]})
+        registros.append(registro)
+    return registros
+
+
+# ===============================================================
+# GRAVAÇÃO EM LOTES
+# ===============================================================
+def gravar_em_lotes(pessoal_manager, registros, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Grava os registros em transações de chunk_size funcionários.
+    :return: dict {linha: mensagem de erro} dos funcionários que o banco recusou.
+    """
+    falhas = {}
+    for inicio in range(0, len(registros), chunk_size):
+        lote = registros[inicio:inicio + chunk_size]
+        try:
+            pessoal_manager.bulk_add_funcionarios(lote, commit=not dry_run)
+        except Exception as e_lote:
+            logger.warning("Lote de importação de funcionários recusado (%s); reprocessando um a um.", e_lote)
+            for registro in lote:
+                try:
+                    pessoal_manager.bulk_add_funcionarios([registro], commit=not dry_run)
+                except Exception as e:
+                    falhas[registro['linha']] = f"Recusado pelo banco: {e}"
+    return falhas
+
+
+def importar(pessoal_manager, df, dry_run=False):
+    """
+    Executa o pipeline completo sobre a planilha lida por ler_planilha.
+    :return: (quantidade gravada/válida, quantidade com erro, bytes do relatório CSV).
+    """
+    inicio = time.perf_counter()
+    ids_cargos = {c.id for c in pessoal_manager.get_all_cargos_for_dropdown() or []}
+    ids_niveis = {n.id for n in pessoal_manager.get_all_niveis_for_dropdown() or []}
+    norm, erros, avisos = validar(
+        df, pessoal_manager.get_all_matriculas(), pessoal_manager.get_all_cpfs(), ids_cargos, ids_niveis
+    )
+
+    validas = erros == ''
+    falhas = gravar_em_lotes(pessoal_manager, montar_registros(norm[validas]), dry_run=dry_run)
+    if falhas:
+        recusadas = pd.Series(falhas)
+        erros.loc[recusadas.index] = recusadas
+        validas.loc[recusadas.index] = False
+
+    relatorio = pd.DataFrame({
+        'Linha': df.index + 2,  # +2: cabeçalho da planilha e índice começando em 0
+        'Matricula': df['Matricula'],
+        'Nome_Completo': df['Nome_Completo'],
+        'Situacao': validas.map({True: SITUACAO_SIMULADO if dry_run else SITUACAO_IMPORTADO, False: SITUACAO_ERRO}),
+        'Mensagens': (erros + '; ' + avisos).str.strip('; '),
+    })
+    conteudo = b''.join(escrever_csv(RELATORIO_SPEC, relatorio.to_dict('records')))
+    recusadas = int((~validas).sum())
+    metricas.registrar_importacao('funcionarios', 'simulacao' if dry_run else 'gravacao',
+                                  time.perf_counter() - inicio, len(df), recusadas)
+    return int(validas.sum()), recusadas, conteudo
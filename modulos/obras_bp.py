@@ -7,10 +7,6 @@ from dotenv import load_dotenv
 from datetime import datetime, date, timedelta # Incluído timedelta para get_proximas_ferias se for movido
 from decimal import Decimal, InvalidOperation
 
-# Para a adição da opção exportar para Excel no módulo Pessoal
-from flask import send_file # Adicione este import no topo do seu app.py
-import pandas as pd         # Adicione este import no topo do seu app.py
-from io import BytesIO      # Adicione este import no topo do seu app.py
 
 from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, Flask, session, get_flashed_messages, jsonify
 from flask_login import login_required, current_user, LoginManager, UserMixin, login_user, logout_user 
@@ -26,6 +22,12 @@ from utils import formatar_moeda_brl
 # Importação da função de análise de permissão do usuário aos módulos através do decorator @module_required('Obras')
 from utils import module_required
 
+# Paginação keyset das listagens (?page=<token>&page_size=<n>)
+from utils import get_page_args
+
+# Exportação declarativa em streaming (XLSX/CSV) das rotas export_*_excel
+from modulos.exportacao import ExportSpec, exportar
+
 # Crie a instância do Blueprint para o Módulo Obras
 obras_bp = Blueprint('obras_bp', __name__, url_prefix='/obras')
 
@@ -119,12 +121,17 @@ def gerenciar_obras_lista():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
-            obras = obras_manager.get_all_obras(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_obras(
                 search_numero=search_numero,
                 search_nome=search_nome,
                 search_status=search_status,
-                search_cliente_id=search_cliente_id
+                search_cliente_id=search_cliente_id,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            obras = pagina['items']
 
             # Formata o valor da obra para o padrão brasileiro
             if obras:
@@ -136,12 +143,13 @@ def gerenciar_obras_lista():
                     else:
                         obra_item['Valor_Obra_Formatado'] = locale.currency(0, grouping=True)
 
-            clientes = obras_manager.get_all_clientes() 
+            clientes = obras_manager.get_all_clientes_for_dropdown()
             status_options = ['Planejamento', 'Em Andamento', 'Concluída', 'Pausada', 'Cancelada']
 
         return render_template(
             'obras/obras_module.html', 
             user=current_user,
+            pagination=pagina,
             obras=obras,
             clientes=clientes,
             status_options=status_options,
@@ -186,7 +194,7 @@ def obras_relatorio_andamento():
                 search_cliente_id=search_cliente_id
             )
 
-            all_clientes = obras_manager.get_all_clientes()
+            all_clientes = obras_manager.get_all_clientes_for_dropdown()
             status_options = ['Planejamento', 'Em Andamento', 'Concluída', 'Pausada', 'Cancelada']
 
             return render_template(
@@ -261,13 +269,11 @@ def add_obra():
                     # Garante que o ID do contrato esteja como string para o template
                     form_data_to_template['id_contratos'] = str(id_contratos)
 
-                    all_contratos = obras_manager.get_all_contratos_for_dropdown()
                     status_options_list = ['Planejamento', 'Em Andamento', 'Concluída', 'Pausada', 'Cancelada']
                     return render_template(
                         'obras/add_obra.html',
                         user=current_user,
                         obra=form_data_to_template,
-                        all_contratos=all_contratos,
                         status_options=status_options_list
                     )
 
@@ -287,14 +293,12 @@ def add_obra():
                 # Você pode pré-popula campos aqui, se necessário
                 # Ex: form_data_to_template['status_obra'] = 'Planejamento'
 
-            all_contratos = obras_manager.get_all_contratos_for_dropdown()
             status_options_list = ['Planejamento', 'Em Andamento', 'Concluída', 'Pausada', 'Cancelada']
 
             return render_template(
                 'obras/add_obra.html',
                 user=current_user,
                 obra=form_data_to_template, # Passa form_data_to_template
-                all_contratos=all_contratos,
                 status_options=status_options_list
             )
     except mysql.connector.Error as e:
@@ -329,7 +333,6 @@ def edit_obra(obra_id):
                 print(f"DEBUG_EDIT_OBRA: Obra ID {obra_id} não encontrada no DB.")
                 return redirect(url_for('obras_bp.gerenciar_obras_lista'))
 
-            all_contratos = obras_manager.get_all_contratos_for_dropdown()
             status_options_list = ['Planejamento', 'Em Andamento', 'Concluída', 'Pausada', 'Cancelada']
 
             form_data_to_template = {} # Inicializa como um dicionário vazio para passar ao template
@@ -428,7 +431,6 @@ def edit_obra(obra_id):
                         'obras/edit_obra.html',
                         user=current_user,
                         obra=form_data_to_template,
-                        all_contratos=all_contratos,
                         status_options=status_options_list
                     )
 
@@ -491,7 +493,6 @@ def edit_obra(obra_id):
                 'obras/edit_obra.html',
                 user=current_user,
                 obra=form_data_to_template,
-                all_contratos=all_contratos,
                 status_options=status_options_list
             )
 
@@ -531,6 +532,30 @@ def delete_obra(obra_id):
         print(f"Erro inesperado em delete_obra: {e}")
         return redirect(url_for('obras_bp.gerenciar_obras_lista'))
 
+# Intervalo máximo da curva S na tela de detalhes da obra (meses)
+CURVA_S_MAX_MESES = 240
+
+def _periodo_curva_s(inicio_str, fim_str):
+    """
+    Período da curva S a partir de ?inicio=AAAA-MM&fim=AAAA-MM. Sem parâmetros (ou inválidos),
+    o ano corrente inteiro, como a tela sempre mostrou.
+    """
+    ano_corrente = datetime.now().year
+    padrao = (date(ano_corrente, 1, 1), date(ano_corrente, 12, 1))
+    if not inicio_str and not fim_str:
+        return padrao
+    try:
+        inicio = datetime.strptime(inicio_str or fim_str, '%Y-%m').date()
+        fim = datetime.strptime(fim_str or inicio_str, '%Y-%m').date()
+    except ValueError:
+        flash('Período inválido. Use o formato AAAA-MM.', 'warning')
+        return padrao
+    meses = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    if meses < 1 or meses > CURVA_S_MAX_MESES:
+        flash(f'O período deve ter entre 1 e {CURVA_S_MAX_MESES} meses, com o início antes do fim.', 'warning')
+        return padrao
+    return inicio, fim
+
 # ROTA PARA DETALHES DA OBRA (AGORA COM LÓGICA DE DASHBOARD)
 @obras_bp.route('/details/<int:obra_id>') # O nome da rota e o decorador permanecem os mesmos
 @login_required
@@ -546,39 +571,20 @@ def obra_details(obra_id): # O nome da função permanece o mesmo
                 flash('Obra não encontrada.', 'danger')
                 return redirect(url_for('obras_bp.gerenciar_obras_lista'))
 
-            # --- A LÓGICA DE PROCESSAMENTO DO DASHBOARD ENTRA AQUI ---
-            current_year = datetime.now().year
-
-            avancos = obras_manager.get_avancos_by_obra_id(obra_id) #
-            medicoes = obras_manager.get_medicoes_by_obra_id(obra_id) #
-
-            months_labels = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-            monthly_physical = [0.0] * 12
-            monthly_financial = [0.0] * 12
-
-            if avancos:
-                for avanco in avancos:
-                    if avanco.get('Data_Avanco') and avanco['Data_Avanco'].year == current_year:
-                        month_index = avanco['Data_Avanco'].month - 1
-                        monthly_physical[month_index] += float(avanco.get('Percentual_Avanco_Fisico', 0.0))
-
-            if medicoes:
-                for medicao in medicoes:
-                    if medicao.get('Data_Medicao') and medicao['Data_Medicao'].year == current_year:
-                        month_index = medicao['Data_Medicao'].month - 1
-                        monthly_financial[month_index] += float(medicao.get('Valor_Medicao', 0.0))
-
-            accumulated_physical = [sum(monthly_physical[:i+1]) for i in range(12)]
-            accumulated_financial = [sum(monthly_financial[:i+1]) for i in range(12)]
-
-            dashboard_data = {
-                "year": current_year,
-                "months": months_labels,
-                "monthly_physical": monthly_physical,
-                "monthly_financial": monthly_financial,
-                "accumulated_physical": accumulated_physical,
-                "accumulated_financial": accumulated_financial
-            }
+            # --- Curva S física/financeira: agregada no banco e cacheada por obra e período ---
+            inicio, fim = _periodo_curva_s(request.args.get('inicio'), request.args.get('fim'))
+            dashboard_data = obras_manager.get_curva_s(obra_id, inicio, fim)
+            if dashboard_data is None:
+                flash('Não foi possível carregar a curva S da obra.', 'warning')
+                dashboard_data = {'months': [], 'monthly_physical': [], 'monthly_financial': [],
+                                  'accumulated_physical': [], 'accumulated_financial': []}
+            dashboard_data = dict(
+                dashboard_data,
+                periodo=str(inicio.year) if (inicio.year, inicio.month, fim.month) == (fim.year, 1, 12)
+                        else f"{inicio.strftime('%m/%Y')} a {fim.strftime('%m/%Y')}",
+                inicio=inicio.strftime('%Y-%m'),
+                fim=fim.strftime('%Y-%m'),
+            )
 
         # O template renderizado continua sendo o 'obra_details.html'
         return render_template(
@@ -597,72 +603,34 @@ def obra_details(obra_id): # O nome da função permanece o mesmo
         return redirect(url_for('obras_bp.gerenciar_obras_lista'))
 
 # ROTA PARA EXPORTAR OBRAS PARA EXCEL
+EXPORT_OBRAS = ExportSpec('relatorio_obras', [
+    ('ID_Obras', 'ID Obra'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Nome_Cliente', 'Cliente'),
+    ('Numero_Contrato', 'Número do Contrato'),
+    ('Endereco_Obra', 'Endereço'),
+    ('Status_Obra', 'Status'),
+    ('Data_Inicio_Prevista', 'Início Previsto'),
+    ('Data_Fim_Prevista', 'Fim Previsto'),
+    ('Valor_Obra', 'Valor (R$)'),
+    ('Valor_Aditivo_Total', 'Aditivos (R$)'),
+    ('Escopo_Obra', 'Escopo'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'obras', 'Nenhuma obra encontrada para exportar.', 'obras_bp.gerenciar_obras_lista')
+
 @obras_bp.route('/export/excel')
 @login_required
 @module_required('Obras')
 def export_obras_excel():
-    
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_numero = request.args.get('numero_obra')
-            search_nome = request.args.get('nome_obra')
-            search_status = request.args.get('status_obra')
-            search_cliente_id = request.args.get('cliente_id')
-
-            obras_data = obras_manager.get_all_obras(
-                search_numero=search_numero,
-                search_nome=search_nome,
-                search_status=search_status,
-                search_cliente_id=search_cliente_id
-            )
-
-            if not obras_data:
-                flash('Nenhuma obra encontrada para exportar.', 'info')
-                return redirect(url_for('obras_bp.gerenciar_obras_lista'))
-
-            df = pd.DataFrame(obras_data)
-
-            df = df.rename(columns={
-                'ID_Obras': 'ID Obra',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Endereco_Obra': 'Endereço',
-                'Escopo_Obra': 'Escopo',
-                'Valor_Obra': 'Valor (R$)',
-                'Valor_Aditivo_Total': 'Aditivos (R$)',
-                'Status_Obra': 'Status',
-                'Data_Inicio_Prevista': 'Início Previsto',
-                'Data_Fim_Prevista': 'Fim Previsto',
-                'Numero_Contrato': 'Número do Contrato',
-                'Nome_Cliente': 'Cliente',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Obra', 'Número da Obra', 'Nome da Obra', 'Cliente', 'Número do Contrato',
-                'Endereço', 'Status', 'Início Previsto', 'Fim Previsto',
-                'Valor (R$)', 'Aditivos (R$)', 'Escopo', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_obras.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar obras para Excel: {e}", 'danger')
-        print(f"Erro ao exportar obras Excel: {e}")
-        return redirect(url_for('obras_bp.gerenciar_obras_lista'))
+    filtros = dict(
+        search_numero=request.args.get('numero_obra'),
+        search_nome=request.args.get('nome_obra'),
+        search_status=request.args.get('status_obra'),
+        search_cliente_id=request.args.get('cliente_id')
+    )
+    return exportar(EXPORT_OBRAS, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_obras(**filtros, stream=True))
 
 # ===============================================================
 # 3.2 ROTAS DE CLIENTES - OBRAS
@@ -679,14 +647,20 @@ def clientes_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id) 
-            clientes = obras_manager.get_all_clientes(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_clientes(
                 search_nome=search_nome,
-                search_cnpj=search_cnpj
+                search_cnpj=search_cnpj,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            clientes = pagina['items']
 
         return render_template(
             'obras/clientes/clientes_module.html',
             user=current_user,
+            pagination=pagina,
             clientes=clientes,
             selected_nome=search_nome,
             selected_cnpj=search_cnpj
@@ -881,63 +855,28 @@ def cliente_details(cliente_id):
         return redirect(url_for('obras_bp.clientes_module'))
 
 
+EXPORT_CLIENTES = ExportSpec('relatorio_clientes', [
+    ('ID_Clientes', 'ID Cliente'),
+    ('Nome_Cliente', 'Nome do Cliente'),
+    ('CNPJ_Cliente', 'CNPJ'),
+    ('Razao_Social_Cliente', 'Razão Social'),
+    ('Endereco_Cliente', 'Endereço'),
+    ('Telefone_Cliente', 'Telefone'),
+    ('Email_Cliente', 'Email'),
+    ('Contato_Principal_Nome', 'Contato Principal'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'clientes', 'Nenhum cliente encontrado para exportar.', 'obras_bp.clientes_module')
+
 @obras_bp.route('/clientes/export/excel')
 @login_required
 @module_required('Obras')
 def export_clientes_excel():
-
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_nome = request.args.get('nome_cliente')
-            search_cnpj = request.args.get('cnpj_cliente')
-
-            clientes_data = obras_manager.get_all_clientes(
-                search_nome=search_nome,
-                search_cnpj=search_cnpj
-            )
-
-            if not clientes_data:
-                flash('Nenhum cliente encontrado para exportar.', 'info')
-                return redirect(url_for('obras_bp.clientes_module'))
-
-            df = pd.DataFrame(clientes_data)
-
-            df = df.rename(columns={
-                'ID_Clientes': 'ID Cliente',
-                'Nome_Cliente': 'Nome do Cliente',
-                'CNPJ_Cliente': 'CNPJ',
-                'Razao_Social_Cliente': 'Razão Social',
-                'Endereco_Cliente': 'Endereço',
-                'Telefone_Cliente': 'Telefone',
-                'Email_Cliente': 'Email',
-                'Contato_Principal_Nome': 'Contato Principal',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Cliente', 'Nome do Cliente', 'CNPJ', 'Razão Social', 'Endereço',
-                'Telefone', 'Email', 'Contato Principal', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_clientes.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar clientes para Excel: {e}", 'danger')
-        print(f"Erro ao exportar clientes Excel: {e}")
-        return redirect(url_for('obras_bp.clientes_module'))
+    filtros = dict(
+        search_nome=request.args.get('nome_cliente'),
+        search_cnpj=request.args.get('cnpj_cliente')
+    )
+    return exportar(EXPORT_CLIENTES, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_clientes(**filtros, stream=True))
 
 # ===============================================================
 # 3.3 ROTAS DE CONTRATOS - OBRAS
@@ -956,11 +895,16 @@ def contratos_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
-            contratos = obras_manager.get_all_contratos(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_contratos(
                 search_numero=search_numero,
                 search_cliente_id=search_cliente_id,
-                search_status=search_status
+                search_status=search_status,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            contratos = pagina['items']
 
             # --- NOVA SEÇÃO: Formatação de moeda para a lista de contratos ---
             if contratos:
@@ -968,12 +912,13 @@ def contratos_module():
                     contrato['Valor_Contrato_Formatado'] = formatar_moeda_brl(contrato.get('Valor_Contrato'))
             # --- FIM DA NOVA SEÇÃO ---
 
-            clientes = obras_manager.get_all_clientes() 
+            clientes = obras_manager.get_all_clientes_for_dropdown()
             status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
 
         return render_template(
             'obras/contratos/contratos_module.html',
             user=current_user,
+            pagination=pagina,
             contratos=contratos,
             clientes=clientes,
             status_options=status_options,
@@ -1014,12 +959,10 @@ def add_contrato():
 
                 if not all([id_clientes, numero_contrato, valor_contrato, data_assinatura_str, status_contrato]):
                     flash('Campos obrigatórios (Cliente, Número, Valor, Data Assinatura, Status) não podem ser vazios.', 'danger')
-                    all_clientes = obras_manager.get_all_clientes() 
                     status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
                     return render_template(
                         'obras/contratos/add_contrato.html',
                         user=current_user,
-                        all_clientes=all_clientes,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -1030,36 +973,30 @@ def add_contrato():
                     data_termino_previsto = datetime.strptime(data_termino_previsto_str, '%Y-%m-%d').date() if data_termino_previsto_str else None
                 except ValueError:
                     flash('Formato de data inválido. Use AAAA-MM-DD.', 'danger')
-                    all_clientes = obras_manager.get_all_clientes() 
                     status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
                     return render_template(
                         'obras/contratos/add_contrato.html',
                         user=current_user,
-                        all_clientes=all_clientes,
                         status_options=status_options,
                         form_data=request.form
                     )
 
                 if obras_manager.get_contrato_by_numero(numero_contrato):
                     flash('Número do contrato já existe. Por favor, use um número único.', 'danger')
-                    all_clientes = obras_manager.get_all_clientes()
                     status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
                     return render_template(
                         'obras/contratos/add_contrato.html',
                         user=current_user,
-                        all_clientes=all_clientes,
                         status_options=status_options,
                         form_data=request.form
                     )
 
                 if not obras_manager.get_cliente_by_id(id_clientes):
                     flash('Cliente inválido.', 'danger')
-                    all_clientes = obras_manager.get_all_clientes()
                     status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
                     return render_template(
                         'obras/contratos/add_contrato.html',
                         user=current_user,
-                        all_clientes=all_clientes,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -1073,13 +1010,11 @@ def add_contrato():
                 else:
                     flash('Erro ao adicionar contrato. Verifique os dados e tente novamente.', 'danger')
 
-            all_clientes = obras_manager.get_all_clientes() 
             status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
 
             return render_template(
                 'obras/contratos/add_contrato.html',
                 user=current_user,
-                all_clientes=all_clientes,
                 status_options=status_options,
                 form_data={}
             )
@@ -1107,7 +1042,6 @@ def edit_contrato(contrato_id):
                 return redirect(url_for('obras_bp.contratos_module'))
 
             # Para dropdowns (clientes, status_options)
-            all_clientes = obras_manager.get_all_clientes() 
             status_options = ['Ativo', 'Pendente', 'Encerrado', 'Aditivado', 'Cancelado']
 
             # Inicializa form_data_to_template aqui, será preenchido com dados do DB (GET) ou do form (POST com erro)
@@ -1154,7 +1088,6 @@ def edit_contrato(contrato_id):
                         'obras/contratos/edit_contrato.html',
                         user=current_user,
                         contrato=form_data_to_template, # Passa form_data_to_template como 'contrato'
-                        all_clientes=all_clientes,
                         status_options=status_options
                     )
 
@@ -1174,7 +1107,6 @@ def edit_contrato(contrato_id):
                         'obras/contratos/edit_contrato.html',
                         user=current_user,
                         contrato=form_data_to_template,
-                        all_clientes=all_clientes,
                         status_options=status_options
                     )
 
@@ -1210,7 +1142,6 @@ def edit_contrato(contrato_id):
                 'obras/contratos/edit_contrato.html',
                 user=current_user,
                 contrato=form_data_to_template, # AGORA SEMPRE PASSA form_data_to_template COMO 'contrato'
-                all_clientes=all_clientes,
                 status_options=status_options
             )
 
@@ -1284,68 +1215,31 @@ def contrato_details(contrato_id):
         return redirect(url_for('obras_bp.contratos_module'))
 
 
+EXPORT_CONTRATOS = ExportSpec('relatorio_contratos', [
+    ('ID_Contratos', 'ID Contrato'),
+    ('Numero_Contrato', 'Número do Contrato'),
+    ('Nome_Cliente', 'Cliente'),
+    ('Valor_Contrato', 'Valor (R$)'),
+    ('Data_Assinatura', 'Data Assinatura'),
+    ('Data_Ordem_Inicio', 'Ordem de Início'),
+    ('Prazo_Contrato_Dias', 'Prazo (Dias)'),
+    ('Data_Termino_Previsto', 'Término Previsto'),
+    ('Status_Contrato', 'Status'),
+    ('Observacoes', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'contratos', 'Nenhum contrato encontrado para exportar.', 'obras_bp.contratos_module')
+
 @obras_bp.route('/contratos/export/excel')
 @login_required
 @module_required('Obras')
 def export_contratos_excel():
-    
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_numero = request.args.get('numero_contrato')
-            search_cliente_id = request.args.get('cliente_id')
-            search_status = request.args.get('status_contrato')
-
-            contratos_data = obras_manager.get_all_contratos(
-                search_numero=search_numero,
-                search_cliente_id=search_cliente_id,
-                search_status=search_status
-            )
-
-            if not contratos_data:
-                flash('Nenhum contrato encontrado para exportar.', 'info')
-                return redirect(url_for('obras_bp.contratos_module'))
-
-            df = pd.DataFrame(contratos_data)
-
-            df = df.rename(columns={
-                'ID_Contratos': 'ID Contrato',
-                'Numero_Contrato': 'Número do Contrato',
-                'Valor_Contrato': 'Valor (R$)',
-                'Data_Assinatura': 'Data Assinatura',
-                'Data_Ordem_Inicio': 'Ordem de Início',
-                'Prazo_Contrato_Dias': 'Prazo (Dias)',
-                'Data_Termino_Previsto': 'Término Previsto',
-                'Status_Contrato': 'Status',
-                'Observacoes': 'Observações',
-                'Nome_Cliente': 'Cliente',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Contrato', 'Número do Contrato', 'Cliente', 'Valor (R$)',
-                'Data Assinatura', 'Ordem de Início', 'Prazo (Dias)', 'Término Previsto',
-                'Status', 'Observações', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_contratos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar contratos para Excel: {e}", 'danger')
-        print(f"Erro ao exportar contratos Excel: {e}")
-        return redirect(url_for('obras_bp.contratos_module'))
+    filtros = dict(
+        search_numero=request.args.get('numero_contrato'),
+        search_cliente_id=request.args.get('cliente_id'),
+        search_status=request.args.get('status_contrato')
+    )
+    return exportar(EXPORT_CONTRATOS, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_contratos(**filtros, stream=True))
 
 
 # ===============================================================
@@ -1365,11 +1259,16 @@ def arts_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
-            arts = obras_manager.get_all_arts(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_arts(
                 search_numero=search_numero,
                 search_obra_id=search_obra_id,
-                search_status=search_status
+                search_status=search_status,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            arts = pagina['items']
 
             all_obras = obras_manager.get_all_obras_for_dropdown()
 
@@ -1378,6 +1277,7 @@ def arts_module():
         return render_template(
             'obras/arts/arts_module.html',
             user=current_user,
+            pagination=pagina,
             arts=arts,
             all_obras=all_obras,
             status_options=status_options,
@@ -1406,7 +1306,6 @@ def add_art():
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
             
             # --- CORRIGIDO AQUI: DEFINIR AS VARIÁVEIS PARA O DROPDOWN SEMPRE ---
-            all_obras = obras_manager.get_all_obras_for_dropdown() # <-- MOVIDA PARA CÁ
             status_options = ['Paga', 'Emitida', 'Cancelada', 'Em Análise'] # <-- MOVIDA PARA CÁ
             # --- FIM DA CORREÇÃO ---
 
@@ -1481,7 +1380,6 @@ def add_art():
                     return render_template(
                         'obras/arts/add_art.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=form_data_to_template
                     )
@@ -1500,7 +1398,6 @@ def add_art():
             return render_template(
                 'obras/arts/add_art.html',
                 user=current_user,
-                all_obras=all_obras,
                 status_options=status_options,
                 form_data={} # Para o GET, form_data é vazio
             )
@@ -1528,7 +1425,6 @@ def edit_art(art_id):
                 flash('ART não encontrada.', 'danger')
                 return redirect(url_for('obras_bp.arts_module'))
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             status_options = ['Paga', 'Emitida', 'Cancelada', 'Em Análise']
 
             # Inicializa form_data_to_template aqui
@@ -1605,7 +1501,6 @@ def edit_art(art_id):
                         'obras/arts/edit_art.html',
                         user=current_user,
                         art=form_data_to_template, # Passa os dados para repopular
-                        all_obras=all_obras,
                         status_options=status_options
                     )
 
@@ -1644,7 +1539,6 @@ def edit_art(art_id):
                 'obras/arts/edit_art.html',
                 user=current_user,
                 art=form_data_to_template, # AGORA SEMPRE PASSA form_data_to_template COMO 'art'
-                all_obras=all_obras,
                 status_options=status_options
             )
 
@@ -1711,66 +1605,28 @@ def art_details(art_id):
         return redirect(url_for('obras_bp.arts_module'))
 
 
+EXPORT_ARTS = ExportSpec('relatorio_arts', [
+    ('ID_Arts', 'ID ART'),
+    ('Numero_Art', 'Número da ART'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Data_Pagamento', 'Data de Pagamento'),
+    ('Valor_Pagamento', 'Valor de Pagamento (R$)'),
+    ('Status_Art', 'Status'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'ARTs', 'Nenhuma ART encontrada para exportar.', 'obras_bp.arts_module')
+
 @obras_bp.route('/arts/export/excel')
 @login_required
 @module_required('Obras')
 def export_arts_excel():
-    
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_numero = request.args.get('numero_art')
-            search_obra_id = request.args.get('obra_id')
-            search_status = request.args.get('status_art')
-
-            arts_data = obras_manager.get_all_arts(
-                search_numero=search_numero,
-                search_obra_id=search_obra_id,
-                search_status=search_status
-            )
-
-            if not arts_data:
-                flash('Nenhuma ART encontrada para exportar.', 'info')
-                return redirect(url_for('obras_bp.arts_module'))
-
-            df = pd.DataFrame(arts_data)
-
-            df = df.rename(columns={
-                'ID_Arts': 'ID ART',
-                'ID_Obras': 'ID Obra',
-                'Numero_Art': 'Número da ART',
-                'Data_Pagamento': 'Data de Pagamento',
-                'Valor_Pagamento': 'Valor de Pagamento (R$)',
-                'Status_Art': 'Status',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID ART', 'Número da ART', 'Número da Obra', 'Nome da Obra',
-                'Data de Pagamento', 'Valor de Pagamento (R$)', 'Status',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_arts.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar ARTs para Excel: {e}", 'danger')
-        print(f"Erro ao exportar ARTs Excel: {e}")
-        return redirect(url_for('obras_bp.arts_module'))
+    filtros = dict(
+        search_numero=request.args.get('numero_art'),
+        search_obra_id=request.args.get('obra_id'),
+        search_status=request.args.get('status_art')
+    )
+    return exportar(EXPORT_ARTS, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_arts(**filtros, stream=True))
 
 # ===============================================================
 # 3.5 ROTAS DE MEDICOES - OBRAS
@@ -1789,11 +1645,16 @@ def medicoes_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
-            medicoes = obras_manager.get_all_medicoes(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_medicoes(
                 search_numero_medicao=search_numero_medicao,
                 search_obra_id=search_obra_id,
-                search_status=search_status
+                search_status=search_status,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            medicoes = pagina['items']
             
             # --- SEÇÃO DE FORMATAÇÃO ATUALIZADA ---
             if medicoes:
@@ -1808,6 +1669,7 @@ def medicoes_module():
         return render_template(
             'obras/medicoes/medicoes_module.html',
             user=current_user,
+            pagination=pagina,
             medicoes=medicoes,
             all_obras=all_obras,
             status_options=status_options,
@@ -1842,12 +1704,10 @@ def add_medicao():
 
                 if not all([id_obras_str, numero_medicao_str, valor_medicao_str, data_medicao_str, status_medicao]):
                     flash('Campos obrigatórios (Obra, Número, Valor, Data, Status) não podem ser vazios.', 'danger')
-                    all_obras = obras_manager.get_all_obras_for_dropdown()
                     status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
                     return render_template(
                         'obras/medicoes/add_medicao.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -1858,12 +1718,10 @@ def add_medicao():
                     valor_medicao = float(valor_medicao_str.replace(',', '.'))
                 except ValueError:
                     flash('Obra, Número da Medição ou Valor inválido. Use números.', 'danger')
-                    all_obras = obras_manager.get_all_obras_for_dropdown()
                     status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
                     return render_template(
                         'obras/medicoes/add_medicao.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -1873,36 +1731,30 @@ def add_medicao():
                     data_aprovacao = datetime.strptime(data_aprovacao_str, '%Y-%m-%d').date() if data_aprovacao_str else None
                 except ValueError:
                     flash('Formato de data inválido. Use AAAA-MM-DD.', 'danger')
-                    all_obras = obras_manager.get_all_obras_for_dropdown()
                     status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
                     return render_template(
                         'obras/medicoes/add_medicao.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
 
                 if obras_manager.get_medicao_by_obra_numero(id_obras, numero_medicao):
                     flash('Já existe uma medição com este número para a obra selecionada. Use um número único.', 'danger')
-                    all_obras = obras_manager.get_all_obras_for_dropdown()
                     status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
                     return render_template(
                         'obras/medicoes/add_medicao.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
 
                 if not obras_manager.get_obra_by_id(id_obras):
                     flash('Obra inválida.', 'danger')
-                    all_obras = obras_manager.get_all_obras_for_dropdown()
                     status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
                     return render_template(
                         'obras/medicoes/add_medicao.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -1916,13 +1768,11 @@ def add_medicao():
                 else:
                     flash('Erro ao adicionar medição. Verifique os dados e tente novamente.', 'danger')
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
 
             return render_template(
                 'obras/medicoes/add_medicao.html',
                 user=current_user,
-                all_obras=all_obras,
                 status_options=status_options,
                 form_data={}
             )
@@ -1950,7 +1800,6 @@ def edit_medicao(medicao_id):
                 flash('Medição não encontrada.', 'danger')
                 return redirect(url_for('obras_bp.medicoes_module'))
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             status_options = ['Emitida', 'Aprovada', 'Paga', 'Rejeitada']
 
             # Inicializa form_data_to_template aqui
@@ -2054,7 +1903,6 @@ def edit_medicao(medicao_id):
                         'obras/medicoes/edit_medicao.html',
                         user=current_user,
                         medicao=form_data_to_template, # Passa os dados para repopular
-                        all_obras=all_obras,
                         status_options=status_options
                     )
 
@@ -2088,7 +1936,6 @@ def edit_medicao(medicao_id):
                 'obras/medicoes/edit_medicao.html',
                 user=current_user,
                 medicao=form_data_to_template, # AGORA SEMPRE PASSA form_data_to_template COMO 'medicao'
-                all_obras=all_obras,
                 status_options=status_options
             )
 
@@ -2158,69 +2005,31 @@ def medicao_details(medicao_id):
         return redirect(url_for('obras_bp.medicoes_module'))
 
 
+EXPORT_MEDICOES = ExportSpec('relatorio_medicoes', [
+    ('ID_Medicoes', 'ID Medição'),
+    ('Numero_Medicao', 'Número da Medição'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Valor_Medicao', 'Valor da Medição (R$)'),
+    ('Data_Medicao', 'Data da Medição'),
+    ('Mes_Referencia', 'Mês de Referência'),
+    ('Data_Aprovacao', 'Data de Aprovação'),
+    ('Status_Medicao', 'Status'),
+    ('Observacao_Medicao', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Medições', 'Nenhuma Medição encontrada para exportar.', 'obras_bp.medicoes_module')
+
 @obras_bp.route('/medicoes/export/excel')
 @login_required
 @module_required('Obras')
 def export_medicoes_excel():
-
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_numero_medicao = request.args.get('numero_medicao')
-            search_obra_id = request.args.get('obra_id')
-            search_status = request.args.get('status_medicao')
-
-            medicoes_data = obras_manager.get_all_medicoes(
-                search_numero_medicao=search_numero_medicao,
-                search_obra_id=search_obra_id,
-                search_status=search_status
-            )
-
-            if not medicoes_data:
-                flash('Nenhuma Medição encontrada para exportar.', 'info')
-                return redirect(url_for('obras_bp.medicoes_module'))
-
-            df = pd.DataFrame(medicoes_data)
-
-            df = df.rename(columns={
-                'ID_Medicoes': 'ID Medição',
-                'ID_Obras': 'ID Obra',
-                'Numero_Medicao': 'Número da Medição',
-                'Valor_Medicao': 'Valor da Medição (R$)',
-                'Data_Medicao': 'Data da Medição',
-                'Mes_Referencia': 'Mês de Referência',
-                'Data_Aprovacao': 'Data de Aprovação',
-                'Status_Medicao': 'Status',
-                'Observacao_Medicao': 'Observações',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Medição', 'Número da Medição', 'Número da Obra', 'Nome da Obra',
-                'Valor da Medição (R$)', 'Data da Medição', 'Mês de Referência',
-                'Data de Aprovação', 'Status', 'Observações', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_medicoes.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Medições para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Medições Excel: {e}")
-        return redirect(url_for('obras_bp.medicoes_module'))
+    filtros = dict(
+        search_numero_medicao=request.args.get('numero_medicao'),
+        search_obra_id=request.args.get('obra_id'),
+        search_status=request.args.get('status_medicao')
+    )
+    return exportar(EXPORT_MEDICOES, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_medicoes(**filtros, stream=True))
 
 # ===============================================================
 # 3.6 ROTAS DE AVANCO FISICO - OBRAS
@@ -2251,17 +2060,23 @@ def avancos_fisicos_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
-            avancos = obras_manager.get_all_avancos_fisicos(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_avancos_fisicos(
                 search_obra_id=int(search_obra_id) if search_obra_id else None,
                 search_data_inicio=search_data_inicio,
-                search_data_fim=search_data_fim
+                search_data_fim=search_data_fim,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            avancos = pagina['items']
 
             all_obras = obras_manager.get_all_obras_for_dropdown()
 
         return render_template(
             'obras/avancos_fisicos/avancos_fisicos_module.html',
             user=current_user,
+            pagination=pagina,
             avancos=avancos,
             all_obras=all_obras,
             selected_obra_id=int(search_obra_id) if search_obra_id else None,
@@ -2287,7 +2102,6 @@ def add_avanco_fisico():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             
             form_data_to_template = {} # Para repopular o formulário em caso de erro
 
@@ -2368,7 +2182,6 @@ def add_avanco_fisico():
                     return render_template(
                         'obras/avancos_fisicos/add_avanco_fisico.html',
                         user=current_user,
-                        all_obras=all_obras,
                         avanco=form_data_to_template # Passa os dados para repopular
                     )
 
@@ -2391,7 +2204,6 @@ def add_avanco_fisico():
             return render_template(
                 'obras/avancos_fisicos/add_avanco_fisico.html',
                 user=current_user,
-                all_obras=all_obras,
                 avanco=form_data_to_template # Passa os dados para o template (incluindo acumulado inicial)
             )
 
@@ -2419,7 +2231,6 @@ def edit_avanco_fisico(avanco_id):
                 flash('Avanço Físico não encontrado.', 'danger')
                 return redirect(url_for('obras_bp.avancos_fisicos_module'))
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             
             form_data_to_template = {} # Inicializa como um dicionário vazio
 
@@ -2502,7 +2313,6 @@ def edit_avanco_fisico(avanco_id):
                         'obras/avancos_fisicos/edit_avanco_fisico.html',
                         user=current_user,
                         avanco=form_data_to_template,
-                        all_obras=all_obras
                     )
 
                 # Se todas as validações passaram, tenta atualizar
@@ -2540,7 +2350,6 @@ def edit_avanco_fisico(avanco_id):
                 'obras/avancos_fisicos/edit_avanco_fisico.html',
                 user=current_user,
                 avanco=form_data_to_template, # AGORA SEMPRE PASSA form_data_to_template COMO 'avanco' (chaves minúsculas)
-                all_obras=all_obras
             )
 
     except mysql.connector.Error as e:
@@ -2617,75 +2426,39 @@ def avanco_fisico_details(avanco_id):
         print(f"Erro inesperado em avanco_fisico_details: {e}")
         return redirect(url_for('obras_bp.avancos_fisicos_module'))
 
+EXPORT_AVANCOS_FISICOS = ExportSpec('relatorio_avancos_fisicos', [
+    ('ID_Avancos_Fisicos', 'ID Avanço'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Percentual_Avanco_Fisico', 'Percentual de Avanço (%)'),
+    ('Data_Avanco', 'Data do Avanço'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Avanços Físicos', 'Nenhuma Avanço Físico encontrado para exportar.', 'obras_bp.avancos_fisicos_module')
+
 @obras_bp.route('/avancos_fisicos/export/excel')
 @login_required
 @module_required('Obras')
 def export_avancos_fisicos_excel():
-   
+    search_obra_id = request.args.get('obra_id')
+    search_data_inicio_str = request.args.get('data_inicio')
+    search_data_fim_str = request.args.get('data_fim')
+    search_data_inicio = None
+    search_data_fim = None
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_obra_id = request.args.get('obra_id')
-            search_data_inicio_str = request.args.get('data_inicio')
-            search_data_fim_str = request.args.get('data_fim')
-
-            search_data_inicio = None
-            search_data_fim = None
-            try:
-                if search_data_inicio_str:
-                    search_data_inicio = datetime.strptime(search_data_inicio_str, '%Y-%m-%d').date()
-                if search_data_fim_str:
-                    search_data_fim = datetime.strptime(search_data_fim_str, '%Y-%m-%d').date()
-            except ValueError:
-                flash('Formato de data inválido nos filtros de exportação. Use AAAA-MM-DD.', 'danger')
-                return redirect(url_for('obras_bp.avancos_fisicos_module')) 
-
-            avancos_data = obras_manager.get_all_avancos_fisicos(
-                search_obra_id=int(search_obra_id) if search_obra_id else None,
-                search_data_inicio=search_data_inicio,
-                search_data_fim=search_data_fim
-            )
-
-            if not avancos_data:
-                flash('Nenhuma Avanço Físico encontrado para exportar.', 'info')
-                return redirect(url_for('obras_bp.avancos_fisicos_module'))
-
-            df = pd.DataFrame(avancos_data)
-
-            df = df.rename(columns={
-                'ID_Avancos_Fisicos': 'ID Avanço',
-                'ID_Obras': 'ID Obra',
-                'Percentual_Avanco_Fisico': 'Percentual de Avanço (%)',
-                'Data_Avanco': 'Data do Avanço',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Avanço', 'Número da Obra', 'Nome da Obra',
-                'Percentual de Avanço (%)', 'Data do Avanço',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_avancos_fisicos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Avanços Físicos para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Avanços Físicos Excel: {e}")
+        if search_data_inicio_str:
+            search_data_inicio = datetime.strptime(search_data_inicio_str, '%Y-%m-%d').date()
+        if search_data_fim_str:
+            search_data_fim = datetime.strptime(search_data_fim_str, '%Y-%m-%d').date()
+        filtros = dict(
+            search_obra_id=int(search_obra_id) if search_obra_id else None,
+            search_data_inicio=search_data_inicio,
+            search_data_fim=search_data_fim
+        )
+    except ValueError:
+        flash('Formato de data inválido nos filtros de exportação. Use AAAA-MM-DD.', 'danger')
         return redirect(url_for('obras_bp.avancos_fisicos_module'))
+    return exportar(EXPORT_AVANCOS_FISICOS, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_avancos_fisicos(**filtros, stream=True))
 
 # --- NOVA ROTA: Endpoint AJAX para obter avanço acumulado ---
 @obras_bp.route('/get_acumulado_obra/<int:obra_id>', methods=['GET'])
@@ -2731,12 +2504,17 @@ def reidis_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
-            reidis = obras_manager.get_all_reidis(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_reidis(
                 search_numero_portaria=search_numero_portaria,
                 search_numero_ato=search_numero_ato,
                 search_obra_id=int(search_obra_id) if search_obra_id else None,
-                search_status=search_status
+                search_status=search_status,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            reidis = pagina['items']
 
             all_obras = obras_manager.get_all_obras_for_dropdown()
             status_options = ['Ativo', 'Inativo', 'Vencido', 'Em Análise'] 
@@ -2744,6 +2522,7 @@ def reidis_module():
         return render_template(
             'obras/reidis/reidis_module.html',
             user=current_user,
+            pagination=pagina,
             reidis=reidis,
             all_obras=all_obras,
             status_options=status_options,
@@ -2773,7 +2552,6 @@ def add_reidi():
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
             # --- CORRIGIDO AQUI: DEFINIR AS VARIÁVEIS PARA O DROPDOWN SEMPRE ---
-            all_obras = obras_manager.get_all_obras_for_dropdown() # <-- MOVIDA PARA CÁ
             status_options = ['Ativo', 'Inativo', 'Vencido', 'Em Análise'] # <-- MOVIDA PARA CÁ
             # --- FIM DA CORREÇÃO ---
             # Inicializa form_data_to_template para preencher o formulário em caso de erro ou GET
@@ -2801,7 +2579,6 @@ def add_reidi():
                     return render_template(
                         'obras/reidis/add_reidi.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -2813,36 +2590,30 @@ def add_reidi():
                     data_validade_reidi = datetime.strptime(data_validade_reidi_str, '%Y-%m-%d').date() if data_validade_reidi_str else None
                 except ValueError:
                     flash('Formato de data inválido. Use AAAA-MM-DD.', 'danger')
-                    all_obras = obras_manager.get_all_obras_for_dropdown()
                     status_options = ['Ativo', 'Inativo', 'Vencido', 'Em Análise']
                     return render_template(
                         'obras/reidis/add_reidi.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
 
                 #if obras_manager.get_reidi_by_numero_portaria(numero_portaria):
                 #    flash('Número da Portaria já existe. Por favor, use um número único.', 'danger')
-                #    all_obras = obras_manager.get_all_obras_for_dropdown()
                 #    status_options = ['Ativo', 'Inativo', 'Vencido', 'Em Análise']
                 #    return render_template(
                 #        'obras/reidis/add_reidi.html',
                 #        user=current_user,
-                #        all_obras=all_obras,
                 #        status_options=status_options,
                 #        form_data=request.form
                 #    )
 
                 #if obras_manager.get_reidi_by_numero_ato_declaratorio(numero_ato_declaratorio):
                 #    flash('Número do Ato Declaratório já existe. Por favor, use um número único.', 'danger')
-                #    all_obras = obras_manager.get_all_obras_for_dropdown()
                 #    status_options = ['Ativo', 'Inativo', 'Vencido', 'Em Análise']
                 #    return render_template(
                 #        'obras/reidis/add_reidi.html',
                 #        user=current_user,
-                #        all_obras=all_obras,
                 #        status_options=status_options,
                 #        form_data=request.form
                 #    )
@@ -2852,7 +2623,6 @@ def add_reidi():
                     return render_template(
                         'obras/reidis/add_reidi.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         form_data=request.form
                     )
@@ -2869,7 +2639,6 @@ def add_reidi():
             return render_template(
                 'obras/reidis/add_reidi.html',
                 user=current_user,
-                all_obras=all_obras,
                 status_options=status_options,
                 form_data={}
             )
@@ -2898,7 +2667,6 @@ def edit_reidi(reidi_id):
                 return redirect(url_for('obras_bp.reidis_module'))
 
             # Prepara opções para dropdowns
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             status_options = ['Ativo', 'Inativo', 'Vencido', 'Em Análise'] 
 
             # Inicializa form_data_to_template aqui, será preenchido com dados do DB (GET) ou do form (POST com erro)
@@ -2974,7 +2742,6 @@ def edit_reidi(reidi_id):
                         'obras/reidis/edit_reidi.html',
                         user=current_user,
                         reidi=form_data_to_template, # Passa form_data_to_template como 'reidi'
-                        all_obras=all_obras,
                         status_options=status_options
                     )
 
@@ -3008,7 +2775,6 @@ def edit_reidi(reidi_id):
                 'obras/reidis/edit_reidi.html',
                 user=current_user,
                 reidi=form_data_to_template, # AGORA SEMPRE PASSA form_data_to_template COMO 'reidi'
-                all_obras=all_obras,
                 status_options=status_options
             )
 
@@ -3075,70 +2841,36 @@ def reidi_details(reidi_id):
         return redirect(url_for('obras_bp.reidis_module'))
 
 
+EXPORT_REIDIS = ExportSpec('relatorio_reidis', [
+    ('ID_Reidis', 'ID REIDI'),
+    ('Numero_Portaria', 'Número da Portaria'),
+    ('Numero_Ato_Declaratorio', 'Número do Ato Declaratório'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Data_Aprovacao_Reidi', 'Data de Aprovação'),
+    ('Data_Validade_Reidi', 'Data de Validade'),
+    ('Status_Reidi', 'Status'),
+    ('Observacoes_Reidi', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'REIDIs', 'Nenhum REIDI encontrado para exportar.', 'obras_bp.reidis_module')
+
 @obras_bp.route('/reidis/export/excel')
 @login_required
 @module_required('Obras')
 def export_reidis_excel():
-    
+    search_obra_id = request.args.get('obra_id')
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_numero_portaria = request.args.get('numero_portaria')
-            search_numero_ato = request.args.get('numero_ato')
-            search_obra_id = request.args.get('obra_id')
-            search_status = request.args.get('status_reidi')
-
-            reidis_data = obras_manager.get_all_reidis(
-                search_numero_portaria=search_numero_portaria,
-                search_numero_ato=search_numero_ato,
-                search_obra_id=int(search_obra_id) if search_obra_id else None,
-                search_status=search_status
-            )
-
-            if not reidis_data:
-                flash('Nenhum REIDI encontrado para exportar.', 'info')
-                return redirect(url_for('obras_bp.reidis_module'))
-
-            df = pd.DataFrame(reidis_data)
-
-            df = df.rename(columns={
-                'ID_Reidis': 'ID REIDI',
-                'ID_Obras': 'ID Obra',
-                'Numero_Portaria': 'Número da Portaria',
-                'Numero_Ato_Declaratorio': 'Número do Ato Declaratório',
-                'Data_Aprovacao_Reidi': 'Data de Aprovação',
-                'Data_Validade_Reidi': 'Data de Validade',
-                'Status_Reidi': 'Status',
-                'Observacoes_Reidi': 'Observações',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID REIDI', 'Número da Portaria', 'Número do Ato Declaratório',
-                'Número da Obra', 'Nome da Obra', 'Data de Aprovação', 'Data de Validade',
-                'Status', 'Observações', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_reidis.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar REIDIs para Excel: {e}", 'danger')
-        print(f"Erro ao exportar REIDIs Excel: {e}")
-        return redirect(url_for('obras_bp.reidis_module'))
+        search_obra_id = int(search_obra_id) if search_obra_id else None
+    except ValueError:
+        search_obra_id = None
+    filtros = dict(
+        search_numero_portaria=request.args.get('numero_portaria'),
+        search_numero_ato=request.args.get('numero_ato'),
+        search_obra_id=search_obra_id,
+        search_status=request.args.get('status_reidi')
+    )
+    return exportar(EXPORT_REIDIS, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_reidis(**filtros, stream=True))
 
 # ===============================================================
 # 3.8 ROTAS DE SEGUROS - OBRAS
@@ -3158,12 +2890,17 @@ def seguros_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
 
-            seguros = obras_manager.get_all_seguros(
+            page_token, page_size = get_page_args()
+            pagina = obras_manager.get_all_seguros(
                 search_numero_apolice=search_numero_apolice,
                 search_obra_id=int(search_obra_id) if search_obra_id else None,
                 search_status=search_status,
-                search_tipo=search_tipo
+                search_tipo=search_tipo,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            seguros = pagina['items']
 
             # --- NOVA SEÇÃO: Formatação de moeda para a lista de seguros ---
             if seguros:
@@ -3178,6 +2915,7 @@ def seguros_module():
         return render_template(
             'obras/seguros/seguros_module.html',
             user=current_user,
+            pagination=pagina,
             seguros=seguros,
             all_obras=all_obras,
             status_options=status_options,
@@ -3207,7 +2945,6 @@ def add_seguro():
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
             
             # --- CORRIGIDO AQUI: DEFINIR AS VARIÁVEIS PARA O DROPDOWN SEMPRE ---
-            all_obras = obras_manager.get_all_obras_for_dropdown() # <-- MOVIDA PARA CÁ
             status_options = ['Ativo', 'Vencido', 'Cancelado', 'Em Renovação'] # <-- MOVIDA PARA CÁ
             tipo_seguro_options = ['Responsabilidade Civil', 'Riscos de Engenharia', 'Garantia', 'Frota', 'Outros'] # <-- MOVIDA PARA CÁ
             # --- FIM DA CORREÇÃO ---
@@ -3239,7 +2976,6 @@ def add_seguro():
                     return render_template(
                         'obras/seguros/add_seguro.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         tipo_seguro_options=tipo_seguro_options,
                         form_data=request.form
@@ -3252,7 +2988,6 @@ def add_seguro():
                     return render_template(
                         'obras/seguros/add_seguro.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         tipo_seguro_options=tipo_seguro_options,
                         form_data=request.form
@@ -3269,7 +3004,6 @@ def add_seguro():
                     return render_template(
                         'obras/seguros/add_seguro.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         tipo_seguro_options=tipo_seguro_options,
                         form_data=request.form
@@ -3281,7 +3015,6 @@ def add_seguro():
                     return render_template(
                         'obras/seguros/add_seguro.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         tipo_seguro_options=tipo_seguro_options,
                         form_data=request.form
@@ -3292,7 +3025,6 @@ def add_seguro():
                     return render_template(
                         'obras/seguros/add_seguro.html',
                         user=current_user,
-                        all_obras=all_obras,
                         status_options=status_options,
                         tipo_seguro_options=tipo_seguro_options,
                         form_data=request.form
@@ -3311,7 +3043,6 @@ def add_seguro():
             return render_template(
                 'obras/seguros/add_seguro.html',
                 user=current_user,
-                all_obras=all_obras,
                 status_options=status_options,
                 tipo_seguro_options=tipo_seguro_options,
                 form_data={} # Para o GET, form_data é vazio
@@ -3340,7 +3071,6 @@ def edit_seguro(seguro_id):
                 flash('Seguro não encontrado.', 'danger')
                 return redirect(url_for('obras_bp.seguros_module'))
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
             status_options = ['Ativo', 'Vencido', 'Cancelado', 'Em Renovação']
             tipo_seguro_options = ['Responsabilidade Civil', 'Riscos de Engenharia', 'Garantia', 'Frota', 'Outros']
 
@@ -3407,7 +3137,6 @@ def edit_seguro(seguro_id):
                         user=current_user,
                         seguro=seguro_from_db,
                         form_data=form_data,
-                        all_obras=all_obras,
                         status_options=status_options,
                         tipo_seguro_options=tipo_seguro_options
                     )
@@ -3440,7 +3169,6 @@ def edit_seguro(seguro_id):
                 user=current_user,
                 seguro=seguro_from_db,
                 form_data=form_data,
-                all_obras=all_obras,
                 status_options=status_options,
                 tipo_seguro_options=tipo_seguro_options
             )
@@ -3513,70 +3241,35 @@ def seguro_details(seguro_id):
         return redirect(url_for('obras_bp.seguros_module'))
 
 
+EXPORT_SEGUROS = ExportSpec('relatorio_seguros', [
+    ('ID_Seguros', 'ID Seguro'),
+    ('Numero_Apolice', 'Número da Apólice'),
+    ('Seguradora', 'Seguradora'),
+    ('Tipo_Seguro', 'Tipo de Seguro'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Valor_Segurado', 'Valor Segurado (R$)'),
+    ('Data_Inicio_Vigencia', 'Início Vigência'),
+    ('Data_Fim_Vigencia', 'Fim Vigência'),
+    ('Status_Seguro', 'Status'),
+    ('Observacoes_Seguro', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Seguros', 'Nenhum Seguro encontrado para exportar.', 'obras_bp.seguros_module')
+
 @obras_bp.route('/seguros/export/excel')
 @login_required
 @module_required('Obras')
 def export_seguros_excel():
-    
+    search_obra_id = request.args.get('obra_id')
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-
-            search_numero_apolice = request.args.get('numero_apolice')
-            search_obra_id = request.args.get('obra_id')
-            search_status = request.args.get('status_seguro')
-            search_tipo = request.args.get('tipo_seguro')
-
-            seguros_data = obras_manager.get_all_seguros(
-                search_numero_apolice=search_numero_apolice,
-                search_obra_id=int(search_obra_id) if search_obra_id else None,
-                search_status=search_status,
-                search_tipo=search_tipo
-            )
-
-            if not seguros_data:
-                flash('Nenhum Seguro encontrado para exportar.', 'info')
-                return redirect(url_for('obras_bp.seguros_module'))
-
-            df = pd.DataFrame(seguros_data)
-
-            df = df.rename(columns={
-                'ID_Seguros': 'ID Seguro',
-                'ID_Obras': 'ID Obra',
-                'Numero_Apolice': 'Número da Apólice',
-                'Seguradora': 'Seguradora',
-                'Tipo_Seguro': 'Tipo de Seguro',
-                'Valor_Segurado': 'Valor Segurado (R$)',
-                'Data_Inicio_Vigencia': 'Início Vigência',
-                'Data_Fim_Vigencia': 'Fim Vigência',
-                'Status_Seguro': 'Status',
-                'Observacoes_Seguro': 'Observações',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Seguro', 'Número da Apólice', 'Seguradora', 'Tipo de Seguro',
-                'Número da Obra', 'Nome da Obra', 'Valor Segurado (R$)',
-                'Início Vigência', 'Fim Vigência', 'Status', 'Observações',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_seguros.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Seguros para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Seguros Excel: {e}")
-        return redirect(url_for('obras_bp.seguros_module'))
\ No newline at end of file
+        search_obra_id = int(search_obra_id) if search_obra_id else None
+    except ValueError:
+        search_obra_id = None
+    filtros = dict(
+        search_numero_apolice=request.args.get('numero_apolice'),
+        search_obra_id=search_obra_id,
+        search_status=request.args.get('status_seguro'),
+        search_tipo=request.args.get('tipo_seguro')
+    )
+    return exportar(EXPORT_SEGUROS, lambda db_base: ObrasManager(db_base, current_user.tenant_id).get_all_seguros(**filtros, stream=True))
\ No newline at end of file
@@ -23,8 +23,17 @@ from utils import formatar_moeda_brl
 # Decorator de validação de permissão de acesso aos módulos
 from utils import module_required
 
-# Para importação de funcionários em lote via planilha Excel, normalização de campos de seleção ENUM
-from utils import normalizar_valor_enum, MAPA_ESTADO_CIVIL, MAPA_GENERO, MAPA_STATUS_FUNCIONARIO, MAPA_TIPO_CONTRATACAO
+# Paginação keyset das listagens (?page=<token>&page_size=<n>)
+from utils import get_page_args
+
+# Exportação declarativa em streaming (XLSX/CSV) das rotas export_*_excel
+from modulos.exportacao import ExportSpec, exportar, sim_nao
+
+# Para importação de funcionários em lote via planilha Excel (validação vetorizada + INSERT em lotes)
+from modulos.importacao_funcionarios import COLUNAS_TEMPLATE, ler_planilha, importar
+
+# Relatório da última importação fica no cache (por tenant/usuário)
+from database.cache_ext import cache
 
 # Crie a instância do Blueprint para o Módulo Pessoal
 pessoal_bp = Blueprint('pessoal_bp', __name__, url_prefix='/pessoal')
@@ -69,12 +78,17 @@ def funcionarios_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            funcionarios = pessoal_manager.get_all_funcionarios(
+            page_token, page_size = get_page_args()
+            pagina = pessoal_manager.get_all_funcionarios(
                 search_matricula=search_matricula,
                 search_nome=search_nome,
                 search_status=search_status,
-                search_cargo_id=search_cargo_id
+                search_cargo_id=search_cargo_id,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            funcionarios = pagina['items']
 
             all_cargos = pessoal_manager.get_all_cargos_for_dropdown()
             status_options = ['Ativo', 'Inativo', 'Ferias', 'Afastado']
@@ -82,6 +96,7 @@ def funcionarios_module():
         return render_template(
             'pessoal/funcionarios/funcionarios_module.html',
             user=current_user,
+            pagination=pagina,
             funcionarios=funcionarios,
             all_cargos=all_cargos,
             status_options=status_options,
@@ -793,105 +808,59 @@ def funcionario_details(matricula):
 # ---------------------------------------------------------------
 # 2.1.5 ROTA DE FUNCIONÁRIOS - EXPORTAR P/ EXCEL - PESSOAL
 # ---------------------------------------------------------------
+EXPORT_FUNCIONARIOS = ExportSpec('relatorio_funcionarios', [
+    ('Matricula', 'Matrícula'),
+    ('Nome_Completo', 'Nome Completo'),
+    ('Status', 'Status'),
+    ('Nome_Cargo', 'Cargo'),
+    ('Nome_Nivel', 'Nível'),
+    ('Data_Admissao', 'Data de Admissão'),
+    ('Data_Nascimento', 'Data de Nascimento'),
+    ('Estado_Civil', 'Estado Civil'),
+    ('Nacionalidade', 'Nacionalidade'),
+    ('Naturalidade', 'Naturalidade'),
+    ('Genero', 'Gênero'),
+    ('Cpf_Numero', 'CPF'),
+    ('Rg_Numero', 'RG Nº'),
+    ('Rg_OrgaoEmissor', 'RG Órgão Emissor'),
+    ('Rg_UfEmissor', 'RG UF Emissor'),
+    ('Rg_DataEmissao', 'RG Data Emissão'),
+    ('Ctps_Numero', 'CTPS Nº'),
+    ('Ctps_Serie', 'CTPS Série'),
+    ('Pispasep', 'PIS/PASEP'),
+    ('Cnh_Numero', 'CNH Nº'),
+    ('Cnh_Categoria', 'CNH Categoria'),
+    ('Cnh_DataValidade', 'CNH Data Validade'),
+    ('Cnh_OrgaoEmissor', 'CNH Órgão Emissor'),
+    ('TitEleitor_Numero', 'Título Eleitor Nº'),
+    ('TitEleitor_Zona', 'Título Eleitor Zona'),
+    ('TitEleitor_Secao', 'Título Eleitor Seção'),
+    ('Doc_Observacoes', 'Observações Documentos'),
+    ('Link_Foto', 'Link da Foto'),
+    ('End_Logradouro', 'Endereço Logradouro'),
+    ('End_Numero', 'Endereço Número'),
+    ('End_Complemento', 'Endereço Complemento'),
+    ('End_Bairro', 'Endereço Bairro'),
+    ('End_Cidade', 'Endereço Cidade'),
+    ('End_Estado', 'Endereço Estado'),
+    ('End_Cep', 'Endereço CEP'),
+    ('Tel_Principal', 'Telefone Principal'),
+    ('Email_Pessoal', 'Email Pessoal'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'funcionários', 'Nenhum funcionário encontrado para exportar.', 'pessoal_bp.funcionarios_module')
+
 @pessoal_bp.route('/funcionarios/export/excel')
 @login_required
 @module_required('Pessoal')
 def export_funcionarios_excel():
-    
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id) 
-
-            search_matricula = request.args.get('matricula')
-            search_nome = request.args.get('nome')
-            search_status = request.args.get('status')
-            search_cargo_id = request.args.get('cargo_id')
-
-            funcionarios_data = pessoal_manager.get_all_funcionarios_completo(
-                search_matricula=search_matricula,
-                search_nome=search_nome,
-                search_status=search_status,
-                search_cargo_id=search_cargo_id
-            )
-
-            if not funcionarios_data:
-                flash('Nenhum funcionário encontrado para exportar.', 'info')
-                return redirect(url_for('pessoal_bp.funcionarios_module'))
-
-            df = pd.DataFrame(funcionarios_data)
-
-            df = df.rename(columns={
-                'Matricula': 'Matrícula',
-                'Nome_Completo': 'Nome Completo',
-                'Data_Admissao': 'Data de Admissão',
-                'Nome_Cargo': 'Cargo',
-                'Nome_Nivel': 'Nível',
-                'Status': 'Status',
-                'Data_Nascimento': 'Data de Nascimento',
-                'Estado_Civil': 'Estado Civil',
-                'Nacionalidade': 'Nacionalidade',
-                'Naturalidade': 'Naturalidade',
-                'Genero': 'Gênero',
-                'Rg_Numero': 'RG Nº', 
-                'Rg_OrgaoEmissor': 'RG Órgão Emissor', 
-                'Rg_UfEmissor': 'RG UF Emissor', 
-                'Rg_DataEmissao': 'RG Data Emissão', 
-                'Cpf_Numero': 'CPF', 
-                'Ctps_Numero': 'CTPS Nº', 
-                'Ctps_Serie': 'CTPS Série', 
-                'Pispasep': 'PIS/PASEP', 
-                'Cnh_Numero': 'CNH Nº', 
-                'Cnh_Categoria': 'CNH Categoria', 
-                'Cnh_DataValidade': 'CNH Data Validade', 
-                'Cnh_OrgaoEmissor': 'CNH Órgão Emissor', 
-                'TitEleitor_Numero': 'Título Eleitor Nº', 
-                'TitEleitor_Zona': 'Título Eleitor Zona', 
-                'TitEleitor_Secao': 'Título Eleitor Seção', 
-                'Doc_Observacoes': 'Observações Documentos', 
-                'Link_Foto': 'Link da Foto', 
-                'End_Logradouro': 'Endereço Logradouro', 
-                'End_Numero': 'Endereço Número',
-                'End_Complemento': 'Endereço Complemento',
-                'End_Bairro': 'Endereço Bairro',
-                'End_Cidade': 'Endereço Cidade',
-                'End_Estado': 'Endereço Estado',
-                'End_Cep': 'Endereço CEP',
-                'Tel_Principal': 'Telefone Principal',
-                'Email_Pessoal': 'Email Pessoal',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'Matrícula', 'Nome Completo', 'Status', 'Cargo', 'Nível',
-                'Data de Admissão', 'Data de Nascimento', 'Estado Civil', 'Nacionalidade', 'Naturalidade', 'Gênero',
-                'CPF', 'RG Nº', 'Rg_OrgaoEmissor', 'Rg_UfEmissor', 'RG Data Emissão',
-                'CTPS Nº', 'CTPS Série', 'PIS/PASEP',
-                'CNH Nº', 'CNH Categoria', 'CNH Data Validade', 'CNH Órgão Emissor',
-                'Título Eleitor Nº', 'Título Eleitor Zona', 'Título Eleitor Seção',
-                'Observações Documentos', 'Link da Foto',
-                'Endereço Logradouro', 'Endereço Número', 'Endereço Complemento', 'Endereço Bairro',
-                'Endereço Cidade', 'Endereço Estado', 'Endereço CEP',
-                'Telefone Principal', 'Email Pessoal',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_funcionarios.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar funcionários para Excel: {e}", 'danger')
-        print(f"Erro ao exportar funcionários Excel: {e}")
-        return redirect(url_for('pessoal_bp.funcionarios_module'))
+    filtros = dict(
+        search_matricula=request.args.get('matricula'),
+        search_nome=request.args.get('nome'),
+        search_status=request.args.get('status'),
+        search_cargo_id=request.args.get('cargo_id')
+    )
+    return exportar(EXPORT_FUNCIONARIOS, lambda db_base: PessoalManager(db_base, current_user.tenant_id).get_all_funcionarios_completo(**filtros, stream=True))
 
 # ---------------------------------------------------------------
 # 2.1.6 ROTA DE FUNCIONÁRIOS - DOWNLOAD TEMPLATE DO EXCEL - PESSOAL
@@ -906,19 +875,7 @@ def download_funcionario_template():
     usando nomes de coluna padronizados e amigáveis.
     """
     try:
-        # Padrão oficial de colunas para a planilha de importação
-        colunas_template = [
-            'Matricula', 'Nome_Completo', 'Data_Admissao', 'ID_Cargos', 'ID_Niveis', 'Status', 'Tipo_Contratacao',
-            'Data_Nascimento', 'Estado_Civil', 'Nacionalidade', 'Naturalidade', 'Genero', 'Rg_Numero', 
-            'Rg_OrgaoEmissor', 'Rg_UfEmissor', 'Rg_DataEmissao', 'Cpf_Numero', 'Ctps_Numero', 'Ctps_Serie', 
-            'Pispasep', 'Cnh_Numero', 'Cnh_Categoria', 'Cnh_DataValidade', 'Cnh_OrgaoEmissor', 
-            'TitEleitor_Numero', 'TitEleitor_Zona', 'TitEleitor_Secao', 'Link_Foto',
-            # Nomes simplificados para endereço e contatos
-            'Logradouro', 'Numero', 'Complemento', 'Bairro', 'Cidade', 'Estado', 'CEP',
-            'Telefone_Principal', 'Email_Pessoal'
-        ]
-        
-        df_template = pd.DataFrame(columns=colunas_template)
+        df_template = pd.DataFrame(columns=COLUNAS_TEMPLATE)
         output = BytesIO()
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
             df_template.to_excel(writer, index=False, sheet_name='Funcionarios')
@@ -948,118 +905,58 @@ def import_funcionarios():
         return redirect(url_for('pessoal_bp.add_funcionario'))
 
     file = request.files['file']
+    dry_run = bool(request.form.get('dry_run'))
     try:
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file, dtype=str).fillna('')
-        else:
-            df = pd.read_excel(file, dtype=str).fillna('')
-
-        sucessos, erros, avisos = 0, [], []
-        
-        MAPA_ESTADO_CIVIL = {'solteiro': 'Solteiro(a)', 'solteira': 'Solteiro(a)', 'casado': 'Casado(a)', 'casada': 'Casado(a)', 'divorciado': 'Divorciado(a)', 'divorciada': 'Divorciado(a)', 'viuvo': 'Viuvo(a)', 'viuva': 'Viuvo(a)', 'uniao estavel': 'Uniao Estavel'}
-        MAPA_GENERO = {'masculino': 'Masculino', 'feminino': 'Feminino', 'outro': 'Outro', 'prefiro nao informar': 'Prefiro nao informar'}
-        MAPA_STATUS_FUNCIONARIO = {'ativo': 'Ativo', 'inativo': 'Inativo', 'ferias': 'Ferias', 'férias': 'Ferias', 'afastado': 'Afastado'}
-        MAPA_TIPO_CONTRATACAO = {'clt': 'CLT', 'pj': 'PJ', 'temporario': 'Temporario', 'temporário': 'Temporario'}
+        df = ler_planilha(file)
 
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-            
-            matriculas_no_banco = pessoal_manager.get_all_matriculas()
-            cpfs_no_banco = pessoal_manager.get_all_cpfs()
-            
-            matriculas_no_arquivo, cpfs_no_arquivo = set(), set()
+            sucessos, com_erro, relatorio = importar(pessoal_manager, df, dry_run=dry_run)
 
-            print("\nINICIANDO PROCESSAMENTO DA PLANILHA...")
-            for index, row in df.iterrows():
-                matricula = row.get('Matricula', '').strip()
-                nome = row.get('Nome_Completo', '').strip()
-                cpf = row.get('Cpf_Numero', '').strip()
-                
-                print(f"\n--- [BP] Processando Linha {index + 2} (Matrícula: {matricula}) ---")
+        # Relatório por linha fica disponível para download por 1 hora
+        cache.set(_chave_relatorio_importacao(), relatorio, timeout=3600)
 
-                try:
-                    # (Validações e Normalizações permanecem as mesmas)
-                    if not all([matricula, nome, cpf]):
-                        raise ValueError("Matrícula, Nome Completo e CPF são obrigatórios.")
-                    if matricula in matriculas_no_banco or matricula in matriculas_no_arquivo:
-                        raise ValueError(f"Matrícula '{matricula}' já existe ou está duplicada.")
-                    if cpf in cpfs_no_banco or cpf in cpfs_no_arquivo:
-                        raise ValueError(f"CPF '{cpf}' já existe ou está duplicado.")
-                    
-                    matriculas_no_arquivo.add(matricula)
-                    cpfs_no_arquivo.add(cpf)
-
-                    status = normalizar_valor_enum(row.get('Status', 'Ativo'), MAPA_STATUS_FUNCIONARIO) or 'Ativo'
-                    tipo_contratacao = normalizar_valor_enum(row.get('Tipo_Contratacao', 'CLT'), MAPA_TIPO_CONTRATACAO) or 'CLT'
-                    estado_civil = normalizar_valor_enum(row.get('Estado_Civil', ''), MAPA_ESTADO_CIVIL)
-                    genero = normalizar_valor_enum(row.get('Genero', ''), MAPA_GENERO)
-
-                    # --- INSERÇÃO EM 'funcionarios' ---
-                    pessoal_manager.add_funcionario(
-                        matricula, nome, pd.to_datetime(row.get('Data_Admissao')).date(),
-                        int(row.get('ID_Cargos')), int(row.get('ID_Niveis')), status, tipo_contratacao
-                    )
-                    
-                    # --- INSERÇÃO EM 'funcionarios_documentos' ---
-                    pessoal_manager.save_funcionario_dados_pessoais_documentos(
-                        matricula, pd.to_datetime(row.get('Data_Nascimento')).date() if pd.notna(row.get('Data_Nascimento')) else None,
-                        estado_civil, row.get('Nacionalidade', '').strip() or None, row.get('Naturalidade', '').strip() or None,
-                        genero, row.get('Rg_Numero', '').strip() or None, row.get('Rg_OrgaoEmissor', '').strip() or None,
-                        row.get('Rg_UfEmissor', '').strip() or None, pd.to_datetime(row.get('Rg_DataEmissao')).date() if pd.notna(row.get('Rg_DataEmissao')) else None,
-                        cpf, row.get('Ctps_Numero', '').strip() or None, row.get('Ctps_Serie', '').strip() or None,
-                        row.get('Pispasep', '').strip() or None, row.get('Cnh_Numero', '').strip() or None,
-                        row.get('Cnh_Categoria', '').strip() or None, pd.to_datetime(row.get('Cnh_DataValidade')).date() if pd.notna(row.get('Cnh_DataValidade')) else None,
-                        row.get('Cnh_OrgaoEmissor', '').strip() or None, row.get('TitEleitor_Numero', '').strip() or None,
-                        row.get('TitEleitor_Zona', '').strip() or None, row.get('TitEleitor_Secao', '').strip() or None,
-                        None, row.get('Link_Foto', '').strip() or None
-                    )
-                    
-                    # --- LÓGICA DE INSERÇÃO DE ENDEREÇO COM DEBUG ---
-                    logradouro = row.get('Logradouro', '').strip()
-                    print(f"  [BP] Verificando endereço. Valor de 'Logradouro': '{logradouro}'")
-                    if logradouro:
-                        print(f"  [BP] CONDIÇÃO VERDADEIRA. Chamando add_funcionario_endereco...")
-                        pessoal_manager.add_funcionario_endereco(
-                            matricula, 'Residencial', logradouro,
-                            row.get('Numero', '').strip(), row.get('Complemento', '').strip(),
-                            row.get('Bairro', '').strip(), row.get('Cidade', '').strip(),
-                            row.get('Estado', '').strip(), row.get('CEP', '').strip()
-                        )
-                        print(f"  [BP] Chamada para add_funcionario_endereco CONCLUÍDA.")
-                    else:
-                        print(f"  [BP] CONDIÇÃO FALSA. Pulando inserção de endereço.")
-                    
-                    # --- LÓGICA DE INSERÇÃO DE CONTATOS COM DEBUG ---
-                    tel_principal = row.get('Telefone_Principal', '').strip()
-                    print(f"  [BP] Verificando telefone. Valor de 'Telefone_Principal': '{tel_principal}'")
-                    if tel_principal:
-                        print(f"  [BP] CONDIÇÃO VERDADEIRA. Chamando add_funcionario_contato para TELEFONE...")
-                        pessoal_manager.add_funcionario_contato(matricula, 'Telefone Principal', tel_principal)
-                        print(f"  [BP] Chamada para add_funcionario_contato (TELEFONE) CONCLUÍDA.")
-                    else:
-                        print(f"  [BP] CONDIÇÃO FALSA. Pulando inserção de telefone.")
-
-                    email_pessoal = row.get('Email_Pessoal', '').strip()
-                    print(f"  [BP] Verificando email. Valor de 'Email_Pessoal': '{email_pessoal}'")
-                    if email_pessoal:
-                        print(f"  [BP] CONDIÇÃO VERDADEIRA. Chamando add_funcionario_contato para EMAIL...")
-                        pessoal_manager.add_funcionario_contato(matricula, 'Email Pessoal', email_pessoal)
-                        print(f"  [BP] Chamada para add_funcionario_contato (EMAIL) CONCLUÍDA.")
-                    else:
-                        print(f"  [BP] CONDIÇÃO FALSA. Pulando inserção de email.")
-
-                    sucessos += 1
+        if dry_run:
+            flash(f"Simulação concluída: {sucessos} funcionário(s) seriam importados, {com_erro} linha(s) com erro. Nada foi gravado.", 'info')
+        else:
+            if sucessos:
+                flash(f"{sucessos} funcionário(s) importado(s) com sucesso!", 'success')
+            if com_erro:
+                flash(f"{com_erro} linha(s) não foram importadas. Baixe o relatório para ver os erros.", 'warning')
 
-                except Exception as e:
-                    erros.append(f"Linha {index + 2} (Matrícula: {matricula}): Erro - {e}")
-        
-        # (Feedback para o usuário no final permanece o mesmo)
+        if dry_run or com_erro:
+            return redirect(url_for('pessoal_bp.add_funcionario', relatorio=1))
 
     except Exception as e:
         flash(f"Erro crítico ao ler o arquivo: {e}", 'danger')
-    
+        print(f"Erro na importação de funcionários: {e}")
+        return redirect(url_for('pessoal_bp.add_funcionario'))
+
     return redirect(url_for('pessoal_bp.funcionarios_module'))
 
+def _chave_relatorio_importacao():
+    return f"import:funcionarios:relatorio:{current_user.tenant_id}:{current_user.id}"
+
+# ---------------------------------------------------------------
+# 2.1.8 ROTA DE FUNCIONÁRIOS - RELATÓRIO DA ÚLTIMA IMPORTAÇÃO - PESSOAL
+# ---------------------------------------------------------------
+
+@pessoal_bp.route('/funcionarios/import/relatorio')
+@login_required
+@module_required('Pessoal')
+def download_relatorio_importacao():
+    relatorio = cache.get(_chave_relatorio_importacao())
+    if relatorio is None:
+        flash('Nenhum relatório de importação disponível (expira em 1 hora).', 'info')
+        return redirect(url_for('pessoal_bp.add_funcionario'))
+
+    return send_file(
+        BytesIO(relatorio),
+        mimetype='text/csv',
+        as_attachment=True,
+        download_name='relatorio_importacao_funcionarios.csv'
+    )
+
 # ===============================================================
 # 2.2 ROTAS DE CARGOS - PESSOAL
 # ===============================================================
@@ -1073,11 +970,19 @@ def cargos_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-            cargos = pessoal_manager.get_all_cargos(search_nome=search_nome)
+            page_token, page_size = get_page_args()
+            pagina = pessoal_manager.get_all_cargos(
+                search_nome=search_nome,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
+            )
+            cargos = pagina['items']
 
         return render_template(
             'pessoal/cargos/cargos_module.html',
             user=current_user,
+            pagination=pagina,
             cargos=cargos,
             selected_nome=search_nome
         )
@@ -1266,46 +1171,21 @@ def cargo_details(cargo_id):
 # ---------------------------------------------------------------
 # 2.2.5 ROTA DE CARGOS - EXPORTAR P/ EXCEL - PESSOAL
 # ---------------------------------------------------------------
+EXPORT_CARGOS = ExportSpec('relatorio_cargos', [
+    ('ID_Cargos', 'ID Cargo'),
+    ('Nome_Cargo', 'Nome do Cargo'),
+    ('Descricao_Cargo', 'Descrição do Cargo'),
+    ('Cbo', 'CBO'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'cargos', 'Nenhum cargo encontrado para exportar.', 'pessoal_bp.cargos_module')
+
 @pessoal_bp.route('/cargos/export/excel')
 @login_required
 @module_required('Pessoal')
 def export_cargos_excel():
-
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-            search_nome = request.args.get('nome_cargo')
-            cargos_data = pessoal_manager.get_all_cargos(search_nome=search_nome)
-
-            if not cargos_data:
-                flash('Nenhum cargo encontrado para exportar.', 'info')
-                return redirect(url_for('pessoal_bp.cargos_module'))
-
-            df = pd.DataFrame(cargos_data)
-            df = df.rename(columns={
-                'ID_Cargos': 'ID Cargo',
-                'Nome_Cargo': 'Nome do Cargo',
-                'Descricao_Cargo': 'Descrição do Cargo',
-                'Cbo': 'CBO',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_cargos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar cargos para Excel: {e}", 'danger')
-        print(f"Erro ao exportar cargos Excel: {e}")
-        return redirect(url_for('pessoal_bp.cargos_module'))
+    search_nome = request.args.get('nome_cargo')
+    return exportar(EXPORT_CARGOS, lambda db_base: PessoalManager(db_base, current_user.tenant_id).get_all_cargos(search_nome=search_nome, stream=True))
 
 # ===============================================================
 # 2.3 ROTAS DE NIVEIS - PESSOAL
@@ -1320,11 +1200,19 @@ def niveis_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-            niveis = pessoal_manager.get_all_niveis(search_nome=search_nome)
+            page_token, page_size = get_page_args()
+            pagina = pessoal_manager.get_all_niveis(
+                search_nome=search_nome,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
+            )
+            niveis = pagina['items']
 
         return render_template(
             'pessoal/niveis/niveis_module.html',
             user=current_user,
+            pagination=pagina,
             niveis=niveis,
             selected_nome=search_nome
         )
@@ -1511,45 +1399,20 @@ def nivel_details(nivel_id):
 # ---------------------------------------------------------------
 # 2.3.5 ROTA DE NIVEIS - EXPORTAR P/ EXCEL - PESSOAL
 # ---------------------------------------------------------------
+EXPORT_NIVEIS = ExportSpec('relatorio_niveis', [
+    ('ID_Niveis', 'ID Nível'),
+    ('Nome_Nivel', 'Nome do Nível'),
+    ('Descricao', 'Descrição'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'níveis', 'Nenhum nível encontrado para exportar.', 'pessoal_bp.niveis_module')
+
 @pessoal_bp.route('/niveis/export/excel')
 @login_required
 @module_required('Pessoal')
 def export_niveis_excel():
-
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-            search_nome = request.args.get('nome_nivel')
-            niveis_data = pessoal_manager.get_all_niveis(search_nome=search_nome)
-
-            if not niveis_data:
-                flash('Nenhum nível encontrado para exportar.', 'info')
-                return redirect(url_for('pessoal_bp.niveis_module'))
-
-            df = pd.DataFrame(niveis_data)
-            df = df.rename(columns={
-                'ID_Niveis': 'ID Nível',
-                'Nome_Nivel': 'Nome do Nível',
-                'Descricao': 'Descrição',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_niveis.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar níveis para Excel: {e}", 'danger')
-        print(f"Erro ao exportar níveis Excel: {e}")
-        return redirect(url_for('pessoal_bp.niveis_module'))
+    search_nome = request.args.get('nome_nivel')
+    return exportar(EXPORT_NIVEIS, lambda db_base: PessoalManager(db_base, current_user.tenant_id).get_all_niveis(search_nome=search_nome, stream=True))
 
 # ===============================================================
 # 2.4 ROTAS DE SALARIOS - PESSOAL
@@ -1566,10 +1429,15 @@ def salarios_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            salarios = pessoal_manager.get_all_salarios(
+            page_token, page_size = get_page_args()
+            pagina = pessoal_manager.get_all_salarios(
                 search_cargo_id=int(search_cargo_id) if search_cargo_id else None,
-                search_nivel_id=int(search_nivel_id) if search_nivel_id else None
+                search_nivel_id=int(search_nivel_id) if search_nivel_id else None,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            salarios = pagina['items']
 
             # --- NOVA SEÇÃO: Formatação de moeda para a lista de salários ---
             if salarios:
@@ -1583,6 +1451,7 @@ def salarios_module():
         return render_template(
             'pessoal/salarios/salarios_module.html',
             user=current_user,
+            pagination=pagina,
             salarios=salarios,
             all_cargos=all_cargos,
             all_niveis=all_niveis,
@@ -1856,76 +1725,39 @@ def salario_details(salario_id):
 # ---------------------------------------------------------------
 # 2.4.5 ROTAS DE SALARIOS - EXPORTAR P/ EXCEL - PESSOAL
 # ---------------------------------------------------------------
+EXPORT_SALARIOS = ExportSpec('relatorio_salarios', [
+    ('ID_Salarios', 'ID Salário'),
+    ('Nome_Cargo', 'Cargo'),
+    ('Nome_Nivel', 'Nível'),
+    ('Salario_Base', 'Salário Base (R$)'),
+    ('Data_Vigencia', 'Data de Vigência'),
+    ('Periculosidade', 'Periculosidade', sim_nao),
+    ('Insalubridade', 'Insalubridade', sim_nao),
+    ('Ajuda_De_Custo', 'Ajuda de Custo (R$)'),
+    ('Vale_Refeicao', 'Vale Refeição (R$)'),
+    ('Gratificacao', 'Gratificação (R$)'),
+    ('Cesta_Basica', 'Cesta Básica', sim_nao),
+    ('Outros_Beneficios', 'Outros Benefícios'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Salários', 'Nenhum pacote salarial encontrado para exportar.', 'pessoal_bp.salarios_module')
+
 @pessoal_bp.route('/salarios/export/excel')
 @login_required
 @module_required('Pessoal')
 def export_salarios_excel():
-
+    search_cargo_id = request.args.get('cargo_id')
+    search_nivel_id = request.args.get('nivel_id')
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-
-            search_cargo_id = request.args.get('cargo_id')
-            search_nivel_id = request.args.get('nivel_id')
-
-            salarios_data = pessoal_manager.get_all_salarios(
-                search_cargo_id=int(search_cargo_id) if search_cargo_id else None,
-                search_nivel_id=int(search_nivel_id) if search_nivel_id else None
-            )
-
-            if not salarios_data:
-                flash('Nenhum pacote salarial encontrado para exportar.', 'info')
-                return redirect(url_for('pessoal_bp.salarios_module'))
-
-            df = pd.DataFrame(salarios_data)
-
-            # Mova estas linhas para ANTES do df.rename
-            df['Periculosidade'] = df['Periculosidade'].apply(lambda x: 'Sim' if x else 'Não')
-            df['Insalubridade'] = df['Insalubridade'].apply(lambda x: 'Sim' if x else 'Não')
-            df['Cesta_Basica'] = df['Cesta_Basica'].apply(lambda x: 'Sim' if x else 'Não') # Esta linha agora está correta
-
-            df = df.rename(columns={
-                'ID_Salarios': 'ID Salário',
-                'ID_Cargos': 'ID Cargo',
-                'ID_Niveis': 'ID Nível',
-                'Salario_Base': 'Salário Base (R$)',
-                'Periculosidade': 'Periculosidade',
-                'Insalubridade': 'Insalubridade',
-                'Ajuda_De_Custo': 'Ajuda de Custo (R$)',
-                'Vale_Refeicao': 'Vale Refeição (R$)',
-                'Gratificacao': 'Gratificação (R$)',
-                'Cesta_Basica': 'Cesta Básica',
-                'Outros_Beneficios': 'Outros Benefícios',
-                'Data_Vigencia': 'Data de Vigência',
-                'Nome_Cargo': 'Cargo',
-                'Nome_Nivel': 'Nível',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Salário', 'Cargo', 'Nível', 'Salário Base (R$)', 'Data de Vigência',
-                'Periculosidade', 'Insalubridade', 'Ajuda de Custo (R$)',
-                'Vale Refeição (R$)', 'Gratificação (R$)', 'Cesta Básica', 'Outros Benefícios',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_salarios.xlsx'
-            )
-
-    except Exception as e:
+        filtros = dict(
+            search_cargo_id=int(search_cargo_id) if search_cargo_id else None,
+            search_nivel_id=int(search_nivel_id) if search_nivel_id else None
+        )
+    except ValueError as e:
         flash(f"Ocorreu um erro ao exportar Salários para Excel: {e}", 'danger')
         print(f"Erro ao exportar Salários Excel: {e}")
         return redirect(url_for('pessoal_bp.salarios_module'))
+    return exportar(EXPORT_SALARIOS, lambda db_base: PessoalManager(db_base, current_user.tenant_id).get_all_salarios(**filtros, stream=True))
 
 # ===============================================================
 # 2.5 ROTAS DE FERIAS - PESSOAL
@@ -1944,22 +1776,26 @@ def ferias_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            ferias = pessoal_manager.get_all_ferias(
+            page_token, page_size = get_page_args()
+            pagina = pessoal_manager.get_all_ferias(
                 search_matricula=search_matricula,
                 search_status=search_status,
                 search_periodo_inicio=datetime.strptime(search_periodo_inicio, '%Y-%m-%d').date() if search_periodo_inicio else None,
-                search_periodo_fim=datetime.strptime(search_periodo_fim, '%Y-%m-%d').date() if search_periodo_fim else None
+                search_periodo_fim=datetime.strptime(search_periodo_fim, '%Y-%m-%d').date() if search_periodo_fim else None,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            ferias = pagina['items']
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
 
             status_options = ['Programada', 'Aprovada', 'Gozo', 'Concluída', 'Cancelada']
 
         return render_template(
             'pessoal/ferias/ferias_module.html',
             user=current_user,
+            pagination=pagina,
             ferias=ferias,
-            all_funcionarios=all_funcionarios,
             status_options=status_options,
             selected_matricula=search_matricula,
             selected_status=search_status,
@@ -1987,7 +1823,6 @@ def add_ferias():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             status_options = ['Programada', 'Aprovada', 'Gozo', 'Concluída', 'Cancelada']
 
             form_data_to_template = {}
@@ -2061,7 +1896,6 @@ def add_ferias():
                 return render_template(
                     'pessoal/ferias/add_ferias.html',
                     user=current_user,
-                    all_funcionarios=all_funcionarios,
                     status_options=status_options,
                     form_data=form_data_to_template # Passa os dados para preencher o formulário
                 )
@@ -2086,7 +1920,6 @@ def edit_ferias(ferias_id):
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             status_options = ['Programada', 'Aprovada', 'Gozo', 'Concluída', 'Cancelada']
 
             ferias_from_db = pessoal_manager.get_ferias_by_id(ferias_id)
@@ -2175,7 +2008,6 @@ def edit_ferias(ferias_id):
                 'pessoal/ferias/edit_ferias.html',
                 user=current_user,
                 ferias=form_data_to_template,
-                all_funcionarios=all_funcionarios,
                 status_options=status_options
             )
     except mysql.connector.Error as e:
@@ -2249,71 +2081,38 @@ def ferias_details(ferias_id):
 # ---------------------------------------------------------------
 # 2.5.5 ROTAS DE FERIAS - EXPORTAR P/ EXCEL - PESSOAL
 # ---------------------------------------------------------------
+EXPORT_FERIAS = ExportSpec('relatorio_ferias', [
+    ('ID_Ferias', 'ID Férias'),
+    ('Matricula_Funcionario', 'Matrícula'),
+    ('Nome_Funcionario', 'Nome do Funcionário'),
+    ('Periodo_Aquisitivo_Inicio', 'Início Período Aquisitivo'),
+    ('Periodo_Aquisitivo_Fim', 'Fim Período Aquisitivo'),
+    ('Data_Inicio_Gozo', 'Início Gozo'),
+    ('Data_Fim_Gozo', 'Fim Gozo'),
+    ('Dias_Gozo', 'Dias de Gozo'),
+    ('Status_Ferias', 'Status'),
+    ('Observacoes', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Férias', 'Nenhum registro de férias encontrado para exportar.', 'pessoal_bp.ferias_module')
+
 @pessoal_bp.route('/ferias/export/excel')
 @login_required
 @module_required('Pessoal')
 def export_ferias_excel():
-
+    search_periodo_inicio = request.args.get('periodo_inicio')
+    search_periodo_fim = request.args.get('periodo_fim')
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-
-            search_matricula = request.args.get('matricula')
-            search_status = request.args.get('status')
-            search_periodo_inicio = request.args.get('periodo_inicio')
-            search_periodo_fim = request.args.get('periodo_fim')
-
-            ferias_data = pessoal_manager.get_all_ferias(
-                search_matricula=search_matricula,
-                search_status=search_status,
-                search_periodo_inicio=datetime.strptime(search_periodo_inicio, '%Y-%m-%d').date() if search_periodo_inicio else None,
-                search_periodo_fim=datetime.strptime(search_periodo_fim, '%Y-%m-%d').date() if search_periodo_fim else None
-            )
-
-            if not ferias_data:
-                flash('Nenhum registro de férias encontrado para exportar.', 'info')
-                return redirect(url_for('pessoal_bp.ferias_module'))
-
-            df = pd.DataFrame(ferias_data)
-
-            df = df.rename(columns={
-                'ID_Ferias': 'ID Férias',
-                'Matricula_Funcionario': 'Matrícula',
-                'Nome_Funcionario': 'Nome do Funcionário',
-                'Periodo_Aquisitivo_Inicio': 'Início Período Aquisitivo',
-                'Periodo_Aquisitivo_Fim': 'Fim Período Aquisitivo',
-                'Data_Inicio_Gozo': 'Início Gozo',
-                'Data_Fim_Gozo': 'Fim Gozo',
-                'Dias_Gozo': 'Dias de Gozo',
-                'Status_Ferias': 'Status',
-                'Observacoes': 'Observações',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Férias', 'Matrícula', 'Nome do Funcionário',
-                'Início Período Aquisitivo', 'Fim Período Aquisitivo',
-                'Início Gozo', 'Fim Gozo', 'Dias de Gozo', 'Status',
-                'Observações', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_ferias.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Férias para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Férias Excel: {e}")
+        filtros = dict(
+            search_matricula=request.args.get('matricula'),
+            search_status=request.args.get('status'),
+            search_periodo_inicio=datetime.strptime(search_periodo_inicio, '%Y-%m-%d').date() if search_periodo_inicio else None,
+            search_periodo_fim=datetime.strptime(search_periodo_fim, '%Y-%m-%d').date() if search_periodo_fim else None
+        )
+    except ValueError:
+        flash('Formato de data inválido nos filtros de exportação. Use AAAA-MM-DD.', 'danger')
         return redirect(url_for('pessoal_bp.ferias_module'))
+    return exportar(EXPORT_FERIAS, lambda db_base: PessoalManager(db_base, current_user.tenant_id).get_all_ferias(**filtros, stream=True))
 
 # ===============================================================
 # 2.6 ROTAS DE DEPENDENTES - PESSOAL
@@ -2346,11 +2145,16 @@ def dependentes_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            dependentes = pessoal_manager.get_all_dependentes(
+            page_token, page_size = get_page_args()
+            pagina = pessoal_manager.get_all_dependentes(
                 search_matricula=search_matricula,
                 search_nome=search_nome,
-                search_parentesco=search_parentesco
+                search_parentesco=search_parentesco,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            dependentes = pagina['items']
 
             processed_dependentes = []
             for dep in dependentes:
@@ -2358,15 +2162,14 @@ def dependentes_module():
                 dep_copy['Idade'] = calculate_age(dep_copy.get('Data_Nascimento'))
                 processed_dependentes.append(dep_copy)
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
 
             parentesco_options = ['Filho(a)', 'Cônjuge', 'Pai', 'Mãe', 'Irmão(ã)', 'Outro']
 
         return render_template(
             'pessoal/dependentes/dependentes_module.html',
             user=current_user,
+            pagination=pagina,
             dependentes=processed_dependentes,
-            all_funcionarios=all_funcionarios,
             parentesco_options=parentesco_options,
             selected_matricula=search_matricula,
             selected_nome=search_nome,
@@ -2393,7 +2196,6 @@ def add_dependente():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             parentesco_options = ['Filho(a)', 'Cônjuge', 'Pai', 'Mãe', 'Irmão(ã)', 'Outro']
 
             form_data_to_template = {}
@@ -2449,7 +2251,6 @@ def add_dependente():
                 return render_template(
                     'pessoal/dependentes/add_dependente.html',
                     user=current_user,
-                    all_funcionarios=all_funcionarios,
                     parentesco_options=parentesco_options,
                     form_data=form_data_to_template
                 )
@@ -2474,7 +2275,6 @@ def edit_dependente(dependente_id):
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             parentesco_options = ['Filho(a)', 'Cônjuge', 'Pai', 'Mãe', 'Irmão(ã)', 'Outro']
 
             dependente_from_db = pessoal_manager.get_dependente_by_id(dependente_id)
@@ -2541,7 +2341,6 @@ def edit_dependente(dependente_id):
                 'pessoal/dependentes/edit_dependente.html',
                 user=current_user,
                 dependente=form_data_to_template,
-                all_funcionarios=all_funcionarios,
                 parentesco_options=parentesco_options
             )
     except mysql.connector.Error as e:
@@ -2616,75 +2415,32 @@ def dependente_details(dependente_id):
 # ---------------------------------------------------------------
 # 2.6.5 ROTA DE DEPENDENTES - EXPORTAR P/ EXCEL- PESSOAL
 # ---------------------------------------------------------------
+EXPORT_DEPENDENTES = ExportSpec('relatorio_dependentes', [
+    ('ID_Dependente', 'ID Dependente'),
+    ('Matricula_Funcionario', 'Matrícula Funcionário'),
+    ('Nome_Funcionario', 'Nome do Funcionário'),
+    ('Nome_Completo', 'Nome do Dependente'),
+    ('Parentesco', 'Parentesco'),
+    ('Data_Nascimento', 'Data de Nascimento'),
+    ('Data_Nascimento', 'Idade (anos)', calculate_age),
+    ('Cpf', 'CPF'),
+    ('Contato_Emergencia', 'Contato de Emergência', sim_nao),
+    ('Telefone_Emergencia', 'Telefone de Emergência'),
+    ('Observacoes', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Dependentes', 'Nenhum dependente encontrado para exportar.', 'pessoal_bp.dependentes_module')
+
 @pessoal_bp.route('/dependentes/export/excel')
 @login_required
 @module_required('Pessoal')
 def export_dependentes_excel():
-
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-
-            search_matricula = request.args.get('matricula')
-            search_nome = request.args.get('nome')
-            search_parentesco = request.args.get('parentesco')
-
-            dependentes_data = pessoal_manager.get_all_dependentes(
-                search_matricula=search_matricula,
-                search_nome=search_nome,
-                search_parentesco=search_parentesco
-            )
-
-            if not dependentes_data:
-                flash('Nenhum dependente encontrado para exportar.', 'info')
-                return redirect(url_for('pessoal_bp.dependentes_module'))
-
-            for dep in dependentes_data:
-                dep['Idade'] = calculate_age(dep.get('Data_Nascimento'))
-
-            df = pd.DataFrame(dependentes_data)
-
-            df = df.rename(columns={
-                'ID_Dependente': 'ID Dependente',
-                'Matricula_Funcionario': 'Matrícula Funcionário',
-                'Nome_Funcionario': 'Nome do Funcionário',
-                'Nome_Completo': 'Nome do Dependente',
-                'Parentesco': 'Parentesco',
-                'Data_Nascimento': 'Data de Nascimento',
-                'Idade': 'Idade (anos)', 
-                'Cpf': 'CPF',
-                'Contato_Emergencia': 'Contato de Emergência',
-                'Telefone_Emergencia': 'Telefone de Emergência',
-                'Observacoes': 'Observações',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            df['Contato de Emergência'] = df['Contato de Emergência'].apply(lambda x: 'Sim' if x else 'Não')
-
-            ordered_columns = [
-                'ID Dependente', 'Matrícula Funcionário', 'Nome do Funcionário',
-                'Nome do Dependente', 'Parentesco', 'Data de Nascimento', 'Idade (anos)', 'CPF',
-                'Contato de Emergência', 'Telefone de Emergência', 'Observações',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_dependentes.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Dependentes para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Dependentes Excel: {e}")
-        return redirect(url_for('pessoal_bp.dependentes_module'))
+    filtros = dict(
+        search_matricula=request.args.get('matricula'),
+        search_nome=request.args.get('nome'),
+        search_parentesco=request.args.get('parentesco')
+    )
+    return exportar(EXPORT_DEPENDENTES, lambda db_base: PessoalManager(db_base, current_user.tenant_id).get_all_dependentes(**filtros, stream=True))
 
 # ---------------------------------------------------------------
 # 2.6.6 ROTA DE DEPENDENTES - DASHBOARD - PESSOAL
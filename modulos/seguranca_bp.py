@@ -3,10 +3,8 @@
 import mysql.connector
 import os
 from datetime import datetime, date, timedelta
-import pandas as pd
-from io import BytesIO
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, send_file
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app
 from flask_login import login_required, current_user
 
 # Importações dos managers de banco de dados
@@ -18,6 +16,12 @@ from database.db_seguranca_manager import SegurancaManager
 # Importação da função de análise de permissão do usuário aos módulos através do decorator @module_required('Segurança')
 from utils import module_required
 
+# Paginação keyset das listagens (?page=<token>&page_size=<n>)
+from utils import get_page_args
+
+# Exportação declarativa em streaming (XLSX/CSV) das rotas export_*_excel
+from modulos.exportacao import ExportSpec, exportar, sim_nao
+
 # Crie a instância do Blueprint para o Módulo Segurança
 seguranca_bp = Blueprint('seguranca_bp', __name__, url_prefix='/seguranca')
 
@@ -117,17 +121,20 @@ def incidentes_acidentes_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
             obras_manager = ObrasManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            incidentes = seguranca_manager.get_all_incidentes_acidentes(
+            page_token, page_size = get_page_args()
+            pagina = seguranca_manager.get_all_incidentes_acidentes(
                 search_tipo=search_tipo,
                 search_status=search_status,
                 search_obra_id=search_obra_id_int,
-                search_responsavel_matricula=search_responsavel_matricula
+                search_responsavel_matricula=search_responsavel_matricula,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            incidentes = pagina['items']
 
             all_obras = obras_manager.get_all_obras_for_dropdown()
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
 
             tipo_registro_options = ['Incidente', 'Acidente']
             status_registro_options = ['Aberto', 'Em Investigação', 'Concluído', 'Fechado']
@@ -135,9 +142,9 @@ def incidentes_acidentes_module():
         return render_template(
             'seguranca/incidentes_acidentes/incidentes_acidentes_module.html',
             user=current_user,
+            pagination=pagina,
             incidentes=incidentes,
             all_obras=all_obras,
-            all_funcionarios=all_funcionarios,
             tipo_registro_options=tipo_registro_options,
             status_registro_options=status_registro_options,
             selected_tipo=search_tipo,
@@ -165,11 +172,7 @@ def add_incidente_acidente():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             tipo_registro_options = ['Incidente', 'Acidente']
             status_registro_options = ['Aberto', 'Em Investigação', 'Concluído', 'Fechado']
 
@@ -241,8 +244,6 @@ def add_incidente_acidente():
             return render_template(
                 'seguranca/incidentes_acidentes/add_incidente_acidente.html',
                 user=current_user,
-                all_obras=all_obras,
-                all_funcionarios=all_funcionarios,
                 tipo_registro_options=tipo_registro_options,
                 status_registro_options=status_registro_options,
                 form_data=form_data_to_template
@@ -267,16 +268,12 @@ def edit_incidente_acidente(incidente_id):
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            obras_manager = ObrasManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
             incidente_from_db = seguranca_manager.get_incidente_acidente_by_id(incidente_id)
             if not incidente_from_db:
                 flash('Registro de Incidente/Acidente não encontrado.', 'danger')
                 return redirect(url_for('seguranca_bp.incidentes_acidentes_module'))
 
-            all_obras = obras_manager.get_all_obras_for_dropdown()
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             tipo_registro_options = ['Incidente', 'Acidente']
             status_registro_options = ['Aberto', 'Em Investigação', 'Concluído', 'Fechado']
 
@@ -354,8 +351,6 @@ def edit_incidente_acidente(incidente_id):
                         'seguranca/incidentes_acidentes/edit_incidente_acidente.html',
                         user=current_user,
                         incidente=form_data_to_template, # Passa form_data_to_template como 'incidente'
-                        all_obras=all_obras,
-                        all_funcionarios=all_funcionarios,
                         tipo_registro_options=tipo_registro_options,
                         status_registro_options=status_registro_options
                     )
@@ -397,8 +392,6 @@ def edit_incidente_acidente(incidente_id):
                 'seguranca/incidentes_acidentes/edit_incidente_acidente.html',
                 user=current_user,
                 incidente=form_data_to_template, # Passa o dicionário com chaves minúsculas
-                all_obras=all_obras,
-                all_funcionarios=all_funcionarios,
                 tipo_registro_options=tipo_registro_options,
                 status_registro_options=status_registro_options
             )
@@ -471,83 +464,42 @@ def incidente_acidente_details(incidente_id):
 # ---------------------------------------------------------------
 # 4.1.5 ROTA INCIDENTES_ACIDENTES - EXPORTAR P/ EXCEL - SEGURANCA
 # ---------------------------------------------------------------
+EXPORT_INCIDENTES_ACIDENTES = ExportSpec('relatorio_incidentes_acidentes', [
+    ('ID_Incidente_Acidente', 'ID Registro'),
+    ('Tipo_Registro', 'Tipo de Registro'),
+    ('Data_Hora_Ocorrencia', 'Data/Hora Ocorrência'),
+    ('Local_Ocorrencia', 'Local'),
+    ('Numero_Obra', 'Número da Obra'),
+    ('Nome_Obra', 'Nome da Obra'),
+    ('Descricao_Resumida', 'Descrição Resumida'),
+    ('Status_Registro', 'Status'),
+    ('Responsavel_Investigacao_Funcionario_Matricula', 'Matrícula Responsável'),
+    ('Nome_Responsavel_Investigacao', 'Nome Responsável'),
+    ('Data_Fechamento', 'Data de Fechamento'),
+    ('Causas_Identificadas', 'Causas'),
+    ('Acoes_Corretivas_Tomadas', 'Ações Corretivas'),
+    ('Acoes_Preventivas_Recomendadas', 'Ações Preventivas'),
+    ('Observacoes', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Incidentes/Acidentes', 'Nenhum registro de Incidente/Acidente encontrado para exportar.', 'seguranca_bp.incidentes_acidentes_module')
+
 @seguranca_bp.route('/incidentes_acidentes/export/excel')
 @login_required
 @module_required('Segurança')
 def export_incidentes_acidentes_excel():
-    
+    search_obra_id = request.args.get('obra_id')
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-
-            search_tipo = request.args.get('tipo_registro')
-            search_status = request.args.get('status_registro')
-            search_obra_id = request.args.get('obra_id')
-            search_responsavel_matricula = request.args.get('responsavel_matricula')
-
-            try:
-                search_obra_id_int = int(search_obra_id) if search_obra_id else None
-            except ValueError:
-                search_obra_id_int = None
-
-            incidentes_data = seguranca_manager.get_all_incidentes_acidentes(
-                search_tipo=search_tipo,
-                search_status=search_status,
-                search_obra_id=search_obra_id_int,
-                search_responsavel_matricula=search_responsavel_matricula
-            )
-
-            if not incidentes_data:
-                flash('Nenhum registro de Incidente/Acidente encontrado para exportar.', 'info')
-                return redirect(url_for('seguranca_bp.incidentes_acidentes_module'))
-
-            df = pd.DataFrame(incidentes_data)
-
-            df = df.rename(columns={
-                'ID_Incidente_Acidente': 'ID Registro',
-                'Tipo_Registro': 'Tipo de Registro',
-                'Data_Hora_Ocorrencia': 'Data/Hora Ocorrência',
-                'Local_Ocorrencia': 'Local',
-                'ID_Obras': 'ID Obra',
-                'Descricao_Resumida': 'Descrição Resumida',
-                'Causas_Identificadas': 'Causas',
-                'Acoes_Corretivas_Tomadas': 'Ações Corretivas',
-                'Acoes_Preventivas_Recomendadas': 'Ações Preventivas',
-                'Status_Registro': 'Status',
-                'Responsavel_Investigacao_Funcionario_Matricula': 'Matrícula Responsável',
-                'Nome_Responsavel_Investigacao': 'Nome Responsável',
-                'Data_Fechamento': 'Data de Fechamento',
-                'Observacoes': 'Observações',
-                'Numero_Obra': 'Número da Obra',
-                'Nome_Obra': 'Nome da Obra',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID Registro', 'Tipo de Registro', 'Data/Hora Ocorrência', 'Local',
-                'Número da Obra', 'Nome da Obra', 'Descrição Resumida', 'Status',
-                'Matrícula Responsável', 'Nome Responsável', 'Data de Fechamento',
-                'Causas', 'Ações Corretivas', 'Ações Preventivas', 'Observações',
-                'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_incidentes_acidentes.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Incidentes/Acidentes para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Incidentes/Acidentes Excel: {e}")
-        return redirect(url_for('seguranca_bp.incidentes_acidentes_module'))
+        search_obra_id_int = int(search_obra_id) if search_obra_id else None
+    except ValueError:
+        search_obra_id_int = None
+    filtros = dict(
+        search_tipo=request.args.get('tipo_registro'),
+        search_status=request.args.get('status_registro'),
+        search_obra_id=search_obra_id_int,
+        search_responsavel_matricula=request.args.get('responsavel_matricula')
+    )
+    return exportar(EXPORT_INCIDENTES_ACIDENTES, lambda db_base: SegurancaManager(db_base, current_user.tenant_id).get_all_incidentes_acidentes(**filtros, stream=True))
 
 # ===============================================================
 # 4.2 ROTAS DE ASOS - SEGURANCA
@@ -575,25 +527,28 @@ def asos_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            asos = seguranca_manager.get_all_asos(
+            page_token, page_size = get_page_args()
+            pagina = seguranca_manager.get_all_asos(
                 search_matricula=search_matricula,
                 search_tipo=search_tipo,
                 search_resultado=search_resultado,
                 search_data_emissao_inicio=search_data_emissao_inicio_obj,
-                search_data_emissao_fim=search_data_emissao_fim_obj
+                search_data_emissao_fim=search_data_emissao_fim_obj,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            asos = pagina['items']
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             tipo_aso_options = ['Admissional', 'Periódico', 'Mudança de Função', 'Retorno ao Trabalho', 'Demissional', 'Outro']
             resultado_options = ['Apto', 'Inapto', 'Apto com Restrições']
 
         return render_template(
             'seguranca/asos/asos_module.html',
             user=current_user,
+            pagination=pagina,
             asos=asos,
-            all_funcionarios=all_funcionarios,
             tipo_aso_options=tipo_aso_options,
             resultado_options=resultado_options,
             selected_matricula=search_matricula,
@@ -623,9 +578,7 @@ def add_aso():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             tipo_aso_options = ['Admissional', 'Periódico', 'Mudança de Função', 'Retorno ao Trabalho', 'Demissional', 'Outro']
             resultado_options = ['Apto', 'Inapto', 'Apto com Restrições']
 
@@ -681,7 +634,6 @@ def add_aso():
             return render_template(
                 'seguranca/asos/add_aso.html',
                 user=current_user,
-                all_funcionarios=all_funcionarios,
                 tipo_aso_options=tipo_aso_options,
                 resultado_options=resultado_options,
                 form_data=form_data_to_template
@@ -706,14 +658,12 @@ def edit_aso(aso_id):
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
 
             aso_from_db = seguranca_manager.get_aso_by_id(aso_id)
             if not aso_from_db:
                 flash('ASO não encontrado.', 'danger')
                 return redirect(url_for('seguranca_bp.asos_module'))
 
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
             tipo_aso_options = ['Admissional', 'Periódico', 'Mudança de Função', 'Retorno ao Trabalho', 'Demissional', 'Outro']
             resultado_options = ['Apto', 'Inapto', 'Apto com Restrições']
 
@@ -776,7 +726,6 @@ def edit_aso(aso_id):
                 'seguranca/asos/edit_aso.html',
                 user=current_user,
                 aso=form_data_to_template,
-                all_funcionarios=all_funcionarios,
                 tipo_aso_options=tipo_aso_options,
                 resultado_options=resultado_options
             )
@@ -849,81 +798,42 @@ def aso_details(aso_id):
 # ---------------------------------------------------------------
 # 4.2.5 ROTA ASOS - EXPORTAR P/ EXCEL - SEGURANCA
 # ---------------------------------------------------------------
+EXPORT_ASOS = ExportSpec('relatorio_asos', [
+    ('ID_ASO', 'ID ASO'),
+    ('Matricula_Funcionario', 'Matrícula Funcionário'),
+    ('Nome_Funcionario', 'Nome do Funcionário'),
+    ('Tipo_ASO', 'Tipo de ASO'),
+    ('Data_Emissao', 'Data de Emissão'),
+    ('Data_Vencimento', 'Data de Vencimento'),
+    ('Resultado', 'Resultado'),
+    ('Medico_Responsavel', 'Médico Responsável'),
+    ('Observacoes', 'Observações'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'ASOs', 'Nenhum ASO encontrado para exportar.', 'seguranca_bp.asos_module')
+
 @seguranca_bp.route('/asos/export/excel')
 @login_required
 @module_required('Segurança')
 def export_asos_excel():
-    
+    search_data_emissao_inicio = request.args.get('data_emissao_inicio')
+    search_data_emissao_fim = request.args.get('data_emissao_fim')
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
-
-            search_matricula = request.args.get('matricula')
-            search_tipo = request.args.get('tipo_aso')
-            search_resultado = request.args.get('resultado')
-            search_data_emissao_inicio = request.args.get('data_emissao_inicio')
-            search_data_emissao_fim = request.args.get('data_emissao_fim')
-
-            try:
-                search_data_emissao_inicio_obj = datetime.strptime(search_data_emissao_inicio, '%Y-%m-%d').date() if search_data_emissao_inicio else None
-            except ValueError:
-                search_data_emissao_inicio_obj = None
-            try:
-                search_data_emissao_fim_obj = datetime.strptime(search_data_emissao_fim, '%Y-%m-%d').date() if search_data_emissao_fim else None
-            except ValueError:
-                search_data_emissao_fim_obj = None
-
-            asos_data = seguranca_manager.get_all_asos(
-                search_matricula=search_matricula,
-                search_tipo=search_tipo,
-                search_resultado=search_resultado,
-                search_data_emissao_inicio=search_data_emissao_inicio_obj,
-                search_data_emissao_fim=search_data_emissao_fim_obj
-            )
-
-            if not asos_data:
-                flash('Nenhum ASO encontrado para exportar.', 'info')
-                return redirect(url_for('seguranca_bp.asos_module'))
-
-            df = pd.DataFrame(asos_data)
-
-            df = df.rename(columns={
-                'ID_ASO': 'ID ASO',
-                'Matricula_Funcionario': 'Matrícula Funcionário',
-                'Nome_Funcionario': 'Nome do Funcionário',
-                'Tipo_ASO': 'Tipo de ASO',
-                'Data_Emissao': 'Data de Emissão',
-                'Data_Vencimento': 'Data de Vencimento',
-                'Resultado': 'Resultado',
-                'Medico_Responsavel': 'Médico Responsável',
-                'Observacoes': 'Observações',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            ordered_columns = [
-                'ID ASO', 'Matrícula Funcionário', 'Nome do Funcionário', 'Tipo de ASO',
-                'Data de Emissão', 'Data de Vencimento', 'Resultado', 'Médico Responsável',
-                'Observações', 'Data de Criação', 'Última Modificação'
-            ]
-            df = df[[col for col in ordered_columns if col in df.columns]]
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_asos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar ASOs para Excel: {e}", 'danger')
-        print(f"Erro ao exportar ASOs Excel: {e}")
-        return redirect(url_for('seguranca_bp.asos_module'))
+        search_data_emissao_inicio_obj = datetime.strptime(search_data_emissao_inicio, '%Y-%m-%d').date() if search_data_emissao_inicio else None
+    except ValueError:
+        search_data_emissao_inicio_obj = None
+    try:
+        search_data_emissao_fim_obj = datetime.strptime(search_data_emissao_fim, '%Y-%m-%d').date() if search_data_emissao_fim else None
+    except ValueError:
+        search_data_emissao_fim_obj = None
+    filtros = dict(
+        search_matricula=request.args.get('matricula'),
+        search_tipo=request.args.get('tipo_aso'),
+        search_resultado=request.args.get('resultado'),
+        search_data_emissao_inicio=search_data_emissao_inicio_obj,
+        search_data_emissao_fim=search_data_emissao_fim_obj
+    )
+    return exportar(EXPORT_ASOS, lambda db_base: SegurancaManager(db_base, current_user.tenant_id).get_all_asos(**filtros, stream=True))
 
 # ===============================================================
 # 4.3 ROTAS DE TREINAMENTOS - SEGURANCA
@@ -940,16 +850,22 @@ def treinamentos_module():
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
 
-            treinamentos = seguranca_manager.get_all_treinamentos(
+            page_token, page_size = get_page_args()
+            pagina = seguranca_manager.get_all_treinamentos(
                 search_nome=search_nome,
-                search_tipo=search_tipo
+                search_tipo=search_tipo,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            treinamentos = pagina['items']
 
             tipo_treinamento_options = ['Obrigatório', 'Reciclagem', 'Voluntário', 'Outro']
 
         return render_template(
             'seguranca/treinamentos/treinamentos_module.html',
             user=current_user,
+            pagination=pagina,
             treinamentos=treinamentos,
             tipo_treinamento_options=tipo_treinamento_options,
             selected_nome=search_nome,
@@ -1248,56 +1164,27 @@ def treinamento_details(treinamento_id):
 # ---------------------------------------------------------------
 # 4.3.5 ROTA TREINAMENTOS - EXPORTAR P/ EXCEL - SEGURANCA
 # ---------------------------------------------------------------
+EXPORT_TREINAMENTOS = ExportSpec('relatorio_treinamentos', [
+    ('ID_Treinamento', 'ID Treinamento'),
+    ('Nome_Treinamento', 'Nome do Treinamento'),
+    ('Descricao', 'Descrição'),
+    ('Carga_Horaria_Horas', 'Carga Horária (h)'),
+    ('Tipo_Treinamento', 'Tipo de Treinamento'),
+    ('Validade_Dias', 'Validade (dias)'),
+    ('Instrutor_Responsavel', 'Instrutor Responsável'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Treinamentos', 'Nenhum treinamento encontrado para exportar.', 'seguranca_bp.treinamentos_module')
+
 @seguranca_bp.route('/treinamentos/export/excel')
 @login_required
 @module_required('Segurança')
 def export_treinamentos_excel():
-    
-    try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-
-            search_nome = request.args.get('nome_treinamento')
-            search_tipo = request.args.get('tipo_treinamento')
-
-            treinamentos_data = seguranca_manager.get_all_treinamentos(
-                search_nome=search_nome,
-                search_tipo=search_tipo
-            )
-
-            if not treinamentos_data:
-                flash('Nenhum treinamento encontrado para exportar.', 'info')
-                return redirect(url_for('seguranca_bp.treinamentos_module'))
-
-            df = pd.DataFrame(treinamentos_data)
-
-            df = df.rename(columns={
-                'ID_Treinamento': 'ID Treinamento',
-                'Nome_Treinamento': 'Nome do Treinamento',
-                'Descricao': 'Descrição',
-                'Carga_Horaria_Horas': 'Carga Horária (h)',
-                'Tipo_Treinamento': 'Tipo de Treinamento',
-                'Validade_Dias': 'Validade (dias)',
-                'Instrutor_Responsavel': 'Instrutor Responsável',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_treinamentos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Treinamentos para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Treinamentos Excel: {e}")
-        return redirect(url_for('seguranca_bp.treinamentos_module'))
+    filtros = dict(
+        search_nome=request.args.get('nome_treinamento'),
+        search_tipo=request.args.get('tipo_treinamento')
+    )
+    return exportar(EXPORT_TREINAMENTOS, lambda db_base: SegurancaManager(db_base, current_user.tenant_id).get_all_treinamentos(**filtros, stream=True))
 
 
 # ---------------------------------------------------------------
@@ -1382,26 +1269,28 @@ def treinamentos_agendamentos_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            # --- CORREÇÃO AQUI: INSTANCIAR PessoalManager ---
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id)
             # --- FIM DA CORREÇÃO ---
 
-            agendamentos = seguranca_manager.get_all_treinamentos_agendamentos(
+            page_token, page_size = get_page_args()
+            pagina = seguranca_manager.get_all_treinamentos_agendamentos(
                 search_treinamento_id=search_treinamento_id_int,
                 search_status=search_status,
                 search_data_inicio=data_inicio,
-                search_data_fim=data_fim
+                search_data_fim=data_fim,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            agendamentos = pagina['items']
 
             all_treinamentos = seguranca_manager.get_all_treinamentos_for_dropdown()
-            # all_funcionarios = seguranca_manager.get_all_funcionarios_for_dropdown() # Removido, agora vem de pessoal_manager
-            all_funcionarios = pessoal_manager.get_all_funcionarios() # <-- USA O pessoal_manager INSTANCIADO ACIMA
 
             status_agendamento_options = ['Programado', 'Realizado', 'Cancelado', 'Adiado']
 
         return render_template(
             'seguranca/treinamentos/agendamentos/agendamentos_module.html',
             user=current_user,
+            pagination=pagina,
             agendamentos=agendamentos,
             all_treinamentos=all_treinamentos,
             status_agendamento_options=status_agendamento_options,
@@ -1434,7 +1323,6 @@ def add_treinamento_agendamento():
             # que não existe. Deve ser de pessoal_manager.get_all_funcionarios().
             pessoal_manager = PessoalManager(db_base, current_user.tenant_id) # Precisa instanciar aqui
 
-            all_treinamentos = seguranca_manager.get_all_treinamentos_for_dropdown()
             status_agendamento_options = ['Programado', 'Realizado', 'Cancelado', 'Adiado']
             form_data_to_template = {}
 
@@ -1480,7 +1368,6 @@ def add_treinamento_agendamento():
                     return render_template(
                         'seguranca/treinamentos/agendamentos/add_agendamento.html',
                         user=current_user,
-                        all_treinamentos=all_treinamentos,
                         status_agendamento_options=status_agendamento_options,
                         form_data=form_data_to_template
                     )
@@ -1498,7 +1385,6 @@ def add_treinamento_agendamento():
             return render_template(
                 'seguranca/treinamentos/agendamentos/add_agendamento.html',
                 user=current_user,
-                all_treinamentos=all_treinamentos,
                 status_agendamento_options=status_agendamento_options,
                 form_data=form_data_to_template
             )
@@ -1531,7 +1417,6 @@ def edit_treinamento_agendamento(agendamento_id):
                 flash('Agendamento não encontrado.', 'danger')
                 return redirect(url_for('seguranca_bp.treinamentos_agendamentos_module'))
 
-            all_treinamentos = seguranca_manager.get_all_treinamentos_for_dropdown()
             status_agendamento_options = ['Programado', 'Realizado', 'Cancelado', 'Adiado']
             form_data_to_template = {}
 
@@ -1580,7 +1465,6 @@ def edit_treinamento_agendamento(agendamento_id):
                         'seguranca/treinamentos/agendamentos/edit_agendamento.html',
                         user=current_user,
                         agendamento=form_data_to_template,
-                        all_treinamentos=all_treinamentos,
                         status_agendamento_options=status_agendamento_options
                     )
 
@@ -1603,7 +1487,6 @@ def edit_treinamento_agendamento(agendamento_id):
                 'seguranca/treinamentos/agendamentos/edit_agendamento.html',
                 user=current_user,
                 agendamento=form_data_to_template,
-                all_treinamentos=all_treinamentos,
                 status_agendamento_options=status_agendamento_options
             )
     except mysql.connector.Error as e:
@@ -1679,78 +1562,48 @@ def treinamento_agendamento_details(agendamento_id):
 # ·······························································
 # 4.3.7.5 TREINAMENTOS AGENDAMENTOS EXPORTAR P/ EXCEL - SEGURANCA
 # ·······························································
+EXPORT_TREINAMENTOS_AGENDAMENTOS = ExportSpec('relatorio_agendamentos_treinamentos', [
+    ('ID_Agendamento', 'ID Agendamento'),
+    ('ID_Treinamento', 'ID Treinamento'),
+    ('Data_Hora_Inicio', 'Início'),
+    ('Data_Hora_Fim', 'Fim'),
+    ('Local_Treinamento', 'Local'),
+    ('Status_Agendamento', 'Status'),
+    ('Observacoes', 'Observações'),
+    ('Nome_Treinamento', 'Nome do Treinamento'),
+    ('Tipo_Treinamento', 'Tipo de Treinamento'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Agendamentos', 'Nenhum agendamento de treinamento encontrado para exportar.', 'seguranca_bp.treinamentos_agendamentos_module')
+
 @seguranca_bp.route('/treinamentos/agendamentos/export/excel')
 @login_required
 @module_required('Segurança')
 def export_treinamentos_agendamentos_excel():
-    
+    search_treinamento_id = request.args.get('treinamento_id')
+    search_data_inicio_str = request.args.get('data_inicio')
+    search_data_fim_str = request.args.get('data_fim')
+    data_inicio = None
+    data_fim = None
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-
-            search_treinamento_id = request.args.get('treinamento_id')
-            search_status = request.args.get('status_agendamento')
-            search_data_inicio_str = request.args.get('data_inicio')
-            search_data_fim_str = request.args.get('data_fim')
-
-            data_inicio = None
-            data_fim = None
-            try:
-                if search_data_inicio_str:
-                    data_inicio = datetime.strptime(search_data_inicio_str, '%Y-%m-%d').date()
-                if search_data_fim_str:
-                    data_fim = datetime.strptime(search_data_fim_str, '%Y-%m-%d').date()
-            except ValueError:
-                flash('Formato de data inválido nos filtros de exportação. Use AAAA-MM-DD.', 'danger')
-                return redirect(url_for('seguranca_bp.treinamentos_agendamentos_module'))
-
-            try:
-                search_treinamento_id_int = int(search_treinamento_id) if search_treinamento_id else None
-            except ValueError:
-                search_treinamento_id_int = None
-
-            agendamentos_data = seguranca_manager.get_all_treinamentos_agendamentos(
-                search_treinamento_id=search_treinamento_id_int,
-                search_status=search_status,
-                search_data_inicio=data_inicio,
-                search_data_fim=data_fim
-            )
-
-            if not agendamentos_data:
-                flash('Nenhum agendamento de treinamento encontrado para exportar.', 'info')
-                return redirect(url_for('seguranca_bp.treinamentos_agendamentos_module'))
-
-            df = pd.DataFrame(agendamentos_data)
-
-            df = df.rename(columns={
-                'ID_Agendamento': 'ID Agendamento',
-                'ID_Treinamento': 'ID Treinamento',
-                'Nome_Treinamento': 'Nome do Treinamento',
-                'Tipo_Treinamento': 'Tipo de Treinamento',
-                'Data_Hora_Inicio': 'Início',
-                'Data_Hora_Fim': 'Fim',
-                'Local_Treinamento': 'Local',
-                'Status_Agendamento': 'Status',
-                'Observacoes': 'Observações',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_agendamentos_treinamentos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Agendamentos para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Agendamentos Excel: {e}")
+        if search_data_inicio_str:
+            data_inicio = datetime.strptime(search_data_inicio_str, '%Y-%m-%d').date()
+        if search_data_fim_str:
+            data_fim = datetime.strptime(search_data_fim_str, '%Y-%m-%d').date()
+    except ValueError:
+        flash('Formato de data inválido nos filtros de exportação. Use AAAA-MM-DD.', 'danger')
         return redirect(url_for('seguranca_bp.treinamentos_agendamentos_module'))
+    try:
+        search_treinamento_id_int = int(search_treinamento_id) if search_treinamento_id else None
+    except ValueError:
+        search_treinamento_id_int = None
+    filtros = dict(
+        search_treinamento_id=search_treinamento_id_int,
+        search_status=request.args.get('status_agendamento'),
+        search_data_inicio=data_inicio,
+        search_data_fim=data_fim
+    )
+    return exportar(EXPORT_TREINAMENTOS_AGENDAMENTOS, lambda db_base: SegurancaManager(db_base, current_user.tenant_id).get_all_treinamentos_agendamentos(**filtros, stream=True))
 
 # ---------------------------------------------------------------
 # 4.3.8 ROTAS TREINAMENTOS PARTICIPANTES - SEGURANCA
@@ -1773,33 +1626,33 @@ def treinamentos_participantes_module():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            # FIX: all_funcionarios estava sendo pego de seguranca_manager.get_all_funcionarios_for_dropdown()
-            # que não existe. Deve ser de pessoal_manager.get_all_funcionarios().
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id) # Precisa instanciar aqui
-            all_funcionarios = pessoal_manager.get_all_funcionarios()
 
             try:
                 search_agendamento_id_int = int(search_agendamento_id) if search_agendamento_id else None
             except ValueError:
                 search_agendamento_id_int = None
 
-            participantes = seguranca_manager.get_all_treinamentos_participantes(
+            page_token, page_size = get_page_args()
+            pagina = seguranca_manager.get_all_treinamentos_participantes(
                 search_agendamento_id=search_agendamento_id_int,
                 search_matricula=search_matricula,
-                search_presenca=presenca_filter
+                search_presenca=presenca_filter,
+                page_token=page_token,
+                page_size=page_size,
+                count='exact'
             )
+            participantes = pagina['items']
 
             all_agendamentos = seguranca_manager.get_all_agendamentos_for_dropdown()
-            # all_funcionarios = seguranca_manager.get_all_funcionarios_for_dropdown() # Removido, agora vem de pessoal_manager.get_all_funcionarios()
 
             presenca_options = [('True', 'Presente'), ('False', 'Ausente')]
 
         return render_template(
             'seguranca/treinamentos/participantes/participantes_module.html',
             user=current_user,
+            pagination=pagina,
             participantes=participantes,
             all_agendamentos=all_agendamentos,
-            all_funcionarios=all_funcionarios,
             presenca_options=presenca_options,
             selected_agendamento_id=search_agendamento_id_int,
             selected_matricula=search_matricula,
@@ -1825,12 +1678,7 @@ def add_treinamento_participante():
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            # FIX: all_funcionarios estava sendo pego de seguranca_manager.get_all_funcionarios_for_dropdown()
-            # que não existe. Deve ser de pessoal_manager.get_all_funcionarios().
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id) # Precisa instanciar aqui
 
-            all_agendamentos = seguranca_manager.get_all_agendamentos_for_dropdown()
-            all_funcionarios = pessoal_manager.get_all_funcionarios() # Pegar de pessoal_manager
 
             form_data_to_template = {}
 
@@ -1891,8 +1739,6 @@ def add_treinamento_participante():
                     return render_template(
                         'seguranca/treinamentos/participantes/add_participante.html',
                         user=current_user,
-                        all_agendamentos=all_agendamentos,
-                        all_funcionarios=all_funcionarios,
                         form_data=form_data_to_template
                     )
 
@@ -1916,8 +1762,6 @@ def add_treinamento_participante():
             return render_template(
                 'seguranca/treinamentos/participantes/add_participante.html',
                 user=current_user,
-                all_agendamentos=all_agendamentos,
-                all_funcionarios=all_funcionarios,
                 form_data=form_data_to_template
             )
     except mysql.connector.Error as e:
@@ -1940,17 +1784,12 @@ def edit_treinamento_participante(participante_id):
     try:
         with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
             seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-            # FIX: all_funcionarios estava sendo pego de seguranca_manager.get_all_funcionarios_for_dropdown()
-            # que não existe. Deve ser de pessoal_manager.get_all_funcionarios().
-            pessoal_manager = PessoalManager(db_base, current_user.tenant_id) # Precisa instanciar aqui
 
             participante_from_db = seguranca_manager.get_treinamento_participante_by_id(participante_id)
             if not participante_from_db:
                 flash('Participante não encontrado.', 'danger')
                 return redirect(url_for('seguranca_bp.treinamentos_participantes_module'))
 
-            all_agendamentos = seguranca_manager.get_all_agendamentos_for_dropdown()
-            all_funcionarios = pessoal_manager.get_all_funcionarios() # Pegar de pessoal_manager
             form_data_to_template = {}
 
             if request.method == 'POST':
@@ -2015,8 +1854,6 @@ def edit_treinamento_participante(participante_id):
                         'seguranca/treinamentos/participantes/edit_participante.html',
                         user=current_user,
                         participante=form_data_to_template,
-                        all_agendamentos=all_agendamentos,
-                        all_funcionarios=all_funcionarios
                     )
 
                 success = seguranca_manager.update_treinamento_participante(
@@ -2039,8 +1876,6 @@ def edit_treinamento_participante(participante_id):
                 'seguranca/treinamentos/participantes/edit_participante.html',
                 user=current_user,
                 participante=form_data_to_template,
-                all_agendamentos=all_agendamentos,
-                all_funcionarios=all_funcionarios
             )
     except mysql.connector.Error as e:
         flash(f"Erro de banco de dados: {e}", 'danger')
@@ -2111,76 +1946,39 @@ def treinamento_participante_details(participante_id):
 # ·······························································
 # 4.3.8.5 TREINAMENTOS AGENDAMENTOS EXPORTAR P/ EXCEL - SEGURANCA
 # ·······························································
+EXPORT_TREINAMENTOS_PARTICIPANTES = ExportSpec('relatorio_participantes_treinamentos', [
+    ('ID_Participante', 'ID Participante'),
+    ('ID_Agendamento', 'ID Agendamento'),
+    ('Matricula_Funcionario', 'Matrícula Funcionário'),
+    ('Presenca', 'Presença', sim_nao),
+    ('Nota_Avaliacao', 'Nota de Avaliação'),
+    ('Data_Conclusao', 'Data de Conclusão'),
+    ('Certificado_Emitido', 'Certificado Emitido', sim_nao),
+    ('Data_Hora_Inicio', 'Data/Hora Agendamento'),
+    ('Nome_Treinamento', 'Nome do Treinamento'),
+    ('Nome_Funcionario', 'Nome do Funcionário'),
+    ('Data_Criacao', 'Data de Criação'),
+    ('Data_Modificacao', 'Última Modificação'),
+], 'Participantes', 'Nenhum participante encontrado para exportar.', 'seguranca_bp.treinamentos_participantes_module')
+
 @seguranca_bp.route('/treinamentos/participantes/export/excel')
 @login_required
 @module_required('Segurança')
 def export_treinamentos_participantes_excel():
-    
+    search_agendamento_id = request.args.get('agendamento_id')
+    search_presenca = request.args.get('presenca') # String 'True', 'False' ou None
+    presenca_filter = None
+    if search_presenca == 'True':
+        presenca_filter = True
+    elif search_presenca == 'False':
+        presenca_filter = False
     try:
-        with DatabaseManager(**current_app.config['DB_CONFIG']) as db_base:
-            seguranca_manager = SegurancaManager(db_base, current_user.tenant_id)
-
-            search_agendamento_id = request.args.get('agendamento_id')
-            search_matricula = request.args.get('matricula')
-            search_presenca = request.args.get('presenca') # String 'True', 'False' ou None
-
-            presenca_filter = None
-            if search_presenca == 'True':
-                presenca_filter = True
-            elif search_presenca == 'False':
-                presenca_filter = False
-
-            try:
-                search_agendamento_id_int = int(search_agendamento_id) if search_agendamento_id else None
-            except ValueError:
-                search_agendamento_id_int = None
-
-            participantes_data = seguranca_manager.get_all_treinamentos_participantes(
-                search_agendamento_id=search_agendamento_id_int,
-                search_matricula=search_matricula,
-                search_presenca=presenca_filter
-            )
-
-            if not participantes_data:
-                flash('Nenhum participante encontrado para exportar.', 'info')
-                return redirect(url_for('seguranca_bp.treinamentos_participantes_module'))
-
-            df = pd.DataFrame(participantes_data)
-
-            df = df.rename(columns={
-                'ID_Participante': 'ID Participante',
-                'ID_Agendamento': 'ID Agendamento',
-                'Matricula_Funcionario': 'Matrícula Funcionário',
-                'Nome_Funcionario': 'Nome do Funcionário',
-                'Presenca': 'Presença',
-                'Nota_Avaliacao': 'Nota de Avaliação',
-                'Data_Conclusao': 'Data de Conclusão',
-                'Certificado_Emitido': 'Certificado Emitido',
-                'Nome_Treinamento': 'Nome do Treinamento',
-                'Data_Hora_Inicio': 'Data/Hora Agendamento',
-                'Data_Criacao': 'Data de Criação',
-                'Data_Modificacao': 'Última Modificação'
-            })
-
-            # --- CORREÇÃO APLICADA AQUI ---
-            # O nome da coluna agora é 'Presença' (com acento), e não mais 'Presenca'.
-            df['Presença'] = df['Presença'].apply(lambda x: 'Sim' if x else 'Não')
-            
-            # Esta linha já estava correta, pois usa o nome novo 'Certificado Emitido'.
-            df['Certificado Emitido'] = df['Certificado Emitido'].apply(lambda x: 'Sim' if x else 'Não')
-
-            excel_buffer = BytesIO()
-            df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-
-            return send_file(
-                excel_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name='relatorio_participantes_treinamentos.xlsx'
-            )
-
-    except Exception as e:
-        flash(f"Ocorreu um erro ao exportar Participantes para Excel: {e}", 'danger')
-        print(f"Erro ao exportar Participantes Excel: {e}")
-        return redirect(url_for('seguranca_bp.treinamentos_participantes_module'))
\ No newline at end of file
+        search_agendamento_id_int = int(search_agendamento_id) if search_agendamento_id else None
+    except ValueError:
+        search_agendamento_id_int = None
+    filtros = dict(
+        search_agendamento_id=search_agendamento_id_int,
+        search_matricula=request.args.get('matricula'),
+        search_presenca=presenca_filter
+    )
+    return exportar(EXPORT_TREINAMENTOS_PARTICIPANTES, lambda db_base: SegurancaManager(db_base, current_user.tenant_id).get_all_treinamentos_participantes(**filtros, stream=True))
\ No newline at end of file
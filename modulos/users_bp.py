@@ -4,12 +4,13 @@ import mysql.connector
 import os
 from datetime import datetime, date
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, send_file
 from flask_login import login_required, current_user
 
 # Importações dos managers de banco de dados
 from database.db_base import DatabaseManager
 from database.db_user_manager import UserManager
+from database import perfilador
 from utils import admin_required
 
 # Crie a instância do Blueprint para o Módulo Usuários
@@ -303,4 +304,46 @@ def manage_user_permissions(user_id):
     except Exception as e: # Este except é para erros gerais do bloco principal
         flash(f"Ocorreu um erro inesperado ao carregar dados para gerenciamento de permissões: {e}", 'danger')
         print(f"Erro inesperado no GET de manage_user_permissions: {e}")
-        return redirect(url_for('users_bp.users_module'))
\ No newline at end of file
+        return redirect(url_for('users_bp.users_module'))
+
+# 5.2 PERFIS DE EXECUÇÃO (PERFILADOR ESTATÍSTICO)
+# Gravados por database/perfilador.py: '?_perfil=1' (ou 'X-Perfil: 1') em qualquer rota, como admin,
+# ou por amostragem (PERFIL_AMOSTRAGEM). Cada admin vê só os perfis do seu tenant.
+@users_bp.route('/perfis')
+@login_required
+@admin_required('Acesso negado. Apenas administradores podem ver os perfis de execução.')
+def perfis():
+    por_endpoint = perfilador.listar(current_user.tenant_id)
+    return render_template('users/perfis.html', por_endpoint=por_endpoint, user=current_user)
+
+@users_bp.route('/perfis/<rota>/<perfil_id>')
+@login_required
+@admin_required('Acesso negado. Apenas administradores podem ver os perfis de execução.')
+def perfil_detalhe(rota, perfil_id):
+    perfil = perfilador.carregar(rota, perfil_id, current_user.tenant_id)
+    if not perfil:
+        flash('Perfil não encontrado (pode ter sido substituído por um mais recente).', 'warning')
+        return redirect(url_for('users_bp.perfis'))
+    return render_template('users/perfil_detalhe.html', perfil=perfil, user=current_user)
+
+@users_bp.route('/perfis/<rota>/<perfil_id>/flamegraph.svg')
+@login_required
+@admin_required('Acesso negado. Apenas administradores podem ver os perfis de execução.')
+def perfil_flamegraph(rota, perfil_id):
+    caminho = perfilador.caminho_svg(rota, perfil_id, current_user.tenant_id)
+    if not caminho:
+        return 'Perfil não encontrado.', 404
+    return send_file(caminho, mimetype='image/svg+xml', max_age=0)
+
+@users_bp.route('/perfis/<rota>/<perfil_id>/pilhas.txt')
+@login_required
+@admin_required('Acesso negado. Apenas administradores podem ver os perfis de execução.')
+def perfil_pilhas(rota, perfil_id):
+    """Pilhas no formato "folded" (uma linha 'quadro;...;quadro amostras'), para speedscope ou flamegraph.pl."""
+    perfil = perfilador.carregar(rota, perfil_id, current_user.tenant_id)
+    if not perfil:
+        return 'Perfil não encontrado.', 404
+    linhas = ''.join(f"{pilha} {amostras}\n" for pilha, amostras in perfil['pilhas'].items())
+    response = current_app.response_class(linhas, mimetype='text/plain; charset=utf-8')
+    response.headers['Content-Disposition'] = f'attachment; filename="{rota}-{perfil_id}.folded.txt"'
+    return response
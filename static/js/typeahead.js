@@ -0,0 +1,120 @@
+// Campos de seleção com busca (macro typeahead_select em templates/macros/ui.html).
+// O <select data-typeahead="/typeahead/<entidade>"> chega só com o valor já selecionado; as opções
+// são buscadas conforme o usuário digita no campo de busca criado acima dele (ou ao abrir o select).
+document.addEventListener("DOMContentLoaded", function () {
+  var DEBOUNCE_MS = 250;
+  var LIMITE = 20; // Opções por resposta
+
+  // Sem acento e sem caixa, como o collation das colunas no banco
+  function normalizar(texto) {
+    return (texto || "").normalize("NFD").replace(/[\u0300-\u036f]/g, "").toLowerCase();
+  }
+
+  // Mesma comparação do servidor: o prefixo contra o início de cada coluna que ele comparou (prefixos),
+  // não contra pedaços do rótulo (tipo do treinamento, data do agendamento não entram na busca)
+  function casa(item, alvo) {
+    return (item.prefixos || [item.rotulo]).some(function (texto) {
+      return normalizar(texto).indexOf(alvo) === 0;
+    });
+  }
+
+  function buscarJson(url) {
+    return fetch(url, { headers: { Accept: "application/json" }, credentials: "same-origin" })
+      .then(function (response) {
+        return response.ok ? response.json() : { itens: [] };
+      })
+      .catch(function () {
+        return { itens: [] };
+      });
+  }
+
+  document.querySelectorAll("select[data-typeahead]").forEach(function (select) {
+    var url = select.dataset.typeahead;
+    var respostas = {}; // prefixo -> itens (só desta página)
+    var completos = {}; // prefixos cuja resposta não foi cortada no LIMITE: prefixos maiores filtram aqui
+    var sequencia = 0;
+    var timer = null;
+    var carregado = false;
+
+    var busca = document.createElement("input");
+    busca.type = "search";
+    busca.autocomplete = "off";
+    busca.placeholder = select.dataset.typeaheadPlaceholder || "Digite para buscar...";
+    busca.setAttribute("aria-label", busca.placeholder);
+    busca.setAttribute("aria-controls", select.id);
+    busca.className = select.className + " mb-2";
+    select.parentNode.insertBefore(busca, select);
+
+    function preencher(itens) {
+      var atual = select.value;
+      var rotuloAtual = atual ? select.options[select.selectedIndex].text : null;
+      var vazia = select.querySelector('option[value=""]');
+      select.innerHTML = "";
+      if (vazia) select.appendChild(vazia);
+      if (atual && !itens.some(function (item) { return String(item.id) === atual; })) {
+        select.appendChild(new Option(rotuloAtual, atual, true, true));
+      }
+      itens.forEach(function (item) {
+        var valor = String(item.id);
+        select.appendChild(new Option(item.rotulo, valor, false, valor === atual));
+      });
+    }
+
+    function localmente(prefixo) {
+      for (var tamanho = prefixo.length - 1; tamanho >= 0; tamanho--) {
+        var menor = prefixo.slice(0, tamanho);
+        if (completos[menor]) {
+          var alvo = normalizar(prefixo);
+          return respostas[menor].filter(function (item) {
+            return casa(item, alvo);
+          });
+        }
+      }
+      return null;
+    }
+
+    function carregar(prefixo) {
+      var minha = ++sequencia; // Resposta de uma busca anterior que chegar depois é descartada
+      prefixo = prefixo.trim().toLowerCase();
+      if (respostas[prefixo]) return preencher(respostas[prefixo]);
+      var filtrados = localmente(prefixo);
+      if (filtrados) return preencher(filtrados);
+
+      buscarJson(url + "?limite=" + LIMITE + "&q=" + encodeURIComponent(prefixo)).then(function (dados) {
+        var itens = dados.itens || [];
+        respostas[prefixo] = itens;
+        completos[prefixo] = itens.length < LIMITE;
+        if (minha === sequencia) preencher(itens);
+      });
+    }
+
+    busca.addEventListener("input", function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        carregado = true;
+        carregar(busca.value);
+      }, DEBOUNCE_MS);
+    });
+
+    // Sem digitar nada, abrir o select traz as primeiras opções
+    function primeiraCarga() {
+      if (carregado) return;
+      carregado = true;
+      carregar("");
+    }
+    select.addEventListener("focus", primeiraCarga);
+    select.addEventListener("mousedown", primeiraCarga);
+
+    // Valor já selecionado (edição, filtro ativo, formulário devolvido com erro): busca o rótulo
+    var pendente = select.querySelector("option[data-rotulo-pendente]");
+    if (pendente) {
+      var valor = pendente.value;
+      buscarJson(url + "?id=" + encodeURIComponent(valor)).then(function (dados) {
+        if (!dados.itens || !dados.itens.length) return;
+        Array.prototype.forEach.call(select.options, function (opcao) {
+          if (opcao.value === valor) opcao.text = dados.itens[0].rotulo;
+        });
+      });
+    }
+  });
+});
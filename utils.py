@@ -1,9 +1,11 @@
 # utils.py
 
 from functools import wraps
-from flask import flash, redirect, url_for
+from flask import flash, redirect, url_for, request
 from flask_login import current_user
 
+from database.db_base import DEFAULT_PAGE_SIZE
+
 def formatar_moeda_brl(valor):
     """Formata um número para o padrão de moeda brasileiro (R$ 1.234,56) de forma manual."""
     if valor is None:
@@ -52,6 +54,19 @@ def admin_required(message, redirect_endpoint='users_bp.users_module'):
         return decorated_function
     return decorator
 
+# --- PARÂMETROS DE PAGINAÇÃO DAS LISTAGENS ---
+def get_page_args(default_size=DEFAULT_PAGE_SIZE):
+    """
+    Lê ?page=<token>&page_size=<n> da query string, no formato esperado por
+    TenantScopedManager.fetch_page. page_size ausente/inválido cai no padrão.
+    """
+    page_token = request.args.get('page') or None
+    try:
+        page_size = int(request.args.get('page_size', default_size)) or default_size
+    except (TypeError, ValueError):
+        page_size = default_size
+    return page_token, page_size
+
 # --- NOVA LÓGICA DE NORMALIZAÇÃO DE ENUM ---
 
 # Dicionários de mapeamento para cada campo ENUM